@@ -18,6 +18,31 @@ def _prepare_cli_output(force: bool = False) -> None:
     sys.stderr = open("CONOUT$", "w")
 
 
+class _CliProcessManager:
+    """Minimal PM-like object with the comfyui_process attribute runner_stop expects."""
+
+    def __init__(self, process):
+        self.comfyui_process = process
+
+
+def _print_telemetry(app, samples: int, pids=None) -> None:
+    """Print CPU/RSS/threads/I-O of the ComfyUI process tree and GPU usage."""
+    from core import telemetry
+
+    try:
+        pids = pids or telemetry.port_pids(app.custom_port.get())
+        if not pids:
+            return
+        count = max(1, samples)
+        history = telemetry.collect(pids, duration=float(count), samples=count + 1)
+    except Exception:
+        return
+    if not history:
+        return
+    for line in telemetry.format_sample(history[-1], history):
+        print(f"  {line}")
+
+
 def main():
     global _comfyui_process
 
@@ -28,10 +53,53 @@ def main():
     parser.add_argument("--start", action="store_true", help="Start the launcher")
     parser.add_argument("--stop", action="store_true", help="Stop the launcher")
     parser.add_argument("--status", action="store_true", help="Check launcher status")
+    parser.add_argument(
+        "--json", action="store_true", help="With --status: print one JSON status record"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Stream JSON status records (one per line) until interrupted",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="With --watch: seconds between status records",
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="Restart ComfyUI (stop, then start)"
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="With --start: spawn ComfyUI directly instead of under the background daemon",
+    )
+    # Internal: the background daemon spawned by --start
+    parser.add_argument("--daemon", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=1,
+        help="With --status: number of one-second resource samples to print",
+    )
 
     args = parser.parse_args()
 
-    if args.start:
+    if args.daemon:
+        import os
+
+        original_cwd = os.getcwd()
+        exe_dir = os.path.dirname(os.path.abspath(sys.executable))
+        os.chdir(exe_dir)
+
+        from headless_app import HeadlessAppContext
+        from core.daemon import Daemon
+
+        app = HeadlessAppContext(original_cwd)
+        sys.exit(Daemon(app, original_cwd).serve())
+
+    elif args.start:
         import os
 
         # Save original cwd before changing directory
@@ -42,14 +110,31 @@ def main():
         _prepare_cli_output(force=True)
 
         from headless_app import HeadlessAppContext
-        from core.cli_start import cli_start
+        from core import daemon
 
         # Use original cwd so config is found from where exe was run
         app = HeadlessAppContext(original_cwd)
-        _comfyui_process = cli_start(app)
 
-        if _comfyui_process is not None:
-            print(f"ComfyUI started with PID {_comfyui_process.pid}")
+        status = daemon.request(original_cwd, "status")
+        if status and status.get("running"):
+            print(f"ComfyUI is already running with PID {status.get('pid')}")
+            sys.exit(0)
+
+        pid = None
+        reg = None
+        if not args.no_daemon:
+            reg = daemon.spawn(original_cwd)
+            if reg is not None:
+                pid = reg.get("comfyui_pid") if reg.get("state") == "running" else None
+        if args.no_daemon or reg is None:
+            # No daemon (or it could not be spawned): start ComfyUI directly
+            from core.cli_start import cli_start
+
+            _comfyui_process = cli_start(app)
+            pid = _comfyui_process.pid if _comfyui_process is not None else None
+
+        if pid is not None:
+            print(f"ComfyUI started with PID {pid}")
             sys.exit(0)
         else:
             print("Failed to start ComfyUI")
@@ -65,16 +150,18 @@ def main():
         _prepare_cli_output(force=True)
 
         from headless_app import HeadlessAppContext
+        from core import daemon
         from core.runner_stop import stop
 
         app = HeadlessAppContext(original_cwd)
 
-        # Create a simple PM-like object with comfyui_process attribute
-        class PM:
-            def __init__(self, process):
-                self.comfyui_process = process
+        # Started by the daemon: one request, no process search
+        resp = daemon.request(original_cwd, "stop")
+        if resp is not None and resp.get("ok"):
+            print("ComfyUI stopped")
+            sys.exit(0)
 
-        pm = PM(_comfyui_process)
+        pm = _CliProcessManager(_comfyui_process)
         killed = stop(app, pm)
 
         if killed:
@@ -85,6 +172,69 @@ def main():
             print("Failed to stop ComfyUI (process may not be running)")
             sys.exit(1)
 
+    elif args.restart:
+        import os
+
+        original_cwd = os.getcwd()
+        exe_dir = os.path.dirname(os.path.abspath(sys.executable))
+        os.chdir(exe_dir)
+
+        _prepare_cli_output(force=True)
+
+        from headless_app import HeadlessAppContext
+        from core import daemon
+        from core.runner_stop import stop
+
+        app = HeadlessAppContext(original_cwd)
+
+        resp = daemon.request(original_cwd, "restart")
+        if resp is None:
+            # Not started by the daemon: stop by port, then start under the daemon
+            stop(app, _CliProcessManager(None))
+            reg = daemon.spawn(original_cwd)
+            resp = {
+                "ok": bool(reg and reg.get("state") == "running"),
+                "pid": reg.get("comfyui_pid") if reg else None,
+            }
+
+        if resp.get("ok"):
+            print(f"ComfyUI restarted with PID {resp.get('pid')}")
+            sys.exit(0)
+        else:
+            print("Failed to restart ComfyUI")
+            sys.exit(1)
+
+    elif args.watch or (args.status and args.json):
+        import os
+        import json
+
+        original_cwd = os.getcwd()
+        exe_dir = os.path.dirname(os.path.abspath(sys.executable))
+        os.chdir(exe_dir)
+
+        from headless_app import HeadlessAppContext
+        from core.status import StatusReader
+
+        app = HeadlessAppContext(original_cwd)
+        reader = StatusReader(app, original_cwd)
+
+        if args.watch:
+            try:
+                reader.watch(interval=max(0.1, args.interval))
+            except KeyboardInterrupt:
+                pass
+            except BrokenPipeError:
+                # Consumer closed the pipe (e.g. `| head`); silence the final flush
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            finally:
+                reader.close()
+            sys.exit(0)
+
+        record = reader.read()
+        reader.close()
+        print(json.dumps(record, ensure_ascii=False, indent=2))
+        sys.exit(0 if record["running"] else 1)
+
     elif args.status:
         import os
 
@@ -93,13 +243,25 @@ def main():
         os.chdir(exe_dir)
 
         from headless_app import HeadlessAppContext
+        from core import daemon
         from core.probe import is_http_reachable
 
         app = HeadlessAppContext(original_cwd)
+
+        status = daemon.request(original_cwd, "status")
+        if status and status.get("running"):
+            print(
+                f"ComfyUI is running (PID {status.get('pid')}, "
+                f"uptime {status.get('uptime') or 0:.0f}s, daemon PID {status.get('daemon_pid')})"
+            )
+            _print_telemetry(app, args.samples, pids=[status.get("pid")])
+            sys.exit(0)
+
         running = is_http_reachable(app)
 
         if running:
             print("ComfyUI is running")
+            _print_telemetry(app, args.samples)
             sys.exit(0)
         else:
             print("ComfyUI is not running")
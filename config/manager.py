@@ -67,6 +67,28 @@ class ConfigManager:
                 "custom_browser_path": "",
                 "show_console": True,
                 "gpu_device": -1,
+                "probe_cache_ttl": 1.0,
+                "multi_instance": False,
+                "multi_instance_gpus": [],
+                "watchdog_enabled": False,
+                "watchdog_max_restarts": 5,
+                "watchdog_restart_window": 600.0,
+                "watchdog_backoff_initial": 2.0,
+                "watchdog_backoff_max": 120.0,
+                "watchdog_hang_timeout": 10.0,
+                "watchdog_hang_checks": 3,
+                "watchdog_check_interval": 15.0,
+                "watchdog_rss_limit_mb": 0,
+                "watchdog_vram_limit_mb": 0,
+                "telemetry_interval": 2.0,
+                "telemetry_history": 300,
+                "output_log_enabled": True,
+                "output_log_max_mb": 10,
+                "output_log_backups": 3,
+                "output_tail_lines": 5000,
+                "stop_api_release": True,
+                "stop_timeout": 5.0,
+                "event_queue_enabled": False,
             },
             "ui_settings": {
                 "window_width": 800,
@@ -98,6 +120,11 @@ class ConfigManager:
                 "hf_mirror_mode": "hf-mirror",
                 "hf_mirror_url": "https://hf-mirror.com",
             },
+            "pip_cache": {
+                "enabled": False,
+                "dir": "",
+                "max_size_gb": 20,
+            },
             "announcement": {
                 "enabled": True,
                 "source_url": "https://gitee.com/MieMieeeee/comfyui-mie-resources/raw/master/launcher/announcements/index.json",
@@ -106,6 +133,12 @@ class ConfigManager:
             "version_preferences": {
                 "stable_only": True,
                 "auto_update_deps": True,
+                "sync_node_requirements": False,
+                "plan_requirements": True,
+                "prefetch_requirements": True,
+                "prefetch_workers": 6,
+                "installer_backend": "pip",
+                "uv_path": "",
                 "update_timeout": 120,
                 "background_fetch_delay_seconds": 180,
             },
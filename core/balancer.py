@@ -0,0 +1,387 @@
+"""
+多实例负载均衡代理
+多卡机器上每张卡跑一个 ComfyUI 实例（各自的本地端口），由这个小型反向代理
+对外占用用户配置的端口：
+
+- WebSocket（``/ws?clientId=...``）：连接时分给排队最短、绑定客户端最少的实例，
+  并记住 ``clientId -> 实例``；没带 ``clientId`` 时由代理生成一个写进请求，
+  ComfyUI 会把它作为会话 id 回给前端；
+- ``POST /prompt``：请求体里的 ``client_id`` 已绑定实例时提交给该实例，这样
+  网页端的进度与 ``executed`` 事件都来自它自己的 WebSocket；没有绑定的（纯
+  API 调用）查询各实例 ``/queue``，提交给排队最短的实例。两种情况都记住
+  ``prompt_id -> 实例``，之后的 ``/history/<prompt_id>`` 转发到同一实例；
+- ``GET /queue``：合并所有实例的队列；``/interrupt``、``/free`` 广播到所有实例；
+- 其他请求（前端页面、静态资源等）转发到主实例（第一张卡）。
+
+只依赖标准库。
+"""
+
+import http.client
+import json
+import logging
+import select
+import socket
+import threading
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+BACKEND_HOST = "127.0.0.1"
+QUEUE_TIMEOUT = 1.0
+FORWARD_TIMEOUT = 300.0
+# 记住的 prompt_id 数量上限
+PROMPT_MAP_LIMIT = 10000
+# 记住的 WebSocket clientId 数量上限
+CLIENT_MAP_LIMIT = 1000
+
+_HOP_BY_HOP = frozenset({
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade", "content-length",
+})
+_PROMPT_PATHS = ("/prompt", "/api/prompt")
+_QUEUE_PATHS = ("/queue", "/api/queue")
+_BROADCAST_PATHS = ("/interrupt", "/api/interrupt", "/free", "/api/free")
+_HISTORY_PREFIXES = ("/history/", "/api/history/")
+
+
+class Backend:
+    def __init__(self, port: int, label: str = ""):
+        self.port = int(port)
+        self.label = label or str(port)
+        self.submitted = 0
+        # 已转发但后端尚未回应的 /prompt 数，避免并发提交全部压到同一实例
+        self.inflight = 0
+        # 绑定到该实例的 WebSocket 客户端数
+        self.clients = 0
+
+    def __repr__(self):
+        return f"Backend({self.label}@{self.port})"
+
+
+class LoadBalancer:
+    def __init__(
+        self,
+        port: int,
+        backends: List[Backend],
+        host: str = "127.0.0.1",
+        log: Optional[logging.Logger] = None,
+    ):
+        if not backends:
+            raise ValueError("至少需要一个后端实例")
+        self.host = host
+        self.port = int(port)
+        self.backends = list(backends)
+        self.log = log or logger
+        self._lock = threading.Lock()
+        self._prompts: "OrderedDict[str, Backend]" = OrderedDict()
+        self._clients: "OrderedDict[str, Backend]" = OrderedDict()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def primary(self) -> Backend:
+        return self.backends[0]
+
+    # ---- 生命周期 ----
+    def start(self) -> None:
+        handler = type("_BoundHandler", (_ProxyHandler,), {"balancer": self})
+        server = ThreadingHTTPServer((self.host, self.port), handler)
+        server.daemon_threads = True
+        self._server = server
+        self.port = server.server_address[1]
+        self._thread = threading.Thread(
+            target=server.serve_forever, name="comfyui-balancer", daemon=True
+        )
+        self._thread.start()
+        self.log.info(
+            "负载均衡代理已启动: %s:%s -> %s",
+            self.host, self.port, ", ".join(f"{b.label}@{b.port}" for b in self.backends),
+        )
+
+    def stop(self) -> None:
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.shutdown()
+            server.server_close()
+        except Exception:
+            pass
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    # ---- 路由 ----
+    def queue_depth(self, backend: Backend) -> Optional[int]:
+        """实例当前运行 + 等待中的任务数；实例不可达时返回 None。"""
+        data = _get_json(backend.port, "/queue", QUEUE_TIMEOUT)
+        if not isinstance(data, dict):
+            return None
+        return len(data.get("queue_running") or []) + len(data.get("queue_pending") or [])
+
+    def pick(self, by_clients: bool = False) -> Backend:
+        """排队最短的实例；都不可达时退回主实例。
+
+        ``by_clients`` 为 True 时（分配 WebSocket）排队相同的按已绑定客户端数分摊。
+        """
+        if len(self.backends) == 1:
+            return self.primary
+        best: Optional[Tuple[int, int, int]] = None
+        chosen = None
+        for i, b in enumerate(self.backends):
+            depth = self.queue_depth(b)
+            if depth is None:
+                continue
+            with self._lock:
+                key = (depth + b.inflight, b.clients if by_clients else b.submitted, i)
+            if best is None or key < best:
+                best, chosen = key, b
+        return chosen or self.primary
+
+    def remember(self, prompt_id: str, backend: Backend) -> None:
+        with self._lock:
+            self._prompts[prompt_id] = backend
+            self._prompts.move_to_end(prompt_id)
+            while len(self._prompts) > PROMPT_MAP_LIMIT:
+                self._prompts.popitem(last=False)
+
+    def backend_for_prompt(self, prompt_id: str) -> Backend:
+        with self._lock:
+            return self._prompts.get(prompt_id) or self.primary
+
+    def bind_client(self, client_id: str) -> Backend:
+        """WebSocket 客户端所在的实例；首次出现时按负载分配，重连沿用原实例。"""
+        with self._lock:
+            backend = self._clients.get(client_id)
+            if backend is not None:
+                self._clients.move_to_end(client_id)
+                return backend
+        backend = self.pick(by_clients=True)
+        with self._lock:
+            existing = self._clients.get(client_id)
+            if existing is not None:
+                return existing
+            self._clients[client_id] = backend
+            backend.clients += 1
+            while len(self._clients) > CLIENT_MAP_LIMIT:
+                _cid, old = self._clients.popitem(last=False)
+                old.clients -= 1
+        return backend
+
+    def backend_for_client(self, client_id: Optional[str]) -> Optional[Backend]:
+        if not client_id:
+            return None
+        with self._lock:
+            return self._clients.get(client_id)
+
+    def merged_queue(self) -> Dict[str, list]:
+        out: Dict[str, list] = {"queue_running": [], "queue_pending": []}
+        for b in self.backends:
+            data = _get_json(b.port, "/queue", QUEUE_TIMEOUT)
+            if isinstance(data, dict):
+                out["queue_running"].extend(data.get("queue_running") or [])
+                out["queue_pending"].extend(data.get("queue_pending") or [])
+        return out
+
+    def stats(self) -> List[Dict[str, int]]:
+        with self._lock:
+            return [
+                {"label": b.label, "port": b.port, "submitted": b.submitted, "inflight": b.inflight}
+                for b in self.backends
+            ]
+
+
+def _get_json(port: int, path: str, timeout: float):
+    conn = http.client.HTTPConnection(BACKEND_HOST, port, timeout=timeout)
+    try:
+        conn.request("GET", path, headers={"Accept": "application/json"})
+        resp = conn.getresponse()
+        body = resp.read()
+        if resp.status != 200:
+            return None
+        return json.loads(body.decode("utf-8"))
+    except Exception:
+        return None
+    finally:
+        conn.close()
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    balancer: LoadBalancer = None  # 由 LoadBalancer.start 绑定
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_PUT(self):
+        self._handle()
+
+    def do_DELETE(self):
+        self._handle()
+
+    def do_PATCH(self):
+        self._handle()
+
+    def do_HEAD(self):
+        self._handle()
+
+    def do_OPTIONS(self):
+        self._handle()
+
+    # ---- 分发 ----
+    def _handle(self):
+        lb = self.balancer
+        path = self.path.split("?", 1)[0]
+        try:
+            if (self.headers.get("Upgrade") or "").lower() == "websocket":
+                self._open_websocket()
+                return
+            body = self._read_body()
+            if body is None:
+                return
+            if self.command == "POST" and path in _PROMPT_PATHS:
+                self._submit_prompt(body)
+            elif self.command == "GET" and path in _QUEUE_PATHS:
+                self._send_json(200, lb.merged_queue())
+            elif self.command == "POST" and path in _BROADCAST_PATHS:
+                self._broadcast(body)
+            elif path.startswith(_HISTORY_PREFIXES):
+                prompt_id = path.rsplit("/", 1)[-1]
+                self._relay(lb.backend_for_prompt(prompt_id), body)
+            else:
+                self._relay(lb.primary, body)
+        except (ConnectionError, socket.timeout, OSError) as e:
+            try:
+                self._send_json(502, {"error": f"backend unavailable: {e}"})
+            except Exception:
+                self.close_connection = True
+
+    def _read_body(self) -> Optional[bytes]:
+        if (self.headers.get("Transfer-Encoding") or "").lower() == "chunked":
+            self._send_json(411, {"error": "chunked request body is not supported"})
+            return None
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = 0
+        return self.rfile.read(length) if length > 0 else b""
+
+    def _open_websocket(self):
+        parts = urlsplit(self.path)
+        client_id = (parse_qs(parts.query).get("clientId") or [""])[0]
+        if not client_id:
+            # 代理先定下会话 id，之后该客户端的 /prompt 才能找回这个实例
+            client_id = uuid.uuid4().hex
+            sep = "&" if parts.query else "?"
+            self.path = f"{self.path}{sep}clientId={client_id}"
+        self._tunnel(self.balancer.bind_client(client_id))
+
+    def _submit_prompt(self, body: bytes):
+        lb = self.balancer
+        try:
+            client_id = json.loads(body.decode("utf-8")).get("client_id")
+        except Exception:
+            client_id = None
+        backend = lb.backend_for_client(str(client_id) if client_id else None) or lb.pick()
+        with lb._lock:
+            backend.inflight += 1
+        try:
+            status, headers, data = self._forward(backend, body)
+        finally:
+            with lb._lock:
+                backend.inflight -= 1
+        if status == 200:
+            with lb._lock:
+                backend.submitted += 1
+            try:
+                prompt_id = json.loads(data.decode("utf-8")).get("prompt_id")
+            except Exception:
+                prompt_id = None
+            if prompt_id:
+                lb.remember(str(prompt_id), backend)
+        self._send(status, headers, data)
+
+    def _broadcast(self, body: bytes):
+        result = None
+        for b in self.balancer.backends:
+            try:
+                r = self._forward(b, body)
+            except OSError:
+                continue
+            if result is None or b is self.balancer.primary:
+                result = r
+        if result is None:
+            self._send_json(502, {"error": "no backend reachable"})
+        else:
+            self._send(*result)
+
+    def _relay(self, backend: Backend, body: bytes):
+        self._send(*self._forward(backend, body))
+
+    # ---- 转发 ----
+    def _forward(self, backend: Backend, body: bytes):
+        conn = http.client.HTTPConnection(BACKEND_HOST, backend.port, timeout=FORWARD_TIMEOUT)
+        try:
+            headers = {k: v for k, v in self.headers.items() if k.lower() not in _HOP_BY_HOP}
+            # 保留原 Host，ComfyUI 的同源检查比较的是 Host 与 Origin
+            if body or self.command in ("POST", "PUT", "PATCH"):
+                headers["Content-Length"] = str(len(body))
+            conn.request(self.command, self.path, body=body or None, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+            out = [(k, v) for k, v in resp.getheaders() if k.lower() not in _HOP_BY_HOP]
+            return resp.status, out, data
+        finally:
+            conn.close()
+
+    def _send(self, status: int, headers, data: bytes):
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD" and data:
+            self.wfile.write(data)
+
+    def _send_json(self, status: int, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self._send(status, [("Content-Type", "application/json")], data)
+
+    def _tunnel(self, backend: Backend):
+        """WebSocket 等升级连接：把原始请求头转给后端后双向透传字节。"""
+        upstream = socket.create_connection((BACKEND_HOST, backend.port), timeout=10)
+        try:
+            upstream.settimeout(None)
+            head = [f"{self.command} {self.path} {self.request_version}\r\n"]
+            head.extend(f"{k}: {v}\r\n" for k, v in self.headers.items())
+            head.append("\r\n")
+            upstream.sendall("".join(head).encode("latin-1"))
+            client = self.connection
+            # 客户端在收到 101 之前不会发送帧，rfile 缓冲区此时为空
+            socks = [client, upstream]
+            while True:
+                readable, _w, _x = select.select(socks, [], [], 60)
+                if not readable:
+                    continue
+                for s in readable:
+                    chunk = s.recv(65536)
+                    if not chunk:
+                        return
+                    (upstream if s is client else client).sendall(chunk)
+        finally:
+            self.close_connection = True
+            try:
+                upstream.close()
+            except Exception:
+                pass
@@ -4,10 +4,15 @@ import subprocess
 from core.launcher_cmd import build_launch_params
 
 
-def cli_start(app):
+def cli_start(app, capture=False):
     """
     Spawn ComfyUI subprocess without GUI dependencies.
-    
+
+    Args:
+        capture: Pipe ComfyUI's output into the launcher-owned rotating log and
+            an in-memory tail (``process.output_capture``). Only useful when the
+            calling process stays alive: once it exits, nobody drains the pipe.
+
     Returns:
         subprocess.Popen object if ComfyUI started successfully, None otherwise.
     """
@@ -25,7 +30,12 @@ def cli_start(app):
     print("Starting ComfyUI...")
     
     try:
-        if os.name == 'nt':
+        if capture:
+            from core.runner_start import _popen, _start_capture
+
+            process = _popen(cmd, env, run_cwd, show_console=False, capture=True)
+            process.output_capture = _start_capture(app, process.stdout)
+        elif os.name == 'nt':
             si = subprocess.STARTUPINFO()
             si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
             si.wShowWindow = subprocess.SW_HIDE
@@ -0,0 +1,420 @@
+"""
+无界面守护进程
+命令行 ``--start`` 不再拉起 ComfyUI 后立即退出（之后的 ``--stop`` 在新进程里拿不到
+Popen，只能按端口、按进程特征全系统搜索），而是在后台启动一个守护进程（``--daemon``）。
+守护进程持有 ComfyUI 的 Popen 并捕获其输出，同时：
+
+- 把自身 PID、ComfyUI PID、端口与状态写入注册表 ``launcher/daemon.json``；
+- 在 127.0.0.1 的随机端口上监听控制连接，``--stop`` / ``--status`` / ``--restart``
+  直接向它发请求，一次往返即可完成，无需搜索进程。
+
+协议：每个连接一行 JSON 请求 ``{"token": ..., "cmd": ...}``，回一行 JSON 应答；
+令牌随机生成、只写在注册表里。注册表失效（守护进程已不在）时客户端删除它，
+调用方回退到原有的端口查找。
+"""
+
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from config.manager import atomic_write_json
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+REGISTRY_NAME = "daemon.json"
+# 连接控制端口的超时（秒）
+CONNECT_TIMEOUT = 2.0
+# 等待应答的超时（秒）：停止/重启要等进程树退出与重新启动
+REQUEST_TIMEOUT = 30.0
+# --start 等待守护进程报告启动结果的时长（秒）
+START_TIMEOUT = 30.0
+
+_MAX_REQUEST = 64 * 1024
+
+
+def registry_path(cwd) -> Path:
+    return Path(cwd) / "launcher" / REGISTRY_NAME
+
+
+def read_registry(cwd) -> Optional[dict]:
+    try:
+        with open(registry_path(cwd), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except Exception:
+        return None
+
+
+def write_registry(cwd, data: dict) -> None:
+    data = dict(data, updated_at=time.time())
+    atomic_write_json(registry_path(cwd), data)
+
+
+def clear_registry(cwd, pid: Optional[int] = None) -> None:
+    """删除注册表；给出 ``pid`` 时只删除该守护进程写下的注册表。"""
+    try:
+        if pid is not None:
+            current = read_registry(cwd)
+            if current is not None and current.get("pid") != pid:
+                return
+        registry_path(cwd).unlink()
+    except Exception:
+        pass
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        pid = int(pid)
+    except (TypeError, ValueError):
+        return False
+    if pid <= 0:
+        return False
+    if psutil is not None:
+        try:
+            return psutil.pid_exists(pid)
+        except Exception:
+            return True
+    if os.name == "nt":
+        # 没有 psutil 时无法廉价判断，交给控制连接是否可达
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def request(cwd, cmd: str, timeout: float = REQUEST_TIMEOUT, **params) -> Optional[dict]:
+    """向守护进程发送一条命令；没有可用的守护进程时返回 None（并清理失效的注册表）。"""
+    reg = read_registry(cwd)
+    if reg is None:
+        return None
+    if not _pid_alive(reg.get("pid")):
+        clear_registry(cwd, reg.get("pid"))
+        return None
+    try:
+        sock = socket.create_connection(
+            ("127.0.0.1", int(reg["control_port"])), timeout=CONNECT_TIMEOUT
+        )
+    except (KeyError, TypeError, ValueError):
+        clear_registry(cwd, reg.get("pid"))
+        return None
+    except ConnectionRefusedError:
+        clear_registry(cwd, reg.get("pid"))
+        return None
+    except OSError:
+        return None
+    try:
+        sock.settimeout(timeout)
+        msg = dict(params, token=reg.get("token"), cmd=cmd)
+        sock.sendall(json.dumps(msg).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline(_MAX_REQUEST)
+        resp = json.loads(line.decode("utf-8")) if line else None
+        return resp if isinstance(resp, dict) else None
+    except Exception:
+        return None
+    finally:
+        try:
+            sock.close()
+        except Exception:
+            pass
+
+
+def daemon_command() -> list:
+    """启动守护进程的命令行：打包版直接调用自身，源码运行时调用 ``__main__.py``。"""
+    # Nuitka: __compiled__ 存在（是版本对象，不是 True），且不设置 sys.frozen
+    try:
+        is_nuitka = __compiled__ is not None
+    except NameError:
+        is_nuitka = False
+    if is_nuitka:
+        # Nuitka: sys.executable 是 python.exe，sys.argv[0] 才是主 exe
+        return [str(Path(sys.argv[0]).resolve()), "--daemon"]
+    if hasattr(sys, "_MEIPASS") or getattr(sys, "frozen", False):
+        # PyInstaller: sys.executable 是打包的 exe
+        return [sys.executable, "--daemon"]
+    main = Path(__file__).resolve().parent.parent / "__main__.py"
+    return [sys.executable, str(main), "--daemon"]
+
+
+def spawn(cwd, timeout: float = START_TIMEOUT) -> Optional[dict]:
+    """在后台启动守护进程，等待它报告 ComfyUI 的启动结果，返回注册表内容。"""
+    kwargs = {
+        "cwd": str(cwd),
+        "stdin": subprocess.DEVNULL,
+        "stdout": subprocess.DEVNULL,
+        "stderr": subprocess.DEVNULL,
+    }
+    if os.name == "nt":
+        kwargs["creationflags"] = (
+            subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        )
+    else:
+        # 脱离当前终端会话，关闭终端不会带走守护进程
+        kwargs["start_new_session"] = True
+    try:
+        child = subprocess.Popen(daemon_command(), **kwargs)
+    except Exception:
+        return None
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        reg = read_registry(cwd)
+        if reg is not None and reg.get("pid") == child.pid and reg.get("state") != "starting":
+            return reg
+        if child.poll() is not None:
+            # 启动失败时守护进程已退出并删除了注册表
+            return None
+        time.sleep(0.1)
+    return read_registry(cwd)
+
+
+class Daemon:
+    """持有 ComfyUI 子进程并响应控制请求；ComfyUI 退出或收到 stop 后 ``serve()`` 返回。"""
+
+    def __init__(self, app, cwd, launch=None):
+        self.app = app
+        self.cwd = cwd
+        self.pm = app.process_manager
+        self.token = secrets.token_hex(16)
+        self.state = "starting"
+        self.restarts = 0
+        self.started_at = None
+        self.exit_code = None
+        # 本次启动到 ComfyUI 打印就绪日志的耗时（秒）
+        self.ready_seconds = None
+        self.control_port = None
+        self._launch_fn = launch
+        self._lock = threading.Lock()
+        self._busy = False
+        self._done = threading.Event()
+        # stop 等命令回复发出后再结束 serve()，避免进程先退出、客户端收不到应答
+        self._exit_after_reply = False
+
+    # ---- 生命周期 ----
+    def serve(self) -> int:
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            server.bind(("127.0.0.1", 0))
+            server.listen(8)
+            server.settimeout(0.5)
+            self.control_port = server.getsockname()[1]
+            self._write()
+            if not self._launch():
+                self.state = "failed"
+                self._write()
+                return 1
+            while not self._done.is_set():
+                try:
+                    conn, _addr = server.accept()
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                threading.Thread(
+                    target=self._handle_conn, args=(conn,), name="daemon-control", daemon=True
+                ).start()
+            return 0 if self.state == "stopped" else 1
+        finally:
+            try:
+                server.close()
+            except Exception:
+                pass
+            clear_registry(self.cwd, os.getpid())
+
+    def _launch(self) -> bool:
+        t0 = time.monotonic()
+        if self._launch_fn is not None:
+            proc = self._launch_fn(self.app)
+        else:
+            from core.cli_start import cli_start
+
+            proc = cli_start(self.app, capture=True)
+        if proc is None:
+            return False
+        self.pm.comfyui_process = proc
+        self.started_at = time.time()
+        self.exit_code = None
+        self.ready_seconds = None
+        self.state = "running"
+        self._write()
+        threading.Thread(
+            target=self._watch, args=(proc,), name="daemon-watch", daemon=True
+        ).start()
+        cap = getattr(proc, "output_capture", None)
+        if cap is not None:
+            threading.Thread(
+                target=self._wait_ready, args=(proc, cap, t0), name="daemon-ready", daemon=True
+            ).start()
+        return True
+
+    def _wait_ready(self, proc, cap, t0: float) -> None:
+        from core.runner_start import READY_TIMEOUT
+
+        if cap.ready.wait(READY_TIMEOUT) and proc is self.pm.comfyui_process:
+            self.ready_seconds = round(time.monotonic() - t0, 3)
+            self._write()
+
+    def _watch(self, proc) -> None:
+        """ComfyUI 自行退出（崩溃、被外部结束）时记录退出码并结束守护进程。"""
+        try:
+            code = proc.wait()
+        except Exception:
+            code = None
+        with self._lock:
+            if self._busy or proc is not self.pm.comfyui_process:
+                return
+            self.exit_code = code
+            self.state = "exited"
+            self._write()
+        self._done.set()
+
+    def _write(self) -> None:
+        try:
+            write_registry(self.cwd, {
+                "pid": os.getpid(),
+                "control_port": self.control_port,
+                "token": self.token,
+                "state": self.state,
+                "comfyui_pid": self._comfyui_pid(),
+                "port": self._port(),
+                "started_at": self.started_at,
+                "restarts": self.restarts,
+                "exit_code": self.exit_code,
+                "ready_seconds": self.ready_seconds,
+            })
+        except Exception:
+            pass
+
+    # ---- 控制命令 ----
+    def _handle_conn(self, conn) -> None:
+        try:
+            conn.settimeout(CONNECT_TIMEOUT)
+            with conn.makefile("rb") as f:
+                line = f.readline(_MAX_REQUEST)
+            try:
+                req = json.loads(line.decode("utf-8"))
+            except Exception:
+                req = None
+            resp = self.handle(req if isinstance(req, dict) else {})
+            conn.sendall(json.dumps(resp, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+        except Exception:
+            pass
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            if self._exit_after_reply:
+                self._done.set()
+
+    def handle(self, req: dict) -> dict:
+        if not secrets.compare_digest(str(req.get("token") or ""), self.token):
+            return {"ok": False, "error": "unauthorized"}
+        cmd = req.get("cmd")
+        if cmd == "ping":
+            return {"ok": True}
+        if cmd == "status":
+            return self.status()
+        if cmd == "tail":
+            return self.tail(req.get("lines", 200))
+        if cmd == "stop":
+            return self.stop()
+        if cmd == "restart":
+            return self.restart()
+        return {"ok": False, "error": f"unknown command: {cmd}"}
+
+    def status(self) -> dict:
+        proc = self.pm.comfyui_process
+        running = False
+        try:
+            running = proc is not None and proc.poll() is None
+        except Exception:
+            pass
+        uptime = None
+        if running and self.started_at:
+            uptime = round(time.time() - self.started_at, 1)
+        return {
+            "ok": True,
+            "state": self.state,
+            "running": running,
+            "daemon_pid": os.getpid(),
+            "pid": self._comfyui_pid(),
+            "port": self._port(),
+            "started_at": self.started_at,
+            "uptime": uptime,
+            "ready_seconds": self.ready_seconds,
+            "restarts": self.restarts,
+            "exit_code": self.exit_code,
+        }
+
+    def tail(self, lines) -> dict:
+        cap = getattr(self.pm.comfyui_process, "output_capture", None)
+        try:
+            n = int(lines)
+        except (TypeError, ValueError):
+            n = 200
+        return {"ok": True, "lines": cap.tail(n) if cap is not None else []}
+
+    def stop(self) -> dict:
+        with self._lock:
+            self._busy = True
+            self.state = "stopping"
+            self._write()
+            killed = self._stop_process()
+            self.state = "stopped"
+            self._write()
+        self._exit_after_reply = True
+        return {"ok": True, "killed": killed, "stop": getattr(self.pm, "last_stop", None)}
+
+    def restart(self) -> dict:
+        with self._lock:
+            self._busy = True
+            self.state = "restarting"
+            self._write()
+            self._stop_process()
+            self.restarts += 1
+            try:
+                ok = self._launch()
+            finally:
+                self._busy = False
+            if not ok:
+                self.state = "failed"
+                self._write()
+        if not ok:
+            self._exit_after_reply = True
+            return {"ok": False, "error": "restart failed"}
+        return self.status()
+
+    # ---- 内部 ----
+    def _stop_process(self) -> bool:
+        from core.runner_stop import stop as run_stop
+
+        proc = self.pm.comfyui_process
+        try:
+            if proc is None or proc.poll() is not None:
+                return False
+        except Exception:
+            return False
+        return run_stop(self.app, self.pm)
+
+    def _comfyui_pid(self):
+        return getattr(self.pm.comfyui_process, "pid", None)
+
+    def _port(self):
+        try:
+            return (self.app.custom_port.get() or "8188").strip()
+        except Exception:
+            return None
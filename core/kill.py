@@ -1,4 +1,5 @@
 import os
+import time
 from utils.common import run_hidden
 
 try:
@@ -18,37 +19,83 @@ def _kill_with_admin(pid):
     return ret > 32
 
 
+def collect_tree(pids) -> list:
+    """``pids`` 及其全部子孙进程的 ``psutil.Process``（去重，根进程在前）。"""
+    procs = {}
+    for pid in pids:
+        try:
+            root = psutil.Process(pid)
+        except psutil.Error:
+            continue
+        procs.setdefault(root.pid, root)
+        try:
+            for child in root.children(recursive=True):
+                procs.setdefault(child.pid, child)
+        except psutil.Error:
+            pass
+    return list(procs.values())
+
+
+def stop_process_tree(pids, timeout: float = 5.0, kill_timeout: float = 3.0, log=None) -> dict:
+    """一次性终止 ``pids`` 的整棵进程树。
+
+    先对所有进程（含子孙）同时发送 terminate，再用 ``psutil.wait_procs`` 一起等待，
+    超时后只对仍存活的进程 kill。子进程不会因父进程先退出而被遗漏成孤儿。
+    返回本次停止的统计；``survivors`` 为 kill 之后仍存活的 PID。
+    """
+    t0 = time.monotonic()
+    report = {"pids": [], "terminated": 0, "killed": 0, "survivors": [], "denied": [], "seconds": 0.0}
+    if psutil is None:
+        return report
+    procs = collect_tree(pids)
+    report["pids"] = [p.pid for p in procs]
+    waiting = []
+    for p in procs:
+        try:
+            p.terminate()
+            waiting.append(p)
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.AccessDenied:
+            if log: log.info("[kill] terminate PID=%s 权限不足", p.pid)
+            report["denied"].append(p.pid)
+        except psutil.Error:
+            pass
+    alive = []
+    if waiting:
+        gone, alive = psutil.wait_procs(waiting, timeout=timeout)
+        report["terminated"] = len(gone)
+    if alive:
+        if log: log.info("[kill] %d 个进程未响应 terminate，强制结束: PIDs=%s", len(alive), [p.pid for p in alive])
+        for p in alive:
+            try:
+                p.kill()
+            except psutil.NoSuchProcess:
+                pass
+            except psutil.AccessDenied:
+                report["denied"].append(p.pid)
+            except psutil.Error:
+                pass
+        gone, alive = psutil.wait_procs(alive, timeout=kill_timeout)
+        report["killed"] = len(gone)
+    report["survivors"] = [p.pid for p in alive]
+    report["seconds"] = round(time.monotonic() - t0, 3)
+    return report
+
+
 def kill_pids(app, pids):
+    """终止 ``pids``（含子孙进程）；返回 ``stop_process_tree`` 的统计（无 psutil 时为空）。"""
+    report = {}
     killed_any = False
     failed_pids = []
     _log = getattr(app, 'logger', None)
 
     if psutil:
         try:
-            procs_to_wait = []
-            for pid in pids:
-                try:
-                    p = psutil.Process(pid)
-                    p.terminate()
-                    procs_to_wait.append(p)
-                except psutil.AccessDenied:
-                    if _log: _log.info("[kill] psutil.terminate PID=%s 权限不足", pid)
-                    failed_pids.append(pid)
-                except Exception:
-                    pass
-            if procs_to_wait:
-                gone, alive = psutil.wait_procs(procs_to_wait, timeout=3)
-                if gone:
-                    killed_any = True
-                for p in alive:
-                    try:
-                        p.kill()
-                        killed_any = True
-                    except psutil.AccessDenied:
-                        if _log: _log.info("[kill] psutil.kill PID=%s 权限不足", p.pid)
-                        failed_pids.append(p.pid)
-                    except Exception:
-                        pass
+            report = stop_process_tree(pids, timeout=3, log=_log)
+            if report["terminated"] or report["killed"]:
+                killed_any = True
+            failed_pids.extend(pid for pid in report["denied"] if pid in pids)
         except Exception:
             pass
 
@@ -57,6 +104,12 @@ def kill_pids(app, pids):
             if pid in failed_pids:
                 if _log: _log.info("[kill] PID=%s 已在 failed_pids，跳过普通 taskkill", pid)
                 continue
+            try:
+                # 进程树已整体结束的 PID 不再逐个 taskkill
+                if psutil and not psutil.pid_exists(pid):
+                    continue
+            except Exception:
+                pass
             try:
                 r = run_hidden(["taskkill", "/PID", str(pid), "/F"], capture_output=True, text=True)
                 if r.returncode == 0:
@@ -103,4 +156,5 @@ def kill_pids(app, pids):
                     pass
 
     if not killed_any:
-        raise RuntimeError("无法终止目标进程")
\ No newline at end of file
+        raise RuntimeError("无法终止目标进程")
+    return report
\ No newline at end of file
@@ -0,0 +1,323 @@
+"""
+多实例启动
+``launch_options.multi_instance`` 开启且选中（或检测到）至少两张 GPU 时，
+每张卡启动一个 ComfyUI（``--cuda-device N``，自动分配的本地端口，只监听
+127.0.0.1），全部就绪后在用户配置的端口上启动 ``core.balancer`` 代理，
+对外仍是一个地址。
+
+``InstanceGroup`` 提供与 ``subprocess.Popen`` 相同的 ``poll/wait/terminate/kill``，
+挂在 ``ProcessManager.comfyui_process`` 上，监管、停止流程无需区分单实例与多实例。
+"""
+
+import os
+import socket
+import threading
+import time
+from typing import List, Optional
+
+from core import runner_start as RS
+from core.balancer import Backend, LoadBalancer
+
+
+def plan_gpus(app) -> List[int]:
+    """多实例要使用的 GPU 索引；未开启或不足两张卡时返回空列表（走单实例启动）。"""
+    try:
+        opts = app.config.get("launch_options") or {}
+    except Exception:
+        return []
+    if not opts.get("multi_instance"):
+        return []
+    try:
+        if app.compute_mode.get() == "cpu":
+            return []
+    except Exception:
+        pass
+    inventory: List[int] = []
+    try:
+        inv = app.get_gpu_inventory()
+        if isinstance(inv, list):
+            inventory = [int(g.get("index")) for g in inv if isinstance(g, dict)]
+    except Exception:
+        inventory = []
+    selected = opts.get("multi_instance_gpus") or []
+    gpus: List[int] = []
+    if isinstance(selected, list) and selected:
+        for g in selected:
+            try:
+                idx = int(g)
+            except (TypeError, ValueError):
+                continue
+            if (not inventory or idx in inventory) and idx not in gpus:
+                gpus.append(idx)
+    else:
+        for idx in inventory:
+            if idx not in gpus:
+                gpus.append(idx)
+    return gpus if len(gpus) >= 2 else []
+
+
+def allocate_ports(count: int, host: str = "127.0.0.1") -> List[int]:
+    """由系统分配 ``count`` 个互不相同的空闲端口。"""
+    socks = []
+    try:
+        for _ in range(count):
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.bind((host, 0))
+            socks.append(s)
+        return [s.getsockname()[1] for s in socks]
+    finally:
+        for s in socks:
+            try:
+                s.close()
+            except Exception:
+                pass
+
+
+# 由多实例模式重新指定的参数：带值参数 / 可选值参数 / 开关
+_DROP_WITH_VALUE = frozenset({"--cuda-device", "--port"})
+_DROP_FLAGS = frozenset({"--auto-launch", "--disable-auto-launch"})
+
+
+def instance_command(cmd: List[str], gpu: int, port: int) -> List[str]:
+    """单实例启动命令 -> 指定卡与端口、只监听本机、不自动打开浏览器的实例命令。"""
+    out: List[str] = []
+    i = 0
+    while i < len(cmd):
+        token = cmd[i]
+        name = token.split("=", 1)[0]
+        if name in _DROP_WITH_VALUE or name == "--listen":
+            i += 1
+            # --listen 的地址可省略；--port/--cuda-device 以 = 连写时不占下一个参数
+            if "=" not in token and i < len(cmd) and not cmd[i].startswith("-"):
+                i += 1
+            continue
+        if token in _DROP_FLAGS:
+            i += 1
+            continue
+        out.append(token)
+        i += 1
+    out.extend([
+        "--listen", "127.0.0.1",
+        "--port", str(port),
+        "--cuda-device", str(gpu),
+        "--disable-auto-launch",
+    ])
+    return out
+
+
+class Instance:
+    def __init__(self, gpu: int, port: int, proc):
+        self.gpu = gpu
+        self.port = port
+        self.proc = proc
+        self.ready = threading.Event()
+        self.signal: Optional[str] = None
+        # 输出捕获（core.output_capture.OutputCapture）；未捕获时为 None
+        self.output = None
+
+    @property
+    def label(self) -> str:
+        return f"GPU{self.gpu}"
+
+
+class InstanceGroup:
+    """多个 ComfyUI 实例 + 代理，对外表现为一个进程。
+
+    任一实例存活即视为运行中；全部退出后 ``poll()`` 返回第一个实例的退出码。
+    """
+
+    stdout = None
+
+    def __init__(self):
+        self.instances: List[Instance] = []
+        self.balancer: Optional[LoadBalancer] = None
+        self.returncode = None
+
+    @property
+    def pid(self):
+        return self.instances[0].proc.pid if self.instances else None
+
+    @property
+    def pids(self) -> List[int]:
+        return [i.proc.pid for i in self.instances]
+
+    def poll(self):
+        if self.returncode is not None:
+            return self.returncode
+        if not self.instances:
+            return None
+        codes = [i.proc.poll() for i in self.instances]
+        if any(c is None for c in codes):
+            return None
+        self._finish(codes[0])
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        codes = []
+        for inst in self.instances:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            codes.append(inst.proc.wait(remaining))
+        self._finish(codes[0] if codes else 0)
+        return self.returncode
+
+    def terminate(self):
+        self._stop_balancer()
+        for inst in self.instances:
+            try:
+                inst.proc.terminate()
+            except Exception:
+                pass
+
+    def kill(self):
+        self._stop_balancer()
+        for inst in self.instances:
+            try:
+                inst.proc.kill()
+            except Exception:
+                pass
+
+    def _finish(self, code):
+        self._stop_balancer()
+        self.returncode = code
+
+    def _stop_balancer(self):
+        lb, self.balancer = self.balancer, None
+        if lb is not None:
+            lb.stop()
+
+
+def _browser_mode(app) -> str:
+    try:
+        mode = (app.browser_open_mode.get() or "default").strip().lower()
+    except Exception:
+        mode = "default"
+    return mode
+
+
+def start_multi(app, pm, cmd, env, run_cwd, gpus: List[int]):
+    """按 ``gpus`` 启动多个实例并在配置端口上启动代理；接口与 ``runner_start.start`` 相同。"""
+    app.big_btn.set_state("starting")
+    app.big_btn.set_display("启动中…", "点击停止")
+    app._launching = True
+
+    show_console = True
+    try:
+        if hasattr(app, "show_console"):
+            show_console = app.show_console.get()
+    except Exception:
+        pass
+    port = "8188"
+    try:
+        port = (app.custom_port.get() or "8188").strip()
+    except Exception:
+        pass
+    listen_host = "127.0.0.1"
+    try:
+        if app.listen_all.get():
+            listen_host = "0.0.0.0"
+    except Exception:
+        pass
+
+    def worker():
+        t0 = time.monotonic()
+        probes = 0
+        group = InstanceGroup()
+        try:
+            capture = RS._should_capture(show_console)
+            for gpu, inst_port in zip(gpus, allocate_ports(len(gpus))):
+                inst_cmd = instance_command(cmd, gpu, inst_port)
+                try:
+                    app.logger.info("多实例: GPU%s -> 127.0.0.1:%s", gpu, inst_port)
+                except Exception:
+                    pass
+                proc = RS._popen(inst_cmd, env, run_cwd, show_console=show_console, capture=capture)
+                inst = Instance(gpu, inst_port, proc)
+                group.instances.append(inst)
+                stream = getattr(proc, "stdout", None) if capture else None
+                if stream is not None:
+                    echo = None
+                    if os.name != "nt":
+                        echo = (lambda line, p=f"[GPU{gpu}] ": RS._echo_to_stdout(p + line))
+                    inst.output = RS._start_capture(
+                        app, stream, name=f"comfyui_output_gpu{gpu}.log", echo=echo
+                    )
+                    inst.ready = inst.output.ready
+
+            # 全部拉起后再挂到管理器上：空的实例组 wait() 会立即返回
+            pm.comfyui_process = group
+            try:
+                pm.output_capture = group.instances[0].output
+            except Exception:
+                pass
+
+            # 等每个实例就绪（日志信号优先，HTTP 退避探测作后备）或退出
+            pending = list(group.instances)
+            failed: List[Instance] = []
+            delay = RS.PROBE_INITIAL_DELAY
+            deadline = t0 + RS.READY_TIMEOUT
+            while pending and time.monotonic() < deadline:
+                if pm.comfyui_process is not group:
+                    return  # 启动过程中被停止
+                for inst in list(pending):
+                    if inst.proc.poll() is not None:
+                        pending.remove(inst)
+                        failed.append(inst)
+                    elif inst.ready.is_set():
+                        inst.signal = "log"
+                        pending.remove(inst)
+                    else:
+                        probes += 1
+                        if RS._check_system_stats(str(inst.port)):
+                            inst.signal = "http"
+                            pending.remove(inst)
+                if pending:
+                    time.sleep(delay)
+                    delay = min(delay * RS.PROBE_BACKOFF, RS.PROBE_MAX_DELAY)
+
+            ready = [i for i in group.instances if i.signal]
+            for inst in failed:
+                try:
+                    app.logger.warning("多实例: GPU%s 实例启动失败 (code=%s)", inst.gpu, inst.proc.poll())
+                except Exception:
+                    pass
+            if not ready:
+                group.kill()
+                RS._record_launch(app, pm, t0, "exited", probes)
+                RS._post_to_ui(app, lambda: pm.on_start_failed("所有实例均启动失败"))
+                return
+
+            lb = LoadBalancer(
+                int(port),
+                [Backend(i.port, i.label) for i in ready],
+                host=listen_host,
+                log=getattr(app, "logger", None),
+            )
+            try:
+                lb.start()
+            except OSError as e:
+                group.kill()
+                msg = f"代理端口 {port} 无法监听: {e}"
+                RS._post_to_ui(app, lambda m=msg: pm.on_start_failed(m))
+                return
+            group.balancer = lb
+            entry = RS._record_launch(app, pm, t0, "multi", probes)
+            entry["instances"] = [
+                {"gpu": i.gpu, "port": i.port, "signal": i.signal} for i in ready
+            ]
+            RS._post_to_ui(app, pm.on_start_success)
+            # 实例均以 --disable-auto-launch 启动，默认模式下由启动器打开代理地址
+            if _browser_mode(app) == "default":
+                try:
+                    RS._post_to_ui(app, app.open_comfyui_web)
+                except Exception:
+                    pass
+        except Exception as e:
+            try:
+                group.kill()
+            except Exception:
+                pass
+            msg = str(e)
+            RS._post_to_ui(app, lambda m=msg: pm.on_start_failed(m))
+
+    threading.Thread(target=worker, daemon=True).start()
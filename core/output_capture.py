@@ -0,0 +1,207 @@
+"""
+ComfyUI 输出捕获
+隐藏控制台启动时，ComfyUI 的 stdout/stderr（合并为一个管道）由这里的读取线程
+持续读到 EOF，保证子进程不会因管道写满而阻塞，同时：
+
+- 写入启动器自己的按大小轮转日志（默认 ``launcher/comfyui_output.log``）；
+- 在内存中保留最近 ``tail_lines`` 行，供界面即时显示、打包日志使用；
+- 逐行匹配就绪日志，命中时置位 ``ready``（``core.runner_start`` 的就绪检测）。
+
+配置项 ``launch_options.output_log_*`` / ``output_tail_lines``。
+"""
+
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from utils import paths as PATHS
+
+LOG_NAME = "comfyui_output.log"
+DEFAULT_MAX_MB = 10
+DEFAULT_BACKUPS = 3
+DEFAULT_TAIL_LINES = 5000
+
+_MB = 1024 * 1024
+
+
+def default_log_dir(app=None) -> Path:
+    """与 launcher.log 相同的目录：应用的 ``base_root``（缺省时按 ``resolve_base_root``）下的 ``launcher``。
+
+    不用当前目录：守护进程等入口会先切换到 exe 所在目录。
+    """
+    base = getattr(app, "base_root", None)
+    if not base or not isinstance(base, (str, os.PathLike)):
+        base = PATHS.resolve_base_root()
+    return Path(base) / "launcher"
+
+
+def settings_from_config(config) -> dict:
+    """读取输出捕获配置；缺省或非法的项使用默认值。"""
+    opts = {}
+    try:
+        if isinstance(config, dict):
+            opts = config.get("launch_options") or {}
+    except Exception:
+        opts = {}
+
+    def _num(key, default, cast):
+        try:
+            value = cast(opts.get(key, default))
+        except (TypeError, ValueError):
+            return default
+        return value if value >= 0 else default
+
+    return {
+        "enabled": bool(opts.get("output_log_enabled", True)),
+        "max_bytes": int(_num("output_log_max_mb", DEFAULT_MAX_MB, float) * _MB),
+        "backups": _num("output_log_backups", DEFAULT_BACKUPS, int),
+        "tail_lines": max(1, _num("output_tail_lines", DEFAULT_TAIL_LINES, int)),
+    }
+
+
+class RotatingWriter:
+    """按大小轮转的追加写文件：``name`` 写满后依次改名为 ``name.1`` … ``name.N``。"""
+
+    def __init__(self, path, max_bytes: int = DEFAULT_MAX_MB * _MB, backups: int = DEFAULT_BACKUPS):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._fh = None
+        self._size = 0
+        # 写入失败（磁盘满、无权限）后不再尝试，读取线程照常排空管道
+        self.failed = False
+
+    def write(self, text: str) -> None:
+        if self.failed:
+            return
+        data = text.encode("utf-8", errors="replace")
+        try:
+            if self._fh is None:
+                self._open()
+            if self.max_bytes and self._size and self._size + len(data) > self.max_bytes:
+                self._rotate()
+            self._fh.write(data)
+            self._fh.flush()
+            self._size += len(data)
+        except OSError:
+            self.failed = True
+            self.close()
+
+    def close(self) -> None:
+        fh, self._fh = self._fh, None
+        if fh is not None:
+            try:
+                fh.close()
+            except Exception:
+                pass
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "ab")
+        self._size = self._fh.tell()
+
+    def _rotate(self) -> None:
+        self.close()
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+            self._fh = open(self.path, "ab")
+        else:
+            self._fh = open(self.path, "wb")
+        self._size = 0
+
+
+class OutputCapture:
+    def __init__(
+        self,
+        log_path=None,
+        max_bytes: int = DEFAULT_MAX_MB * _MB,
+        backups: int = DEFAULT_BACKUPS,
+        tail_lines: int = DEFAULT_TAIL_LINES,
+        patterns=(),
+        echo: Optional[Callable[[str], None]] = None,
+    ):
+        self.ready = threading.Event()
+        self.patterns = tuple(patterns)
+        self.echo = echo
+        self.log_path = Path(log_path) if log_path else None
+        self._writer = RotatingWriter(log_path, max_bytes, backups) if log_path else None
+        self._tail: deque = deque(maxlen=tail_lines)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # 已读取的总行数
+        self.lines = 0
+
+    @classmethod
+    def from_config(cls, config, name: str = LOG_NAME, log_dir=None, app=None, **kwargs) -> "OutputCapture":
+        s = settings_from_config(config)
+        log_path = None
+        if s["enabled"]:
+            log_path = Path(log_dir or default_log_dir(app)) / name
+        return cls(
+            log_path=log_path,
+            max_bytes=s["max_bytes"],
+            backups=s["backups"],
+            tail_lines=s["tail_lines"],
+            **kwargs,
+        )
+
+    # ---- 读取 ----
+    def attach(self, stream) -> threading.Thread:
+        """在后台线程中读取 ``stream`` 直到 EOF。"""
+        t = threading.Thread(target=self.drain, args=(stream,), name="comfyui-output", daemon=True)
+        self._thread = t
+        t.start()
+        return t
+
+    def drain(self, stream) -> None:
+        """读取子进程输出直到 EOF。必须一直读到子进程退出，否则管道写满会把 ComfyUI 阻塞住。"""
+        try:
+            for raw in iter(stream.readline, b""):
+                if not isinstance(raw, (bytes, str)) or not raw:
+                    break
+                line = raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else raw
+                self.feed(line)
+        except Exception:
+            pass
+        finally:
+            try:
+                stream.close()
+            except Exception:
+                pass
+            if self._writer is not None:
+                self._writer.close()
+
+    def feed(self, line: str) -> None:
+        with self._lock:
+            self._tail.append(line)
+            self.lines += 1
+            if self._writer is not None:
+                self._writer.write(line)
+        if not self.ready.is_set() and any(p.search(line) for p in self.patterns):
+            self.ready.set()
+        if self.echo is not None:
+            try:
+                self.echo(line)
+            except Exception:
+                pass
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        t = self._thread
+        if t is not None:
+            t.join(timeout)
+
+    # ---- 查询 ----
+    def tail(self, n: Optional[int] = None) -> List[str]:
+        """最近 ``n`` 行（默认缓冲区内全部）。"""
+        with self._lock:
+            lines = list(self._tail)
+        return lines if n is None else lines[-n:] if n > 0 else []
+
+    def text(self, n: Optional[int] = None) -> str:
+        return "".join(self.tail(n))
@@ -0,0 +1,195 @@
+"""
+端口占用查询
+一次系统级的 TCP 套接字表查询得到 ``端口 -> PID``，代替逐个进程调用
+``psutil.Process.connections()``（进程多的机器上要数秒）：
+
+- 有 psutil：一次 ``psutil.net_connections(kind="tcp")``；
+- Linux 无 psutil：解析 ``/proc/net/tcp{,6}``，只为目标端口的 socket inode
+  扫描 ``/proc/<pid>/fd`` 找属主，找齐即停；
+- Windows 无 psutil：一次 ``netstat -ano``。
+
+套接字表缓存 ``CACHE_TTL`` 秒；终止进程后调用 ``invalidate()``。
+"""
+
+import locale
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.common import run_hidden
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+CACHE_TTL = 1.0
+
+LISTEN = "LISTEN"
+ESTABLISHED = "ESTABLISHED"
+
+# /proc/net/tcp 的 st 字段
+_PROC_STATES = {"01": ESTABLISHED, "0A": LISTEN}
+_PROC_TABLES = ("/proc/net/tcp", "/proc/net/tcp6")
+_NETSTAT_RE = re.compile(
+    r"^\s*TCP\s+\S+:(\d+)\s+\S+:\S+\s+(LISTENING|ESTABLISHED)\s+(\d+)\s*$",
+    re.IGNORECASE,
+)
+
+# 表项：(本地端口, 状态, pid 或 None, inode 或 None)
+_Entry = Tuple[int, str, Optional[int], Optional[int]]
+
+_lock = threading.Lock()
+_table: Optional[List[_Entry]] = None
+_table_at = 0.0
+_inode_pids: Dict[int, int] = {}
+
+
+def invalidate() -> None:
+    global _table
+    with _lock:
+        _table = None
+        _inode_pids.clear()
+
+
+def pids_for_port(
+    port,
+    states: Iterable[str] = (LISTEN,),
+    max_age: float = CACHE_TTL,
+) -> List[int]:
+    """占用 ``port`` 且状态在 ``states`` 内的 PID 列表（升序）；查不到返回空列表。"""
+    try:
+        port = int(str(port).strip())
+    except Exception:
+        return []
+    wanted = {s.upper() for s in states}
+    entries = [e for e in _get_table(max_age) if e[0] == port and e[1] in wanted]
+    pids: Set[int] = set()
+    unresolved: Set[int] = set()
+    for _port, _status, pid, inode in entries:
+        if pid:
+            pids.add(pid)
+        elif inode:
+            unresolved.add(inode)
+    if unresolved:
+        pids.update(_resolve_inodes(unresolved).values())
+    return sorted(p for p in pids if p > 0)
+
+
+def _get_table(max_age: float) -> List[_Entry]:
+    global _table, _table_at
+    with _lock:
+        now = time.monotonic()
+        if _table is not None and now - _table_at <= max_age:
+            return _table
+        _inode_pids.clear()
+        _table = _query_table()
+        _table_at = now
+        return _table
+
+
+def _query_table() -> List[_Entry]:
+    if psutil is not None:
+        try:
+            return _from_psutil()
+        except Exception:
+            pass
+    if os.name != "nt" and os.path.exists(_PROC_TABLES[0]):
+        try:
+            return _from_proc()
+        except Exception:
+            pass
+    try:
+        return _from_netstat()
+    except Exception:
+        return []
+
+
+def _from_psutil() -> List[_Entry]:
+    out: List[_Entry] = []
+    for conn in psutil.net_connections(kind="tcp"):
+        laddr = getattr(conn, "laddr", None)
+        port = getattr(laddr, "port", None) if laddr else None
+        if not port:
+            continue
+        out.append((int(port), str(conn.status), conn.pid or None, None))
+    return out
+
+
+def _from_proc() -> List[_Entry]:
+    out: List[_Entry] = []
+    for path in _PROC_TABLES:
+        try:
+            with open(path, "r", encoding="ascii", errors="ignore") as f:
+                lines = f.read().splitlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            parts = line.split()
+            if len(parts) < 10:
+                continue
+            status = _PROC_STATES.get(parts[3].upper())
+            if status is None:
+                continue
+            try:
+                port = int(parts[1].rsplit(":", 1)[1], 16)
+                inode = int(parts[9])
+            except (IndexError, ValueError):
+                continue
+            if inode:
+                out.append((port, status, None, inode))
+    return out
+
+
+def _resolve_inodes(inodes: Set[int]) -> Dict[int, int]:
+    """socket inode -> pid：扫描 /proc/<pid>/fd，目标全部找到即停。"""
+    with _lock:
+        found = {i: _inode_pids[i] for i in inodes if i in _inode_pids}
+    missing = {f"socket:[{i}]": i for i in inodes if i not in found}
+    if missing:
+        try:
+            pid_dirs = [d for d in os.listdir("/proc") if d.isdigit()]
+        except OSError:
+            pid_dirs = []
+        for d in pid_dirs:
+            fd_dir = f"/proc/{d}/fd"
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                continue
+            for fd in fds:
+                try:
+                    target = os.readlink(f"{fd_dir}/{fd}")
+                except OSError:
+                    continue
+                inode = missing.pop(target, None)
+                if inode is not None:
+                    found[inode] = int(d)
+            if not missing:
+                break
+        with _lock:
+            _inode_pids.update(found)
+    return {i: found[i] for i in inodes if i in found}
+
+
+def _from_netstat() -> List[_Entry]:
+    preferred_enc = locale.getpreferredencoding(False) or "utf-8"
+    r = run_hidden(
+        ["netstat", "-ano"],
+        capture_output=True,
+        text=True,
+        encoding=preferred_enc,
+        errors="ignore",
+    )
+    out: List[_Entry] = []
+    if getattr(r, "returncode", 1) != 0 or not getattr(r, "stdout", None):
+        return out
+    for line in r.stdout.splitlines():
+        m = _NETSTAT_RE.match(line)
+        if not m:
+            continue
+        status = LISTEN if m.group(2).upper() == "LISTENING" else ESTABLISHED
+        out.append((int(m.group(1)), status, int(m.group(3)) or None, None))
+    return out
@@ -1,10 +1,10 @@
 import os
 import locale
 import shutil
-import re
 from pathlib import Path
 from utils.common import run_hidden
-from urllib.request import urlopen, Request
+from core.port_owner import LISTEN, pids_for_port
+from core import probe_client as PROBECLIENT
 
 try:
     import psutil
@@ -12,49 +12,11 @@ except ImportError:
     psutil = None
 
 def find_pids_by_port_safe(port: str):
-    if psutil:
-        try:
-            pids = set()
-            for p in psutil.process_iter(attrs=["pid"]):
-                try:
-                    conns = p.connections(kind='inet')
-                    for conn in conns:
-                        try:
-                            # 只查找 LISTEN 状态的进程，避免误杀连接到该端口的浏览器
-                            if (getattr(conn, 'status', None) == 'LISTEN' and
-                                getattr(conn, 'laddr', None) and
-                                getattr(conn.laddr, 'port', None) == int(port)):
-                                if p.pid and p.pid > 0:
-                                    pids.add(p.pid)
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-            if pids:
-                return list(pids)
-        except Exception:
-            pass
+    """监听 ``port`` 的 PID 列表（一次系统级套接字表查询，见 ``core.port_owner``）。"""
     try:
-        cmd = ["netstat", "-ano"]
-        preferred_enc = locale.getpreferredencoding(False) or "utf-8"
-        r = run_hidden(cmd, capture_output=True, text=True, encoding=preferred_enc, errors="ignore")
-        if r.returncode == 0 and r.stdout:
-            pids = set()
-            # 只查找 LISTENING 状态的进程，避免误杀连接到该端口的浏览器
-            pattern_tcp = re.compile(rf"^\s*TCP\s+\S+:{port}\s+\S+:\S+\s+LISTENING\s+(\d+)\s*$", re.IGNORECASE)
-            for line in r.stdout.splitlines():
-                m = pattern_tcp.match(line)
-                if m:
-                    try:
-                        pid_val = int(m.group(1))
-                        if pid_val > 0:
-                            pids.add(pid_val)
-                    except Exception:
-                        pass
-            return list(pids)
+        return pids_for_port(port, (LISTEN,))
     except Exception:
-        pass
-    return []
+        return []
 
 def is_comfyui_pid(app, pid: int) -> bool:
     if psutil:
@@ -113,8 +75,12 @@ def is_comfyui_pid(app, pid: int) -> bool:
                 pass
     return False
 
-def is_http_reachable(app, _log=False) -> bool:
-    """检查 ComfyUI HTTP 服务是否可达"""
+def is_http_reachable(app, _log=False, max_age=None) -> bool:
+    """检查 ComfyUI HTTP 服务是否可达
+
+    经由共享的长连接探测客户端（``core.probe_client``）：并发调用只发一次请求，
+    结果缓存 ``launch_options.probe_cache_ttl`` 秒；需要最新结果时传 ``max_age=0``。
+    """
     try:
         port = int((app.custom_port.get() or "8188").strip())
     except Exception:
@@ -124,38 +90,24 @@ def is_http_reachable(app, _log=False) -> bool:
             except Exception:
                 pass
         return False
+    if max_age is None:
+        try:
+            max_age = PROBECLIENT.ttl_from_config(app.config)
+        except Exception:
+            max_age = PROBECLIENT.DEFAULT_TTL
     try:
-        url = f"http://127.0.0.1:{port}/system_stats"
-        req = Request(url, headers={"Accept": "application/json", "User-Agent": "ComfyUI-Launcher"})
-        last_err = None
-        for timeout in (0.4, 1.5):
-            try:
-                with urlopen(req, timeout=timeout) as resp:
-                    code = getattr(resp, "status", None)
-                    if code is None:
-                        try:
-                            code = resp.getcode()
-                        except Exception:
-                            code = None
-                    result = code == 200
-                    if _log:
-                        try:
-                            app.logger.info("[probe] is_http_reachable: port=%s, code=%s, result=%s", port, code, result)
-                        except Exception:
-                            pass
-                    return result
-            except Exception as e:
-                last_err = e
+        client = PROBECLIENT.get_client(port)
+        result = client.check(max_age=max_age)
         if _log:
             try:
-                reason = getattr(last_err, "reason", None)
-                if reason is not None:
-                    app.logger.info("[probe] is_http_reachable: port=%s, 失败: %s, reason=%r, msg=%s", port, type(last_err).__name__, reason, str(last_err))
+                if client.last_error is None:
+                    app.logger.info("[probe] is_http_reachable: port=%s, code=%s, result=%s", port, client.last_status, result)
                 else:
-                    app.logger.info("[probe] is_http_reachable: port=%s, 失败: %s, msg=%s", port, type(last_err).__name__, str(last_err))
+                    err = client.last_error
+                    app.logger.info("[probe] is_http_reachable: port=%s, 失败: %s, msg=%s", port, type(err).__name__, str(err))
             except Exception:
                 pass
-        return False
+        return result
     except Exception as e:
         if _log:
             try:
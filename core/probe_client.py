@@ -0,0 +1,226 @@
+"""
+本地 HTTP 探测客户端
+监管线程、按钮切换、进程结束处理、启动就绪检查都在探测同一个本地端口。
+每个端口共用一个 ``ProbeClient``：
+
+- 复用一条 ``http.client`` 长连接，不再每次探测都新建 TCP 连接；
+- 并发调用合并到同一个进行中的请求上（single-flight），只发一次；
+- 最近一次结果缓存 ``ttl`` 秒，短时间内的一串状态检查只花一次往返。
+
+需要最新结果的调用方（启动就绪、进程刚退出）传 ``max_age=0`` 或先 ``invalidate()``。
+"""
+
+import http.client
+import json
+import socket
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PATH = "/system_stats"
+DEFAULT_TIMEOUT = 1.5
+# 结果缓存时间（秒），可由 launch_options.probe_cache_ttl 配置
+DEFAULT_TTL = 1.0
+
+_MAX_BODY = 64 * 1024
+
+_HEADERS = {
+    "Accept": "application/json",
+    "User-Agent": "ComfyUI-Launcher",
+    "Connection": "keep-alive",
+}
+
+
+class ProbeClient:
+    def __init__(
+        self,
+        port: int,
+        host: str = DEFAULT_HOST,
+        path: str = DEFAULT_PATH,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.host = host
+        self.port = int(port)
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # 串行化对长连接的使用（check 的 leader 与 fetch_json 可能来自不同线程）
+        self._io_lock = threading.Lock()
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._inflight: Optional[threading.Event] = None
+        self._result: Optional[bool] = None
+        self._result_at = 0.0
+        self.last_status: Optional[int] = None
+        self.last_error: Optional[BaseException] = None
+        # 最近一次请求的往返耗时（秒）与响应体（仅保留小响应，供 /system_stats 解析）
+        self.last_latency: Optional[float] = None
+        self.last_body: Optional[bytes] = None
+        # 统计：实际发出的请求、命中缓存、合并到进行中请求、新建连接
+        self.requests = 0
+        self.cache_hits = 0
+        self.joined = 0
+        self.connects = 0
+
+    def check(self, max_age: Optional[float] = None, timeout: Optional[float] = None) -> bool:
+        """``path`` 是否返回 200；``max_age`` 秒内的结果直接复用。"""
+        ttl = DEFAULT_TTL if max_age is None else max_age
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            if self._result is not None and time.monotonic() - self._result_at <= ttl:
+                self.cache_hits += 1
+                return self._result
+            flight = self._inflight
+            leader = flight is None
+            if leader:
+                flight = self._inflight = threading.Event()
+            else:
+                self.joined += 1
+        if not leader:
+            # 单次请求最多重连一次，等两倍超时足够
+            flight.wait(timeout * 2 + 0.5)
+            with self._lock:
+                return bool(self._result)
+        ok = False
+        try:
+            ok = self._request(timeout)
+        finally:
+            with self._lock:
+                self._result = ok
+                self._result_at = time.monotonic()
+                self._inflight = None
+            flight.set()
+        return ok
+
+    def last_json(self):
+        """最近一次成功响应的 JSON；没有或无法解析时返回 None。"""
+        body = self.last_body
+        if not body or self.last_status != 200:
+            return None
+        try:
+            return json.loads(body.decode("utf-8"))
+        except Exception:
+            return None
+
+    def fetch_json(self, path: str, timeout: Optional[float] = None):
+        """在同一条长连接上 GET ``path`` 并解析 JSON；失败返回 None。
+
+        不读写 ``check()`` 的缓存，也不覆盖 ``last_*``。
+        """
+        status, body, _err = self._roundtrip(path, self.timeout if timeout is None else timeout)
+        if status != 200 or not body:
+            return None
+        try:
+            return json.loads(body.decode("utf-8"))
+        except Exception:
+            return None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._result = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._result = None
+        self._close_conn()
+
+    def _close_conn(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _request(self, timeout: float) -> bool:
+        t0 = time.monotonic()
+        status, body, err = self._roundtrip(self.path, timeout)
+        self.last_latency = time.monotonic() - t0
+        self.last_body = body if body is not None and len(body) <= _MAX_BODY else None
+        self.last_status = status
+        self.last_error = err
+        return status == 200
+
+    def _roundtrip(self, path: str, timeout: float):
+        """发送一次 GET，返回 ``(status, body, error)``；失败时 status 为 None。"""
+        with self._io_lock:
+            err = None
+            for _attempt in range(2):
+                conn = self._conn
+                reused = conn is not None
+                if conn is None:
+                    conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+                    self._conn = conn
+                    self.connects += 1
+                else:
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        try:
+                            conn.sock.settimeout(timeout)
+                        except Exception:
+                            pass
+                self.requests += 1
+                try:
+                    conn.request("GET", path, headers=_HEADERS)
+                    resp = conn.getresponse()
+                    # 读完响应体，连接才能复用
+                    body = resp.read()
+                    if resp.will_close:
+                        self._close_conn()
+                    return resp.status, body, None
+                except (http.client.HTTPException, OSError) as e:
+                    err = e
+                    self._close_conn()
+                    # 复用的长连接可能已被服务端关闭：换新连接重试一次；超时不重试
+                    if reused and not isinstance(e, socket.timeout):
+                        continue
+                    break
+            return None, None, err
+
+
+_clients: Dict[Tuple[str, int], ProbeClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(port, host: str = DEFAULT_HOST) -> ProbeClient:
+    key = (host, int(port))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = ProbeClient(key[1], host=host)
+        return client
+
+
+def check(
+    port,
+    max_age: Optional[float] = None,
+    timeout: Optional[float] = None,
+    host: str = DEFAULT_HOST,
+) -> bool:
+    return get_client(port, host).check(max_age=max_age, timeout=timeout)
+
+
+def invalidate(port=None) -> None:
+    """丢弃缓存结果（进程启动/退出后调用）；不指定端口时清空全部。"""
+    with _clients_lock:
+        clients = list(_clients.values())
+    for c in clients:
+        if port is None or c.port == int(port):
+            c.invalidate()
+
+
+def close_all() -> None:
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for c in clients:
+        c.close()
+
+
+def ttl_from_config(config) -> float:
+    """``launch_options.probe_cache_ttl``，缺省或非法时为 ``DEFAULT_TTL``。"""
+    try:
+        value = float((config.get("launch_options") or {}).get("probe_cache_ttl"))
+    except Exception:
+        return DEFAULT_TTL
+    return value if value >= 0 else DEFAULT_TTL
@@ -1,6 +1,21 @@
+"""
+进程事件总线
+``register_callback`` 时为每个回调、每种事件一次性解析出适配函数（按回调签名决定
+传哪些参数），``emit_event`` 只需查表调用，不再每次都做 ``inspect.signature``。
+
+默认在发出事件的线程上同步投递；``start_dispatcher()`` 之后改为放入队列，由独立的
+分发线程投递，发出事件的线程（监管、看门狗）不会被慢回调拖住。``stats()`` 返回事件数、
+投递延迟与慢回调统计。
+"""
+
 import enum
 import inspect
-from typing import Optional
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Callable, Optional
 
 
 class ProcessEvent(enum.Enum):
@@ -11,6 +26,11 @@ class ProcessEvent(enum.Enum):
     STOPPED = "process_stopped"
     ERROR = "process_error"
     PORT_CONFLICT = "port_conflict"
+    # 看门狗：计划重启、检测到无响应、资源超限、重启预算耗尽
+    WATCHDOG_RESTART = "watchdog_restart"
+    HANG_DETECTED = "process_hang_detected"
+    RESOURCE_LIMIT = "resource_limit"
+    RESTART_BUDGET_EXHAUSTED = "restart_budget_exhausted"
 
 
 class ProcessCallback:
@@ -37,6 +57,36 @@ class ProcessCallback:
     ) -> None:
         pass
 
+    def on_watchdog_restart(
+        self,
+        reason: Optional[str] = None,
+        attempt: Optional[int] = None,
+        delay: Optional[float] = None,
+        exit_code: Optional[int] = None,
+    ) -> None:
+        pass
+
+    def on_hang_detected(
+        self, latency: Optional[float] = None, failures: Optional[int] = None
+    ) -> None:
+        pass
+
+    def on_resource_limit(
+        self,
+        resource: Optional[str] = None,
+        value_mb: Optional[float] = None,
+        limit_mb: Optional[float] = None,
+    ) -> None:
+        pass
+
+    def on_restart_budget_exhausted(
+        self,
+        reason: Optional[str] = None,
+        restarts: Optional[int] = None,
+        window: Optional[float] = None,
+    ) -> None:
+        pass
+
 
 _EVENT_CALLBACK_MAP = {
     ProcessEvent.STARTING: "on_starting",
@@ -46,59 +96,224 @@ _EVENT_CALLBACK_MAP = {
     ProcessEvent.STOPPED: "on_stopped",
     ProcessEvent.ERROR: "on_error",
     ProcessEvent.PORT_CONFLICT: "on_port_conflict",
+    ProcessEvent.WATCHDOG_RESTART: "on_watchdog_restart",
+    ProcessEvent.HANG_DETECTED: "on_hang_detected",
+    ProcessEvent.RESOURCE_LIMIT: "on_resource_limit",
+    ProcessEvent.RESTART_BUDGET_EXHAUSTED: "on_restart_budget_exhausted",
 }
 
+# 按参数名传递 data 中对应字段的事件
+_KEYWORD_EVENTS = frozenset({
+    ProcessEvent.WATCHDOG_RESTART,
+    ProcessEvent.HANG_DETECTED,
+    ProcessEvent.RESOURCE_LIMIT,
+    ProcessEvent.RESTART_BUDGET_EXHAUSTED,
+})
+
+# 单次回调超过该时长（秒）计为慢回调
+SLOW_CALLBACK_SECONDS = 0.05
+
+logger = logging.getLogger(__name__)
+
 _callbacks: list[object] = []
+# 事件 -> ((回调, 适配函数, 名称), ...)；注册变化时整体替换，投递时无需加锁
+_dispatch: dict = {}
+_registry_lock = threading.Lock()
+
+_queue: Optional[queue.Queue] = None
+_dispatcher: Optional[threading.Thread] = None
+
+_stats_lock = threading.Lock()
+_stats = {
+    "emitted": Counter(),
+    "delivered": 0,
+    "errors": 0,
+    "latency_total": 0.0,
+    "latency_max": 0.0,
+    "slow": Counter(),
+}
+
+
+def _build_adapter(event: ProcessEvent, callback: object) -> Optional[Callable[[dict], None]]:
+    """按回调签名生成 ``adapter(data)``；该回调不接收此事件时返回 None。"""
+    name = _EVENT_CALLBACK_MAP[event]
+    method = getattr(callback, name, None)
+    if method is None:
+        return None
+    try:
+        params = inspect.signature(method).parameters
+    except (TypeError, ValueError):
+        params = {}
+    if any(p.kind == inspect.Parameter.VAR_KEYWORD for p in params.values()):
+        return lambda data: method(**data)
+
+    accepted = set(params.keys()) - {"self"}
+    if event == ProcessEvent.STARTED:
+        if "data" in accepted:
+            return lambda data: method(data=data)
+        return None
+    if event == ProcessEvent.START_FAILED:
+        if "error" in accepted:
+            return lambda data: method(error=data.get("error"))
+        return None
+    if event == ProcessEvent.ERROR:
+        want_error = "error" in accepted
+        extra = frozenset(accepted - {"error"})
+        if not want_error and not extra:
+            return None
+
+        def _error(data):
+            kwargs = {k: data[k] for k in extra if k in data}
+            if want_error:
+                kwargs["error"] = data.get("error")
+            if kwargs:
+                method(**kwargs)
+
+        return _error
+    if event == ProcessEvent.PORT_CONFLICT:
+        if "port" in accepted:
+            return lambda data: method(port=data.get("port"), pids=data.get("pids"))
+        return None
+    if event in _KEYWORD_EVENTS:
+        keys = frozenset(accepted)
+        return lambda data: method(**{k: data[k] for k in keys if k in data})
+    if not accepted or name in accepted:
+        return lambda data: method()
+    return None
+
+
+def _rebuild_dispatch() -> None:
+    table = {}
+    for event, name in _EVENT_CALLBACK_MAP.items():
+        entries = []
+        for cb in _callbacks:
+            adapter = _build_adapter(event, cb)
+            if adapter is not None:
+                entries.append((cb, adapter, f"{type(cb).__name__}.{name}"))
+        if entries:
+            table[event] = tuple(entries)
+    global _dispatch
+    _dispatch = table
 
 
 def register_callback(callback: object) -> None:
-    if callback not in _callbacks:
-        _callbacks.append(callback)
+    with _registry_lock:
+        if callback not in _callbacks:
+            _callbacks.append(callback)
+            _rebuild_dispatch()
 
 
 def unregister_callback(callback: object) -> None:
-    if callback in _callbacks:
-        _callbacks.remove(callback)
+    with _registry_lock:
+        if callback in _callbacks:
+            _callbacks.remove(callback)
+            _rebuild_dispatch()
 
 
-def emit_event(event: ProcessEvent, data: Optional[dict] = None) -> None:
+def emit_event(event: ProcessEvent, data: Optional[dict] = None, sync: Optional[bool] = None) -> None:
+    """发出事件。分发线程运行时默认入队异步投递；``sync=True`` 强制在当前线程投递。"""
+    if event not in _EVENT_CALLBACK_MAP:
+        return
     data = data or {}
-    callback_method = _EVENT_CALLBACK_MAP.get(event)
-
-    if callback_method is None:
+    with _stats_lock:
+        _stats["emitted"][event.value] += 1
+    q = _queue
+    if (
+        not sync
+        and q is not None
+        and threading.current_thread() is not _dispatcher
+    ):
+        q.put((event, data, time.perf_counter()))
         return
+    _deliver(event, data, time.perf_counter(), raise_errors=True)
+
+
+def _deliver(event: ProcessEvent, data: dict, emitted_at: float, raise_errors: bool) -> None:
+    for _cb, adapter, label in _dispatch.get(event, ()):
+        start = time.perf_counter()
+        ok = False
+        try:
+            adapter(data)
+            ok = True
+        except Exception:
+            if raise_errors:
+                raise
+            logger.exception("事件回调异常: %s", label)
+        finally:
+            end = time.perf_counter()
+            latency = start - emitted_at
+            with _stats_lock:
+                _stats["delivered"] += 1
+                if not ok:
+                    _stats["errors"] += 1
+                _stats["latency_total"] += latency
+                if latency > _stats["latency_max"]:
+                    _stats["latency_max"] = latency
+                if end - start > SLOW_CALLBACK_SECONDS:
+                    _stats["slow"][label] += 1
+
+
+# ---- 队列投递 ----
+def start_dispatcher() -> None:
+    """之后发出的事件由独立的分发线程按顺序投递。"""
+    global _queue, _dispatcher
+    with _registry_lock:
+        if _dispatcher is not None and _dispatcher.is_alive():
+            return
+        q = queue.Queue()
+        t = threading.Thread(target=_run_dispatcher, args=(q,), name="process-events", daemon=True)
+        _queue, _dispatcher = q, t
+        t.start()
+
+
+def stop_dispatcher(timeout: float = 2.0) -> None:
+    """投递完已入队的事件后停止分发线程，恢复同步投递。"""
+    global _queue, _dispatcher
+    with _registry_lock:
+        q, t = _queue, _dispatcher
+        _queue = None
+        _dispatcher = None
+    if q is not None:
+        q.put(None)
+    if t is not None and t is not threading.current_thread():
+        t.join(timeout)
+
+
+def _run_dispatcher(q: queue.Queue) -> None:
+    while True:
+        item = q.get()
+        if item is None:
+            return
+        event, data, emitted_at = item
+        try:
+            _deliver(event, data, emitted_at, raise_errors=False)
+        except Exception:
+            pass
+
+
+# ---- 统计 ----
+def stats() -> dict:
+    """已发出的事件数、投递次数与延迟（发出到回调开始）、慢回调次数、队列积压。"""
+    with _stats_lock:
+        delivered = _stats["delivered"]
+        out = {
+            "emitted": dict(_stats["emitted"]),
+            "delivered": delivered,
+            "errors": _stats["errors"],
+            "latency_avg_ms": round(_stats["latency_total"] / delivered * 1000, 3) if delivered else 0.0,
+            "latency_max_ms": round(_stats["latency_max"] * 1000, 3),
+            "slow": dict(_stats["slow"]),
+        }
+    q = _queue
+    out["queued"] = q.qsize() if q is not None else 0
+    return out
+
 
-    for callback in _callbacks:
-        method = getattr(callback, callback_method, None)
-        if method is not None:
-            sig = inspect.signature(method)
-            params = sig.parameters
-            has_var_keyword = any(
-                p.kind == inspect.Parameter.VAR_KEYWORD for p in params.values()
-            )
-
-            if has_var_keyword:
-                method(**data)
-            else:
-                accepted = set(params.keys()) - {"self"}
-                if event == ProcessEvent.STARTED:
-                    if "data" in accepted:
-                        method(data=data)
-                elif event == ProcessEvent.START_FAILED:
-                    if "error" in accepted:
-                        method(error=data.get("error"))
-                elif event == ProcessEvent.ERROR:
-                    kwargs = {}
-                    if "error" in accepted:
-                        kwargs["error"] = data.get("error")
-                    for key in accepted - {"error"}:
-                        if key in data:
-                            kwargs[key] = data[key]
-                    if kwargs:
-                        method(**kwargs)
-                elif event == ProcessEvent.PORT_CONFLICT:
-                    if "port" in accepted:
-                        method(port=data.get("port"), pids=data.get("pids"))
-                else:
-                    if not accepted or callback_method in accepted:
-                        method()
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats["emitted"].clear()
+        _stats["delivered"] = 0
+        _stats["errors"] = 0
+        _stats["latency_total"] = 0.0
+        _stats["latency_max"] = 0.0
+        _stats["slow"].clear()
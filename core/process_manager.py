@@ -11,6 +11,7 @@ from pathlib import Path
 
 from core.probe import is_http_reachable, find_pids_by_port_safe, is_comfyui_pid
 from core.kill import kill_pids
+from core.port_owner import ESTABLISHED, LISTEN, pids_for_port
 from core.process_events import emit_event, ProcessEvent
 from utils.common import run_hidden
 
@@ -30,6 +31,11 @@ class ProcessManager:
         self.app = app
         self.comfyui_process = None
         self._stopping = False
+        self._supervisor = None
+        self._watchdog = None
+        self._telemetry = None
+        # 最近一次启动的输出捕获（core.output_capture.OutputCapture）
+        self.output_capture = None
 
     def _post_to_ui(self, fn):
         try:
@@ -222,6 +228,17 @@ class ProcessManager:
                 )
             except Exception:
                 pass
+            from core.multi_instance import plan_gpus, start_multi
+
+            gpus = plan_gpus(self.app)
+            if gpus:
+                try:
+                    self.app.logger.info("多实例启动: GPU %s", ", ".join(map(str, gpus)))
+                except Exception:
+                    pass
+                start_multi(self.app, self, cmd, env, run_cwd, gpus)
+                return
+
             from core.runner_start import start as run_start
 
             run_start(self.app, self, cmd, env, run_cwd)
@@ -284,6 +301,10 @@ class ProcessManager:
         if getattr(self, "_stopping", False):
             return True
         self._stopping = True
+        # 用户主动停止：取消看门狗尚未执行的自动重启
+        watchdog = getattr(self, "_watchdog", None)
+        if watchdog is not None:
+            watchdog.cancel()
 
         try:
             self.app.big_btn.set_state("starting")
@@ -456,69 +477,11 @@ class ProcessManager:
             return default
 
     def _find_pids_by_port_safe(self, port_str):  #
-        # 解析端口并通过 psutil 或 netstat 查找 PID 列表
+        # 监听或连接中的 PID（一次系统级套接字表查询，见 core.port_owner）
         try:
-            port = int(port_str)
+            return pids_for_port(port_str, (LISTEN, ESTABLISHED))
         except Exception:
             return []
-        # 优先使用 psutil
-        if psutil:
-            try:
-                pids = set()
-                try:
-                    for conn in psutil.net_connections(kind="inet"):  #
-                        try:
-                            if conn.laddr and conn.laddr.port == port:
-                                if conn.status in (
-                                    "LISTEN",
-                                    "ESTABLISHED",
-                                ):  # 监听或连接中
-                                    if conn.pid:
-                                        pids.add(conn.pid)
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-                if pids:
-                    return list(pids)
-            except Exception:
-                pass
-        # 回退到 netstat 解析（Windows）
-        try:
-            import subprocess
-            import re
-
-            cmd = ["netstat", "-ano"]
-            # 使用系统首选编码并忽略解码错误，且隐藏子进程窗口
-            preferred_enc = locale.getpreferredencoding(False) or "utf-8"  #
-            r = run_hidden(
-                cmd,
-                capture_output=True,
-                text=True,
-                encoding=preferred_enc,
-                errors="ignore",
-            )
-            if r.returncode == 0 and r.stdout:
-                pids = set()
-                # 只认 TCP 的 LISTENING 或 ESTABLISHED，避免 TIME_WAIT/Close 等状态误判
-                pattern_tcp = re.compile(  #
-                    rf"^\s*TCP\s+\S+:{port}\s+\S+:\S+\s+(LISTENING|ESTABLISHED)\s+(\d+)\s*$",
-                    re.IGNORECASE,
-                )
-                for line in r.stdout.splitlines():
-                    m = pattern_tcp.match(line)
-                    if m:
-                        try:
-                            _pid = int(m.group(2))
-                            if _pid > 0:
-                                pids.add(_pid)
-                        except Exception:
-                            pass
-                # 不再统计 UDP（ComfyUI 使用 HTTP/TCP），以减少误判
-                return list(pids)
-        except Exception:
-            pass
-        return []
 
     def _is_comfyui_pid(self, pid: int) -> bool:  # **修正后的代码块**
         # 通过 cmdline/exe/cwd 多重特征判断是否为 ComfyUI 相关进程
@@ -700,7 +663,27 @@ class ProcessManager:
         except Exception:
             pass
 
+    def apply_running_status(self, running):  #
+        """把运行状态同步到按钮；启动中或停止中时保留中间态。"""
+        if getattr(self.app, '_launching', False) or getattr(self, '_stopping', False):
+            return
+        try:
+            if running:
+                self.app.big_btn.set_state("running")
+                self.app.big_btn.set_display("正常运行", "点击停止")
+            else:
+                self.app.big_btn.set_state("idle")
+                self.app.big_btn.set_display("🚀 一键启动")
+        except Exception:
+            pass
+
     def refresh_running_status_async(self):  #
+        # 监管线程在运行时直接唤醒它探测，不再为每次刷新单独起线程
+        sup = self._supervisor
+        if sup is not None and sup.active:
+            sup.kick(force=True)
+            return
+
         def _bg():
             # 启动中或停止中时，不刷新按钮状态，避免覆盖中间态
             if getattr(self.app, '_launching', False) or getattr(self, '_stopping', False):
@@ -715,22 +698,9 @@ class ProcessManager:
                 except Exception:
                     running = False
 
-                def _ui():
-                    try:
-                        # 二次检查：防止在异步回调期间状态已变化
-                        if getattr(self.app, '_launching', False) or getattr(self, '_stopping', False):
-                            return
-                        if running:
-                            self.app.big_btn.set_state("running")
-                            self.app.big_btn.set_display("正常运行", "点击停止")
-                        else:
-                            self.app.big_btn.set_state("idle")
-                            self.app.big_btn.set_display("🚀 一键启动")
-                    except Exception:
-                        pass
-
                 try:
-                    self._post_to_ui(_ui)
+                    # 二次检查在 apply_running_status 内：防止回调期间状态已变化
+                    self._post_to_ui(lambda: self.apply_running_status(running))
                 except Exception:
                     pass
             except Exception:
@@ -743,7 +713,49 @@ class ProcessManager:
         except Exception:
             pass
 
+    @property
+    def supervisor(self):
+        if self._supervisor is None:
+            from core.supervisor import ProcessSupervisor
+
+            self._supervisor = ProcessSupervisor(self.app, self)
+        return self._supervisor
+
+    @property
+    def watchdog(self):
+        if self._watchdog is None:
+            from core.watchdog import Watchdog
+
+            self._watchdog = Watchdog(self.app, self)
+        return self._watchdog
+
+    def output_tail(self, n=200):
+        """最近 ``n`` 行 ComfyUI 输出（未捕获时为空列表）。"""
+        capture = self.output_capture
+        if capture is None:
+            return []
+        try:
+            return capture.tail(n)
+        except Exception:
+            return []
+
+    @property
+    def telemetry(self):
+        if self._telemetry is None:
+            from core.telemetry import TelemetrySampler
+
+            self._telemetry = TelemetrySampler(self.app, self)
+        return self._telemetry
+
     def monitor_process(self):  #
+        try:
+            self.watchdog.start()
+        except Exception:
+            pass
+        try:
+            self.telemetry.start()
+        except Exception:
+            pass
         from core.runner import monitor
 
         monitor(self.app, self)
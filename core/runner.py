@@ -1,13 +1,12 @@
-import threading
+from core.supervisor import ProcessSupervisor
+
 
 def monitor(app, process_manager):
-    while True:
-        try:
-            if getattr(app, "_shutting_down", False):
-                break
-            if process_manager.comfyui_process and process_manager.comfyui_process.poll() is not None:
-                process_manager.comfyui_process = None
-            process_manager.refresh_running_status_async()
-            threading.Event().wait(2)
-        except Exception:
-            break
\ No newline at end of file
+    """常驻监管 ComfyUI 进程状态，阻塞直到应用退出。
+
+    子进程存活时阻塞等待其退出，否则按退避间隔探测 HTTP，见 ``core.supervisor``。
+    """
+    sup = getattr(process_manager, "supervisor", None)
+    if not isinstance(sup, ProcessSupervisor):
+        sup = ProcessSupervisor(app, process_manager)
+    sup.run()
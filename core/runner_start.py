@@ -1,8 +1,26 @@
 import os
+import re
+import sys
 import time
 import threading
 import subprocess
-from urllib.request import urlopen, Request
+from collections import deque
+
+from core import probe_client as PROBECLIENT
+from core.output_capture import OutputCapture
+
+# ComfyUI 开始监听后打印的日志（aiohttp 默认 run_app 的提示一并识别）
+READY_PATTERNS = (
+    re.compile(r"To see the GUI go to"),
+    re.compile(r"Running on https?://"),
+)
+# 等待就绪的上限；HTTP 后备探测的初始间隔、退避倍数与最大间隔（秒）
+READY_TIMEOUT = 120.0
+PROBE_INITIAL_DELAY = 0.1
+PROBE_BACKOFF = 2.0
+PROBE_MAX_DELAY = 2.0
+
+LAUNCH_HISTORY = deque(maxlen=20)
 
 
 def _post_to_ui(app, fn):
@@ -16,48 +34,99 @@ def _post_to_ui(app, fn):
             pass
 
 
-def _spawn_process(pm, cmd, env, run_cwd, show_console=True):
+def _popen(cmd, env, run_cwd, show_console=True, capture=False):
+    # 捕获输出时合并 stderr，并关闭子进程的输出缓冲，就绪日志才能及时读到
+    pipe = {}
+    if capture:
+        env = dict(env or os.environ)
+        env.setdefault("PYTHONUNBUFFERED", "1")
+        env.setdefault("PYTHONIOENCODING", "utf-8")
+        pipe = {"stdout": subprocess.PIPE, "stderr": subprocess.STDOUT}
     if os.name == "nt":
         si = subprocess.STARTUPINFO()
         si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
         if show_console:
             si.wShowWindow = 1  # SW_SHOWNORMAL
-            pm.comfyui_process = subprocess.Popen(
+            return subprocess.Popen(
                 cmd,
                 env=env,
                 cwd=run_cwd,
                 creationflags=subprocess.CREATE_NEW_CONSOLE,
                 startupinfo=si,
+                **pipe,
             )
-        else:
-            si.wShowWindow = subprocess.SW_HIDE
-            pm.comfyui_process = subprocess.Popen(
-                cmd,
-                env=env,
-                cwd=run_cwd,
-                creationflags=subprocess.CREATE_NO_WINDOW,
-                startupinfo=si,
-            )
-    else:
-        pm.comfyui_process = subprocess.Popen(cmd, env=env, cwd=run_cwd)
+        si.wShowWindow = subprocess.SW_HIDE
+        return subprocess.Popen(
+            cmd,
+            env=env,
+            cwd=run_cwd,
+            creationflags=subprocess.CREATE_NO_WINDOW,
+            startupinfo=si,
+            **pipe,
+        )
+    return subprocess.Popen(cmd, env=env, cwd=run_cwd, **pipe)
+
+
+def _spawn_process(pm, cmd, env, run_cwd, show_console=True, capture=False):
+    pm.comfyui_process = _popen(cmd, env, run_cwd, show_console=show_console, capture=capture)
+
+
+def _should_capture(show_console: bool) -> bool:
+    """Windows 下显示独立控制台时输出留给控制台，其余情况由启动器读取。"""
+    return not (os.name == "nt" and show_console)
+
+
+def _start_capture(app, stream, name=None, echo=None) -> OutputCapture:
+    """为子进程输出启动读取线程：写轮转日志、保留最近若干行、检测就绪日志。"""
+    kwargs = {"patterns": READY_PATTERNS, "echo": echo}
+    if name:
+        kwargs["name"] = name
+    capture = OutputCapture.from_config(getattr(app, "config", None), app=app, **kwargs)
+    capture.attach(stream)
+    return capture
+
+
+def _echo_to_stdout(line: str) -> None:
+    out = sys.stdout
+    if out is not None:
+        out.write(line)
+        out.flush()
+
+
+def _record_launch(app, pm, t0: float, signal: str, probes: int) -> dict:
+    """记录一次启动的就绪耗时（日志 + ``LAUNCH_HISTORY`` + ``pm.last_launch``）。"""
+    proc = getattr(pm, "comfyui_process", None)
+    entry = {
+        "pid": getattr(proc, "pid", None),
+        "signal": signal,
+        "ready_seconds": round(time.monotonic() - t0, 3),
+        "http_probes": probes,
+        "finished_at": time.time(),
+    }
+    LAUNCH_HISTORY.append(entry)
+    try:
+        pm.last_launch = entry
+    except Exception:
+        pass
+    try:
+        app.logger.info(
+            "启动耗时: %.2fs（信号=%s，HTTP 探测 %d 次）",
+            entry["ready_seconds"], signal, probes,
+        )
+    except Exception:
+        pass
+    return entry
+
+
+def launch_history() -> list:
+    """最近若干次启动的就绪耗时记录（旧 -> 新）。"""
+    return list(LAUNCH_HISTORY)
 
 
 def _check_system_stats(port: str, timeout: float = 1.5) -> bool:
-    """通过 /system_stats API 检查 ComfyUI 是否完全启动"""
+    """通过 /system_stats API 检查 ComfyUI 是否完全启动（不使用缓存结果）"""
     try:
-        url = f"http://127.0.0.1:{port}/system_stats"
-        req = Request(url, headers={
-            "Accept": "application/json",
-            "User-Agent": "ComfyUI-Launcher",
-        })
-        with urlopen(req, timeout=timeout) as resp:
-            code = getattr(resp, "status", None)
-            if code is None:
-                try:
-                    code = resp.getcode()
-                except Exception:
-                    code = None
-            return code == 200
+        return PROBECLIENT.check(int(str(port).strip()), max_age=0, timeout=timeout)
     except Exception:
         return False
 
@@ -83,39 +152,61 @@ def start(app, pm, cmd, env, run_cwd):
         pass
 
     def worker():
+        t0 = time.monotonic()
+        probes = 0
         try:
             try:
                 app.logger.info("启动工作目录(cwd): %s", run_cwd)
             except Exception:
                 pass
 
-            _spawn_process(pm, cmd, env, run_cwd, show_console=show_console)
-
-            # 等待进程初始化，再开始轮询 API
-            time.sleep(3)
+            capture = _should_capture(show_console)
+            _spawn_process(pm, cmd, env, run_cwd, show_console=show_console, capture=capture)
+
+            # 就绪信号优先来自 ComfyUI 输出的监听日志；HTTP 探测作为后备，
+            # 间隔从 100ms 起按倍数退避
+            ready = threading.Event()
+            stream = getattr(pm.comfyui_process, "stdout", None) if capture else None
+            if stream is not None:
+                output = _start_capture(
+                    app, stream, echo=_echo_to_stdout if os.name != "nt" else None
+                )
+                ready = output.ready
+                try:
+                    pm.output_capture = output
+                except Exception:
+                    pass
 
-            # 轮询 /system_stats 直到 ComfyUI 完全启动（最多 120 秒）
-            deadline = time.time() + 120.0
-            while time.time() < deadline:
+            delay = PROBE_INITIAL_DELAY
+            deadline = t0 + READY_TIMEOUT
+            while time.monotonic() < deadline:
                 # 进程已退出
                 if pm.comfyui_process and pm.comfyui_process.poll() is not None:
+                    _record_launch(app, pm, t0, "exited", probes)
                     _post_to_ui(app, lambda: pm.on_start_failed("进程意外退出"))
                     return
 
-                if _check_system_stats(port):
+                if ready.wait(delay):
+                    signal = "log"
+                else:
+                    probes += 1
+                    signal = "http" if _check_system_stats(port) else None
+                if signal:
                     try:
-                        app.logger.info("ComfyUI /system_stats 就绪，启动完成")
+                        app.logger.info("ComfyUI 已就绪（%s），启动完成", "监听日志" if signal == "log" else "/system_stats")
                     except Exception:
                         pass
+                    _record_launch(app, pm, t0, signal, probes)
                     _post_to_ui(app, pm.on_start_success)
                     return
 
-                time.sleep(1.5)
+                delay = min(delay * PROBE_BACKOFF, PROBE_MAX_DELAY)
 
             # 超时，但进程仍在运行 - 视为启动成功
             try:
                 if pm.comfyui_process and pm.comfyui_process.poll() is None:
                     app.logger.warning("启动轮询超时，但进程仍在运行，视为启动成功")
+                    _record_launch(app, pm, t0, "timeout", probes)
                     _post_to_ui(app, pm.on_start_success)
                 else:
                     _post_to_ui(app, lambda: pm.on_start_failed("启动超时"))
@@ -1,6 +1,9 @@
+import http.client
+import json
 import os
 import subprocess
 import time
+from collections import deque
 from utils.common import run_hidden
 
 try:
@@ -8,9 +11,152 @@ try:
 except ImportError:
     psutil = None
 
+# 调用 /interrupt、/free 的超时（秒）；ComfyUI 无响应时不拖慢停止
+API_TIMEOUT = 1.0
+# terminate 后等待整棵进程树退出的默认时长（秒），超时后只强制结束仍存活的进程
+STOP_TIMEOUT = 5.0
 
-def _stop_tracked_process(app, pm) -> bool:
+STOP_HISTORY = deque(maxlen=20)
+
+
+def _stop_options(app):
+    """``launch_options.stop_api_release`` / ``stop_timeout``。"""
+    try:
+        opts = app.config.get("launch_options") or {}
+    except Exception:
+        opts = {}
+    try:
+        timeout = float(opts.get("stop_timeout", STOP_TIMEOUT))
+    except (TypeError, ValueError):
+        timeout = STOP_TIMEOUT
+    return bool(opts.get("stop_api_release", True)), max(0.5, timeout)
+
+
+def _app_port(app) -> str:
+    try:
+        return (app.custom_port.get() or "8188").strip()
+    except Exception:
+        return "8188"
+
+
+def _request_release(port, timeout: float = API_TIMEOUT) -> dict:
+    """请 ComfyUI 中断当前任务（/interrupt）并卸载模型、释放显存（/free）。
+
+    服务不可达时立即放弃后续请求；返回各接口是否成功。
+    """
+    result = {}
+    for path, body in (
+        ("/interrupt", {}),
+        ("/free", {"unload_models": True, "free_memory": True}),
+    ):
+        name = path.lstrip("/")
+        conn = None
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", int(port), timeout=timeout)
+            conn.request(
+                "POST", path, body=json.dumps(body),
+                headers={"Content-Type": "application/json"},
+            )
+            resp = conn.getresponse()
+            resp.read()
+            result[name] = 200 <= resp.status < 300
+        except OSError:
+            result[name] = False
+            break
+        except Exception:
+            result[name] = False
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+    return result
+
+
+def _release_ports(app, proc) -> list:
+    """需要请求释放的端口：多实例为各实例端口（配置端口是代理），否则为配置端口。"""
+    instances = getattr(proc, "instances", None)
+    if isinstance(instances, list) and instances:
+        return [inst.port for inst in instances]
+    return [_app_port(app)]
+
+
+def _tree_pids(proc) -> list:
+    """可用 psutil 整树停止时返回根 PID，否则返回空列表（走逐进程终止）。"""
+    if psutil is None or proc is None:
+        return []
+    pids = getattr(proc, "pids", None)
+    if not isinstance(pids, list):
+        pids = [getattr(proc, "pid", None)]
+    return [p for p in pids if isinstance(p, int) and not isinstance(p, bool)]
+
+
+def _stop_tree(app, proc, pids, report: dict, timeout: float = STOP_TIMEOUT) -> bool:
+    """同时终止 ``pids`` 的整棵进程树，只对超时仍存活的进程强制结束。"""
+    from core.kill import stop_process_tree
+
+    try:
+        app.logger.info("停止进程树: PID=%s", ",".join(map(str, pids)))
+    except Exception:
+        pass
+    tree = stop_process_tree(pids, timeout=timeout, log=getattr(app, "logger", None))
+    report.update(
+        method="tree",
+        pids=tree["pids"],
+        terminated=tree["terminated"],
+        killed=tree["killed"],
+        survivors=tree["survivors"],
+    )
+    # 回收退出码；多实例的 wait 同时停掉代理
+    try:
+        proc.wait(timeout=1)
+    except subprocess.TimeoutExpired:
+        try:
+            proc.kill()
+        except Exception:
+            pass
+    except Exception:
+        pass
+    return True
+
+
+def _stop_instance_group(app, group) -> bool:
+    """多实例（core.multi_instance.InstanceGroup）：停代理并终止全部实例。"""
+    try:
+        app.logger.info("停止多实例: PID=%s", ",".join(map(str, group.pids)))
+    except Exception:
+        pass
+    group.terminate()
+    try:
+        group.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        group.kill()
+    except Exception:
+        pass
+    return True
+
+
+def _stop_tracked_process(app, pm, report: dict = None) -> bool:
     killed = False
+    proc = getattr(pm, "comfyui_process", None)
+    if report is None:
+        report = {}
+    pids = _tree_pids(proc)
+    if pids:
+        try:
+            alive = proc.poll() is None
+        except Exception:
+            alive = False
+        return alive and _stop_tree(app, proc, pids, report, _stop_options(app)[1])
+    report["method"] = "process"
+    try:
+        from core.multi_instance import InstanceGroup
+
+        if isinstance(proc, InstanceGroup):
+            return _stop_instance_group(app, proc)
+    except ImportError:
+        pass
     if getattr(pm, "comfyui_process", None) and pm.comfyui_process.poll() is None:
         pid_str = str(pm.comfyui_process.pid)
         if os.name == "nt":
@@ -118,18 +264,16 @@ def _stop_tracked_process(app, pm) -> bool:
     return killed
 
 
-def _stop_by_port_fallback(app) -> bool:
+def _stop_by_port_fallback(app, report: dict = None) -> bool:
     killed = False
-    if killed:
-        return killed
+    if report is None:
+        report = {}
 
-    try:
-        port = (app.custom_port.get() or "8188").strip()
-    except Exception:
-        port = "8188"
+    port = _app_port(app)
     try:
         from core.probe import find_pids_by_port_safe, is_comfyui_pid
         from core.kill import kill_pids
+        from core.port_owner import invalidate as invalidate_ports
 
         pids = []
         try:
@@ -144,6 +288,8 @@ def _stop_by_port_fallback(app) -> bool:
             )
         except Exception:
             pass
+        # 多实例模式下配置端口由启动器自身的代理监听，不能把自己当成候选
+        pids = [pid for pid in pids if pid != os.getpid()]
         filtered = [pid for pid in pids if is_comfyui_pid(app, pid)]
         try:
             app.logger.info(
@@ -160,15 +306,74 @@ def _stop_by_port_fallback(app) -> bool:
             filtered = pids
         if filtered:
             try:
-                kill_pids(app, filtered)
+                tree = kill_pids(app, filtered)
                 killed = True
+                report["method"] = "port"
+                if isinstance(tree, dict) and tree:
+                    report.update(
+                        pids=tree["pids"],
+                        terminated=tree["terminated"],
+                        killed=tree["killed"],
+                        survivors=tree["survivors"],
+                    )
+                else:
+                    report["pids"] = list(filtered)
             except Exception:
                 pass
+            # 端口属主已变化，丢弃缓存的套接字表
+            invalidate_ports()
     except Exception:
         pass
     return killed
 
 
+def _find_orphans(app, report: dict) -> list:
+    """停止后仍存活的进程：强制结束后的幸存者，加上仍在监听配置端口的进程。"""
+    orphans = list(report.get("survivors") or [])
+    try:
+        from core.port_owner import invalidate as invalidate_ports, pids_for_port
+
+        invalidate_ports()
+        for pid in pids_for_port(_app_port(app)):
+            if pid != os.getpid() and pid not in orphans:
+                orphans.append(pid)
+    except Exception:
+        pass
+    return orphans
+
+
+def _record_stop(app, pm, t0: float, report: dict) -> dict:
+    """记录一次停止的耗时与结果（日志 + ``STOP_HISTORY`` + ``pm.last_stop``）。"""
+    report["seconds"] = round(time.monotonic() - t0, 3)
+    report["finished_at"] = time.time()
+    STOP_HISTORY.append(report)
+    try:
+        pm.last_stop = report
+    except Exception:
+        pass
+    try:
+        app.logger.info(
+            "停止耗时: %.2fs（方式=%s，API 释放=%s，终止 %d 个进程，强制结束 %d 个）",
+            report["seconds"],
+            report.get("method") or "-",
+            ",".join(f"{k}={'ok' if v else 'fail'}" for k, v in report["api"].items()) or "-",
+            report.get("terminated", 0),
+            report.get("killed", 0),
+        )
+        if report["orphans"]:
+            app.logger.warning(
+                "停止后仍有残留进程: PID=%s", ",".join(map(str, report["orphans"]))
+            )
+    except Exception:
+        pass
+    return report
+
+
+def stop_history() -> list:
+    """最近若干次停止的耗时记录（旧 -> 新）。"""
+    return list(STOP_HISTORY)
+
+
 def stop(app, pm):
     try:
         app.logger.info("用户点击停止：开始关闭 ComfyUI")
@@ -176,11 +381,30 @@ def stop(app, pm):
         pass
     app._launching = False
     killed = False
+    t0 = time.monotonic()
+    report = {"method": None, "api": {}, "pids": [], "terminated": 0, "killed": 0, "orphans": []}
+
+    # 第一步：请 ComfyUI 中断任务并释放显存，之后的终止不必等 GPU 上的任务收尾
+    api_release, _timeout = _stop_options(app)
+    if api_release:
+        for port in _release_ports(app, getattr(pm, "comfyui_process", None)):
+            for name, ok in _request_release(port).items():
+                report["api"][name] = report["api"].get(name, True) and ok
 
-    killed = _stop_tracked_process(app, pm)
+    # 第二、三步：整树终止，只强制结束仍存活的进程
+    killed = _stop_tracked_process(app, pm, report)
     if not killed:
-        killed = _stop_by_port_fallback(app)
+        killed = _stop_by_port_fallback(app, report)
 
+    # 之前缓存的"可达"结果已失效，后续状态检查重新探测
+    try:
+        from core.probe_client import invalidate as invalidate_probes
+
+        invalidate_probes()
+    except Exception:
+        pass
+    report["orphans"] = _find_orphans(app, report)
+    _record_stop(app, pm, t0, report)
     try:
         app.logger.info("停止流程完成: killed=%s", killed)
     except Exception:
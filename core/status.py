@@ -0,0 +1,205 @@
+"""
+机器可读的 ComfyUI 状态
+命令行 ``--status --json`` 输出一条状态记录，``--watch`` 按固定间隔输出 JSON Lines：
+
+- 进程：PID、运行时长、就绪耗时（由守护进程提供；没有守护进程时按端口查找 PID）；
+- 服务：``/system_stats`` 的内存、各设备显存与版本信息，``/queue`` 的运行/排队任务数；
+- 版本：ComfyUI 仓库当前提交（直接读 ``.git``，不调用 git）与前端包版本。
+
+同一个 ``StatusReader`` 的所有请求复用一条 HTTP 长连接；提交与前端版本只在首次读取时获取。
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from core import daemon as DAEMON
+from core.probe_client import ProbeClient
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_WATCH_INTERVAL = 2.0
+
+_MB = 1024 * 1024
+
+
+def _mb(value) -> Optional[float]:
+    try:
+        return round(float(value) / _MB, 1)
+    except (TypeError, ValueError):
+        return None
+
+
+def comfy_root(app) -> Path:
+    """与 ``core.launcher_cmd.build_launch_params`` 相同的 ComfyUI 目录。"""
+    paths = (getattr(app, "config", None) or {}).get("paths", {}) or {}
+    return (Path(paths.get("comfyui_root") or ".").resolve() / "ComfyUI").resolve()
+
+
+def git_head(repo) -> Optional[str]:
+    """读取仓库 HEAD 指向的提交；不是 git 仓库或读不到时返回 None。"""
+    try:
+        git_dir = Path(repo) / ".git"
+        if git_dir.is_file():
+            # worktree / submodule：.git 文件内容为 "gitdir: <路径>"
+            text = git_dir.read_text(encoding="utf-8").strip()
+            if not text.startswith("gitdir:"):
+                return None
+            git_dir = (Path(repo) / text[len("gitdir:"):].strip()).resolve()
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        if not head.startswith("ref:"):
+            return head or None
+        ref = head[len("ref:"):].strip()
+        ref_file = git_dir / ref
+        if ref_file.is_file():
+            return ref_file.read_text(encoding="utf-8").strip() or None
+        packed = git_dir / "packed-refs"
+        if packed.is_file():
+            for line in packed.read_text(encoding="utf-8").splitlines():
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except Exception:
+        pass
+    return None
+
+
+def frontend_version(app) -> Optional[str]:
+    try:
+        from utils import pip as PIPUTILS
+
+        return PIPUTILS.get_package_version("comfyui-frontend-package", app.python_exec)
+    except Exception:
+        return None
+
+
+def _uptime(pid) -> Optional[float]:
+    if psutil is None or not pid:
+        return None
+    try:
+        return round(time.time() - psutil.Process(pid).create_time(), 1)
+    except Exception:
+        return None
+
+
+def _system(stats) -> Optional[dict]:
+    system = (stats or {}).get("system")
+    if not isinstance(system, dict):
+        return None
+    return {
+        "comfyui_version": system.get("comfyui_version"),
+        "python_version": system.get("python_version"),
+        "pytorch_version": system.get("pytorch_version"),
+        "ram_total_mb": _mb(system.get("ram_total")),
+        "ram_free_mb": _mb(system.get("ram_free")),
+    }
+
+
+def _devices(stats) -> list:
+    out = []
+    for d in (stats or {}).get("devices") or []:
+        if not isinstance(d, dict):
+            continue
+        out.append({
+            "index": d.get("index"),
+            "name": d.get("name"),
+            "type": d.get("type"),
+            "vram_total_mb": _mb(d.get("vram_total")),
+            "vram_free_mb": _mb(d.get("vram_free")),
+            "torch_vram_total_mb": _mb(d.get("torch_vram_total")),
+            "torch_vram_free_mb": _mb(d.get("torch_vram_free")),
+        })
+    return out
+
+
+def _queue(data) -> Optional[dict]:
+    if not isinstance(data, dict):
+        return None
+    running = len(data.get("queue_running") or [])
+    pending = len(data.get("queue_pending") or [])
+    return {"running": running, "pending": pending, "depth": running + pending}
+
+
+class StatusReader:
+    def __init__(self, app, cwd=None, timeout: float = 2.0):
+        self.app = app
+        self.cwd = cwd
+        try:
+            self.port = int((app.custom_port.get() or "8188").strip())
+        except Exception:
+            self.port = 8188
+        self.client = ProbeClient(self.port, timeout=timeout)
+        self._static = None
+
+    def static_info(self) -> dict:
+        if self._static is None:
+            self._static = {
+                "git_commit": git_head(comfy_root(self.app)),
+                "frontend_version": frontend_version(self.app),
+            }
+        return self._static
+
+    def _process(self) -> dict:
+        """守护进程提供的进程信息；没有守护进程时按端口查找。"""
+        if self.cwd is not None:
+            st = DAEMON.request(self.cwd, "status", timeout=DAEMON.CONNECT_TIMEOUT)
+            if st and st.get("ok"):
+                return {
+                    "pid": st.get("pid"),
+                    "daemon_pid": st.get("daemon_pid"),
+                    "uptime": st.get("uptime"),
+                    "ready_seconds": st.get("ready_seconds"),
+                    "state": st.get("state"),
+                }
+        from core.telemetry import port_pids
+
+        pids = port_pids(self.port)
+        pid = pids[0] if pids else None
+        return {
+            "pid": pid,
+            "daemon_pid": None,
+            "uptime": _uptime(pid),
+            "ready_seconds": None,
+            "state": None,
+        }
+
+    def read(self) -> dict:
+        running = self.client.check(max_age=0)
+        stats = self.client.last_json() if running else None
+        queue = _queue(self.client.fetch_json("/queue")) if running else None
+        record = {
+            "time": time.time(),
+            "running": running,
+            "port": self.port,
+            "latency_ms": round(self.client.last_latency * 1000, 1)
+            if running and self.client.last_latency is not None else None,
+        }
+        record.update(self._process() if running else {
+            "pid": None, "daemon_pid": None, "uptime": None, "ready_seconds": None, "state": None,
+        })
+        record["queue"] = queue
+        record["system"] = _system(stats)
+        record["devices"] = _devices(stats)
+        record.update(self.static_info())
+        return record
+
+    def watch(self, interval: float = DEFAULT_WATCH_INTERVAL, count: Optional[int] = None, out=None) -> None:
+        """每 ``interval`` 秒输出一行 JSON；``count`` 为 None 时一直输出直到被中断。"""
+        out = out or sys.stdout
+        n = 0
+        while count is None or n < count:
+            t0 = time.monotonic()
+            out.write(json.dumps(self.read(), ensure_ascii=False) + "\n")
+            out.flush()
+            n += 1
+            if count is not None and n >= count:
+                break
+            time.sleep(max(0.0, interval - (time.monotonic() - t0)))
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,157 @@
+"""
+ComfyUI 进程监管
+取代原先的轮询式监控（每 2 秒起一个线程做 HTTP 探测）与 Qt 端每 5 秒的
+状态定时器，由一个常驻线程统一负责按钮的运行状态：
+
+- 本启动器启动的子进程：阻塞在 ``Popen.wait()`` 上（POSIX 下即 waitpid，
+  Windows 下即 WaitForSingleObject），进程一退出立即感知，期间不占 CPU；
+- 没有存活的子进程（外部启动的实例、子进程刚退出端口未释放）：只做 HTTP
+  探测，状态刚变化或被 ``kick()`` 唤醒时短间隔，结果稳定后按倍数退避到上限；
+- 启动中/停止中由各自流程负责按钮状态，监管线程只等待，不覆盖中间态；
+- 子进程在这两个流程之外退出时通知 ``core.watchdog``，由其决定是否自动重启。
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from core.probe import is_http_reachable
+
+logger = logging.getLogger(__name__)
+
+# HTTP 探测间隔（秒）：状态不确定时从最小值开始，每次结果不变翻倍，直到上限
+PROBE_MIN_INTERVAL = 0.5
+PROBE_MAX_INTERVAL = 15.0
+PROBE_BACKOFF = 2.0
+# 启动中/停止中的检查间隔：这段时间按钮由启动/停止流程负责
+BUSY_INTERVAL = 0.5
+
+
+class ProcessSupervisor:
+    def __init__(self, app, process_manager):
+        self.app = app
+        self.pm = process_manager
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._interval = PROBE_MIN_INTERVAL
+        # 最近一次发布到按钮的状态；None 表示未知，下一次探测结果必定发布
+        self._published: Optional[bool] = None
+        self.active = False
+        # 统计：HTTP 探测次数、感知到的子进程退出次数
+        self.probes = 0
+        self.exits = 0
+
+    # ---- 对外接口 ----
+    def kick(self, force: bool = False) -> None:
+        """立即唤醒一次探测并把退避间隔重置为最小值。"""
+        self._interval = PROBE_MIN_INTERVAL
+        if force:
+            self._published = None
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def run(self) -> None:
+        """监管循环，阻塞直到应用退出或 ``stop()``；应在后台线程中调用。"""
+        self.active = True
+        try:
+            while not self._should_exit():
+                try:
+                    self._step()
+                except Exception as e:
+                    try:
+                        self.app.logger.warning("进程监管异常: %s", e)
+                    except Exception:
+                        pass
+                    self._sleep(PROBE_MAX_INTERVAL)
+        finally:
+            self.active = False
+
+    # ---- 内部 ----
+    def _should_exit(self) -> bool:
+        return self._stop.is_set() or bool(getattr(self.app, "_shutting_down", False))
+
+    def _busy(self) -> bool:
+        return bool(getattr(self.app, "_launching", False)) or bool(
+            getattr(self.pm, "_stopping", False)
+        )
+
+    def _sleep(self, seconds: float) -> None:
+        self._wake.wait(seconds)
+        self._wake.clear()
+
+    def _step(self) -> None:
+        proc = self.pm.comfyui_process
+        if proc is not None:
+            if proc.poll() is None:
+                self._supervise_child(proc)
+                return
+            if not self._busy():
+                # 已退出但还挂在管理器上（例如退出时正处于启动/停止流程）
+                self.pm.comfyui_process = None
+        if self._busy():
+            # 中间态结束后重新发布一次真实状态
+            self._published = None
+            self._interval = PROBE_MIN_INTERVAL
+            self._sleep(BUSY_INTERVAL)
+            return
+        # 状态未知时不用缓存的探测结果
+        running = self._probe(fresh=self._published is None)
+        self._publish(running)
+        self._sleep(self._interval)
+        self._interval = min(self._interval * PROBE_BACKOFF, PROBE_MAX_INTERVAL)
+
+    def _supervise_child(self, proc) -> None:
+        if not self._busy():
+            self._publish(True)
+        try:
+            code = proc.wait()
+        except Exception:
+            # 拿不到句柄时退回一次短间隔检查
+            self._sleep(PROBE_MIN_INTERVAL)
+            return
+        self.exits += 1
+        try:
+            self.app.logger.info(
+                "ComfyUI 进程已退出 (pid=%s, code=%s)", getattr(proc, "pid", None), code
+            )
+        except Exception:
+            pass
+        if self._busy():
+            # 启动/停止流程自己处理退出
+            return
+        if self.pm.comfyui_process is proc:
+            self.pm.comfyui_process = None
+        # 意外退出：交给看门狗决定是否自动重启
+        watchdog = getattr(self.pm, "watchdog", None)
+        if watchdog is not None:
+            try:
+                watchdog.on_exit(proc, code)
+            except Exception:
+                pass
+        # 端口可能尚未释放，或另有外部实例：立即重新探测
+        self._published = None
+        self._interval = PROBE_MIN_INTERVAL
+
+    def _probe(self, fresh: bool = False) -> bool:
+        self.probes += 1
+        try:
+            if fresh:
+                return bool(is_http_reachable(self.app, _log=False, max_age=0))
+            return bool(is_http_reachable(self.app, _log=False))
+        except Exception:
+            return False
+
+    def _publish(self, running: bool) -> None:
+        if running == self._published:
+            return
+        if self._published is not None:
+            # 状态变化：回到短间隔确认
+            self._interval = PROBE_MIN_INTERVAL
+        self._published = running
+        try:
+            self.pm._post_to_ui(lambda r=running: self.pm.apply_running_status(r))
+        except Exception:
+            pass
@@ -0,0 +1,403 @@
+"""
+ComfyUI 资源遥测
+后台线程按固定间隔采样 ComfyUI 进程树（本启动器启动的子进程及其全部子进程；
+外部启动的实例按端口找到监听进程）的 CPU、常驻内存、线程数与磁盘 I/O，
+以及每张 NVIDIA 显卡的利用率与显存，写入定长环形缓冲区：
+
+- 启动页的资源曲线从 ``TelemetrySampler.snapshot()`` 读取；
+- 命令行 ``--status`` 用 ``collect()`` 现场采样一次并用 ``format_sample()`` 输出。
+
+进程指标依赖 psutil，显卡指标优先 pynvml、其次 nvidia-smi；都缺失时对应字段为空。
+"""
+
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from core import probe_client as PROBECLIENT
+from utils.common import run_hidden
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import pynvml
+except ImportError:
+    pynvml = None
+
+# 采样间隔（秒）与保留的样本数：默认 2 秒一次，保留最近 10 分钟
+DEFAULT_INTERVAL = 2.0
+DEFAULT_HISTORY = 300
+
+_MB = 1024 * 1024
+_SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def settings_from_config(config):
+    """``launch_options.telemetry_interval`` / ``telemetry_history``，非法时取默认值。"""
+    try:
+        opts = config.get("launch_options") or {}
+    except Exception:
+        opts = {}
+    try:
+        interval = float(opts.get("telemetry_interval", DEFAULT_INTERVAL))
+    except (TypeError, ValueError):
+        interval = DEFAULT_INTERVAL
+    try:
+        history = int(opts.get("telemetry_history", DEFAULT_HISTORY))
+    except (TypeError, ValueError):
+        history = DEFAULT_HISTORY
+    return max(0.5, interval), max(10, history)
+
+
+class TreeSampler:
+    """进程树指标。保留 ``psutil.Process`` 对象，``cpu_percent`` 与 I/O 速率按相邻两次采样计算。"""
+
+    def __init__(self):
+        self._procs: Dict[int, "psutil.Process"] = {}
+        self._last_io = None
+
+    def reset(self) -> None:
+        self._procs = {}
+        self._last_io = None
+
+    def sample(self, root_pids) -> Optional[dict]:
+        if psutil is None or not root_pids:
+            self.reset()
+            return None
+        members: Dict[int, "psutil.Process"] = {}
+        for pid in root_pids:
+            try:
+                p = self._procs.get(pid) or psutil.Process(pid)
+                members[pid] = p
+                for c in p.children(recursive=True):
+                    members.setdefault(c.pid, self._procs.get(c.pid) or c)
+            except psutil.Error:
+                continue
+        if not members:
+            self.reset()
+            return None
+
+        cpu = 0.0
+        rss = 0
+        threads = 0
+        read_bytes = write_bytes = 0
+        has_io = False
+        alive = {}
+        for pid, p in members.items():
+            try:
+                with p.oneshot():
+                    cpu += p.cpu_percent(None)
+                    rss += p.memory_info().rss
+                    threads += p.num_threads()
+                    try:
+                        io = p.io_counters()
+                        read_bytes += io.read_bytes
+                        write_bytes += io.write_bytes
+                        has_io = True
+                    except (psutil.Error, AttributeError, NotImplementedError):
+                        pass
+                alive[pid] = p
+            except psutil.Error:
+                continue
+        self._procs = alive
+
+        now = time.monotonic()
+        read_bps = write_bps = None
+        if has_io:
+            if self._last_io is not None:
+                t, r, w = self._last_io
+                dt = now - t
+                if dt > 0:
+                    # 子进程退出会让累计值变小，按 0 计
+                    read_bps = max(0.0, (read_bytes - r) / dt)
+                    write_bps = max(0.0, (write_bytes - w) / dt)
+            self._last_io = (now, read_bytes, write_bytes)
+        return {
+            "processes": len(alive),
+            "cpu_percent": round(cpu, 1),
+            "rss_mb": round(rss / _MB, 1),
+            "threads": threads,
+            "io_read_bps": read_bps,
+            "io_write_bps": write_bps,
+        }
+
+
+def _num(text: str) -> Optional[float]:
+    try:
+        return float(text.strip())
+    except (TypeError, ValueError):
+        return None
+
+
+class GpuSampler:
+    """每张 NVIDIA 显卡的利用率与显存；首次采样时选定 pynvml 或 nvidia-smi。"""
+
+    def __init__(self):
+        self._backend: Optional[str] = None
+        self._smi: Optional[str] = None
+
+    def sample(self) -> List[dict]:
+        if self._backend is None:
+            self._backend = self._detect()
+        try:
+            if self._backend == "nvml":
+                return self._sample_nvml()
+            if self._backend == "smi":
+                return self._sample_smi()
+        except Exception:
+            pass
+        return []
+
+    def _detect(self) -> str:
+        if pynvml is not None:
+            try:
+                pynvml.nvmlInit()
+                return "nvml"
+            except Exception:
+                pass
+        self._smi = shutil.which("nvidia-smi")
+        return "smi" if self._smi else "none"
+
+    def _sample_nvml(self) -> List[dict]:
+        out = []
+        for i in range(pynvml.nvmlDeviceGetCount()):
+            h = pynvml.nvmlDeviceGetHandleByIndex(i)
+            mem = pynvml.nvmlDeviceGetMemoryInfo(h)
+            try:
+                util = float(pynvml.nvmlDeviceGetUtilizationRates(h).gpu)
+            except Exception:
+                util = None
+            out.append({
+                "index": i,
+                "util_percent": util,
+                "vram_used_mb": round(mem.used / _MB, 1),
+                "vram_total_mb": round(mem.total / _MB, 1),
+            })
+        return out
+
+    def _sample_smi(self) -> List[dict]:
+        r = run_hidden(
+            [
+                self._smi,
+                "--query-gpu=index,utilization.gpu,memory.used,memory.total",
+                "--format=csv,noheader,nounits",
+            ],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        if r.returncode != 0:
+            return []
+        out = []
+        for line in (r.stdout or "").splitlines():
+            parts = line.split(",")
+            if len(parts) < 4:
+                continue
+            idx = _num(parts[0])
+            if idx is None:
+                continue
+            out.append({
+                "index": int(idx),
+                "util_percent": _num(parts[1]),
+                "vram_used_mb": _num(parts[2]),
+                "vram_total_mb": _num(parts[3]),
+            })
+        return out
+
+
+def process_pids(proc) -> List[int]:
+    """``Popen`` 或多实例 ``InstanceGroup`` 的根进程 PID。"""
+    if proc is None:
+        return []
+    try:
+        if proc.poll() is not None:
+            return []
+    except Exception:
+        return []
+    pids = getattr(proc, "pids", None)
+    if pids:
+        return list(pids)
+    pid = getattr(proc, "pid", None)
+    return [pid] if pid else []
+
+
+def port_pids(port) -> List[int]:
+    """监听 ``port`` 的进程（外部启动的实例），不含启动器自身。"""
+    try:
+        from core.port_owner import pids_for_port
+
+        return [p for p in pids_for_port(int(port)) if p != os.getpid()]
+    except Exception:
+        return []
+
+
+class TelemetrySampler:
+    def __init__(self, app, process_manager, interval: float = None, history: int = None):
+        self.app = app
+        self.pm = process_manager
+        cfg_interval, cfg_history = settings_from_config(getattr(app, "config", None) or {})
+        self.interval = interval or cfg_interval
+        self._history: deque = deque(maxlen=history or cfg_history)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._tree = TreeSampler()
+        self._gpu = GpuSampler()
+
+    # ---- 生命周期 ----
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="comfyui-telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if getattr(self.app, "_shutting_down", False):
+                break
+            try:
+                self.sample_once()
+            except Exception:
+                pass
+
+    # ---- 采样 ----
+    def target_pids(self) -> List[int]:
+        pids = process_pids(getattr(self.pm, "comfyui_process", None))
+        if pids or psutil is None:
+            return pids
+        try:
+            port = (self.app.custom_port.get() or "8188").strip()
+            # 按端口找进程要扫描全系统的连接：先用（与监管线程共享缓存的）
+            # HTTP 探测确认端口上有服务，没有就跳过本次采样
+            if not PROBECLIENT.check(int(port)):
+                return []
+        except Exception:
+            return []
+        return port_pids(port)
+
+    def sample_once(self) -> Optional[dict]:
+        """采样一次并写入缓冲区；ComfyUI 未运行时不记录，返回 None。"""
+        pids = self.target_pids()
+        tree = self._tree.sample(pids)
+        if tree is None:
+            return None
+        sample = {"t": time.time(), "pids": pids}
+        sample.update(tree)
+        sample["gpus"] = self._gpu.sample()
+        with self._lock:
+            self._history.append(sample)
+        return sample
+
+    # ---- 读取 ----
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return list(self._history)
+
+    def latest(self) -> Optional[dict]:
+        with self._lock:
+            return self._history[-1] if self._history else None
+
+    def series(self, key: str, gpu: Optional[int] = None) -> List[float]:
+        """某项指标的时间序列；``gpu`` 指定时从对应显卡的记录中取值。缺失的点跳过。"""
+        return series(self.snapshot(), key, gpu)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._history.clear()
+
+
+def series(samples, key: str, gpu: Optional[int] = None) -> List[float]:
+    out = []
+    for s in samples:
+        src = s
+        if gpu is not None:
+            src = next((g for g in s.get("gpus") or [] if g.get("index") == gpu), None)
+            if src is None:
+                continue
+        v = src.get(key)
+        if v is not None:
+            out.append(float(v))
+    return out
+
+
+def collect(pids, duration: float = 1.0, samples: int = 2) -> List[dict]:
+    """命令行用：对 ``pids`` 进程树连续采样，相邻两次间隔 ``duration / (samples - 1)`` 秒。
+
+    第一次采样只用于建立 CPU/I/O 基线，不计入结果。
+    """
+    tree = TreeSampler()
+    gpu = GpuSampler()
+    if tree.sample(pids) is None:
+        return []
+    step = duration / max(1, samples - 1)
+    out = []
+    for _ in range(max(1, samples - 1)):
+        time.sleep(step)
+        s = tree.sample(pids)
+        if s is None:
+            break
+        s["t"] = time.time()
+        s["pids"] = list(pids)
+        s["gpus"] = gpu.sample()
+        out.append(s)
+    return out
+
+
+def sparkline(values: List[float], width: int = 40) -> str:
+    """文本迷你曲线（取最近 ``width`` 个点，按区间最小/最大值缩放）。"""
+    values = [v for v in values if v is not None][-width:]
+    if not values:
+        return ""
+    lo, hi = min(values), max(values)
+    if hi - lo <= 1e-9:
+        return _SPARK_CHARS[0] * len(values)
+    scale = (len(_SPARK_CHARS) - 1) / (hi - lo)
+    return "".join(_SPARK_CHARS[int(round((v - lo) * scale))] for v in values)
+
+
+def _rate(bps: Optional[float]) -> str:
+    if bps is None:
+        return "n/a"
+    return f"{bps / _MB:.1f} MB/s"
+
+
+def format_sample(sample: dict, history: Optional[List[dict]] = None) -> List[str]:
+    """一条样本的文本描述；给出 ``history`` 时附带 CPU/内存/显存曲线。"""
+    lines = [
+        "Processes: {} (PID {})".format(
+            sample.get("processes"), ", ".join(map(str, sample.get("pids") or []))
+        ),
+        "CPU: {:.1f}%".format(sample.get("cpu_percent") or 0.0),
+        "RSS: {:.1f} MB".format(sample.get("rss_mb") or 0.0),
+        "Threads: {}".format(sample.get("threads")),
+        "I/O: read {} / write {}".format(
+            _rate(sample.get("io_read_bps")), _rate(sample.get("io_write_bps"))
+        ),
+    ]
+    for g in sample.get("gpus") or []:
+        util = g.get("util_percent")
+        lines.append(
+            "GPU{}: {} util, VRAM {:.0f} / {:.0f} MB".format(
+                g.get("index"),
+                "n/a" if util is None else f"{util:.0f}%",
+                g.get("vram_used_mb") or 0.0,
+                g.get("vram_total_mb") or 0.0,
+            )
+        )
+    if history and len(history) > 1:
+        lines.append("CPU  " + sparkline(series(history, "cpu_percent")))
+        lines.append("RSS  " + sparkline(series(history, "rss_mb")))
+        for g in sample.get("gpus") or []:
+            idx = g.get("index")
+            lines.append(f"VRAM{idx} " + sparkline(series(history, "vram_used_mb", gpu=idx)))
+    return lines
@@ -10,6 +10,7 @@ from PyQt5 import QtCore
 from utils.common import run_hidden
 from utils import pip as PIPUTILS
 from utils import paths as PATHS
+from utils import env_agent as ENVAGENT
 
 
 class BaseVersionWorker(QtCore.QThread):
@@ -38,6 +39,16 @@ class BaseVersionWorker(QtCore.QThread):
             cfg = None
         return PATHS.comfy_root_from_config(cfg if isinstance(cfg, dict) else {})
 
+    def _agent_query(self, op, **args):
+        """向目标解释器里的常驻助手查询；不可用时返回 None，由调用方走一次性子进程。"""
+        return ENVAGENT.query(
+            self.app.python_exec,
+            op,
+            timeout=self.TIMEOUT,
+            log=getattr(self.app, "logger", None),
+            **args,
+        )
+
     def _log(self, level, msg, *args):
         """安全日志方法"""
         try:
@@ -59,17 +70,21 @@ class PythonVersionWorker(BaseVersionWorker):
                 self.versionReady.emit("未找到")
                 return
 
-            r = run_hidden(
-                [self.app.python_exec, "--version"],
-                capture_output=True,
-                text=True,
-                timeout=self.TIMEOUT,
-            )
-            val = (
-                r.stdout.strip().replace("Python ", "")
-                if r.returncode == 0
-                else "获取失败"
-            )
+            info = self._agent_query("python")
+            if isinstance(info, dict) and info.get("version"):
+                val = info["version"]
+            else:
+                r = run_hidden(
+                    [self.app.python_exec, "--version"],
+                    capture_output=True,
+                    text=True,
+                    timeout=self.TIMEOUT,
+                )
+                val = (
+                    r.stdout.strip().replace("Python ", "")
+                    if r.returncode == 0
+                    else "获取失败"
+                )
             self.versionReady.emit(val)
             self._log("info", "Python 版本=%s", val)
         except Exception as e:
@@ -286,46 +301,18 @@ class GpuCheckWorker(BaseVersionWorker):
             gpu_name = None
             driver_version = None
 
-            # 方法1: pynvml
-            pynvml_script = """
-import sys
-import os
-import warnings
-warnings.filterwarnings("ignore")
+            # 方法0: 常驻助手里的 pynvml（不用再起解释器）
+            info = self._agent_query("gpus")
+            if isinstance(info, dict):
+                gpus = info.get("gpus") or []
+                if gpus:
+                    gpu_name = gpus[0].get("name")
+                    driver_version = info.get("driver")
+                    self._log("info", "助手检测成功 - GPU=%s Driver=%s", gpu_name, driver_version)
 
-try:
-    import pynvml
-    pynvml.nvmlInit()
-    count = pynvml.nvmlDeviceGetCount()
-    if count > 0:
-        handle = pynvml.nvmlDeviceGetHandleByIndex(0)
-        name = pynvml.nvmlDeviceGetName(handle)
-        if isinstance(name, bytes):
-            name = name.decode("utf-8")
-        driver = pynvml.nvmlSystemGetDriverVersion()
-        print(f"{name}|{driver}")
-    else:
-        print("无NVIDIA显卡")
-except Exception as e:
-    print(f"pynvml错误:{e}")
-"""
-
-            result = run_hidden(
-                [self.app.python_exec, "-c", pynvml_script],
-                capture_output=True,
-                text=True,
-                timeout=30,
-            )
-
-            if result.returncode == 0 and result.stdout.strip():
-                output = result.stdout.strip()
-                if "|" in output:
-                    gpu_name, driver_version = output.split("|", 1)
-                    self._log("info", "pynvml 检测成功 - GPU=%s Driver=%s", gpu_name, driver_version)
-                else:
-                    self._log("info", "pynvml 输出: %s", output)
-            else:
-                self._log("warning", "pynvml 检测失败: rc=%s", result.returncode)
+            # 方法1: pynvml（一次性子进程）；助手已应答（含“没有显卡”）时跳过
+            if not isinstance(info, dict):
+                gpu_name, driver_version = self._check_via_pynvml_script()
 
             # 方法2: nvidia-smi 兜底
             if not gpu_name:
@@ -364,6 +351,47 @@ except Exception as e:
             if self.attempt < self.MAX_RETRIES:
                 self.retryNeeded.emit(self.attempt)
 
+    def _check_via_pynvml_script(self):
+        """一次性子进程跑 pynvml，返回 ``(显卡名, 驱动版本)``，失败时为 ``(None, None)``。"""
+        pynvml_script = """
+import sys
+import os
+import warnings
+warnings.filterwarnings("ignore")
+
+try:
+    import pynvml
+    pynvml.nvmlInit()
+    count = pynvml.nvmlDeviceGetCount()
+    if count > 0:
+        handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+        name = pynvml.nvmlDeviceGetName(handle)
+        if isinstance(name, bytes):
+            name = name.decode("utf-8")
+        driver = pynvml.nvmlSystemGetDriverVersion()
+        print(f"{name}|{driver}")
+    else:
+        print("无NVIDIA显卡")
+except Exception as e:
+    print(f"pynvml错误:{e}")
+"""
+        result = run_hidden(
+            [self.app.python_exec, "-c", pynvml_script],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            output = result.stdout.strip()
+            if "|" in output:
+                gpu_name, driver_version = output.split("|", 1)
+                self._log("info", "pynvml 检测成功 - GPU=%s Driver=%s", gpu_name, driver_version)
+                return gpu_name, driver_version
+            self._log("info", "pynvml 输出: %s", output)
+        else:
+            self._log("warning", "pynvml 检测失败: rc=%s", result.returncode)
+        return None, None
+
 
 class GpuEnumerateWorker(BaseVersionWorker):
     """枚举所有可见 GPU（含索引、名称、显存），供启动器显卡下拉使用。"""
@@ -389,6 +417,16 @@ class GpuEnumerateWorker(BaseVersionWorker):
         self.inventoryReady.emit(inventory)
 
     def _enumerate_via_pynvml(self):
+        info = self._agent_query("gpus")
+        if isinstance(info, dict):
+            return [
+                {
+                    "index": int(g.get("index", i)),
+                    "name": str(g.get("name") or ""),
+                    "memory_mb": int(g.get("memory_mb") or 0),
+                }
+                for i, g in enumerate(info.get("gpus") or [])
+            ]
         script = """
 import sys, os, warnings
 warnings.filterwarnings("ignore")
@@ -490,5 +528,136 @@ except Exception as e:
         return out
 
 
+class EnvProbeWorker(BaseVersionWorker):
+    """一次探测拿全 Python / torch / 前端包 / 模板库 / GPU 信息，分发到原有的各个信号。
+
+    取代分别起解释器的 Python/Torch/前端/模板/GPU 检测与 GPU 枚举六个 worker；
+    探测本身失败时发 ``probeFailed``，由调用方退回逐项 worker。
+    """
+
+    pythonVersionReady = QtCore.pyqtSignal(str)
+    torchVersionReady = QtCore.pyqtSignal(str)
+    frontendVersionReady = QtCore.pyqtSignal(str)
+    templateVersionReady = QtCore.pyqtSignal(str)
+    gpuStatusReady = QtCore.pyqtSignal(str)
+    inventoryReady = QtCore.pyqtSignal(list)
+    probeFailed = QtCore.pyqtSignal()
+
+    def run(self):
+        try:
+            root = self._get_paths()
+            if not root.exists():
+                for sig in (
+                    self.pythonVersionReady,
+                    self.torchVersionReady,
+                    self.frontendVersionReady,
+                    self.templateVersionReady,
+                ):
+                    sig.emit("未找到")
+                self._emit_gpu(None)
+                return
+
+            data = ENVAGENT.probe(
+                self.app.python_exec,
+                timeout=self.TIMEOUT,
+                log=getattr(self.app, "logger", None),
+            )
+            if not isinstance(data, dict):
+                self._log("warning", "环境探测失败，改为逐项检测")
+                self.probeFailed.emit()
+                return
+
+            py = (data.get("python") or {}).get("version")
+            pkgs = data.get("packages") or {}
+            torch_v = pkgs.get("torch")
+            frontend_v = pkgs.get("comfyui-frontend-package")
+            template_v = pkgs.get("comfyui-workflow-templates")
+            self.pythonVersionReady.emit(py or "获取失败")
+            self.torchVersionReady.emit(torch_v or "未安装")
+            self.frontendVersionReady.emit(frontend_v or "未安装")
+            self.templateVersionReady.emit(template_v or "未安装")
+            self._log(
+                "info",
+                "环境探测: Python=%s Torch=%s CUDA=%s 前端包=%s 模板库=%s",
+                py,
+                torch_v or "未安装",
+                "可用" if data.get("cuda_available") else "不可用",
+                frontend_v or "未安装",
+                template_v or "未安装",
+            )
+            self._emit_gpu(data.get("gpu"))
+        except Exception as e:
+            self._log("warning", "环境探测异常: %s", e)
+            if self.attempt < self.MAX_RETRIES:
+                self.retryNeeded.emit(self.attempt)
+            else:
+                self.probeFailed.emit()
+
+    def _emit_gpu(self, gpu):
+        gpu = gpu if isinstance(gpu, dict) else {}
+        driver = gpu.get("driver")
+        inventory = [
+            {
+                "index": int(g.get("index", i)),
+                "name": str(g.get("name") or ""),
+                "memory_mb": int(g.get("memory_mb") or 0),
+            }
+            for i, g in enumerate(gpu.get("gpus") or [])
+        ]
+        if not inventory:
+            # pynvml 不可用时 nvidia-smi 一次拿齐索引、名称、显存与驱动版本
+            driver, inventory = self._query_nvidia_smi()
+        if inventory:
+            name = inventory[0]["name"]
+            self.gpuStatusReady.emit(f"✓ {name} ({driver})" if driver else f"✓ {name}")
+        else:
+            self.gpuStatusReady.emit("未检测到NVIDIA显卡")
+        self._log("info", "gpu: 探测完成 共 %d 张", len(inventory))
+        self.inventoryReady.emit(inventory)
+
+    def _query_nvidia_smi(self):
+        import shutil
+
+        nvidia_smi = shutil.which("nvidia-smi")
+        if not nvidia_smi:
+            return None, []
+        try:
+            r = run_hidden(
+                [
+                    nvidia_smi,
+                    "--query-gpu=index,name,memory.total,driver_version",
+                    "--format=csv,noheader,nounits",
+                ],
+                capture_output=True,
+                text=True,
+                timeout=10,
+            )
+        except Exception as e:
+            self._log("warning", "nvidia-smi 检测失败: %s", e)
+            return None, []
+        if r.returncode != 0 or not r.stdout.strip():
+            return None, []
+        driver = None
+        out = []
+        for line in r.stdout.strip().splitlines():
+            parts = [p.strip() for p in line.split(",")]
+            if len(parts) < 2:
+                continue
+            try:
+                idx = int(parts[0])
+            except Exception:
+                continue
+            mem_mb = 0
+            if len(parts) >= 3:
+                try:
+                    mem_mb = int(float(parts[2]))
+                except Exception:
+                    mem_mb = 0
+            if len(parts) >= 4 and not driver:
+                driver = parts[3] or None
+            out.append({"index": idx, "name": parts[1], "memory_mb": mem_mb})
+        return driver, out
+
+
 # Alias for backward compatibility
 CoreVersionWorker = ComfyUIVersionWorker
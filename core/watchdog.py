@@ -0,0 +1,372 @@
+"""
+ComfyUI 看门狗
+在 ``core.supervisor`` 的基础上为本启动器启动的 ComfyUI 提供自动恢复：
+
+- 进程意外退出（不是用户点击停止、也不在启动流程中）：按指数退避延迟后自动重新启动；
+- 无响应：定期以 ``hang_timeout`` 为超时探测 ``/system_stats``，连续 ``hang_checks``
+  次超时或失败即判定卡死，结束进程后走同样的重启流程；
+- 资源超限（可选）：进程树常驻内存或 ComfyUI 报告的显存超过阈值时回收重启；
+- 重启预算：``restart_window`` 秒内最多自动重启 ``max_restarts`` 次，耗尽后不再重启。
+
+每个动作都通过 ``core.process_events`` 发出事件。配置项为 ``launch_options.watchdog_*``，
+默认关闭，每次检查时重新读取，修改设置后无需重启启动器。
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from core import probe_client as PROBECLIENT
+from core.process_events import ProcessEvent, emit_event
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# 上次启动后稳定运行超过该时长（秒）再崩溃，退避从初始值重新开始
+STABLE_UPTIME = 300.0
+# 退避倍数
+BACKOFF_FACTOR = 2.0
+
+_MB = 1024 * 1024
+
+
+def _opt(opts: dict, key: str, default, cast):
+    try:
+        value = opts.get(key)
+        if value is None or value == "":
+            return default
+        return cast(value)
+    except Exception:
+        return default
+
+
+class WatchdogPolicy:
+    def __init__(
+        self,
+        enabled: bool = False,
+        max_restarts: int = 5,
+        restart_window: float = 600.0,
+        backoff_initial: float = 2.0,
+        backoff_max: float = 120.0,
+        hang_timeout: float = 10.0,
+        hang_checks: int = 3,
+        check_interval: float = 15.0,
+        rss_limit_mb: float = 0,
+        vram_limit_mb: float = 0,
+    ):
+        self.enabled = enabled
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.hang_timeout = hang_timeout
+        self.hang_checks = hang_checks
+        self.check_interval = check_interval
+        # 0 表示不限制
+        self.rss_limit_mb = rss_limit_mb
+        self.vram_limit_mb = vram_limit_mb
+
+    @classmethod
+    def from_config(cls, config) -> "WatchdogPolicy":
+        """从 ``launch_options.watchdog_*`` 读取；缺省或非法的项使用默认值。"""
+        try:
+            opts = config.get("launch_options") or {}
+        except Exception:
+            opts = {}
+        d = cls()
+        return cls(
+            enabled=bool(opts.get("watchdog_enabled", d.enabled)),
+            max_restarts=max(0, _opt(opts, "watchdog_max_restarts", d.max_restarts, int)),
+            restart_window=max(0.0, _opt(opts, "watchdog_restart_window", d.restart_window, float)),
+            backoff_initial=max(0.0, _opt(opts, "watchdog_backoff_initial", d.backoff_initial, float)),
+            backoff_max=max(0.0, _opt(opts, "watchdog_backoff_max", d.backoff_max, float)),
+            hang_timeout=max(0.5, _opt(opts, "watchdog_hang_timeout", d.hang_timeout, float)),
+            hang_checks=max(1, _opt(opts, "watchdog_hang_checks", d.hang_checks, int)),
+            check_interval=max(1.0, _opt(opts, "watchdog_check_interval", d.check_interval, float)),
+            rss_limit_mb=max(0.0, _opt(opts, "watchdog_rss_limit_mb", d.rss_limit_mb, float)),
+            vram_limit_mb=max(0.0, _opt(opts, "watchdog_vram_limit_mb", d.vram_limit_mb, float)),
+        )
+
+
+def rss_mb(proc) -> Optional[float]:
+    """进程（多实例时为全部实例）及其子进程的常驻内存合计（MB）；无 psutil 时返回 None。"""
+    if psutil is None:
+        return None
+    pids = getattr(proc, "pids", None) or [getattr(proc, "pid", None)]
+    total = 0
+    seen = False
+    for pid in pids:
+        if pid is None:
+            continue
+        try:
+            p = psutil.Process(pid)
+            members = [p] + p.children(recursive=True)
+        except Exception:
+            continue
+        for m in members:
+            try:
+                total += m.memory_info().rss
+                seen = True
+            except Exception:
+                continue
+    return total / _MB if seen else None
+
+
+def vram_mb(stats) -> Optional[float]:
+    """``/system_stats`` 中各 GPU 设备的显存占用合计（MB）。
+
+    优先用 ``torch_vram_total``（该 ComfyUI 进程中 PyTorch 占用的显存），
+    没有时退回整卡的 ``vram_total - vram_free``。
+    """
+    if not isinstance(stats, dict):
+        return None
+    total = 0.0
+    seen = False
+    for dev in stats.get("devices") or []:
+        if not isinstance(dev, dict) or str(dev.get("type", "")).lower() == "cpu":
+            continue
+        try:
+            used = dev.get("torch_vram_total")
+            if used is None:
+                used = float(dev["vram_total"]) - float(dev["vram_free"])
+            total += float(used)
+            seen = True
+        except Exception:
+            continue
+    return total / _MB if seen else None
+
+
+class Watchdog:
+    def __init__(self, app, process_manager):
+        self.app = app
+        self.pm = process_manager
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._timer: Optional[threading.Timer] = None
+        # 预算窗口内已计划的重启时间点
+        self._restart_times: deque = deque()
+        # 连续重启次数，决定下一次退避时长
+        self._attempt = 0
+        # 看门狗主动结束进程的原因（hang/rss/vram），进程退出时据此标注重启原因
+        self._pending_reason: Optional[str] = None
+        self._failures = 0
+        # 统计
+        self.restarts = 0
+        self.hangs = 0
+        self.limit_hits = 0
+
+    def policy(self) -> WatchdogPolicy:
+        return WatchdogPolicy.from_config(getattr(self.app, "config", None) or {})
+
+    # ---- 生命周期 ----
+    def start(self) -> None:
+        """启动健康检查线程（未开启时线程只按间隔读取配置）。"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="comfyui-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.cancel()
+
+    def cancel(self) -> None:
+        """取消尚未执行的自动重启（用户手动停止/启动时调用）。"""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+
+    @property
+    def restart_pending(self) -> bool:
+        return self._timer is not None
+
+    # ---- 意外退出 ----
+    def on_exit(self, proc, code) -> bool:
+        """监管线程发现子进程在启动/停止流程之外退出时调用；返回是否已计划重启。"""
+        reason = self._pending_reason or "crash"
+        self._pending_reason = None
+        self._failures = 0
+        policy = self.policy()
+        if not policy.enabled or self._shutting_down():
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if self._uptime() >= STABLE_UPTIME:
+                self._attempt = 0
+            while self._restart_times and now - self._restart_times[0] > policy.restart_window:
+                self._restart_times.popleft()
+            exhausted = len(self._restart_times) >= policy.max_restarts
+            if not exhausted:
+                self._restart_times.append(now)
+                self._attempt += 1
+                attempt = self._attempt
+                delay = min(
+                    policy.backoff_initial * BACKOFF_FACTOR ** (attempt - 1), policy.backoff_max
+                )
+        if exhausted:
+            self._log(
+                "error",
+                "看门狗: %s 秒内已自动重启 %s 次，不再重启 (原因=%s, code=%s)",
+                policy.restart_window, len(self._restart_times), reason, code,
+            )
+            emit_event(ProcessEvent.RESTART_BUDGET_EXHAUSTED, {
+                "reason": reason,
+                "restarts": len(self._restart_times),
+                "window": policy.restart_window,
+            })
+            return False
+        self.restarts += 1
+        self._log(
+            "warning",
+            "看门狗: ComfyUI 异常退出 (原因=%s, code=%s)，%.1f 秒后第 %s 次自动重启",
+            reason, code, delay, attempt,
+        )
+        emit_event(ProcessEvent.WATCHDOG_RESTART, {
+            "reason": reason,
+            "attempt": attempt,
+            "delay": delay,
+            "exit_code": code,
+        })
+        self._schedule(delay)
+        return True
+
+    def _schedule(self, delay: float) -> None:
+        timer = threading.Timer(delay, self._restart)
+        timer.daemon = True
+        with self._lock:
+            old, self._timer = self._timer, timer
+        if old is not None:
+            old.cancel()
+        timer.start()
+
+    def _restart(self) -> None:
+        with self._lock:
+            self._timer = None
+        if self._stop.is_set() or self._shutting_down() or self._busy():
+            return
+        # 等待期间用户已手动启动，或端口上已有其他实例
+        proc = self.pm.comfyui_process
+        try:
+            if proc is not None and proc.poll() is None:
+                return
+        except Exception:
+            pass
+        port = self._port()
+        if port is not None and PROBECLIENT.check(port, max_age=0):
+            self._log("info", "看门狗: 端口 %s 已有服务响应，跳过自动重启", port)
+            return
+        self._log("info", "看门狗: 自动重启 ComfyUI")
+        self.pm._post_to_ui(self.pm.start_comfyui)
+
+    # ---- 健康检查 ----
+    def _run(self) -> None:
+        while not self._stop.is_set() and not self._shutting_down():
+            policy = self.policy()
+            if self._stop.wait(policy.check_interval):
+                break
+            if not policy.enabled:
+                self._failures = 0
+                continue
+            try:
+                self.check(policy)
+            except Exception as e:
+                self._log("warning", "看门狗检查异常: %s", e)
+
+    def check(self, policy: Optional[WatchdogPolicy] = None) -> Optional[str]:
+        """对运行中的子进程做一次健康检查；需要回收时结束进程并返回原因。"""
+        policy = policy or self.policy()
+        proc = self.pm.comfyui_process
+        if proc is None or self._busy() or self._pending_reason:
+            self._failures = 0
+            return None
+        try:
+            if proc.poll() is not None:
+                return None
+        except Exception:
+            return None
+        port = self._port()
+        if port is None:
+            return None
+
+        client = PROBECLIENT.get_client(port)
+        ok = client.check(max_age=0, timeout=policy.hang_timeout)
+        if not ok:
+            self._failures += 1
+            if self._failures < policy.hang_checks:
+                return None
+            self.hangs += 1
+            latency = client.last_latency
+            self._log(
+                "warning",
+                "看门狗: /system_stats 连续 %s 次无响应 (最近耗时 %.1fs)，判定卡死",
+                self._failures, latency or 0.0,
+            )
+            emit_event(ProcessEvent.HANG_DETECTED, {"latency": latency, "failures": self._failures})
+            return self._recycle("hang")
+        self._failures = 0
+
+        for resource, value, limit in (
+            ("rss", rss_mb(proc) if policy.rss_limit_mb else None, policy.rss_limit_mb),
+            ("vram", vram_mb(client.last_json()) if policy.vram_limit_mb else None, policy.vram_limit_mb),
+        ):
+            if value is not None and value > limit:
+                self.limit_hits += 1
+                self._log(
+                    "warning", "看门狗: %s 占用 %.0f MB 超过阈值 %.0f MB，回收重启",
+                    resource.upper(), value, limit,
+                )
+                emit_event(ProcessEvent.RESOURCE_LIMIT, {
+                    "resource": resource, "value_mb": value, "limit_mb": limit,
+                })
+                return self._recycle(resource)
+        return None
+
+    def _recycle(self, reason: str) -> str:
+        """结束子进程；退出由监管线程感知后交给 ``on_exit`` 计划重启。"""
+        self._pending_reason = reason
+        try:
+            from core.runner_stop import _stop_tracked_process
+
+            _stop_tracked_process(self.app, self.pm)
+        except Exception as e:
+            self._log("warning", "看门狗: 结束进程失败: %s", e)
+        PROBECLIENT.invalidate()
+        return reason
+
+    # ---- 内部 ----
+    def _busy(self) -> bool:
+        return bool(getattr(self.app, "_launching", False)) or bool(
+            getattr(self.pm, "_stopping", False)
+        )
+
+    def _shutting_down(self) -> bool:
+        return bool(getattr(self.app, "_shutting_down", False))
+
+    def _port(self) -> Optional[int]:
+        try:
+            return int((self.app.custom_port.get() or "8188").strip())
+        except Exception:
+            return None
+
+    def _uptime(self) -> float:
+        """距上次启动就绪的时长；没有启动记录时视为刚启动。"""
+        try:
+            finished = float(self.pm.last_launch["finished_at"])
+        except Exception:
+            return 0.0
+        return max(0.0, time.time() - finished)
+
+    def _log(self, level: str, msg: str, *args) -> None:
+        try:
+            getattr(self.app.logger, level)(msg, *args)
+        except Exception:
+            getattr(logger, level)(msg, *args)
@@ -118,6 +118,8 @@ class HeadlessAppContext:
             FileNotFoundError: If config file is missing
         """
         self._cwd = cwd
+        # 与 GUI 的 base_root 一致：launcher/ 目录（配置、日志）所在的根
+        self.base_root = Path(cwd).resolve()
         config_file = Path(cwd) / "launcher" / "config.json"
 
         if not config_file.exists():
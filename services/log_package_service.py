@@ -16,9 +16,10 @@ from utils import paths as PATHS
 
 
 _SOURCES: List[Tuple[str, str]] = [
-    # (label, "comfyui" | "launcher" | "config")
+    # (label, "comfyui" | "launcher" | "output" | "config")
     ("comfyui.log", "comfyui"),
     ("launcher.log", "launcher"),
+    ("comfyui_output.log", "output"),
     ("config.json", "config"),
 ]
 
@@ -44,6 +45,20 @@ def _resolve_launcher_log(app) -> Optional[Path]:
         return None
 
 
+def _resolve_output_log(app) -> Optional[Path]:
+    # ComfyUI stdout/stderr captured by the launcher (core/output_capture.py)
+    try:
+        capture = getattr(getattr(app, "process_manager", None), "output_capture", None)
+        path = getattr(capture, "log_path", None)
+        if not isinstance(path, Path):
+            from core.output_capture import LOG_NAME, default_log_dir
+
+            path = default_log_dir(app) / LOG_NAME
+        return path if path.exists() else None
+    except Exception:
+        return None
+
+
 def _resolve_config(app) -> Optional[Path]:
     try:
         # Match the canonical path used by the rest of the app
@@ -75,6 +90,7 @@ def _resolve_config(app) -> Optional[Path]:
 _RESOLVERS = {
     "comfyui": _resolve_comfyui_log,
     "launcher": _resolve_launcher_log,
+    "output": _resolve_output_log,
     "config": _resolve_config,
 }
 
@@ -4,6 +4,14 @@ import subprocess
 from utils import paths as PATHS
 from utils import pip as PIPUTILS
 from utils import net as NETUTILS
+from utils import wheel_cache as WHEELCACHE
+from utils import installer_backend as INSTALLER
+from utils import pip_prefetch as PIPPREFETCH
+from utils import req_fingerprint as REQFP
+from utils import req_union as REQUNION
+from utils import env_lock as ENVLOCK
+from utils import pep440 as PEP440
+from utils import pip_index as PIPINDEX
 import re
 
 
@@ -82,6 +90,7 @@ class UpdateService:
             return None
 
     def update_frontend(self, notify: bool = False) -> Dict[str, Any]:
+        self._configure_wheel_cache()
         idx = self._resolve_index_url()
         pkg = "comfyui-frontend-package"
         target = self._resolve_target_spec(pkg)
@@ -102,6 +111,7 @@ class UpdateService:
         }
 
     def update_templates(self, notify: bool = False) -> Dict[str, Any]:
+        self._configure_wheel_cache()
         idx = self._resolve_index_url()
         pkg = "comfyui-workflow-templates"
         target = self._resolve_target_spec(pkg)
@@ -192,6 +202,9 @@ class UpdateService:
             )
         )
         pre_core = None
+        if do_core_first or needs_consistency:
+            # 更新前留一份环境锁文件，依赖升级出问题时可 restore_environment 回滚
+            self.snapshot_environment(reason="batch_update")
         if do_core_first:
             try:
                 pre_core = self._safe_get_current_kernel_version()
@@ -222,6 +235,7 @@ class UpdateService:
                     results.append(core_res)
                 # 在内核升级后执行 requirements*.txt 安装，确保前端与模板库等依赖一致
                 if needs_consistency:
+                    self._configure_wheel_cache()
                     comfy_root = self._resolve_comfy_root()
                     idx = self._resolve_index_url()
                     req_files = self._collect_requirement_files(comfy_root)
@@ -238,6 +252,8 @@ class UpdateService:
                                 index_url=idx,
                                 upgrade=False,
                                 logger=self.app.logger,
+                                plan=self._plan_requirements_enabled(),
+                                **self._prefetch_options(),
                             )
                             ok = res.get("success") and not res.get("error")
                             sync_summary.append(f"{rf.name}: {'OK' if ok else 'FAIL'}")
@@ -328,13 +344,24 @@ class UpdateService:
                     lines.append("模板库：更新流程完成")
         return results, "\n".join(lines)
 
-    def sync_requirements_files(self, on_progress=None) -> Dict[str, Any]:
+    def sync_requirements_files(self, on_progress=None, force: bool = False) -> Dict[str, Any]:
         needs_consistency = self._needs_consistency()
         if not needs_consistency:
             return {"component": "requirements", "updated": False}
+        self._configure_wheel_cache()
         comfy_root = self._resolve_comfy_root()
         idx = self._resolve_index_url()
         req_files = self._collect_requirement_files(comfy_root)
+        python_exec = self._resolve_python_exec()
+        # 同步指纹：requirements 内容、解释器、已安装包集合都与上次成功同步
+        # 一致时，整个文件跳过。force=True 时忽略已有指纹（仍会在成功后记录）。
+        fp_store = self._fingerprint_store()
+        fp_extra = sorted(FROZEN_PKGS)
+        env_state = REQFP.environment_state(python_exec) if fp_store else None
+        # 每个文件同步成功后的 (指纹对应的环境状态, 指纹)；只有环境状态与
+        # 全部同步结束时一致的才落盘——后面的文件改动了环境，前面的结论就不再可靠。
+        fp_pending: Dict[Path, Tuple[str, str]] = {}
+        unchanged: List[str] = []
         sync_summary = []
         installed_all = []
         satisfied_all = []
@@ -347,17 +374,29 @@ class UpdateService:
         any_success = False
         any_partial = False
         for rf in req_files:
+            if fp_store is not None and env_state and not force:
+                try:
+                    fp = REQFP.compute(rf, python_exec, env_state, fp_extra)
+                    if fp and fp_store.get(rf) == fp:
+                        self.app.logger.info("依赖同步指纹未变化，跳过: %s", rf)
+                        sync_summary.append(f"{rf.name}: unchanged")
+                        unchanged.append(rf.name)
+                        continue
+                except Exception:
+                    pass
             try:
                 # 不加 -U：pip 默认只有本地不满足 spec 时才装。
                 # 加 -U 会强行追新到最新版，对 transformers / tokenizers 这类库很危险。
                 res = PIPUTILS.install_requirements_file(
                     rf,
-                    self._resolve_python_exec(),
+                    python_exec,
                     index_url=idx,
                     upgrade=False,
                     logger=self.app.logger,
                     on_progress=on_progress,
                     ignore_pkgs=FROZEN_PKGS,
+                    plan=self._plan_requirements_enabled(),
+                    **self._prefetch_options(),
                 )
                 ok = res.get("success") and not res.get("error")
                 sync_summary.append(f"{rf.name}: {'OK' if ok else 'FAIL'}")
@@ -386,12 +425,28 @@ class UpdateService:
                     error_code = rc
                 if ok:
                     any_success = True
+                if fp_store is not None:
+                    fp_store.put(rf, None)
+                    if ok and not res.get("missing") and not res.get("failed"):
+                        env_state = REQFP.environment_state(python_exec)
+                        fp = REQFP.compute(rf, python_exec, env_state, fp_extra) if env_state else None
+                        if fp:
+                            fp_pending[rf] = (env_state, fp)
             except Exception as e:
                 sync_summary.append(f"{rf.name}: FAIL")
+        if fp_pending:
+            try:
+                final_state = REQFP.environment_state(python_exec)
+                for rf, (state, fp) in fp_pending.items():
+                    if state == final_state:
+                        fp_store.put(rf, fp)
+            except Exception:
+                pass
         return {
             "component": "requirements",
             "updated": any_success and not error_parts,
             "partial": any_partial,
+            "unchanged": unchanged,
             "summary": "; ".join(sync_summary),
             "installed": installed_all,
             "satisfied": satisfied_all,
@@ -402,6 +457,194 @@ class UpdateService:
             "error": "; ".join(error_parts) if error_parts else None,
         }
 
+    def _locks_dir(self) -> Optional[Path]:
+        """环境锁文件目录（配置文件旁的 env-locks）；拿不到配置文件路径时为 None。"""
+        try:
+            cfg_file = getattr(getattr(self.app, "config_manager", None), "config_file", None)
+            if isinstance(cfg_file, (str, Path)) and str(cfg_file):
+                return ENVLOCK.locks_dir_for(cfg_file)
+        except Exception:
+            pass
+        return None
+
+    def snapshot_environment(self, reason: str = "") -> Optional[Path]:
+        """把已安装分发包与 ComfyUI 的 git HEAD 写入锁文件，返回路径；失败返回 None。"""
+        locks_dir = self._locks_dir()
+        if locks_dir is None:
+            return None
+        try:
+            core = self._safe_get_current_kernel_version() or {}
+            git = {
+                "commit": core.get("commit") if isinstance(core, dict) else None,
+                "tag": core.get("tag") if isinstance(core, dict) else None,
+            }
+            lock = ENVLOCK.snapshot(self._resolve_python_exec(), git=git, reason=reason)
+            if lock is None:
+                return None
+            path = ENVLOCK.save(lock, locks_dir)
+            self.app.logger.info(
+                "已保存环境锁文件: %s（%d 个分发包，HEAD=%s）",
+                path,
+                len(lock["distributions"]),
+                git.get("commit") or "-",
+            )
+            return path
+        except Exception as e:
+            try:
+                self.app.logger.warning("保存环境锁文件失败: %s", e)
+            except Exception:
+                pass
+            return None
+
+    def list_environment_locks(self) -> List[Path]:
+        locks_dir = self._locks_dir()
+        return ENVLOCK.list_locks(locks_dir) if locks_dir is not None else []
+
+    def restore_environment(
+        self,
+        lock_path: Optional[Path] = None,
+        restore_git: bool = True,
+        on_progress=None,
+    ) -> Dict[str, Any]:
+        """按锁文件回滚：内核 checkout 回记录的提交，依赖只重装有差异的分发包。
+
+        ``lock_path`` 为空时用最近一份锁文件。
+        """
+        result: Dict[str, Any] = {"component": "restore", "lock": None, "error": None}
+        if lock_path is None:
+            locks = self.list_environment_locks()
+            lock_path = locks[0] if locks else None
+        if lock_path is None:
+            result["error"] = "没有可用的环境锁文件"
+            result["error_code"] = "NO_LOCKFILE"
+            return result
+        lock = ENVLOCK.load(lock_path)
+        if lock is None:
+            result["error"] = f"锁文件无效: {lock_path}"
+            result["error_code"] = "INVALID_LOCKFILE"
+            return result
+        result["lock"] = str(lock_path)
+
+        commit = (lock.get("git") or {}).get("commit")
+        result["git_restored"] = False
+        if restore_git and commit:
+            current = self._safe_get_current_kernel_version() or {}
+            if (current.get("commit") if isinstance(current, dict) else None) != commit:
+                if on_progress is not None:
+                    try:
+                        on_progress(f"正在恢复内核到 {commit}…", None)
+                    except Exception:
+                        pass
+                core_res = self.app.services.version.upgrade_to_commit(commit, stable_only=False)
+                if not isinstance(core_res, dict) or core_res.get("error"):
+                    result["error"] = (
+                        core_res.get("error") if isinstance(core_res, dict) else "checkout failed"
+                    )
+                    result["error_code"] = "GIT_RESTORE_FAILED"
+                    return result
+                result["git_restored"] = True
+
+        env_res = ENVLOCK.restore(
+            lock,
+            self._resolve_python_exec(),
+            index_url=self._resolve_index_url(),
+            log=self.app.logger,
+            on_progress=on_progress,
+            frozen=FROZEN_PKGS,
+        )
+        result.update({k: v for k, v in env_res.items() if k != "error" or v})
+        return result
+
+    def sync_custom_node_requirements(
+        self, on_progress=None, install: bool = True
+    ) -> Dict[str, Any]:
+        """ComfyUI 与全部 custom_nodes 的 requirements 合并后一次安装。
+
+        先合并成一份约束集合并逐包检查节点之间的版本冲突（``conflicts``），
+        ``install=False`` 时只返回检查结果；否则把合并结果写成临时
+        requirements 文件，走一次性依赖解析（plan）安装。
+        """
+        self._configure_wheel_cache()
+        comfy_root = self._resolve_comfy_root()
+        python_exec = self._resolve_python_exec()
+        sources = REQUNION.collect_sources(
+            self._collect_requirement_files(comfy_root),
+            PATHS.plugins_dir(comfy_root),
+        )
+        marker_env = PEP440.target_environment(PIPINDEX.guess_python_version(python_exec))
+        union = REQUNION.build_union(
+            sources,
+            PIPUTILS._parse_requirements_entries,
+            marker_env=marker_env,
+            installed=PIPINDEX.installed_versions(python_exec) or {},
+            frozen=FROZEN_PKGS,
+        )
+        result: Dict[str, Any] = {
+            "component": "custom_node_requirements",
+            "updated": False,
+            "sources": union["sources"],
+            "conflicts": union["conflicts"],
+            "unparsed": union["unparsed"],
+            "specs": union["specs"],
+            "installed": [],
+            "satisfied": [],
+            "missing": [],
+            "failed": [],
+            "frozen": [],
+            "error": None,
+            "error_code": None,
+        }
+        for c in union["conflicts"]:
+            try:
+                self.app.logger.warning("节点依赖冲突: %s", REQUNION.format_conflict(c))
+            except Exception:
+                pass
+        try:
+            self.app.logger.info(
+                "节点依赖合并：%d 个来源，%d 条安装行，%d 个冲突",
+                len(union["sources"]),
+                len(union["specs"]),
+                len(union["conflicts"]),
+            )
+        except Exception:
+            pass
+        if not install or not union["specs"]:
+            return result
+
+        import os
+        import tempfile
+
+        fd, tmp_path = tempfile.mkstemp(prefix="union-requirements-", suffix=".txt")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write("\n".join(union["specs"]) + "\n")
+            res = PIPUTILS.install_requirements_file(
+                tmp_path,
+                python_exec,
+                index_url=self._resolve_index_url(),
+                upgrade=False,
+                logger=self.app.logger,
+                on_progress=on_progress,
+                ignore_pkgs=FROZEN_PKGS,
+                plan=True,
+                **self._prefetch_options(),
+            )
+        except Exception as e:
+            result["error"] = str(e)
+            return result
+        finally:
+            try:
+                os.unlink(tmp_path)
+            except Exception:
+                pass
+        for key in ("installed", "satisfied", "missing", "failed", "frozen"):
+            result[key] = list(res.get(key) or [])
+        result["error"] = res.get("error")
+        result["error_code"] = res.get("error_code")
+        result["partial"] = bool(res.get("partial"))
+        result["updated"] = bool(res.get("success") and not res.get("error"))
+        return result
+
     def _resolve_index_url(self) -> str | None:
         idx = None
         try:
@@ -441,6 +684,50 @@ class UpdateService:
         except Exception:
             return False
 
+    def _configure_wheel_cache(self) -> None:
+        """按配置 ``pip_cache`` 启用跨安装共享的 wheel / 下载缓存，并选定安装器后端。"""
+        try:
+            WHEELCACHE.configure_from_config(getattr(self.app, "config", None))
+        except Exception:
+            pass
+        try:
+            INSTALLER.configure_from_config(getattr(self.app, "config", None))
+        except Exception:
+            pass
+
+    def _plan_requirements_enabled(self) -> bool:
+        """依赖同步是否走“一次解析 + 差量安装”（默认开启）。"""
+        try:
+            prefs = self.app.config.get("version_preferences", {}) or {}
+            return bool(prefs.get("plan_requirements", True))
+        except Exception:
+            return True
+
+    def _fingerprint_store(self) -> Optional["REQFP.FingerprintStore"]:
+        """同步指纹存放在配置文件旁；拿不到配置文件路径时不启用指纹。"""
+        try:
+            cfg_file = getattr(getattr(self.app, "config_manager", None), "config_file", None)
+            if isinstance(cfg_file, (str, Path)) and str(cfg_file):
+                return REQFP.FingerprintStore(Path(cfg_file).parent / REQFP.STATE_FILE_NAME)
+        except Exception:
+            pass
+        return None
+
+    def _prefetch_options(self) -> Dict[str, Any]:
+        """依赖同步前是否并发预取 wheel（默认开启）及并发数。"""
+        opts: Dict[str, Any] = {
+            "prefetch": True,
+            "prefetch_workers": PIPPREFETCH.DEFAULT_WORKERS,
+        }
+        try:
+            prefs = self.app.config.get("version_preferences", {}) or {}
+            opts["prefetch"] = bool(prefs.get("prefetch_requirements", True))
+            workers = int(prefs.get("prefetch_workers") or opts["prefetch_workers"])
+            opts["prefetch_workers"] = max(1, min(workers, 16))
+        except Exception:
+            pass
+        return opts
+
     def _collect_requirement_files(self, comfy_root: Path) -> list[Path]:
         req_files: list[Path] = []
         for name in [
@@ -42,7 +42,7 @@ def main():
     assert ok
     srv.shutdown()
     time.sleep(0.1)
-    ok2 = is_http_reachable(app)
+    ok2 = is_http_reachable(app, max_age=0)
     print("after_shutdown:", ok2)
     assert not ok2
 
@@ -16,6 +16,12 @@ from unittest.mock import MagicMock, patch, Mock
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def _run_in_tmp_dir(tmp_path, monkeypatch):
+    """The service keeps its cache files under ``<cwd>/launcher``."""
+    monkeypatch.chdir(tmp_path)
+
+
 class TestAnnouncementServiceInit:
     """Test AnnouncementService initialization."""
 
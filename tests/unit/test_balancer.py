@@ -0,0 +1,239 @@
+"""Tests for core.balancer (multi-instance reverse proxy)."""
+
+import http.client
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.balancer import Backend, LoadBalancer
+
+
+class _FakeComfy(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        srv = self.server
+        srv.requests.append(("GET", self.path, self.headers.get("Host")))
+        if self.path == "/queue":
+            self._json(200, {
+                "queue_running": [[0, f"{srv.name}-run"]] * min(srv.depth, 1),
+                "queue_pending": [[1, f"{srv.name}-p{i}"] for i in range(max(srv.depth - 1, 0))],
+            })
+        elif self.path.startswith("/history/"):
+            self._json(200, {"served_by": srv.name})
+        else:
+            self._json(200, {"served_by": srv.name, "path": self.path})
+
+    def do_POST(self):
+        srv = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        srv.requests.append(("POST", self.path, body))
+        if self.path == "/prompt":
+            srv.depth += 1
+            srv.counter += 1
+            self._json(200, {"prompt_id": f"{srv.name}-{srv.counter}", "number": srv.counter})
+        else:
+            self._json(200, {"served_by": srv.name})
+
+
+def _fake(name, depth=0):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _FakeComfy)
+    srv.daemon_threads = True
+    srv.name = name
+    srv.depth = depth
+    srv.counter = 0
+    srv.requests = []
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+@pytest.fixture
+def cluster():
+    backends = [_fake("a", depth=3), _fake("b", depth=0)]
+    lb = LoadBalancer(0, [Backend(s.server_address[1], s.name) for s in backends])
+    lb.start()
+    yield lb, backends
+    lb.stop()
+    for s in backends:
+        s.shutdown()
+        s.server_close()
+
+
+def _request(lb, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", lb.port, timeout=5)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read().decode("utf-8"))
+    finally:
+        conn.close()
+
+
+def _open_ws(lb, path):
+    """发起 WebSocket 升级，返回后端回应的 JSON（假实例直接回 200）。"""
+    c = socket.create_connection(("127.0.0.1", lb.port), timeout=5)
+    try:
+        c.sendall(
+            f"GET {path} HTTP/1.1\r\nHost: localhost\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n\r\n".encode("latin-1")
+        )
+        buf = b""
+        while b"}" not in buf:
+            chunk = c.recv(1024)
+            if not chunk:
+                break
+            buf += chunk
+        return json.loads(buf.split(b"\r\n\r\n", 1)[1].decode("utf-8"))
+    finally:
+        c.close()
+
+
+class TestLoadBalancer:
+    def test_prompt_goes_to_shortest_queue(self, cluster):
+        lb, (a, b) = cluster
+        status, data = _request(lb, "POST", "/prompt", body=b'{"prompt": {}}',
+                                headers={"Content-Type": "application/json"})
+        assert status == 200
+        assert data["prompt_id"] == "b-1"
+        assert ("POST", "/prompt", b'{"prompt": {}}') in b.requests
+        assert not any(r[0] == "POST" for r in a.requests)
+
+    def test_prompts_spread_as_queues_grow(self, cluster):
+        lb, (a, b) = cluster
+        served = [_request(lb, "POST", "/prompt", body=b"{}")[1]["prompt_id"][0] for _ in range(6)]
+        # b 从 0 排到 3 后与 a 持平，之后交替
+        assert served[:3] == ["b", "b", "b"]
+        assert set(served[3:]) == {"a", "b"}
+        assert sum(s["submitted"] for s in lb.stats()) == 6
+
+    def test_history_follows_prompt(self, cluster):
+        lb, (a, b) = cluster
+        pid = _request(lb, "POST", "/prompt", body=b"{}")[1]["prompt_id"]
+        _status, data = _request(lb, "GET", f"/history/{pid}")
+        assert data == {"served_by": "b"}
+        # 未知 prompt_id 交给主实例
+        assert _request(lb, "GET", "/history/unknown")[1] == {"served_by": "a"}
+
+    def test_queue_is_merged(self, cluster):
+        lb, (a, b) = cluster
+        b.depth = 2
+        _status, data = _request(lb, "GET", "/queue")
+        assert len(data["queue_running"]) == 2
+        assert len(data["queue_pending"]) == 3
+
+    def test_interrupt_is_broadcast(self, cluster):
+        lb, (a, b) = cluster
+        status, _data = _request(lb, "POST", "/interrupt", body=b"{}")
+        assert status == 200
+        assert ("POST", "/interrupt", b"{}") in a.requests
+        assert ("POST", "/interrupt", b"{}") in b.requests
+
+    def test_other_requests_go_to_primary_with_host_kept(self, cluster):
+        lb, (a, b) = cluster
+        _status, data = _request(lb, "GET", "/system_stats")
+        assert data["served_by"] == "a"
+        host = [r[2] for r in a.requests if r[1] == "/system_stats"][0]
+        assert host == f"127.0.0.1:{lb.port}"
+
+    def test_prompt_follows_client_websocket(self, cluster):
+        lb, (a, b) = cluster
+        b.depth = 5
+        assert _open_ws(lb, "/ws?clientId=tab1")["served_by"] == "a"
+        # 队列更长也交给该客户端 WebSocket 所在的实例
+        a.depth = 9
+        body = json.dumps({"prompt": {}, "client_id": "tab1"}).encode("utf-8")
+        assert _request(lb, "POST", "/prompt", body=body)[1]["prompt_id"].startswith("a-")
+        # 重连沿用原实例
+        assert _open_ws(lb, "/ws?clientId=tab1")["served_by"] == "a"
+        # 未绑定的 client_id 仍按队列分配
+        body = json.dumps({"prompt": {}, "client_id": "api"}).encode("utf-8")
+        assert _request(lb, "POST", "/prompt", body=body)[1]["prompt_id"].startswith("b-")
+
+    def test_websocket_clients_spread_across_instances(self, cluster):
+        lb, (a, b) = cluster
+        a.depth = 0
+        served = {_open_ws(lb, f"/ws?clientId=c{i}")["served_by"] for i in range(2)}
+        assert served == {"a", "b"}
+
+    def test_websocket_without_client_id_gets_one(self, cluster):
+        lb, (a, b) = cluster
+        data = _open_ws(lb, "/ws")
+        assert data["served_by"] == "b"
+        client_id = data["path"].split("clientId=", 1)[1]
+        assert lb.backend_for_client(client_id).label == "b"
+
+    def test_unreachable_backend_is_skipped(self, cluster):
+        lb, (a, b) = cluster
+        b.shutdown()
+        b.server_close()
+        _status, data = _request(lb, "POST", "/prompt", body=b"{}")
+        assert data["prompt_id"].startswith("a-")
+
+    def test_primary_down_returns_502(self):
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        dead_port = s.getsockname()[1]
+        s.close()
+        lb = LoadBalancer(0, [Backend(dead_port)])
+        lb.start()
+        try:
+            status, data = _request(lb, "GET", "/system_stats")
+            assert status == 502
+            assert "error" in data
+        finally:
+            lb.stop()
+
+    def test_requires_backends(self):
+        with pytest.raises(ValueError):
+            LoadBalancer(0, [])
+
+
+def test_websocket_upgrade_is_tunneled_to_primary():
+    upstream = socket.socket()
+    upstream.bind(("127.0.0.1", 0))
+    upstream.listen()
+
+    def serve():
+        conn, _ = upstream.accept()
+        buf = b""
+        while b"\r\n\r\n" not in buf:
+            buf += conn.recv(1024)
+        conn.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n\r\n")
+        data = conn.recv(1024)
+        conn.sendall(data.upper())
+        conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    lb = LoadBalancer(0, [Backend(upstream.getsockname()[1])])
+    lb.start()
+    try:
+        c = socket.create_connection(("127.0.0.1", lb.port), timeout=5)
+        c.sendall(
+            b"GET /ws?clientId=x HTTP/1.1\r\nHost: localhost\r\n"
+            b"Upgrade: websocket\r\nConnection: Upgrade\r\n\r\n"
+        )
+        head = b""
+        while b"\r\n\r\n" not in head:
+            head += c.recv(1024)
+        assert head.startswith(b"HTTP/1.1 101")
+        c.sendall(b"ping")
+        assert c.recv(1024) == b"PING"
+        c.close()
+    finally:
+        lb.stop()
+        upstream.close()
@@ -160,18 +160,24 @@ class TestCoreTools(unittest.TestCase):
 
     def test_probe_find_pids_by_port_netstat(self):
         import types
-        from core import probe
+        from core import port_owner, probe
 
-        # monkeypatch run_hidden to simulate netstat output
+        # simulate netstat output (Windows without psutil)
         class R:
             returncode = 0
             stdout = (
                 "\n TCP    127.0.0.1:8188     0.0.0.0:0      LISTENING       1234\n"
+                " TCP    [::]:8188          [::]:0         LISTENING       1235\n"
+                " TCP    127.0.0.1:8188     127.0.0.1:50000  TIME_WAIT     0\n"
             )
 
-        probe.run_hidden = lambda *a, **k: R()
-        pids = probe.find_pids_by_port_safe("8188")
-        self.assertIn(1234, pids)
+        port_owner.invalidate()
+        with mock.patch.object(port_owner, "psutil", None), \
+                mock.patch.object(port_owner, "_PROC_TABLES", ("/nonexistent/tcp",)), \
+                mock.patch.object(port_owner, "run_hidden", return_value=R()):
+            pids = probe.find_pids_by_port_safe("8188")
+        port_owner.invalidate()
+        self.assertEqual([1234, 1235], pids)
 
     def test_probe_is_http_reachable_fallback(self):
         from core import probe
@@ -0,0 +1,147 @@
+"""Tests for core.daemon."""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from core import daemon as DAEMON
+
+
+def _sleeper(app):
+    return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def served(app_context, tmp_path):
+    """在线程中运行守护进程，ComfyUI 用一个 sleep 子进程代替。"""
+    # 停止时的 /interrupt、/free 请求发到一个没有监听的端口
+    app_context.custom_port.set(str(_free_port()))
+    d = DAEMON.Daemon(app_context, tmp_path, launch=_sleeper)
+    result = {}
+    t = threading.Thread(target=lambda: result.setdefault("code", d.serve()), daemon=True)
+    t.start()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        reg = DAEMON.read_registry(tmp_path)
+        if reg and reg.get("state") == "running":
+            break
+        time.sleep(0.05)
+    yield d, t, result
+    proc = app_context.process_manager.comfyui_process
+    d._done.set()
+    t.join(5)
+    if proc is not None and proc.poll() is None:
+        proc.kill()
+        proc.wait()
+
+
+def _wait_exit(t, timeout=10):
+    t.join(timeout)
+    assert not t.is_alive()
+
+
+class TestRegistry:
+    def test_roundtrip_and_clear(self, tmp_path):
+        DAEMON.write_registry(tmp_path, {"pid": 1, "state": "running"})
+        reg = DAEMON.read_registry(tmp_path)
+        assert reg["pid"] == 1 and "updated_at" in reg
+        # 只删除自己写下的注册表
+        DAEMON.clear_registry(tmp_path, pid=2)
+        assert DAEMON.read_registry(tmp_path) is not None
+        DAEMON.clear_registry(tmp_path, pid=1)
+        assert DAEMON.read_registry(tmp_path) is None
+
+    def test_request_without_daemon(self, tmp_path):
+        assert DAEMON.request(tmp_path, "status") is None
+
+    def test_stale_registry_is_removed(self, tmp_path):
+        DAEMON.write_registry(tmp_path, {
+            "pid": os.getpid(), "control_port": _free_port(), "token": "x",
+        })
+        assert DAEMON.request(tmp_path, "status") is None
+        assert DAEMON.read_registry(tmp_path) is None
+
+
+class TestDaemon:
+    def test_status(self, served, tmp_path):
+        d, _t, _r = served
+        reg = DAEMON.read_registry(tmp_path)
+        assert reg["pid"] == os.getpid()
+        status = DAEMON.request(tmp_path, "status")
+        assert status["ok"] and status["running"]
+        assert status["state"] == "running"
+        assert status["pid"] == reg["comfyui_pid"] == d.pm.comfyui_process.pid
+        assert status["uptime"] >= 0
+
+    def test_rejects_bad_token(self, served, tmp_path):
+        d, _t, _r = served
+        with socket.create_connection(("127.0.0.1", d.control_port), timeout=5) as s:
+            s.sendall(json.dumps({"token": "wrong", "cmd": "stop"}).encode() + b"\n")
+            resp = json.loads(s.makefile("rb").readline())
+        assert resp == {"ok": False, "error": "unauthorized"}
+        assert d.pm.comfyui_process.poll() is None
+
+    def test_restart_then_stop(self, served, tmp_path):
+        d, t, result = served
+        old = d.pm.comfyui_process
+        resp = DAEMON.request(tmp_path, "restart")
+        assert resp["ok"] and resp["restarts"] == 1
+        assert resp["pid"] != old.pid
+        assert old.poll() is not None
+        # 旧进程退出不会被当成崩溃
+        time.sleep(0.2)
+        assert d.state == "running"
+        assert DAEMON.read_registry(tmp_path)["comfyui_pid"] == resp["pid"]
+
+        new = d.pm.comfyui_process
+        resp = DAEMON.request(tmp_path, "stop")
+        assert resp["ok"] and resp["killed"]
+        _wait_exit(t)
+        assert result["code"] == 0
+        assert new.poll() is not None
+        assert DAEMON.read_registry(tmp_path) is None
+
+    def test_exits_when_comfyui_dies(self, served, tmp_path):
+        d, t, result = served
+        d.pm.comfyui_process.kill()
+        _wait_exit(t)
+        assert result["code"] == 1
+        assert d.state == "exited"
+        assert DAEMON.read_registry(tmp_path) is None
+
+    def test_launch_failure(self, app_context, tmp_path):
+        d = DAEMON.Daemon(app_context, tmp_path, launch=lambda app: None)
+        assert d.serve() == 1
+        assert DAEMON.read_registry(tmp_path) is None
+
+
+class TestDaemonCommand:
+    def test_source_run(self, monkeypatch):
+        monkeypatch.delattr(DAEMON.sys, "_MEIPASS", raising=False)
+        cmd = DAEMON.daemon_command()
+        assert cmd[0] == sys.executable
+        assert cmd[1].endswith("__main__.py") and os.path.exists(cmd[1])
+        assert cmd[-1] == "--daemon"
+
+    def test_nuitka_build_uses_argv0(self, monkeypatch, tmp_path):
+        exe = tmp_path / "ComfyUI启动器.exe"
+        # Nuitka 不设置 sys.frozen，sys.executable 仍是 python.exe
+        monkeypatch.setattr(DAEMON, "__compiled__", object(), raising=False)
+        monkeypatch.setattr(DAEMON.sys, "argv", [str(exe)])
+        assert DAEMON.daemon_command() == [str(exe.resolve()), "--daemon"]
+
+    def test_pyinstaller_build_uses_executable(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(DAEMON.sys, "_MEIPASS", str(tmp_path), raising=False)
+        assert DAEMON.daemon_command() == [sys.executable, "--daemon"]
@@ -0,0 +1,87 @@
+"""Tests for utils/env_agent.py (resident JSON-lines helper in the target interpreter).
+
+The helper is pure Python, so the tests drive a real one with the current
+interpreter.
+"""
+
+import platform
+import sys
+
+import pytest
+
+from utils import env_agent as ENVAGENT
+
+
+@pytest.fixture
+def agent():
+    a = ENVAGENT.EnvAgent(sys.executable)
+    yield a
+    a.stop()
+
+
+def test_python_and_package_queries_share_one_process(agent):
+    info = agent.request("python")
+    assert info["version"] == platform.python_version()
+    versions = agent.request("package_version", names=["pytest", "surely-not-installed-pkg"])
+    assert versions["pytest"] == pytest.__version__
+    assert versions["surely-not-installed-pkg"] is None
+    assert agent.starts == 1
+    assert agent.requests == 2
+
+
+def test_distributions_lists_installed(agent):
+    dists = {k.lower(): v for k, v in agent.request("distributions").items()}
+    assert dists.get("pytest") == pytest.__version__
+
+
+def test_error_reply_raises_and_keeps_agent(agent):
+    with pytest.raises(ENVAGENT.AgentError):
+        agent.request("no-such-op")
+    assert agent.alive()
+    assert agent.request("ping")["pid"] > 0
+
+
+def test_restarts_after_stop(agent):
+    pid1 = agent.request("ping")["pid"]
+    agent.stop()
+    pid2 = agent.request("ping")["pid"]
+    assert pid1 != pid2
+    assert agent.starts == 2
+
+
+def test_pip_index_invalidate_stops_shared_agent():
+    from utils import pip_index as PIPINDEX
+
+    shared = ENVAGENT.get_agent(sys.executable)
+    try:
+        shared.request("ping")
+        assert shared.alive()
+        PIPINDEX.invalidate(sys.executable)
+        assert not shared.alive()
+        # 下一次查询自动重启
+        assert ENVAGENT.query(sys.executable, "ping")["pid"] > 0
+        assert shared.starts == 2
+    finally:
+        ENVAGENT.shutdown_all()
+
+
+def test_query_returns_none_when_interpreter_missing(tmp_path):
+    assert ENVAGENT.query(tmp_path / "no-python.exe", "python", timeout=5) is None
+
+
+def test_probe_returns_one_document():
+    try:
+        data = ENVAGENT.probe(sys.executable, packages=["pytest"])
+    finally:
+        ENVAGENT.shutdown_all()
+    assert data["python"]["version"] == platform.python_version()
+    assert data["packages"]["pytest"] == pytest.__version__
+    assert "cuda_available" in data
+
+
+def test_probe_falls_back_to_one_shot_run():
+    from unittest.mock import patch
+
+    with patch("utils.env_agent.query", return_value=None):
+        data = ENVAGENT.probe(sys.executable, packages=["pytest"])
+    assert data["packages"]["pytest"] == pytest.__version__
@@ -0,0 +1,141 @@
+"""Tests for utils/env_lock.py (environment lockfile snapshot / restore)."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from utils import env_lock as ENVLOCK
+
+
+class TestDiff(unittest.TestCase):
+    def test_install_remove_frozen_and_tooling(self):
+        locked = {"numpy": "1.26.4", "foo": "1.0", "torch": "2.1.0", "pip": "23.0"}
+        current = {"numpy": "1.26.4", "foo": "2.0", "bar": "0.1", "torch": "2.3.0", "pip": "24.0"}
+        d = ENVLOCK.diff(locked, current, frozen=["torch"])
+        self.assertEqual(d["install"], ["foo==1.0"])
+        self.assertEqual(d["remove"], ["bar"])
+        # pip 等打包工具与黑名单一样不参与回滚
+        self.assertEqual(d["frozen"], ["pip", "torch"])
+        self.assertEqual(d["unchanged"], 1)
+
+    def test_missing_package_is_reinstalled(self):
+        d = ENVLOCK.diff({"foo": "1.0"}, {})
+        self.assertEqual(d["install"], ["foo==1.0"])
+        self.assertEqual(d["remove"], [])
+
+    def test_direct_url_packages_use_their_source(self):
+        sources = {
+            "node": {"url": "https://github.com/x/node", "vcs_info": {"vcs": "git", "commit_id": "abc"}},
+            "wheel-pkg": {"url": "https://x/wheel_pkg-1.0-py3-none-any.whl", "archive_info": {}},
+            "dev": {"url": "file:///src/dev", "dir_info": {"editable": True}},
+        }
+        locked = {"node": "0.1", "wheel-pkg": "1.0", "dev": "0.0.1"}
+        current = {"node": "0.2", "local": "1.0"}
+        d = ENVLOCK.diff(
+            locked, current, sources=sources,
+            current_sources={"local": {"url": "file:///src/local", "dir_info": {"editable": True}}},
+        )
+        self.assertEqual(d["install"], [
+            "node @ git+https://github.com/x/node@abc",
+            "wheel-pkg @ https://x/wheel_pkg-1.0-py3-none-any.whl",
+        ])
+        # 可编辑安装既不重装也不卸载
+        self.assertEqual(d["skipped"], ["dev", "local"])
+        self.assertEqual(d["remove"], [])
+
+
+class TestSaveAndList(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name) / "env-locks"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_prunes_to_keep_and_lists_newest_first(self):
+        paths = [
+            ENVLOCK.save({"distributions": {"foo": str(i)}}, self.dir, keep=2)
+            for i in range(4)
+        ]
+        locks = ENVLOCK.list_locks(self.dir)
+        self.assertEqual(len(locks), 2)
+        self.assertEqual(locks[0], paths[-1])
+        self.assertEqual(ENVLOCK.load(locks[0])["distributions"], {"foo": "3"})
+
+    def test_load_rejects_invalid_file(self):
+        self.dir.mkdir(parents=True)
+        bad = self.dir / "env-lock-bad.json"
+        bad.write_text("{}", encoding="utf-8")
+        self.assertIsNone(ENVLOCK.load(bad))
+
+    def test_snapshot_none_without_site_packages(self):
+        with patch("utils.env_lock.PIPINDEX.installed_versions", return_value=None):
+            self.assertIsNone(ENVLOCK.snapshot("python"))
+
+    def test_snapshot_records_git_and_distributions(self):
+        with patch(
+            "utils.env_lock.PIPINDEX.installed_versions", return_value={"b": "2", "a": "1"}
+        ), patch("utils.env_lock.PIPINDEX.guess_python_version", return_value="3.11"):
+            lock = ENVLOCK.snapshot("python", git={"commit": "abc1234"}, reason="t")
+        self.assertEqual(list(lock["distributions"]), ["a", "b"])
+        self.assertEqual(lock["git"]["commit"], "abc1234")
+        self.assertEqual(lock["version"], ENVLOCK.LOCK_VERSION)
+
+
+class TestRestore(unittest.TestCase):
+    LOCK = {"distributions": {"numpy": "1.26.4", "foo": "1.0"}}
+
+    def _restore(self, current, install_res=None, uninstall_res=None):
+        with patch(
+            "utils.env_lock.PIPINDEX.installed_versions", return_value=current
+        ), patch(
+            "utils.pip.install_pins",
+            return_value=install_res or {"success": True, "offline": True},
+        ) as pins, patch(
+            "utils.pip.uninstall_packages",
+            return_value=uninstall_res or {"success": True},
+        ) as uninstall:
+            order = []
+            pins.side_effect = lambda *a, **k: order.append("install") or pins.return_value
+            uninstall.side_effect = lambda *a, **k: order.append("remove") or uninstall.return_value
+            res = ENVLOCK.restore(self.LOCK, "python")
+        self.order = order
+        return res, pins, uninstall
+
+    def test_only_delta_is_touched(self):
+        res, pins, uninstall = self._restore({"numpy": "1.26.4", "foo": "2.0", "bar": "0.1"})
+        self.assertTrue(res["success"])
+        self.assertEqual(pins.call_args[0][0], ["foo==1.0"])
+        self.assertEqual(uninstall.call_args[0][0], ["bar"])
+        self.assertTrue(res["offline"])
+        self.assertEqual(res["unchanged"], 1)
+        # 先补装，成功后才卸载
+        self.assertEqual(self.order, ["install", "remove"])
+
+    def test_noop_when_environment_matches(self):
+        res, pins, uninstall = self._restore({"numpy": "1.26.4", "foo": "1.0"})
+        self.assertTrue(res["success"])
+        pins.assert_not_called()
+        uninstall.assert_not_called()
+
+    def test_install_failure_is_reported(self):
+        res, _pins, _u = self._restore(
+            {"numpy": "1.26.4"},
+            install_res={"success": False, "error": "boom", "error_code": "PIP_INSTALL_FAILED"},
+        )
+        self.assertFalse(res["success"])
+        self.assertEqual(res["error_code"], "PIP_INSTALL_FAILED")
+
+    def test_nothing_removed_when_install_fails(self):
+        res, _pins, uninstall = self._restore(
+            {"numpy": "1.26.4", "bar": "0.1"},
+            install_res={"success": False, "error": "boom", "error_code": "PIP_INSTALL_FAILED"},
+        )
+        self.assertFalse(res["success"])
+        uninstall.assert_not_called()
+        self.assertEqual(res["removed"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -398,3 +398,17 @@ class TestFormatUpdateSummaryHintMentionsCancel:
         assert "  自动跳过（无需操作）：torch, xformers" in summary
         # 另外验证不应有老格式的 "- 包名 (已跳过…)" 子项
         assert "(已跳过，需手动管理)" not in summary
+
+    def test_all_requirement_files_unchanged(self):
+        summary = _format_update_summary(
+            None,
+            {
+                "updated": False,
+                "unchanged": ["requirements.txt"],
+                "summary": "requirements.txt: unchanged",
+                "installed": [],
+                "satisfied": [],
+            },
+        )
+        assert "依赖：未变化" in summary
+        assert "已满足 0 项" not in summary
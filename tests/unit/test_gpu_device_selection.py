@@ -190,5 +190,56 @@ class TestGpuEnumerateWorkerParseLines(unittest.TestCase):
         self.assertEqual(out[0]["memory_mb"], 24576)
 
 
+try:
+    import PyQt5  # noqa: F401
+    _HAS_QT = True
+except ImportError:
+    _HAS_QT = False
+
+
+@unittest.skipUnless(_HAS_QT, "PyQt5 not installed")
+class TestEnvProbeWorkerFanOut(unittest.TestCase):
+    """One probe document fans out to the per-item version / GPU signals."""
+
+    def _run(self, data):
+        from unittest.mock import MagicMock, patch
+        from core.version_workers import EnvProbeWorker
+
+        with tempfile.TemporaryDirectory() as d:
+            (Path(d) / "ComfyUI").mkdir()
+            app = MagicMock()
+            app.config = {"paths": {"comfyui_root": d}}
+            worker = EnvProbeWorker(app)
+            got = {}
+            for sig in ("pythonVersionReady", "torchVersionReady", "frontendVersionReady",
+                        "templateVersionReady", "gpuStatusReady", "inventoryReady"):
+                getattr(worker, sig).connect(lambda v, _k=sig: got.__setitem__(_k, v))
+            worker.probeFailed.connect(lambda: got.__setitem__("failed", True))
+            with patch("core.version_workers.ENVAGENT.probe", return_value=data), \
+                    patch("shutil.which", return_value=None):
+                worker.run()
+        return got
+
+    def test_fans_out_all_fields(self):
+        got = self._run({
+            "python": {"version": "3.12.7"},
+            "packages": {"torch": "2.5.1+cu124", "comfyui-frontend-package": "1.28.0",
+                         "comfyui-workflow-templates": None},
+            "gpu": {"driver": "560.94", "gpus": [{"index": 0, "name": "RTX 4090", "memory_mb": 24564}]},
+            "cuda_available": True,
+        })
+        self.assertEqual(got["pythonVersionReady"], "3.12.7")
+        self.assertEqual(got["torchVersionReady"], "2.5.1+cu124")
+        self.assertEqual(got["frontendVersionReady"], "1.28.0")
+        self.assertEqual(got["templateVersionReady"], "未安装")
+        self.assertEqual(got["gpuStatusReady"], "✓ RTX 4090 (560.94)")
+        self.assertEqual(got["inventoryReady"][0]["memory_mb"], 24564)
+
+    def test_probe_failure_requests_fallback(self):
+        got = self._run(None)
+        self.assertTrue(got.get("failed"))
+        self.assertNotIn("pythonVersionReady", got)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,71 @@
+"""Tests for utils/installer_backend.py (pip / uv installer selection)."""
+
+import os
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils import installer_backend as INSTALLER
+
+
+@pytest.fixture(autouse=True)
+def _reset_backend():
+    yield
+    INSTALLER.configure(INSTALLER.BACKEND_PIP)
+
+
+def _fake_uv(tmp_path):
+    uv = tmp_path / ("uv.exe" if os.name == "nt" else "uv")
+    uv.write_text("", encoding="utf-8")
+    return uv
+
+
+def test_default_backend_is_pip():
+    assert INSTALLER.get_backend().name == "pip"
+    assert INSTALLER.get_backend().supports_report is True
+
+
+def test_uv_command_targets_interpreter(tmp_path):
+    uv = _fake_uv(tmp_path)
+    INSTALLER.configure("uv", uv_path=uv)
+    backend = INSTALLER.get_backend(tmp_path / "python.exe")
+    assert backend.name == "uv"
+    assert backend.supports_report is False
+    cmd = backend.install_command(tmp_path / "python.exe")
+    assert cmd[:3] == [str(uv), "pip", "install"]
+    assert cmd[3:] == ["--python", str((tmp_path / "python.exe").resolve())]
+
+
+def test_uv_found_next_to_interpreter(tmp_path):
+    scripts = tmp_path / "Scripts"
+    scripts.mkdir()
+    uv = _fake_uv(scripts)
+    with patch("utils.installer_backend.shutil.which", return_value=None):
+        assert INSTALLER.find_uv(tmp_path / "python.exe") == str(uv)
+
+
+def test_missing_uv_falls_back_to_pip(tmp_path):
+    INSTALLER.configure("auto")
+    with patch("utils.installer_backend.shutil.which", return_value=None):
+        assert INSTALLER.get_backend(tmp_path / "python.exe").name == "pip"
+
+
+def test_configure_from_config():
+    INSTALLER.configure_from_config({"version_preferences": {"installer_backend": "uv"}})
+    assert INSTALLER._BACKEND.name == "uv"
+    INSTALLER.configure_from_config({"version_preferences": {}})
+    assert INSTALLER._BACKEND.name == "pip"
+    # 非 dict 配置不改动当前设置
+    INSTALLER.configure("uv")
+    INSTALLER.configure_from_config(MagicMock())
+    assert INSTALLER._BACKEND.name == "uv"
+
+
+def test_uv_cache_args_use_own_subdir(tmp_path):
+    cache = MagicMock()
+    cache.ensure_dirs.return_value = True
+    cache.root = tmp_path
+    cache.wheels_dir = tmp_path / "wheels"
+    args = INSTALLER.UvBackend().cache_args(cache)
+    assert args == ["--cache-dir", str(tmp_path / "uv"), "--find-links", str(tmp_path / "wheels")]
@@ -0,0 +1,130 @@
+"""Tests for core.kill process-tree stopping."""
+
+import types
+
+import pytest
+
+from core import kill
+
+
+class _Error(Exception):
+    pass
+
+
+class _NoSuchProcess(_Error):
+    pass
+
+
+class _AccessDenied(_Error):
+    pass
+
+
+class _FakeProc:
+    """psutil.Process 替身：``stubborn`` 的进程忽略 terminate，只有 kill 能结束。"""
+
+    def __init__(self, pid, children=(), stubborn=False, denied=False):
+        self.pid = pid
+        self._children = list(children)
+        self.stubborn = stubborn
+        self.denied = denied
+        self.alive = True
+        self.calls = []
+
+    def children(self, recursive=False):
+        out = []
+        for c in self._children:
+            out.append(c)
+            if recursive:
+                out.extend(c.children(recursive=True))
+        return out
+
+    def terminate(self):
+        self.calls.append("terminate")
+        if self.denied:
+            raise _AccessDenied()
+        if not self.stubborn:
+            self.alive = False
+
+    def kill(self):
+        self.calls.append("kill")
+        if self.denied:
+            raise _AccessDenied()
+        self.alive = False
+
+
+@pytest.fixture
+def fake_psutil(monkeypatch):
+    table = {}
+    waits = []
+
+    def process(pid):
+        if pid not in table:
+            raise _NoSuchProcess()
+        return table[pid]
+
+    def wait_procs(procs, timeout=None):
+        waits.append(([p.pid for p in procs], timeout))
+        return [p for p in procs if not p.alive], [p for p in procs if p.alive]
+
+    mod = types.SimpleNamespace(
+        Process=process,
+        wait_procs=wait_procs,
+        pid_exists=lambda pid: pid in table and table[pid].alive,
+        Error=_Error,
+        NoSuchProcess=_NoSuchProcess,
+        AccessDenied=_AccessDenied,
+    )
+    monkeypatch.setattr(kill, "psutil", mod)
+    mod.table = table
+    mod.waits = waits
+    return mod
+
+
+def _tree(fake):
+    grandchild = _FakeProc(12, stubborn=True)
+    child = _FakeProc(11, children=[grandchild])
+    root = _FakeProc(10, children=[child])
+    for p in (root, child, grandchild):
+        fake.table[p.pid] = p
+    return root, child, grandchild
+
+
+class TestStopProcessTree:
+    def test_terminates_whole_tree_then_kills_only_survivors(self, fake_psutil):
+        root, child, grandchild = _tree(fake_psutil)
+        report = kill.stop_process_tree([10], timeout=2, kill_timeout=1)
+        assert report["pids"] == [10, 11, 12]
+        assert root.calls == ["terminate"]
+        assert child.calls == ["terminate"]
+        assert grandchild.calls == ["terminate", "kill"]
+        # 先整体等待一次，再只等被强制结束的进程
+        assert fake_psutil.waits == [([10, 11, 12], 2), ([12], 1)]
+        assert report["terminated"] == 2
+        assert report["killed"] == 1
+        assert report["survivors"] == []
+
+    def test_dedupes_overlapping_roots(self, fake_psutil):
+        _tree(fake_psutil)
+        report = kill.stop_process_tree([10, 11, 99])
+        assert report["pids"] == [10, 11, 12]
+
+    def test_reports_denied_survivors(self, fake_psutil):
+        fake_psutil.table[20] = _FakeProc(20, denied=True)
+        report = kill.stop_process_tree([20])
+        assert report["denied"] == [20]
+        assert report["survivors"] == []
+        assert fake_psutil.waits == []
+
+    def test_without_psutil(self, monkeypatch):
+        monkeypatch.setattr(kill, "psutil", None)
+        assert kill.stop_process_tree([1])["pids"] == []
+
+
+def test_kill_pids_skips_taskkill_for_finished_tree(fake_psutil, monkeypatch):
+    _tree(fake_psutil)
+    calls = []
+    monkeypatch.setattr(kill.os, "name", "nt")
+    monkeypatch.setattr(kill, "run_hidden", lambda *a, **k: calls.append(a))
+    report = kill.kill_pids(types.SimpleNamespace(), [10])
+    assert report["killed"] == 1
+    assert calls == []
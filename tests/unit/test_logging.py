@@ -13,25 +13,40 @@ from unittest.mock import patch
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def _drop_file_handlers():
+    """Detach the handlers install_logging adds so later tests do not keep writing to them."""
+    before = {name: list(lg.handlers) for name, lg in logging.Logger.manager.loggerDict.items()
+              if isinstance(lg, logging.Logger)}
+    yield
+    for name, lg in list(logging.Logger.manager.loggerDict.items()):
+        if not isinstance(lg, logging.Logger):
+            continue
+        for h in list(lg.handlers):
+            if h not in before.get(name, []):
+                lg.removeHandler(h)
+                h.close()
+
+
 class TestInstallLogging:
     """Tests for install_logging function."""
 
-    def test_returns_logger_instance(self):
+    def test_returns_logger_instance(self, tmp_path):
         """Should return a logging.Logger instance."""
         from utils.logging import install_logging
-        logger = install_logging("test_app")
+        logger = install_logging("test_app", log_root=str(tmp_path))
         assert isinstance(logger, logging.Logger)
 
-    def test_logger_name(self):
+    def test_logger_name(self, tmp_path):
         """Logger should use the provided app_name."""
         from utils.logging import install_logging
-        logger = install_logging("my_custom_app")
+        logger = install_logging("my_custom_app", log_root=str(tmp_path))
         assert logger.name == "my_custom_app"
 
-    def test_default_app_name(self):
+    def test_default_app_name(self, tmp_path):
         """Should use 'comfyui_launcher' when no app_name provided."""
         from utils.logging import install_logging
-        logger = install_logging()
+        logger = install_logging(log_root=str(tmp_path))
         assert logger.name == "comfyui_launcher"
 
     def test_log_level_info_by_default(self, tmp_path):
@@ -102,12 +117,24 @@ class TestInstallLogging:
         assert log_file.exists()
         assert log_file.is_file()
 
-    def test_log_root_none_uses_fallback(self, tmp_path):
+    def test_log_root_none_uses_fallback(self, tmp_path, monkeypatch):
         """When log_root is None, should use fallback detection."""
-        from utils.logging import install_logging
+        from logging.handlers import RotatingFileHandler
+
+        from utils import logging as LOGGING
+
+        class _Unopened(RotatingFileHandler):
+            # Don't create a log file inside the detected root (the source tree)
+            def __init__(self, filename, *args, **kwargs):
+                kwargs["delay"] = True
+                super().__init__(filename, *args, **kwargs)
+
+        monkeypatch.setattr(LOGGING, "RotatingFileHandler", _Unopened)
         # Should not raise even with log_root=None
-        logger = install_logging("test_fallback", log_root=None)
+        logger = LOGGING.install_logging("test_fallback", log_root=None)
         assert logger is not None
+        handlers = [h for h in logger.handlers if isinstance(h, _Unopened)]
+        assert handlers and handlers[0].baseFilename.endswith("launcher.log")
 
     def test_handler_not_duplicated(self, tmp_path):
         """Should not add duplicate handlers on multiple calls."""
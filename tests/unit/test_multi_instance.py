@@ -0,0 +1,175 @@
+"""Tests for core.multi_instance."""
+
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+
+
+from core import multi_instance as MI
+from core import runner_start as RS
+
+
+class _Var:
+    def __init__(self, v):
+        self._v = v
+
+    def get(self):
+        return self._v
+
+
+def _app(opts=None, inventory=None, mode="gpu"):
+    app = MagicMock()
+    app.config = {"launch_options": dict(opts or {})}
+    app.compute_mode = _Var(mode)
+    app.get_gpu_inventory.return_value = [
+        {"index": i, "name": f"GPU {i}", "memory_mb": 8192} for i in (inventory or [])
+    ]
+    return app
+
+
+class TestPlanGpus:
+    def test_disabled_by_default(self):
+        assert MI.plan_gpus(_app({}, [0, 1])) == []
+
+    def test_all_detected_gpus(self):
+        assert MI.plan_gpus(_app({"multi_instance": True}, [0, 1, 2])) == [0, 1, 2]
+
+    def test_selection_filtered_by_inventory(self):
+        app = _app({"multi_instance": True, "multi_instance_gpus": [2, "0", 5, 2]}, [0, 1, 2])
+        assert MI.plan_gpus(app) == [2, 0]
+
+    def test_single_gpu_or_cpu_falls_back(self):
+        assert MI.plan_gpus(_app({"multi_instance": True}, [0])) == []
+        assert MI.plan_gpus(_app({"multi_instance": True}, [0, 1], mode="cpu")) == []
+
+
+class TestInstanceCommand:
+    def test_rewrites_device_port_listen_and_browser(self):
+        cmd = [
+            "py", "main.py", "--windows-standalone-build", "--cuda-device", "0",
+            "--listen", "0.0.0.0", "--port", "8190", "--enable-cors-header", "*",
+            "--auto-launch", "--fast",
+        ]
+        out = MI.instance_command(cmd, 1, 40001)
+        assert out == [
+            "py", "main.py", "--windows-standalone-build", "--enable-cors-header", "*",
+            "--fast", "--listen", "127.0.0.1", "--port", "40001", "--cuda-device", "1",
+            "--disable-auto-launch",
+        ]
+
+    def test_bare_listen_and_equals_forms(self):
+        out = MI.instance_command(["py", "main.py", "--listen", "--port=9000", "--lowvram"], 0, 1234)
+        assert out[:3] == ["py", "main.py", "--lowvram"]
+        assert out.count("--listen") == 1 and out.count("--port") == 1
+
+
+def test_allocate_ports_distinct():
+    ports = MI.allocate_ports(4)
+    assert len(set(ports)) == 4
+    assert all(p > 0 for p in ports)
+
+
+class TestInstanceGroup:
+    def _spawn(self, seconds):
+        return subprocess.Popen([sys.executable, "-c", f"import time; time.sleep({seconds})"])
+
+    def test_alive_until_all_exit(self):
+        group = MI.InstanceGroup()
+        group.instances = [MI.Instance(0, 1, self._spawn(0)), MI.Instance(1, 2, self._spawn(0.5))]
+        group.balancer = MagicMock()
+        group.instances[0].proc.wait()
+        assert group.poll() is None
+        lb = group.balancer
+        assert group.wait(timeout=10) == 0
+        lb.stop.assert_called_once_with()
+        assert group.poll() == 0
+        assert group.pids == [i.proc.pid for i in group.instances]
+
+    def test_terminate_stops_everything(self):
+        group = MI.InstanceGroup()
+        group.instances = [MI.Instance(0, 1, self._spawn(30)), MI.Instance(1, 2, self._spawn(30))]
+        group.terminate()
+        group.wait(timeout=10)
+        assert all(i.proc.poll() is not None for i in group.instances)
+
+    def test_stop_flow_uses_group(self):
+        from core.runner_stop import stop
+
+        group = MI.InstanceGroup()
+        group.instances = [MI.Instance(0, 1, self._spawn(30)), MI.Instance(1, 2, self._spawn(30))]
+        pm = MagicMock()
+        pm.comfyui_process = group
+        app = MagicMock()
+        with patch("core.runner_stop._stop_by_port_fallback") as fallback:
+            assert stop(app, pm) is True
+        fallback.assert_not_called()
+        assert all(i.proc.poll() is not None for i in group.instances)
+
+
+# 假的 ComfyUI：按 --port 监听，打印就绪日志，/queue 返回空队列
+_FAKE_COMFY = r'''
+import json, sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+port = int(sys.argv[sys.argv.index("--port") + 1])
+gpu = sys.argv[sys.argv.index("--cuda-device") + 1]
+class H(BaseHTTPRequestHandler):
+    def log_message(self, *a):
+        pass
+    def do_GET(self):
+        body = json.dumps({"gpu": gpu, "queue_running": [], "queue_pending": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+srv = HTTPServer(("127.0.0.1", port), H)
+print("To see the GUI go to: http://127.0.0.1:%d" % port, flush=True)
+srv.serve_forever()
+'''
+
+
+def test_start_multi_end_to_end(tmp_path, monkeypatch):
+    script = tmp_path / "fake_comfy.py"
+    script.write_text(_FAKE_COMFY, encoding="utf-8")
+    monkeypatch.setattr(RS, "_echo_to_stdout", lambda line: None)
+    monkeypatch.setattr("core.output_capture.default_log_dir", lambda app=None: tmp_path)
+    proxy_port = MI.allocate_ports(1)[0]
+
+    app = MagicMock()
+    app.custom_port = _Var(str(proxy_port))
+    app.listen_all = _Var(False)
+    app.show_console = _Var(False)
+    app.browser_open_mode = _Var("none")
+    app.ui_post.side_effect = lambda fn: fn()
+    pm = MagicMock()
+    pm.comfyui_process = None
+    started = threading.Event()
+    pm.on_start_success.side_effect = started.set
+    pm.on_start_failed.side_effect = lambda msg: started.set()
+
+    MI.start_multi(app, pm, [sys.executable, str(script), "--auto-launch"], dict(os.environ), str(tmp_path), [0, 1])
+    try:
+        assert started.wait(20)
+        pm.on_start_failed.assert_not_called()
+        group = pm.comfyui_process
+        assert isinstance(group, MI.InstanceGroup)
+        assert len(group.instances) == 2
+        assert pm.last_launch["signal"] == "multi"
+        assert {i["gpu"] for i in pm.last_launch["instances"]} == {0, 1}
+        assert pm.output_capture is group.instances[0].output
+        assert any("To see the GUI" in line for line in pm.output_capture.tail())
+        assert (tmp_path / "comfyui_output_gpu1.log").exists()
+
+        conn = http.client.HTTPConnection("127.0.0.1", proxy_port, timeout=5)
+        conn.request("GET", "/system_stats")
+        data = json.loads(conn.getresponse().read())
+        conn.close()
+        assert data["gpu"] == "0"  # 主实例
+    finally:
+        proc = pm.comfyui_process
+        if proc is not None:
+            proc.kill()
+            proc.wait(timeout=10)
@@ -213,8 +213,9 @@ class TestUpdatePipIni:
 
         update_pip_ini(str(python_exe), "aliyun", "", "", logger)
 
-    def test_nonexistent_python_path_uses_default_embeded(self, tmp_path):
+    def test_nonexistent_python_path_uses_default_embeded(self, tmp_path, monkeypatch):
         """Should use 'python_embeded' when python path doesn't exist."""
+        monkeypatch.chdir(tmp_path)
         update_pip_ini(str(tmp_path / "nonexistent_python.exe"), "aliyun", "", "", None)
 
         pip_ini = Path("python_embeded") / "pip.ini"
@@ -0,0 +1,120 @@
+"""Tests for core.output_capture."""
+
+import io
+import re
+import subprocess
+import sys
+
+from core import output_capture as OC
+
+
+class TestRotatingWriter:
+    def test_rotates_by_size_and_keeps_backups(self, tmp_path):
+        path = tmp_path / "out.log"
+        w = OC.RotatingWriter(path, max_bytes=10, backups=2)
+        for i in range(5):
+            w.write(f"line{i}\n")  # 6 字节/行，每个文件只放得下一行
+        w.close()
+        assert path.read_text() == "line4\n"
+        assert (tmp_path / "out.log.1").read_text() == "line3\n"
+        assert (tmp_path / "out.log.2").read_text() == "line2\n"
+        assert not (tmp_path / "out.log.3").exists()
+
+    def test_appends_to_existing_file(self, tmp_path):
+        path = tmp_path / "out.log"
+        path.write_text("old\n")
+        w = OC.RotatingWriter(path, max_bytes=100, backups=1)
+        w.write("new\n")
+        w.close()
+        assert path.read_text() == "old\nnew\n"
+
+    def test_no_backups_truncates(self, tmp_path):
+        path = tmp_path / "out.log"
+        w = OC.RotatingWriter(path, max_bytes=8, backups=0)
+        w.write("aaaaaa\n")
+        w.write("bbbbbb\n")
+        w.close()
+        assert path.read_text() == "bbbbbb\n"
+        assert not (tmp_path / "out.log.1").exists()
+
+    def test_failure_disables_writer(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("x")
+        w = OC.RotatingWriter(blocker / "out.log")
+        w.write("a\n")
+        assert w.failed
+        w.write("b\n")  # 不再抛出
+
+
+class TestOutputCapture:
+    def test_tail_ready_and_echo(self, tmp_path):
+        echoed = []
+        cap = OC.OutputCapture(
+            log_path=tmp_path / "c.log",
+            tail_lines=2,
+            patterns=(re.compile("ready"),),
+            echo=echoed.append,
+        )
+        cap.drain(io.BytesIO("a\nserver ready\n中文\n".encode("utf-8")))
+        assert cap.ready.is_set()
+        assert cap.tail() == ["server ready\n", "中文\n"]
+        assert cap.tail(1) == ["中文\n"]
+        assert cap.lines == 3
+        assert echoed[-1] == "中文\n"
+        assert (tmp_path / "c.log").read_text(encoding="utf-8") == "a\nserver ready\n中文\n"
+
+    def test_without_log_file(self):
+        cap = OC.OutputCapture(log_path=None)
+        cap.drain(io.BytesIO(b"x\n"))
+        assert cap.text() == "x\n"
+
+    def test_child_never_blocks_on_full_pipe(self, tmp_path):
+        # 远超管道缓冲区（通常 64KB）的输出
+        script = "import sys\nfor i in range(20000): print('x' * 40, i)\n"
+        proc = subprocess.Popen(
+            [sys.executable, "-c", script], stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        cap = OC.OutputCapture(log_path=tmp_path / "big.log", max_bytes=256 * 1024, tail_lines=100)
+        cap.attach(proc.stdout)
+        assert proc.wait(timeout=30) == 0
+        cap.join(10)
+        assert cap.lines == 20000
+        assert cap.tail(1)[0].endswith("19999\n")
+        assert len(cap.tail()) == 100
+        assert (tmp_path / "big.log.1").exists()
+
+
+class TestConfig:
+    def test_defaults(self):
+        s = OC.settings_from_config(None)
+        assert s["enabled"] is True
+        assert s["max_bytes"] == OC.DEFAULT_MAX_MB * 1024 * 1024
+        assert s["tail_lines"] == OC.DEFAULT_TAIL_LINES
+
+    def test_from_config(self, tmp_path):
+        cfg = {"launch_options": {
+            "output_log_max_mb": 1, "output_log_backups": "x", "output_tail_lines": 50,
+        }}
+        cap = OC.OutputCapture.from_config(cfg, log_dir=tmp_path)
+        assert cap.log_path == tmp_path / OC.LOG_NAME
+        assert cap._writer.max_bytes == 1024 * 1024
+        assert cap._writer.backups == OC.DEFAULT_BACKUPS
+        assert cap._tail.maxlen == 50
+
+    def test_log_disabled(self, tmp_path):
+        cap = OC.OutputCapture.from_config(
+            {"launch_options": {"output_log_enabled": False}}, log_dir=tmp_path
+        )
+        assert cap.log_path is None
+        cap.feed("x\n")
+        assert cap.tail() == ["x\n"]
+
+    def test_log_dir_follows_app_base_root_not_cwd(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        app = type("App", (), {"base_root": tmp_path / "root"})()
+        cap = OC.OutputCapture.from_config({}, app=app)
+        assert cap.log_path == tmp_path / "root" / "launcher" / OC.LOG_NAME
+
+    def test_log_dir_without_app_uses_resolved_base_root(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(OC.PATHS, "resolve_base_root", lambda: tmp_path)
+        assert OC.default_log_dir(object()) == tmp_path / "launcher"
@@ -0,0 +1,116 @@
+"""
+Tests for utils/pep440.py (in-process version / specifier / marker evaluator).
+"""
+
+import pytest
+
+from utils.pep440 import (
+    InvalidSpecifier,
+    SpecifierSet,
+    Version,
+    evaluate_marker,
+    target_environment,
+)
+
+
+class TestVersionOrdering:
+    @pytest.mark.parametrize(
+        "lower, higher",
+        [
+            ("1.0.dev1", "1.0a1"),
+            ("1.0a1", "1.0b1"),
+            ("1.0b1", "1.0rc1"),
+            ("1.0rc1", "1.0"),
+            ("1.0", "1.0.post1"),
+            ("1.0", "1.0+cu124"),
+            ("1.0+abc", "1.0+1"),
+            ("4.50.3", "4.56.2"),
+            ("9.9", "1!0.1"),
+        ],
+    )
+    def test_ordering(self, lower, higher):
+        assert Version(lower) < Version(higher)
+
+    def test_trailing_zeros_are_equal(self):
+        assert Version("1.0") == Version("1.0.0")
+
+    def test_normalizes_spelling(self):
+        assert str(Version("1.0-alpha-2")) == "1.0a2"
+        assert str(Version("2.5.1+CU124")) == "2.5.1+cu124"
+
+
+class TestSpecifierSet:
+    @pytest.mark.parametrize(
+        "spec, version, expected",
+        [
+            (">=4.50.3", "4.56.2", True),
+            (">=4.50.3", "4.50.2", False),
+            ("==1.45.15", "1.45.15", True),
+            ("==1.45.15", "1.45.16", False),
+            ("==2.5.1", "2.5.1+cu124", True),
+            ("==2.5.1+cu118", "2.5.1+cu124", False),
+            ("~=2.5", "2.9.0", True),
+            ("~=2.5", "3.0", False),
+            ("~=2.5.0", "2.6.0", False),
+            ("==1.*", "1.9.3", True),
+            ("!=1.2.*", "1.2.7", False),
+            (">=2.0,<3", "2.7", True),
+            (">=2.0,<3", "3.0", False),
+            ("<2.0", "2.0rc1", False),
+            (">1.0", "1.0.post1", False),
+            ("", "0.0.1", True),
+        ],
+    )
+    def test_contains_installed(self, spec, version, expected):
+        assert SpecifierSet(spec).contains(version, prereleases=True) is expected
+
+    def test_prereleases_rejected_by_default(self):
+        assert SpecifierSet(">=1.0").contains("2.0b1") is False
+        assert SpecifierSet(">=1.0b1").contains("2.0b1") is True
+
+    def test_invalid_specifier_raises(self):
+        with pytest.raises(InvalidSpecifier):
+            SpecifierSet("~=1")
+        with pytest.raises(InvalidSpecifier):
+            SpecifierSet(">=1.*")
+
+
+class TestMarkers:
+    ENV = {
+        "python_version": "3.11",
+        "sys_platform": "win32",
+        "platform_machine": "AMD64",
+        "os_name": "nt",
+        "platform_system": "Windows",
+    }
+
+    @pytest.mark.parametrize(
+        "marker, expected",
+        [
+            ('python_version < "3.10"', False),
+            ("python_version >= '3.8'", True),
+            ('sys_platform == "win32" and platform_machine == "AMD64"', True),
+            ('sys_platform == "linux" or (os_name == "nt" and python_version > "3.9")', True),
+            ('"win" in sys_platform', True),
+            ('platform_system not in "Linux Darwin"', True),
+            ('sys.platform == "darwin"', False),
+        ],
+    )
+    def test_evaluate(self, marker, expected):
+        assert evaluate_marker(marker, self.ENV) is expected
+
+    def test_undefined_variable_is_undetermined(self):
+        assert evaluate_marker('python_full_version >= "3.11.2"', self.ENV) is None
+
+    def test_bad_syntax_is_undetermined(self):
+        assert evaluate_marker('python_version <<< "3"', self.ENV) is None
+
+    def test_target_environment_replaces_python_version(self):
+        env = target_environment("3.12")
+        assert env["python_version"] == "3.12"
+        assert "python_full_version" not in env
+
+    def test_target_environment_unknown_version(self):
+        env = target_environment(None)
+        assert "python_version" not in env
+        assert evaluate_marker('python_version < "3.10"', env) is None
@@ -870,8 +870,9 @@ class TestInstallRequirementsFileUnversioned:
     scipy is already on the system, treating it as satisfied is the right
     default.
 
-    Version-pinned specs (``==X.Y.Z``) must keep the existing behavior:
-    we still call pip so the pin is enforced.
+    Version-pinned specs (``==X.Y.Z``) only skip pip when the in-process
+    index shows the installed version satisfies the pin; otherwise pip is
+    still called so the pin is enforced.
     """
 
     def test_unversioned_already_installed_skips_pip(self, tmp_path):
@@ -1384,3 +1385,581 @@ class TestInstallOrUpdatePackageProgress:
         pipmod.install_or_update_package("torch", "python")
         assert called["hidden"] is True
         assert called["stream"] is False
+
+
+class TestInstallOrUpdatePackageReport:
+    """Results come from pip's --report JSON; stdout parsing is only the fallback."""
+
+    @staticmethod
+    def _fake_run(report, stdout="", stderr="", returncode=0, calls=None):
+        import json
+
+        def fake_run_hidden(cmd, **kw):
+            if calls is not None:
+                calls.append(list(cmd))
+            if "--report" in cmd and report is not None:
+                path = cmd[cmd.index("--report") + 1]
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(report, f)
+            return MagicMock(returncode=returncode, stdout=stdout, stderr=stderr)
+
+        return fake_run_hidden
+
+    def test_installed_and_version_come_from_report(self):
+        from utils.pip import install_or_update_package
+
+        report = {"install": [
+            {"metadata": {"name": "requests", "version": "2.32.3"}},
+            {"metadata": {"name": "urllib3", "version": "2.2.2"}},
+        ]}
+        calls = []
+        with patch("utils.pip.run_hidden", side_effect=self._fake_run(report, calls=calls)), \
+                patch("utils.pip.get_package_version") as gpv:
+            result = install_or_update_package("Requests>=2", "python")
+        gpv.assert_not_called()
+        assert len(calls) == 1 and "--report" in calls[0]
+        assert result["updated"] is True
+        assert result["version"] == "2.32.3"
+        assert result["installed"] == ["requests-2.32.3", "urllib3-2.2.2"]
+
+    def test_empty_report_means_up_to_date(self):
+        from utils.pip import install_or_update_package
+
+        with patch("utils.pip.run_hidden", side_effect=self._fake_run({"install": []})), \
+                patch("utils.pip.get_package_version", return_value="2.28.0"):
+            result = install_or_update_package("requests", "python")
+        assert result["updated"] is False
+        assert result["up_to_date"] is True
+        assert result["version"] == "2.28.0"
+
+    def test_old_pip_without_report_falls_back_to_stdout(self):
+        from utils.pip import install_or_update_package
+
+        calls = []
+        results = iter([
+            MagicMock(returncode=2, stdout="", stderr="no such option: --report"),
+            MagicMock(returncode=0, stdout="Successfully installed requests-2.28.0", stderr=""),
+        ])
+
+        def fake_run_hidden(cmd, **kw):
+            calls.append(list(cmd))
+            return next(results)
+
+        with patch("utils.pip.run_hidden", side_effect=fake_run_hidden), \
+                patch("utils.pip.get_package_version") as gpv:
+            result = install_or_update_package("requests", "python")
+        assert "--report" in calls[0] and "--report" not in calls[1]
+        assert result["success"] is True
+        assert result["installed"] == ["requests-2.28.0"]
+        assert result["version"] == "2.28.0"
+        gpv.assert_not_called()
+
+    def test_retry_remaining_reads_report(self, tmp_path):
+        from utils.pip import _retry_install_remaining
+
+        req = tmp_path / "requirements.txt"
+        req.write_text("foo==1.0\nbar==2.0\n", encoding="utf-8")
+        report = {"install": [{"metadata": {"name": "bar", "version": "2.0"}}]}
+        with patch("utils.pip.run_hidden", side_effect=self._fake_run(report)):
+            out = _retry_install_remaining(
+                req, ["foo==1.0"], ["python", "-m", "pip", "install", "-r", str(req)],
+                logging.getLogger("test"),
+            )
+        try:
+            assert out["success"] is True
+            assert out["installed"] == ["bar-2.0"]
+        finally:
+            if out.get("filtered_path"):
+                Path(out["filtered_path"]).unlink()
+
+
+class TestUvBackend:
+    """With the uv backend results are parsed from uv's output (no --report)."""
+
+    @pytest.fixture(autouse=True)
+    def _uv(self, tmp_path):
+        from utils import installer_backend as INSTALLER
+
+        uv = tmp_path / "uv"
+        uv.write_text("", encoding="utf-8")
+        INSTALLER.configure("uv", uv_path=uv)
+        self.uv = str(uv)
+        yield
+        INSTALLER.configure("pip")
+
+    def test_install_or_update_package_parses_uv_output(self):
+        from utils.pip import install_or_update_package
+
+        calls = []
+        proc = MagicMock(
+            returncode=0,
+            stdout="",
+            stderr="Resolved 2 packages in 5ms\nInstalled 1 package in 3ms\n + requests==2.32.3\n",
+        )
+
+        def fake_run_hidden(cmd, **kw):
+            calls.append(list(cmd))
+            return proc
+
+        with patch("utils.pip.run_hidden", side_effect=fake_run_hidden), \
+                patch("utils.pip.get_package_version") as gpv:
+            result = install_or_update_package("requests", "python")
+        assert calls[0][:3] == [self.uv, "pip", "install"]
+        assert "--report" not in calls[0]
+        assert result["updated"] is True
+        assert result["version"] == "2.32.3"
+        gpv.assert_not_called()
+
+    def test_uv_missing_version_maps_to_version_not_found(self):
+        from utils.pip import install_or_update_package
+
+        stderr = (
+            "  × No solution found when resolving dependencies:\n"
+            "  ╰─▶ Because there is no version of foo==9.9 and you require foo==9.9, "
+            "we can conclude that your requirements are unsatisfiable.\n"
+        )
+        with patch("utils.pip.run_hidden", return_value=MagicMock(returncode=1, stdout="", stderr=stderr)):
+            result = install_or_update_package("foo==9.9", "python")
+        assert result["error_code"] == "VERSION_NOT_FOUND"
+
+    def test_requirements_plan_uses_one_uv_call_with_frozen_constraints(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req = tmp_path / "requirements.txt"
+        req.write_text("foo>=1\nbar==2.0\ntorch\n", encoding="utf-8")
+        calls = []
+
+        def fake_run_hidden(cmd, **kw):
+            calls.append(list(cmd))
+            c = cmd[cmd.index("-c") + 1]
+            assert Path(c).read_text(encoding="utf-8").split() == ["torch==2.3.0"]
+            return MagicMock(returncode=0, stdout="", stderr=" + foo==1.5\n")
+
+        def lookup(name, _py):
+            return True, {"torch": "2.3.0", "bar": "2.0"}.get(name.lower())
+
+        with patch("utils.pip.run_hidden", side_effect=fake_run_hidden), \
+                patch("utils.pip._locally_satisfied_version", return_value=None), \
+                patch("utils.pip.PIPINDEX.lookup_version", side_effect=lookup):
+            result = install_requirements_file(
+                req, "python", plan=True, ignore_pkgs={"torch"}
+            )
+        assert len(calls) == 1
+        assert "--dry-run" not in calls[0]
+        assert result["installed"] == ["foo-1.5"]
+        assert result["satisfied"] == ["bar-2.0"]
+        assert [f["name"] for f in result["frozen"]] == ["torch"]
+        assert result["success"] is True
+
+
+class TestInstallRequirementsFilePlanned:
+    """plan=True: one resolver pass, install only the delta in one pip run."""
+
+    def _report(self, *items):
+        return {
+            "version": "1",
+            "install": [
+                {
+                    "is_direct": False,
+                    "requested": requested,
+                    "metadata": {"name": name, "version": ver},
+                    "download_info": {"url": f"https://x/{name}-{ver}.whl"},
+                }
+                for name, ver, requested in items
+            ],
+        }
+
+    def _ok(self, stdout=""):
+        return MagicMock(returncode=0, stdout=stdout, stderr="")
+
+    def test_noop_sync_runs_single_resolver_and_no_install(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text("requests==2.28.0\nflask>=2.0\n", encoding="utf-8")
+
+        with patch("utils.pip._pip_command", return_value=["pip"]), patch(
+            "utils.pip._run_pip_report", return_value=(self._ok(), self._report())
+        ) as mock_report, patch("utils.pip.run_hidden") as mock_run, patch(
+            "utils.pip.PIPINDEX.installed_versions",
+            return_value={"requests": "2.28.0", "flask": "2.3.0"},
+        ), patch("utils.pip.install_or_update_package") as mock_install:
+            result = install_requirements_file(str(req_file), "python", plan=True)
+
+        assert mock_report.call_count == 1
+        cmd = mock_report.call_args[0][0]
+        assert "--dry-run" in cmd
+        assert "requests==2.28.0" in cmd and "flask>=2.0" in cmd
+        mock_run.assert_not_called()
+        mock_install.assert_not_called()
+        assert result["success"] is True
+        assert result["up_to_date"] is True
+        assert sorted(result["satisfied"]) == ["flask-2.3.0", "requests-2.28.0"]
+
+    def test_installs_only_delta_in_one_invocation(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text("requests==2.31.0\nflask>=2.0\n", encoding="utf-8")
+        report = self._report(
+            ("requests", "2.31.0", True), ("urllib3", "2.2.1", False)
+        )
+
+        with patch("utils.pip._pip_command", return_value=["pip"]), patch(
+            "utils.pip._run_pip_report", return_value=(self._ok(), report)
+        ), patch("utils.pip.run_hidden", return_value=self._ok()) as mock_run, patch(
+            "utils.pip.PIPINDEX.installed_versions", return_value={"flask": "2.3.0"}
+        ), patch("utils.pip.install_or_update_package") as mock_install:
+            result = install_requirements_file(str(req_file), "python", plan=True)
+
+        assert mock_run.call_count == 1
+        cmd = mock_run.call_args[0][0]
+        assert cmd[:3] == ["pip", "install", "--no-deps"]
+        assert "requests==2.31.0" in cmd and "urllib3==2.2.1" in cmd
+        mock_install.assert_not_called()
+        assert result["installed"] == ["requests-2.31.0"]
+        assert result["satisfied"] == ["flask-2.3.0"]
+        assert result["updated"] is True
+
+    def test_plan_pins_frozen_packages_with_constraints(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text("kornia>=0.7\n", encoding="utf-8")
+        report = self._report(("kornia", "0.8.0", True))
+        seen = {}
+
+        def fake_report(cmd, *args, **kwargs):
+            if "--dry-run" in cmd:
+                seen["cmd"] = list(cmd)
+                with open(cmd[cmd.index("-c") + 1], encoding="utf-8") as f:
+                    seen["constraints"] = f.read()
+            return self._ok(), report
+
+        with patch("utils.pip._pip_command", return_value=["pip"]), patch(
+            "utils.pip._run_pip_report", side_effect=fake_report
+        ), patch("utils.pip.run_hidden", return_value=self._ok()) as mock_run, patch(
+            "utils.pip.PIPINDEX.installed_versions", return_value={}
+        ), patch(
+            "utils.pip.PIPINDEX.lookup_version",
+            side_effect=lambda name, exe: (True, "2.5.1" if name == "torch" else None),
+        ):
+            install_requirements_file(
+                str(req_file), "python", ignore_pkgs={"torch"}, plan=True
+            )
+
+        assert seen["constraints"].strip() == "torch==2.5.1"
+        assert "kornia==0.8.0" in mock_run.call_args[0][0]
+
+    def test_plan_touching_frozen_package_falls_back_per_spec(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text("kornia>=0.7\n", encoding="utf-8")
+        # torch 未安装（无法钉版本），解析结果要装它
+        report = self._report(("kornia", "0.8.0", True), ("torch", "2.7.0", False))
+
+        with patch("utils.pip._pip_command", return_value=["pip"]), patch(
+            "utils.pip._run_pip_report", return_value=(self._ok(), report)
+        ), patch("utils.pip.run_hidden", return_value=self._ok()) as mock_run, patch(
+            "utils.pip.PIPINDEX.installed_versions", return_value={}
+        ), patch("utils.pip.install_or_update_package") as mock_install:
+            mock_install.return_value = {
+                "success": True, "updated": True, "up_to_date": False,
+                "version": "0.8.0", "error": None, "error_code": None,
+            }
+            result = install_requirements_file(
+                str(req_file), "python", ignore_pkgs={"torch"}, plan=True
+            )
+
+        # 没有用 --no-deps 批量安装依赖 torch 的包
+        mock_run.assert_not_called()
+        assert [c.args[0] for c in mock_install.call_args_list] == ["kornia>=0.7"]
+        assert result["installed"] == ["kornia-0.8.0"]
+
+    def test_batch_install_failure_falls_back_per_spec(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text("requests==2.31.0\nflask>=2.0\n", encoding="utf-8")
+        report = self._report(("requests", "2.31.0", True))
+        fail = MagicMock(returncode=1, stdout="", stderr="boom")
+
+        def fake_install(spec, python_exec, **kwargs):
+            return {"success": True, "updated": True, "up_to_date": False,
+                    "version": "2.31.0", "error": None, "error_code": None}
+
+        with patch("utils.pip._pip_command", return_value=["pip"]), patch(
+            "utils.pip._run_pip_report", return_value=(self._ok(), report)
+        ), patch("utils.pip.run_hidden", return_value=fail), patch(
+            "utils.pip.PIPINDEX.installed_versions", return_value={"flask": "2.3.0"}
+        ), patch(
+            "utils.pip.install_or_update_package", side_effect=fake_install
+        ) as mock_install:
+            result = install_requirements_file(str(req_file), "python", plan=True)
+
+        assert [c[0][0] for c in mock_install.call_args_list] == ["requests==2.31.0"]
+        assert result["installed"] == ["requests-2.31.0"]
+        assert result["satisfied"] == ["flask-2.3.0"]
+
+    def test_mirror_missing_specs_are_dropped_and_resolved_again(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text(
+            "comfyui-frontend-package==1.45.15\nrequests==2.28.0\n", encoding="utf-8"
+        )
+        missing = MagicMock(
+            returncode=1,
+            stdout="",
+            stderr="ERROR: Could not find a version that satisfies the requirement "
+            "comfyui-frontend-package==1.45.15 (from versions: 1.0)",
+        )
+
+        with patch("utils.pip._pip_command", return_value=["pip"]), patch(
+            "utils.pip._run_pip_report",
+            side_effect=[(missing, None), (self._ok(), self._report())],
+        ) as mock_report, patch(
+            "utils.pip.PIPINDEX.installed_versions", return_value={"requests": "2.28.0"}
+        ), patch("utils.pip.install_or_update_package") as mock_install:
+            result = install_requirements_file(str(req_file), "python", plan=True)
+
+        assert mock_report.call_count == 2
+        assert "comfyui-frontend-package==1.45.15" not in mock_report.call_args[0][0]
+        mock_install.assert_not_called()
+        assert result["missing"] == ["comfyui-frontend-package==1.45.15"]
+        assert result["satisfied"] == ["requests-2.28.0"]
+        assert result["error_code"] == "VERSION_NOT_FOUND"
+
+    def test_resolver_unavailable_falls_back_to_per_spec(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text("requests==2.28.0\n", encoding="utf-8")
+        old_pip = MagicMock(returncode=2, stdout="", stderr="no such option: --dry-run")
+
+        def fake_install(spec, python_exec, **kwargs):
+            return {"success": True, "updated": False, "up_to_date": True,
+                    "version": "2.28.0", "error": None, "error_code": None}
+
+        with patch("utils.pip._pip_command", return_value=["pip"]), patch(
+            "utils.pip._run_pip_report", return_value=(old_pip, None)
+        ), patch(
+            "utils.pip.install_or_update_package", side_effect=fake_install
+        ) as mock_install:
+            result = install_requirements_file(str(req_file), "python", plan=True)
+
+        assert mock_install.call_count == 1
+        assert result["satisfied"] == ["requests-2.28.0"]
+
+
+class TestInstallRequirementsFileLocalSatisfied:
+    """Pinned / ranged specs whose installed version already satisfies them skip pip."""
+
+    def test_pinned_and_ranged_specs_satisfied_locally(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text(
+            "transformers>=4.50.3\ncomfyui-frontend-package==1.45.15\naiohttp~=3.9\n",
+            encoding="utf-8",
+        )
+        installed = {
+            "transformers": "4.56.2",
+            "comfyui-frontend-package": "1.45.15",
+            "aiohttp": "3.10.5",
+        }
+
+        with patch(
+            "utils.pip.PIPINDEX.lookup_version",
+            side_effect=lambda name, _py: (True, installed.get(name)),
+        ), patch("utils.pip.install_or_update_package") as mock_install, patch(
+            "utils.pip._run_pip_report"
+        ) as mock_report:
+            result = install_requirements_file(str(req_file), "python", plan=True)
+
+        mock_install.assert_not_called()
+        mock_report.assert_not_called()
+        assert result["success"] is True
+        assert result["up_to_date"] is True
+        assert sorted(result["satisfied"]) == [
+            "aiohttp-3.10.5",
+            "comfyui-frontend-package-1.45.15",
+            "transformers-4.56.2",
+        ]
+
+    def test_unsatisfied_pin_still_calls_pip(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text("transformers>=4.50.3\n", encoding="utf-8")
+
+        with patch(
+            "utils.pip.PIPINDEX.lookup_version", return_value=(True, "4.49.0")
+        ), patch("utils.pip.install_or_update_package") as mock_install:
+            mock_install.return_value = {
+                "success": True, "updated": True, "up_to_date": False,
+                "version": "4.56.2", "error": None, "error_code": None,
+            }
+            result = install_requirements_file(str(req_file), "python")
+
+        mock_install.assert_called_once()
+        assert result["installed"] == ["transformers-4.56.2"]
+
+    def test_upgrade_mode_never_skips_pip(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text("transformers>=4.50.3\n", encoding="utf-8")
+
+        with patch(
+            "utils.pip.PIPINDEX.lookup_version", return_value=(True, "4.56.2")
+        ), patch("utils.pip.install_or_update_package") as mock_install:
+            mock_install.return_value = {
+                "success": True, "updated": False, "up_to_date": True,
+                "version": "4.56.2", "error": None, "error_code": None,
+            }
+            install_requirements_file(str(req_file), "python", upgrade=True)
+
+        mock_install.assert_called_once()
+
+    def test_markers_that_do_not_apply_are_skipped(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text(
+            "tomli>=1.1 ; python_version < '3.11'\n"
+            "requests==2.28.0 ; python_version >= '3.8'\n",
+            encoding="utf-8",
+        )
+
+        with patch(
+            "utils.pip.PIPINDEX.guess_python_version", return_value="3.12"
+        ), patch("utils.pip.install_or_update_package") as mock_install:
+            mock_install.return_value = {
+                "success": True, "updated": True, "up_to_date": False,
+                "version": "2.28.0", "error": None, "error_code": None,
+            }
+            result = install_requirements_file(str(req_file), "python")
+
+        assert [c.args[0] for c in mock_install.call_args_list] == ["requests==2.28.0"]
+        assert result["installed"] == ["requests-2.28.0"]
+
+    def test_unevaluable_marker_is_passed_to_pip(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text('foo==1.0 ; platform_release >= "6"\n', encoding="utf-8")
+
+        with patch(
+            "utils.pip.PIPINDEX.guess_python_version", return_value="3.12"
+        ), patch(
+            "utils.pip.PIPINDEX.lookup_version", return_value=(True, None)
+        ), patch("utils.pip.install_or_update_package") as mock_install:
+            mock_install.return_value = {
+                "success": True, "updated": True, "up_to_date": False,
+                "version": "1.0", "error": None, "error_code": None,
+            }
+            result = install_requirements_file(str(req_file), "python")
+
+        assert [c.args[0] for c in mock_install.call_args_list] == ['foo==1.0 ; platform_release >= "6"']
+        assert result["installed"] == ["foo-1.0"]
+
+
+class TestInstallRequirementsFilePrefetch:
+    """prefetch=True: download the delta concurrently, then install offline."""
+
+    def _report(self, *pins):
+        return {
+            "install": [
+                {
+                    "is_direct": False,
+                    "metadata": {"name": name, "version": ver},
+                    "download_info": {"url": f"https://x/{name}-{ver}-py3-none-any.whl"},
+                }
+                for name, ver in pins
+            ]
+        }
+
+    def _fake_prefetch(self, failed=()):
+        def _prefetch(items, staging, pip_cmd, **_kw):
+            files = {}
+            for item in items:
+                meta = item["metadata"]
+                if meta["name"] in failed:
+                    continue
+                p = Path(staging) / f"{meta['name']}-{meta['version']}-py3-none-any.whl"
+                p.write_bytes(b"x")
+                files[meta["name"]] = p
+            return {"files": files, "failed": list(failed), "skipped": []}
+
+        return _prefetch
+
+    def test_complete_prefetch_installs_offline_from_staging(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text("requests==2.31.0\n", encoding="utf-8")
+        report = self._report(("requests", "2.31.0"), ("urllib3", "2.2.1"))
+        staging_seen = []
+
+        def fake_prefetch(items, staging, pip_cmd, **kw):
+            staging_seen.append(Path(staging))
+            assert kw["max_workers"] == 4
+            return self._fake_prefetch()(items, staging, pip_cmd)
+
+        with patch("utils.pip._pip_command", return_value=["pip"]), patch(
+            "utils.pip._run_pip_report", return_value=(MagicMock(returncode=0), report)
+        ), patch(
+            "utils.pip.PIPPREFETCH.prefetch", side_effect=fake_prefetch
+        ) as mock_prefetch, patch(
+            "utils.pip.run_hidden",
+            return_value=MagicMock(returncode=0, stdout="", stderr=""),
+        ) as mock_run, patch(
+            "utils.pip.PIPINDEX.installed_versions", return_value={}
+        ):
+            result = install_requirements_file(
+                str(req_file), "python", prefetch=True, prefetch_workers=4
+            )
+
+        mock_prefetch.assert_called_once()
+        cmd = mock_run.call_args[0][0]
+        assert "--no-index" in cmd
+        assert cmd[cmd.index("--find-links") + 1] == str(staging_seen[0])
+        assert "requests==2.31.0" in cmd and "urllib3==2.2.1" in cmd
+        assert result["installed"] == ["requests-2.31.0"]
+        assert result["success"] is True
+        # 暂存目录用完即删
+        assert not staging_seen[0].exists()
+
+    def test_incomplete_prefetch_installs_online_with_staged_links(self, tmp_path):
+        from utils.pip import install_requirements_file
+
+        req_file = tmp_path / "requirements.txt"
+        req_file.write_text("requests==2.31.0\n", encoding="utf-8")
+        report = self._report(("requests", "2.31.0"), ("urllib3", "2.2.1"))
+
+        with patch("utils.pip._pip_command", return_value=["pip"]), patch(
+            "utils.pip._run_pip_report", return_value=(MagicMock(returncode=0), report)
+        ), patch(
+            "utils.pip.PIPPREFETCH.prefetch",
+            side_effect=self._fake_prefetch(failed=("urllib3",)),
+        ), patch(
+            "utils.pip.run_hidden",
+            return_value=MagicMock(returncode=0, stdout="", stderr=""),
+        ) as mock_run, patch(
+            "utils.pip.PIPINDEX.installed_versions", return_value={}
+        ):
+            result = install_requirements_file(
+                str(req_file),
+                "python",
+                index_url="https://mirror/simple",
+                prefetch=True,
+            )
+
+        assert mock_run.call_count == 1
+        cmd = mock_run.call_args[0][0]
+        assert "--no-index" not in cmd
+        assert cmd[cmd.index("-i") + 1] == "https://mirror/simple"
+        assert "--find-links" in cmd
+        assert result["success"] is True
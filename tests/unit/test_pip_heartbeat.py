@@ -156,9 +156,12 @@ class TestHeartbeatDoesNotDisturbActive(unittest.TestCase):
         heartbeats = [e for e in events if "已等待" in e]
         self.assertFalse(heartbeats,
                           f"heartbeat fired while pip active: {heartbeats!r}")
-        # pip 的 progress bar 应该有出现
+        # pip 的 progress bar 应该有出现；逐行进度按限速合并，
+        # 不再是每行一条，但最后一条（50.0/100.0）一定送达
         bar = [e for e in events if "MB" in e and "/" in e]
-        self.assertGreater(len(bar), 10, f"too few bars: {len(bar)}")
+        self.assertTrue(bar, f"no bars: {events!r}")
+        self.assertLess(len(bar), 50, f"bars not coalesced: {len(bar)}")
+        self.assertIn("50.0 MB / 100.0 MB", bar[-1])
 
     def test_heartbeat_resumes_after_silence_following_activity(self):
         """先打几行 progress bar → 静默 7s → 心跳必须重新出现。"""
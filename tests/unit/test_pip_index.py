@@ -0,0 +1,175 @@
+"""
+Tests for utils/pip_index.py (in-process installed-distribution index).
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+
+def _make_env(tmp_path, embedded=True):
+    """Build a fake interpreter layout and return (python_exec, site_dir)."""
+    if embedded:
+        exe_dir = tmp_path / "python_embeded"
+        site = exe_dir / "Lib" / "site-packages"
+        exe = exe_dir / "python.exe"
+    else:
+        exe_dir = tmp_path / "venv" / "bin"
+        site = tmp_path / "venv" / "lib" / "python3.11" / "site-packages"
+        exe = exe_dir / "python"
+    site.mkdir(parents=True)
+    exe_dir.mkdir(parents=True, exist_ok=True)
+    exe.write_bytes(b"")
+    return exe, site
+
+
+def _add_dist(site, name, version, dirname=None):
+    d = site / (dirname or f"{name.replace('-', '_')}-{version}.dist-info")
+    d.mkdir()
+    (d / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n\nbody\n",
+        encoding="utf-8",
+    )
+    return d
+
+
+@pytest.fixture(autouse=True)
+def _fresh_indexes():
+    from utils import pip_index
+
+    pip_index._INDEXES.clear()
+    yield
+    pip_index._INDEXES.clear()
+
+
+class TestFindSitePackages:
+    def test_embedded_layout(self, tmp_path):
+        from utils.pip_index import find_site_packages
+
+        exe, site = _make_env(tmp_path, embedded=True)
+        assert site in find_site_packages(exe)
+
+    def test_posix_venv_layout(self, tmp_path):
+        from utils.pip_index import find_site_packages
+
+        exe, site = _make_env(tmp_path, embedded=False)
+        assert site in find_site_packages(exe)
+
+    def test_pth_file_dirs_are_used(self, tmp_path):
+        from utils.pip_index import find_site_packages
+
+        exe, _site = _make_env(tmp_path, embedded=True)
+        extra = exe.parent / "extra"
+        extra.mkdir()
+        (exe.parent / "python311._pth").write_text(
+            "python311.zip\n.\nextra\nimport site\n", encoding="utf-8"
+        )
+        assert extra in find_site_packages(exe)
+
+    def test_missing_interpreter_returns_empty(self, tmp_path):
+        from utils.pip_index import find_site_packages
+
+        assert find_site_packages(tmp_path / "nope" / "python.exe") == []
+
+
+class TestInstalledDistributionIndex:
+    def test_lookup_reads_metadata_and_normalizes_names(self, tmp_path):
+        from utils.pip_index import lookup_version
+
+        exe, site = _make_env(tmp_path)
+        _add_dist(site, "comfyui-frontend-package", "1.45.15")
+        _add_dist(site, "PyYAML", "6.0.2")
+
+        assert lookup_version("comfyui_frontend_package", exe) == (True, "1.45.15")
+        assert lookup_version("pyyaml", exe) == (True, "6.0.2")
+        assert lookup_version("missing-pkg", exe) == (True, None)
+
+    def test_unknown_interpreter_is_not_authoritative(self, tmp_path):
+        from utils.pip_index import lookup_version
+
+        assert lookup_version("torch", tmp_path / "python.exe") == (False, None)
+
+    def test_falls_back_to_directory_name_without_metadata(self, tmp_path):
+        from utils.pip_index import lookup_version
+
+        exe, site = _make_env(tmp_path)
+        (site / "legacy_pkg-0.3.1-py3.11.egg-info").mkdir()
+        assert lookup_version("legacy-pkg", exe) == (True, "0.3.1")
+
+    def test_cached_until_site_dir_mtime_changes(self, tmp_path):
+        from utils import pip_index
+
+        exe, site = _make_env(tmp_path)
+        _add_dist(site, "requests", "2.31.0")
+        assert pip_index.lookup_version("requests", exe) == (True, "2.31.0")
+
+        with patch("utils.pip_index._scan_site_dir") as scan:
+            assert pip_index.lookup_version("requests", exe) == (True, "2.31.0")
+            scan.assert_not_called()
+
+        old = site / "requests-2.31.0.dist-info"
+        for f in old.iterdir():
+            f.unlink()
+        old.rmdir()
+        _add_dist(site, "requests", "2.32.3")
+        st = os.stat(site)
+        os.utime(site, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert pip_index.lookup_version("requests", exe) == (True, "2.32.3")
+
+    def test_invalidate_forces_rescan(self, tmp_path):
+        from utils import pip_index
+
+        exe, site = _make_env(tmp_path)
+        _add_dist(site, "requests", "2.31.0")
+        pip_index.lookup_version("requests", exe)
+
+        with patch("utils.pip_index._scan_site_dir") as scan:
+            pip_index.invalidate(exe)
+            pip_index.lookup_version("requests", exe)
+            assert scan.called
+
+
+class TestDirectUrls:
+    def test_reads_direct_url_json(self, tmp_path):
+        import json
+
+        from utils.pip_index import direct_urls
+
+        exe, site = _make_env(tmp_path)
+        _add_dist(site, "requests", "2.31.0")
+        d = _add_dist(site, "My_Node", "0.1.0")
+        info = {"url": "https://github.com/x/node", "vcs_info": {"vcs": "git", "commit_id": "abc"}}
+        (d / "direct_url.json").write_text(json.dumps(info), encoding="utf-8")
+        assert direct_urls(exe) == {"my-node": info}
+
+
+class TestGetPackageVersionUsesIndex:
+    def test_index_hit_skips_pip_show(self, tmp_path):
+        from utils.pip import get_package_version
+
+        exe, site = _make_env(tmp_path)
+        _add_dist(site, "torch", "2.5.1+cu124")
+
+        with patch("utils.pip.run_hidden") as run:
+            assert get_package_version("torch>=2.0", str(exe)) == "2.5.1+cu124"
+            run.assert_not_called()
+
+    def test_index_miss_is_authoritative(self, tmp_path):
+        from utils.pip import get_package_version
+
+        exe, _site = _make_env(tmp_path)
+        with patch("utils.pip.run_hidden") as run:
+            assert get_package_version("not-installed", str(exe)) is None
+            run.assert_not_called()
+
+    def test_install_invalidates_index(self, tmp_path):
+        from unittest.mock import MagicMock
+        from utils.pip import install_or_update_package
+
+        ok = MagicMock(returncode=0, stdout="Successfully installed x-1.0", stderr="")
+        with patch("utils.pip.run_hidden", return_value=ok), patch(
+            "utils.pip.get_package_version", return_value="1.0"
+        ), patch("utils.pip.PIPINDEX.invalidate") as inv:
+            install_or_update_package("x", str(tmp_path / "python.exe"))
+        inv.assert_called_once_with(str(tmp_path / "python.exe"))
@@ -0,0 +1,176 @@
+"""
+Tests for utils/pip_prefetch.py (concurrent download of resolved pins).
+"""
+
+import hashlib
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+
+def _item(name, version, url, sha256=None, is_direct=False):
+    info = {"url": url}
+    if sha256:
+        info["archive_info"] = {"hashes": {"sha256": sha256}}
+    return {
+        "is_direct": is_direct,
+        "metadata": {"name": name, "version": version},
+        "download_info": info,
+    }
+
+
+def _served(tmp_path, filename, payload=b"wheel-bytes"):
+    src = tmp_path / "index" / filename
+    src.parent.mkdir(parents=True, exist_ok=True)
+    src.write_bytes(payload)
+    return src.as_uri(), hashlib.sha256(payload).hexdigest()
+
+
+class TestPrefetch:
+    def test_downloads_all_items_into_staging(self, tmp_path):
+        from utils.pip_prefetch import prefetch
+
+        url_a, sha_a = _served(tmp_path, "foo-1.0-py3-none-any.whl", b"a")
+        url_b, sha_b = _served(tmp_path, "Bar_Baz-2.0-py3-none-any.whl", b"b")
+        staging = tmp_path / "staging"
+
+        out = prefetch(
+            [_item("foo", "1.0", url_a, sha_a), _item("Bar_Baz", "2.0", url_b, sha_b)],
+            staging,
+            ["pip"],
+        )
+
+        assert out["failed"] == [] and out["skipped"] == []
+        assert sorted(out["files"]) == ["bar-baz", "foo"]
+        assert (staging / "foo-1.0-py3-none-any.whl").read_bytes() == b"a"
+        assert not list(staging.glob("*.part"))
+
+    def test_hash_mismatch_falls_back_to_pip_download(self, tmp_path):
+        from utils.pip_prefetch import prefetch
+
+        url, _sha = _served(tmp_path, "foo-1.0-py3-none-any.whl", b"tampered")
+        staging = tmp_path / "staging"
+
+        def fake_run(cmd, **_kw):
+            assert cmd[:2] == ["pip", "download"]
+            assert "--no-deps" in cmd and "foo==1.0" in cmd
+            assert cmd[cmd.index("-i") + 1] == "https://mirror/simple"
+            dest = Path(cmd[cmd.index("-d") + 1])
+            assert dest.parent == staging
+            (dest / "foo-1.0-py3-none-any.whl").write_bytes(b"good")
+            return MagicMock(returncode=0, stdout="", stderr="")
+
+        with patch("utils.pip_prefetch.run_hidden", side_effect=fake_run) as mock_run:
+            out = prefetch(
+                [_item("foo", "1.0", url, "0" * 64)],
+                staging,
+                ["pip"],
+                index_url="https://mirror/simple",
+            )
+
+        assert mock_run.call_count == 1
+        assert out["failed"] == []
+        assert out["files"]["foo"] == staging / "foo-1.0-py3-none-any.whl"
+        assert out["files"]["foo"].read_bytes() == b"good"
+        assert [p.name for p in staging.iterdir()] == ["foo-1.0-py3-none-any.whl"]
+
+    def test_failed_download_is_reported(self, tmp_path):
+        from utils.pip_prefetch import prefetch
+
+        missing = (tmp_path / "nope-1.0-py3-none-any.whl").as_uri()
+        with patch(
+            "utils.pip_prefetch.run_hidden",
+            return_value=MagicMock(returncode=1, stdout="", stderr="No matching"),
+        ):
+            out = prefetch([_item("nope", "1.0", missing)], tmp_path / "s", ["pip"])
+
+        assert out["failed"] == ["nope"]
+        assert out["files"] == {}
+
+    def test_direct_and_vcs_items_are_skipped(self, tmp_path):
+        from utils.pip_prefetch import prefetch
+
+        vcs = _item("lib", "0.1", "https://github.com/x/lib.git")
+        vcs["download_info"]["vcs_info"] = {"vcs": "git"}
+        direct = _item("other", "1.0", "https://x/other.whl", is_direct=True)
+
+        with patch("utils.pip_prefetch.run_hidden") as mock_run:
+            out = prefetch([vcs, direct], tmp_path / "s", ["pip"])
+
+        mock_run.assert_not_called()
+        assert sorted(out["skipped"]) == ["lib", "other"]
+
+    def test_worker_pool_is_bounded(self, tmp_path):
+        from utils import pip_prefetch
+
+        items = [_item(f"p{i}", "1.0", f"https://x/p{i}-1.0-py3-none-any.whl") for i in range(8)]
+        active = [0]
+        peak = [0]
+        lock = threading.Lock()
+
+        def fake_download(url, dest, sha256, timeout):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            dest.write_bytes(b"x")
+            with lock:
+                active[0] -= 1
+            return dest
+
+        progress = []
+        with patch.object(pip_prefetch, "_download_url", side_effect=fake_download):
+            out = pip_prefetch.prefetch(
+                items,
+                tmp_path / "s",
+                ["pip"],
+                max_workers=3,
+                on_progress=lambda text, pct: progress.append(pct),
+            )
+
+        assert len(out["files"]) == 8
+        assert 1 < peak[0] <= 3
+        assert sorted(progress)[-1] == 100
+
+
+def test_concurrent_pip_downloads_keep_their_own_files(tmp_path):
+    """并发的 pip download 回退不会拿到别的包下载的文件。"""
+    from utils import pip_prefetch
+
+    staging = tmp_path / "staging"
+    barrier = threading.Barrier(2)
+
+    def fake_run(cmd, **_kw):
+        pin = cmd[-1]
+        name, version = pin.split("==")
+        dest = Path(cmd[cmd.index("-d") + 1])
+        # 两个下载同时进行，写完各自的文件后再一起返回
+        barrier.wait(5)
+        suffix = ".tar.gz" if name == "sdistpkg" else "-py3-none-any.whl"
+        (dest / f"{name}-{version}{suffix}").write_bytes(name.encode())
+        barrier.wait(5)
+        return MagicMock(returncode=0, stdout="", stderr="")
+
+    def fail(*_a, **_kw):
+        raise OSError("offline")
+
+    with (
+        patch.object(pip_prefetch, "_download_url", side_effect=fail),
+        patch.object(pip_prefetch, "run_hidden", side_effect=fake_run),
+    ):
+        out = pip_prefetch.prefetch(
+            [
+                _item("sdistpkg", "1.0", "https://x/sdistpkg-1.0.tar.gz"),
+                _item("wheelpkg", "2.0", "https://x/wheelpkg-2.0-py3-none-any.whl"),
+            ],
+            staging,
+            ["pip"],
+            max_workers=2,
+        )
+
+    assert out["files"]["sdistpkg"].name == "sdistpkg-1.0.tar.gz"
+    assert out["files"]["wheelpkg"].name == "wheelpkg-2.0-py3-none-any.whl"
+    assert sorted(p.name for p in staging.iterdir()) == [
+        "sdistpkg-1.0.tar.gz", "wheelpkg-2.0-py3-none-any.whl",
+    ]
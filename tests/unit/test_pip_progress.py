@@ -0,0 +1,128 @@
+"""
+Tests for utils/pip_progress.py (structured pip progress events + coalescer).
+"""
+
+import threading
+import time
+
+
+class TestPipLineParser:
+    def test_collect_then_download_progress(self):
+        from utils.pip_progress import PHASE_COLLECT, PHASE_DOWNLOAD, PipLineParser
+
+        parser = PipLineParser()
+        ev = parser.feed("Collecting comfyui-foo[extra]>=1.0")
+        assert (ev.phase, ev.package) == (PHASE_COLLECT, "comfyui-foo")
+        assert ev.text == "正在收集依赖: comfyui-foo"
+
+        ev = parser.feed("Downloading comfyui_foo-1.0-py3-none-any.whl (10.5 MB)")
+        assert ev.phase == PHASE_DOWNLOAD and ev.package == "comfyui-foo"
+        assert ev.bytes_total == 10_500_000 and ev.bytes_done is None
+        assert not ev.transient
+        assert ev.text == "正在下载 comfyui-foo (10.5 MB)"
+
+        ev = parser.feed("5.0/10.0 MB 3.1 MB/s eta 0:00:02")
+        assert ev.transient
+        assert (ev.bytes_done, ev.bytes_total, ev.percent) == (5_000_000, 10_000_000, 50)
+        assert ev.text == "正在下载 comfyui-foo  5.0 MB / 10.0 MB"
+
+    def test_install_phase_lines(self):
+        from utils import pip_progress as pp
+
+        parser = pp.PipLineParser()
+        cases = [
+            ("Installing collected packages: foo, bar", pp.PHASE_INSTALL, None),
+            ("Attempting uninstall: foo", pp.PHASE_UNINSTALL_PREPARE, "foo"),
+            ("Uninstalling foo-1.0:", pp.PHASE_UNINSTALL, "foo"),
+            ("Installing foo-1.2.3", pp.PHASE_INSTALLING, "foo"),
+            ("Successfully installed foo-1.2.3", pp.PHASE_INSTALLED, None),
+            ("Successfully uninstalled foo-1.0", pp.PHASE_UNINSTALLED, None),
+            ("Running setup.py install for legacy: started", pp.PHASE_BUILD, "legacy"),
+        ]
+        for line, phase, pkg in cases:
+            ev = parser.feed(line)
+            assert ev.phase == phase, line
+            if pkg:
+                assert ev.package == pkg, line
+
+    def test_found_existing_only_sets_package(self):
+        from utils.pip_progress import PipLineParser
+
+        parser = PipLineParser()
+        assert parser.feed("Found existing installation: bar 1.0") is None
+        assert parser.feed("2.0/4.0 MB").package == "bar"
+
+    def test_bar_without_package_and_noise_are_ignored(self):
+        from utils.pip_progress import PipLineParser
+
+        parser = PipLineParser()
+        assert parser.feed("1.0/2.0 MB") is None
+        assert parser.feed("Looking in indexes: https://pypi.org/simple") is None
+
+
+class TestProgressCoalescer:
+    def _bar(self, i):
+        from utils.pip_progress import PHASE_DOWNLOAD, PipProgressEvent
+
+        return PipProgressEvent(PHASE_DOWNLOAD, "foo", bytes_done=i, bytes_total=100)
+
+    def test_transient_burst_is_rate_limited_and_keeps_latest(self):
+        from utils.pip_progress import ProgressCoalescer
+
+        got = []
+        c = ProgressCoalescer(got.append, max_rate_hz=20)
+        for i in range(1, 101):
+            c.push(self._bar(i))
+        c.close()
+        assert got[0].bytes_done == 1
+        assert got[-1].bytes_done == 100
+        assert len(got) <= 3
+        assert c.dropped >= 97
+
+    def test_trailing_event_is_flushed_by_timer(self):
+        from utils.pip_progress import ProgressCoalescer
+
+        got = []
+        flushed = threading.Event()
+
+        def sink(ev):
+            got.append(ev)
+            if ev.bytes_done == 3:
+                flushed.set()
+
+        c = ProgressCoalescer(sink, max_rate_hz=20)
+        for i in (1, 2, 3):
+            c.push(self._bar(i))
+        assert flushed.wait(1.0)
+        assert [e.bytes_done for e in got] == [1, 3]
+        c.close()
+
+    def test_phase_events_pass_through_and_drop_stale_progress(self):
+        from utils.pip_progress import PHASE_INSTALLED, PipProgressEvent, ProgressCoalescer
+
+        got = []
+        c = ProgressCoalescer(got.append, max_rate_hz=20)
+        c.push(self._bar(1))
+        c.push(self._bar(2))
+        done = PipProgressEvent(PHASE_INSTALLED, detail="foo-1.0")
+        c.push(done)
+        c.push(PipProgressEvent(PHASE_INSTALLED, detail="bar-2.0"))
+        c.close()
+        assert [e.bytes_done for e in got[:1]] == [1]
+        assert [e.detail for e in got[1:]] == ["foo-1.0", "bar-2.0"]
+
+    def test_emission_rate_is_bounded_over_time(self):
+        from utils.pip_progress import ProgressCoalescer
+
+        got = []
+        c = ProgressCoalescer(lambda ev: got.append(time.monotonic()), max_rate_hz=20)
+        end = time.monotonic() + 0.5
+        i = 0
+        while time.monotonic() < end:
+            i += 1
+            c.push(self._bar(i))
+            time.sleep(0.001)
+        c.close()
+        # 0.5s @ 20 Hz：约 10 条，再加首尾余量
+        assert len(got) <= 13
+        assert i > len(got) * 5
@@ -0,0 +1,106 @@
+"""Tests for core.port_owner."""
+
+import os
+import socket
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core import port_owner as PORTS
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    PORTS.invalidate()
+    yield
+    PORTS.invalidate()
+
+
+def _conn(port, status, pid):
+    return SimpleNamespace(laddr=SimpleNamespace(ip="127.0.0.1", port=port), status=status, pid=pid)
+
+
+class TestPsutilSource:
+    def test_single_system_query_and_cache(self):
+        fake = MagicMock()
+        fake.net_connections.return_value = [
+            _conn(8188, "LISTEN", 100),
+            _conn(8188, "ESTABLISHED", 200),
+            _conn(8188, "TIME_WAIT", 300),
+            _conn(9000, "LISTEN", 400),
+        ]
+        with patch.object(PORTS, "psutil", fake):
+            assert PORTS.pids_for_port("8188") == [100]
+            assert PORTS.pids_for_port(8188, (PORTS.LISTEN, PORTS.ESTABLISHED)) == [100, 200]
+            assert PORTS.pids_for_port("9000") == [400]
+        fake.net_connections.assert_called_once_with(kind="tcp")
+
+    def test_invalidate_and_max_age(self):
+        fake = MagicMock()
+        fake.net_connections.return_value = [_conn(8188, "LISTEN", 100)]
+        with patch.object(PORTS, "psutil", fake):
+            PORTS.pids_for_port(8188)
+            PORTS.invalidate()
+            PORTS.pids_for_port(8188)
+            PORTS.pids_for_port(8188, max_age=0)
+        assert fake.net_connections.call_count == 3
+
+    def test_falls_back_when_psutil_fails(self):
+        fake = MagicMock()
+        fake.net_connections.side_effect = RuntimeError("access denied")
+        with patch.object(PORTS, "psutil", fake), \
+                patch.object(PORTS, "_from_proc", return_value=[(8188, "LISTEN", 7, None)]), \
+                patch.object(PORTS.os.path, "exists", return_value=True):
+            assert PORTS.pids_for_port(8188) == [7]
+
+    def test_bad_port(self):
+        assert PORTS.pids_for_port("not-a-port") == []
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux") or not os.path.exists("/proc/net/tcp"),
+    reason="需要 Linux /proc",
+)
+class TestProcSource:
+    def test_finds_own_listening_socket(self):
+        s = socket.socket()
+        try:
+            s.bind(("127.0.0.1", 0))
+            s.listen()
+            port = s.getsockname()[1]
+            with patch.object(PORTS, "psutil", None):
+                assert PORTS.pids_for_port(port) == [os.getpid()]
+                # 已解析的 inode 在同一张表内复用
+                with patch.object(PORTS.os, "listdir", side_effect=AssertionError("rescanned")):
+                    assert PORTS.pids_for_port(port) == [os.getpid()]
+        finally:
+            s.close()
+
+    def test_free_port_is_empty(self):
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+        s.close()
+        with patch.object(PORTS, "psutil", None):
+            assert PORTS.pids_for_port(port, max_age=0) == []
+
+
+class TestNetstatSource:
+    def test_parses_ipv4_and_ipv6(self):
+        out = SimpleNamespace(
+            returncode=0,
+            stdout=(
+                "  TCP    0.0.0.0:8188     0.0.0.0:0        LISTENING       11\n"
+                "  TCP    [::]:8188        [::]:0           LISTENING       12\n"
+                "  TCP    127.0.0.1:8188   127.0.0.1:5000   ESTABLISHED     13\n"
+                "  UDP    0.0.0.0:8188     *:*                              14\n"
+            ),
+        )
+        with patch.object(PORTS, "psutil", None), \
+                patch.object(PORTS, "_PROC_TABLES", ("/nonexistent/tcp",)), \
+                patch.object(PORTS, "run_hidden", return_value=out) as rh:
+            assert PORTS.pids_for_port(8188) == [11, 12]
+            assert PORTS.pids_for_port(8188, (PORTS.ESTABLISHED,)) == [13]
+        rh.assert_called_once()
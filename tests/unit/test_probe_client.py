@@ -0,0 +1,163 @@
+"""Tests for core.probe_client."""
+
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+
+from core import probe_client as PC
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.hits += 1
+            srv.ports.add(self.client_address[1])
+        if srv.delay:
+            time.sleep(srv.delay)
+        body = b"{}"
+        self.send_response(srv.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.lock = threading.Lock()
+    srv.hits = 0
+    srv.ports = set()
+    srv.delay = 0.0
+    srv.status = 200
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _free_port():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class TestProbeClient:
+    def test_keep_alive_reuses_connection(self, server):
+        client = PC.ProbeClient(server.server_address[1])
+        try:
+            for _ in range(3):
+                assert client.check(max_age=0) is True
+            assert server.hits == 3
+            assert client.connects == 1
+            assert len(server.ports) == 1
+        finally:
+            client.close()
+
+    def test_ttl_cache(self, server):
+        client = PC.ProbeClient(server.server_address[1])
+        try:
+            assert client.check(max_age=10) is True
+            assert client.check(max_age=10) is True
+            assert server.hits == 1
+            assert client.cache_hits == 1
+            client.invalidate()
+            client.check(max_age=10)
+            assert server.hits == 2
+        finally:
+            client.close()
+
+    def test_concurrent_callers_share_one_request(self, server):
+        server.delay = 0.3
+        client = PC.ProbeClient(server.server_address[1])
+        results = []
+        try:
+            threads = [
+                threading.Thread(target=lambda: results.append(client.check(max_age=0)))
+                for _ in range(5)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(5)
+            assert results == [True] * 5
+            assert server.hits == 1
+            assert client.joined == 4
+        finally:
+            client.close()
+
+    def test_non_200_is_unreachable(self, server):
+        server.status = 503
+        client = PC.ProbeClient(server.server_address[1])
+        try:
+            assert client.check(max_age=0) is False
+            assert client.last_status == 503
+        finally:
+            client.close()
+
+    def test_refused_port(self):
+        client = PC.ProbeClient(_free_port())
+        assert client.check(max_age=0) is False
+        assert client.last_error is not None
+
+    def test_reconnects_when_server_dropped_connection(self, server):
+        client = PC.ProbeClient(server.server_address[1])
+        try:
+            assert client.check(max_age=0) is True
+            # 模拟服务端关闭了空闲长连接
+            client._conn.sock.shutdown(socket.SHUT_RDWR)
+            assert client.check(max_age=0) is True
+            assert client.connects == 2
+        finally:
+            client.close()
+
+
+class TestModuleHelpers:
+    def test_registry_and_invalidate(self, server):
+        port = server.server_address[1]
+        try:
+            assert PC.get_client(port) is PC.get_client(str(port))
+            assert PC.check(port, max_age=10) is True
+            assert PC.check(port, max_age=10) is True
+            assert server.hits == 1
+            PC.invalidate(port)
+            PC.check(port, max_age=10)
+            assert server.hits == 2
+        finally:
+            PC.close_all()
+
+    def test_ttl_from_config(self):
+        assert PC.ttl_from_config({"launch_options": {"probe_cache_ttl": 0.25}}) == 0.25
+        assert PC.ttl_from_config({"launch_options": {"probe_cache_ttl": "x"}}) == PC.DEFAULT_TTL
+        assert PC.ttl_from_config({"launch_options": {"probe_cache_ttl": -1}}) == PC.DEFAULT_TTL
+        assert PC.ttl_from_config({}) == PC.DEFAULT_TTL
+
+    def test_is_http_reachable_uses_shared_client(self, server):
+        from core.probe import is_http_reachable
+
+        port = server.server_address[1]
+        app = MagicMock()
+        app.custom_port.get.return_value = str(port)
+        app.config = {"launch_options": {"probe_cache_ttl": 10}}
+        try:
+            assert is_http_reachable(app) is True
+            assert is_http_reachable(app) is True
+            assert server.hits == 1
+            assert is_http_reachable(app, max_age=0) is True
+            assert server.hits == 2
+        finally:
+            PC.close_all()
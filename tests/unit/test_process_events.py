@@ -371,3 +371,118 @@ class TestProcessErrorEvent:
 
         assert received_data["error"] == "Connection refused"
         assert received_data.get("context") == "network"
+
+
+class TestDispatchTable:
+    """Adapters are resolved once at registration; queued delivery and counters."""
+
+    @pytest.fixture(autouse=True)
+    def _isolated(self, monkeypatch):
+        from core import process_events as PE
+
+        monkeypatch.setattr(PE, "_callbacks", [])
+        monkeypatch.setattr(PE, "_dispatch", {})
+        PE.reset_stats()
+        yield PE
+        PE.stop_dispatcher()
+
+    def test_signature_resolved_once(self, monkeypatch, _isolated):
+        PE = _isolated
+        received = []
+
+        class TestCallback:
+            def on_started(self, data=None):
+                received.append(data)
+
+        calls = []
+        real = PE.inspect.signature
+        monkeypatch.setattr(
+            PE.inspect, "signature", lambda fn: calls.append(fn) or real(fn)
+        )
+        PE.register_callback(TestCallback())
+        resolved = len(calls)
+        for i in range(5):
+            PE.emit_event(PE.ProcessEvent.STARTED, {"i": i})
+        assert len(calls) == resolved
+        assert [d["i"] for d in received] == [0, 1, 2, 3, 4]
+
+    def test_keyword_event_passes_only_accepted_fields(self, _isolated):
+        PE = _isolated
+        received = []
+
+        class TestCallback:
+            def on_hang_detected(self, latency=None):
+                received.append(latency)
+
+        PE.register_callback(TestCallback())
+        PE.emit_event(PE.ProcessEvent.HANG_DETECTED, {"latency": 3.5, "failures": 2})
+        assert received == [3.5]
+
+    def test_queued_delivery_runs_on_dispatcher_thread(self, _isolated):
+        import threading
+
+        PE = _isolated
+        done = threading.Event()
+        threads = []
+
+        class TestCallback:
+            def on_stopped(self):
+                threads.append(threading.current_thread().name)
+                done.set()
+
+        PE.register_callback(TestCallback())
+        PE.start_dispatcher()
+        PE.emit_event(PE.ProcessEvent.STOPPED)
+        assert done.wait(5)
+        assert threads == ["process-events"]
+
+        # sync=True 仍在当前线程投递
+        done.clear()
+        PE.emit_event(PE.ProcessEvent.STOPPED, sync=True)
+        assert threads[-1] == threading.current_thread().name
+
+    def test_queued_errors_do_not_stop_other_callbacks(self, _isolated):
+        PE = _isolated
+        received = []
+
+        class Broken:
+            def on_stopping(self):
+                raise RuntimeError("boom")
+
+        class Good:
+            def on_stopping(self):
+                received.append(True)
+
+        PE.register_callback(Broken())
+        PE.register_callback(Good())
+        PE.start_dispatcher()
+        PE.emit_event(PE.ProcessEvent.STOPPING)
+        PE.stop_dispatcher()
+        assert received == [True]
+        assert PE.stats()["errors"] == 1
+
+    def test_stats_count_events_and_slow_subscribers(self, monkeypatch, _isolated):
+        import time
+
+        PE = _isolated
+        monkeypatch.setattr(PE, "SLOW_CALLBACK_SECONDS", 0.01)
+
+        class Slow:
+            def on_starting(self):
+                time.sleep(0.02)
+
+        class Fast:
+            def on_starting(self):
+                pass
+
+        PE.register_callback(Slow())
+        PE.register_callback(Fast())
+        PE.emit_event(PE.ProcessEvent.STARTING)
+        PE.emit_event(PE.ProcessEvent.STARTING)
+        s = PE.stats()
+        assert s["emitted"] == {"process_starting": 2}
+        assert s["delivered"] == 4
+        assert s["slow"] == {"Slow.on_starting": 2}
+        # Fast 排在 Slow 之后，等待时间计入投递延迟
+        assert s["latency_max_ms"] >= 10
+        assert s["queued"] == 0
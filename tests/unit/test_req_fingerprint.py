@@ -0,0 +1,67 @@
+"""
+Tests for utils/req_fingerprint.py (requirements sync fingerprints).
+"""
+
+from unittest.mock import patch
+
+
+def _env(versions):
+    return patch("utils.req_fingerprint.PIPINDEX.installed_versions", return_value=versions)
+
+
+class TestCompute:
+    def test_stable_for_same_inputs(self, tmp_path):
+        from utils import req_fingerprint as fp
+
+        req = tmp_path / "requirements.txt"
+        req.write_text("a==1\n", encoding="utf-8")
+        with _env({"a": "1", "b": "2"}):
+            assert fp.compute(req, "python") == fp.compute(req, "python")
+
+    def test_changes_with_file_env_interpreter_and_extra(self, tmp_path):
+        from utils import req_fingerprint as fp
+
+        req = tmp_path / "requirements.txt"
+        req.write_text("a==1\n", encoding="utf-8")
+        with _env({"a": "1"}):
+            base = fp.compute(req, "python")
+            other_exec = fp.compute(req, "other/python")
+            other_extra = fp.compute(req, "python", extra=["torch"])
+        with _env({"a": "2"}):
+            other_env = fp.compute(req, "python")
+        req.write_text("a==2\n", encoding="utf-8")
+        with _env({"a": "1"}):
+            other_file = fp.compute(req, "python")
+        assert len({base, other_exec, other_extra, other_env, other_file}) == 5
+
+    def test_none_when_environment_unknown(self, tmp_path):
+        from utils import req_fingerprint as fp
+
+        req = tmp_path / "requirements.txt"
+        req.write_text("a==1\n", encoding="utf-8")
+        with _env(None):
+            assert fp.environment_state("python") is None
+            assert fp.compute(req, "python") is None
+
+
+class TestFingerprintStore:
+    def test_put_get_and_clear(self, tmp_path):
+        from utils.req_fingerprint import FingerprintStore
+
+        store = FingerprintStore(tmp_path / "state" / "requirements_sync.json")
+        req = tmp_path / "requirements.txt"
+        assert store.get(req) is None
+        store.put(req, "abc")
+        assert FingerprintStore(store.state_file).get(req) == "abc"
+        store.put(req, None)
+        assert store.get(req) is None
+
+    def test_corrupt_state_file_is_ignored(self, tmp_path):
+        from utils.req_fingerprint import FingerprintStore
+
+        state = tmp_path / "requirements_sync.json"
+        state.write_text("{not json", encoding="utf-8")
+        store = FingerprintStore(state)
+        assert store.get(tmp_path / "requirements.txt") is None
+        store.put(tmp_path / "requirements.txt", "x")
+        assert store.get(tmp_path / "requirements.txt") == "x"
@@ -0,0 +1,143 @@
+"""
+Tests for utils/req_union.py (union of ComfyUI + custom_nodes requirements).
+"""
+
+from pathlib import Path
+
+
+def _node(root, name, text):
+    d = root / name
+    d.mkdir(parents=True, exist_ok=True)
+    (d / "requirements.txt").write_text(text, encoding="utf-8")
+    return d / "requirements.txt"
+
+
+def _union(tmp_path, core_text, nodes, installed=None, frozen=(), env=None):
+    from utils.pip import _parse_requirements_entries
+    from utils.req_union import build_union, collect_sources
+
+    core = tmp_path / "requirements.txt"
+    core.write_text(core_text, encoding="utf-8")
+    custom = tmp_path / "custom_nodes"
+    custom.mkdir()
+    for name, text in nodes.items():
+        _node(custom, name, text)
+    sources = collect_sources([core], custom)
+    return build_union(
+        sources,
+        _parse_requirements_entries,
+        marker_env=env or {"python_version": "3.12", "sys_platform": "win32"},
+        installed=installed or {},
+        frozen=frozen,
+    )
+
+
+class TestCollectSources:
+    def test_core_first_then_sorted_nodes_skipping_disabled(self, tmp_path):
+        from utils.req_union import collect_sources
+
+        core = tmp_path / "requirements.txt"
+        core.write_text("", encoding="utf-8")
+        custom = tmp_path / "custom_nodes"
+        _node(custom, "b-node", "x\n")
+        _node(custom, "A-node", "y\n")
+        _node(custom, "old.disabled", "z\n")
+        _node(custom, "__pycache__", "z\n")
+        (custom / "no-reqs").mkdir()
+
+        labels = [label for label, _p in collect_sources([core], custom)]
+        assert labels == ["ComfyUI/requirements.txt", "A-node", "b-node"]
+
+
+class TestSatisfiable:
+    def test_intervals(self):
+        from utils.req_union import satisfiable
+
+        assert satisfiable([">=1.25", "<2"])
+        assert not satisfiable(["<2", ">=2"])
+        assert satisfiable([">1.0", "<1.0.1"])
+        assert satisfiable(["==1.2.*", ">=1.2.5"])
+        assert not satisfiable(["~=1.4", ">=2"])
+        assert not satisfiable(["==4.8.0.76", "==4.9.0.80"])
+        assert satisfiable([])
+
+
+class TestBuildUnion:
+    def test_compatible_specs_are_merged_with_extras(self, tmp_path):
+        out = _union(
+            tmp_path,
+            "numpy>=1.25\nrequests\n",
+            {
+                "node-a": "numpy<2\nopencv-python[contrib]>=4.7\n",
+                "node-b": "Requests>=2.28\nopencv_python>=4.8\n",
+            },
+        )
+        assert out["conflicts"] == []
+        assert "numpy>=1.25,<2" in out["specs"]
+        assert "requests>=2.28" in out["specs"]
+        assert "opencv-python[contrib]>=4.7,>=4.8" in out["specs"]
+
+    def test_conflict_reports_clashing_nodes_and_skips_package(self, tmp_path):
+        out = _union(
+            tmp_path,
+            "aiohttp\n",
+            {
+                "node-a": "transformers>=4.50\n",
+                "node-b": "transformers==4.38.2\n",
+                "node-c": "transformers\n",
+            },
+        )
+        assert [c["name"] for c in out["conflicts"]] == ["transformers"]
+        conflict = out["conflicts"][0]
+        assert conflict["reason"] == "specifier"
+        assert conflict["pairs"] == [["node-a", "node-b"]]
+        assert {s["source"] for s in conflict["specs"]} == {"node-a", "node-b", "node-c"}
+        assert not any(s.startswith("transformers") for s in out["specs"])
+
+    def test_core_constraint_wins_on_conflict(self, tmp_path):
+        out = _union(
+            tmp_path,
+            "numpy>=1.25\n",
+            {"node-a": "numpy<1.20\n", "node-b": "numpy<2\n"},
+        )
+        assert out["conflicts"][0]["pairs"] == [["ComfyUI/requirements.txt", "node-a"]]
+        assert "numpy>=1.25,<2" in out["specs"]
+
+    def test_frozen_package_mismatch_is_reported(self, tmp_path):
+        out = _union(
+            tmp_path,
+            "torch\n",
+            {"node-a": "torch>=2.5\n"},
+            installed={"torch": "2.1.0+cu121"},
+            frozen={"torch"},
+        )
+        conflict = out["conflicts"][0]
+        assert (conflict["name"], conflict["reason"], conflict["installed"]) == (
+            "torch", "frozen", "2.1.0+cu121"
+        )
+        assert conflict["specs"] == [{"source": "node-a", "spec": "torch>=2.5"}]
+
+    def test_markers_and_unparsed_lines(self, tmp_path):
+        out = _union(
+            tmp_path,
+            "tomli ; python_version < '3.11'\nfoo ; extra == 'x'\n",
+            {"node-a": "git+https://github.com/x/y.git\n"},
+        )
+        assert "tomli" not in out["specs"]
+        assert "foo ; extra == 'x'" in out["specs"]
+        assert "git+https://github.com/x/y.git" in out["specs"]
+        assert out["unparsed"] == [
+            {"source": "node-a", "spec": "git+https://github.com/x/y.git"}
+        ]
+
+    def test_different_direct_urls_conflict(self, tmp_path):
+        out = _union(
+            tmp_path,
+            "",
+            {
+                "node-a": "pkg @ https://x/pkg-1.whl\n",
+                "node-b": "pkg @ https://x/pkg-2.whl\n",
+            },
+        )
+        assert out["conflicts"][0]["reason"] == "url"
+        assert out["specs"] == []
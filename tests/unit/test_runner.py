@@ -1,206 +1,215 @@
 """
-Tests for core.runner module.
+Tests for core.runner / core.supervisor.
 
-Tests the monitor function that manages ComfyUI subprocess lifecycle.
+The monitor blocks on the spawned child instead of polling, and probes HTTP
+with adaptive backoff only when there is no live child.
 """
 
-import pytest
+import subprocess
+import sys
 import threading
-from unittest.mock import MagicMock, patch, call
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
 
+from core import supervisor as SUP
+from core.supervisor import ProcessSupervisor
+
+
+def _make(process=None):
+    app = MagicMock()
+    app._shutting_down = False
+    app._launching = False
+    pm = MagicMock()
+    pm._stopping = False
+    pm.comfyui_process = process
+    pm._post_to_ui.side_effect = lambda fn: fn()
+    return app, pm
+
+
+def _published(pm):
+    return [c.args[0] for c in pm.apply_running_status.call_args_list]
 
-class TestMonitorFunction:
-    """Test the monitor function from core.runner."""
 
+class TestMonitorFunction:
     def test_monitor_exits_on_shutting_down(self):
-        """monitor should exit when app._shutting_down is True."""
         from core.runner import monitor
-        
-        app = MagicMock()
+
+        app, pm = _make()
         app._shutting_down = True
-        
-        process_manager = MagicMock()
-        process_manager.comfyui_process = MagicMock()
-        process_manager.comfyui_process.poll.return_value = None
-        
-        with patch.object(threading.Event, 'wait') as mock_wait:
-            monitor(app, process_manager)
-            
-            # Should not call refresh_running_status_async when shutting down
-            process_manager.refresh_running_status_async.assert_not_called()
-    
-    def test_monitor_clears_dead_process(self):
-        """monitor should set comfyui_process to None when poll() returns not None."""
-        from core.runner import monitor
-        
-        app = MagicMock()
-        app._shutting_down = False
-        
-        process_manager = MagicMock()
-        dead_process = MagicMock()
-        dead_process.poll.return_value = 1  # Process has exited with code 1
-        process_manager.comfyui_process = dead_process
-        
-        call_count = [0]
-        original_wait = threading.Event.wait
-        
-        def mock_wait(*args, **kwargs):
-            call_count[0] += 1
-            if call_count[0] >= 1:
-                # Simulate shutting down after first iteration
-                app._shutting_down = True
-            return original_wait(*args, **kwargs)
-        
-        with patch.object(threading.Event, 'wait', side_effect=mock_wait):
-            monitor(app, process_manager)
-        
-        # Should have set comfyui_process to None since poll() returned non-None
-        assert process_manager.comfyui_process is None
-    
-    def test_monitor_keeps_running_process(self):
-        """monitor should not clear comfyui_process when poll() returns None."""
-        from core.runner import monitor
-        
-        app = MagicMock()
-        app._shutting_down = False
-        
-        process_manager = MagicMock()
-        live_process = MagicMock()
-        live_process.poll.return_value = None  # Process still running
-        process_manager.comfyui_process = live_process
-        
-        call_count = [0]
-        original_wait = threading.Event.wait
-        
-        def mock_wait(*args, **kwargs):
-            call_count[0] += 1
-            if call_count[0] >= 1:
-                app._shutting_down = True
-            return original_wait(*args, **kwargs)
-        
-        with patch.object(threading.Event, 'wait', side_effect=mock_wait):
-            monitor(app, process_manager)
-        
-        # Should NOT have cleared the process since it's still running
-        assert process_manager.comfyui_process is live_process
-    
-    def test_monitor_calls_refresh_status(self):
-        """monitor should call refresh_running_status_async each iteration."""
+        with patch.object(SUP, "is_http_reachable") as probe:
+            monitor(app, pm)
+        probe.assert_not_called()
+        pm.apply_running_status.assert_not_called()
+
+    def test_monitor_uses_manager_supervisor(self):
         from core.runner import monitor
-        
-        app = MagicMock()
-        app._shutting_down = False
-        
-        process_manager = MagicMock()
-        process_manager.comfyui_process = MagicMock()
-        process_manager.comfyui_process.poll.return_value = None
-        
-        call_count = [0]
-        original_wait = threading.Event.wait
-        
-        def mock_wait(*args, **kwargs):
-            call_count[0] += 1
-            if call_count[0] >= 1:
+
+        app, pm = _make()
+        app._shutting_down = True
+        sup = ProcessSupervisor(app, pm)
+        pm.supervisor = sup
+        with patch.object(ProcessSupervisor, "run") as run:
+            monitor(app, pm)
+        run.assert_called_once_with()
+
+
+class TestProcessSupervisor:
+    def test_child_exit_detected_without_polling(self):
+        proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.3)"])
+        app, pm = _make(proc)
+        sup = ProcessSupervisor(app, pm)
+
+        def probe(*_a, **_k):
+            app._shutting_down = True
+            return False
+
+        t0 = time.monotonic()
+        with patch.object(SUP, "is_http_reachable", side_effect=probe) as p:
+            sup.run()
+        elapsed = time.monotonic() - t0
+
+        assert pm.comfyui_process is None
+        assert sup.exits == 1
+        # 子进程存活期间不做 HTTP 探测，退出后只探测一次
+        assert p.call_count == 1
+        assert _published(pm) == [True, False]
+        assert elapsed < 5
+
+    def test_probe_backoff_grows_to_cap(self):
+        app, pm = _make()
+        sup = ProcessSupervisor(app, pm)
+        sleeps = []
+
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) >= 7:
                 app._shutting_down = True
-            return original_wait(*args, **kwargs)
-        
-        with patch.object(threading.Event, 'wait', side_effect=mock_wait):
-            monitor(app, process_manager)
-        
-        # Should have called refresh_running_status_async
-        process_manager.refresh_running_status_async.assert_called_once()
-    
-    def test_monitor_handles_exception(self):
-        """monitor should exit gracefully when an exception occurs."""
-        from core.runner import monitor
-        
-        app = MagicMock()
-        app._shutting_down = False
-        
-        process_manager = MagicMock()
-        process_manager.comfyui_process = MagicMock()
-        process_manager.comfyui_process.poll.return_value = None
-        process_manager.refresh_running_status_async.side_effect = RuntimeError("Test error")
-        
-        # Should not raise - exception should be caught and loop should exit
-        with patch.object(threading.Event, 'wait'):
-            monitor(app, process_manager)
-    
-    def test_monitor_with_no_process(self):
-        """monitor should handle case when comfyui_process is None."""
-        from core.runner import monitor
-        
-        app = MagicMock()
-        app._shutting_down = False
-        
-        process_manager = MagicMock()
-        process_manager.comfyui_process = None
-        
-        call_count = [0]
-        original_wait = threading.Event.wait
-        
-        def mock_wait(*args, **kwargs):
-            call_count[0] += 1
-            if call_count[0] >= 1:
+
+        with patch.object(SUP, "is_http_reachable", return_value=False), \
+                patch.object(sup, "_sleep", side_effect=fake_sleep):
+            sup.run()
+
+        assert sleeps == [0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 15.0]
+        # 状态未变化只发布一次
+        assert _published(pm) == [False]
+        assert sup.probes == 7
+
+    def test_state_change_resets_backoff(self):
+        app, pm = _make()
+        sup = ProcessSupervisor(app, pm)
+        results = iter([False, False, False, True, True])
+        sleeps = []
+
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) >= 5:
                 app._shutting_down = True
-            return original_wait(*args, **kwargs)
-        
-        with patch.object(threading.Event, 'wait', side_effect=mock_wait):
-            monitor(app, process_manager)
-        
-        # Should have called refresh_running_status_async even without a process
-        process_manager.refresh_running_status_async.assert_called_once()
-    
-    def test_monitor_waits_between_iterations(self):
-        """monitor should wait 2 seconds between each iteration."""
-        from core.runner import monitor
-        
-        app = MagicMock()
-        app._shutting_down = False
-        
-        process_manager = MagicMock()
-        process_manager.comfyui_process = MagicMock()
-        process_manager.comfyui_process.poll.return_value = None
-        
-        wait_calls = []
-        original_wait = threading.Event.wait
-        
-        def mock_wait(*args, **kwargs):
-            wait_calls.append(args[0] if args else None)
-            call_count = len(wait_calls)
-            if call_count >= 2:
+
+        with patch.object(SUP, "is_http_reachable", side_effect=lambda *a, **k: next(results)), \
+                patch.object(sup, "_sleep", side_effect=fake_sleep):
+            sup.run()
+
+        assert sleeps == [0.5, 1.0, 2.0, 0.5, 1.0]
+        assert _published(pm) == [False, True]
+
+    def test_busy_state_is_left_alone(self):
+        dead = MagicMock()
+        dead.poll.return_value = 1
+        app, pm = _make(dead)
+        app._launching = True
+        sup = ProcessSupervisor(app, pm)
+
+        def fake_sleep(seconds):
+            app._shutting_down = True
+
+        with patch.object(SUP, "is_http_reachable") as probe, \
+                patch.object(sup, "_sleep", side_effect=fake_sleep):
+            sup.run()
+
+        probe.assert_not_called()
+        pm.apply_running_status.assert_not_called()
+        # 启动流程自己处理退出的子进程
+        assert pm.comfyui_process is dead
+
+    def test_dead_process_cleared_when_idle(self):
+        dead = MagicMock()
+        dead.poll.return_value = 1
+        app, pm = _make(dead)
+        sup = ProcessSupervisor(app, pm)
+
+        with patch.object(SUP, "is_http_reachable", return_value=True), \
+                patch.object(sup, "_sleep", side_effect=lambda s: setattr(app, "_shutting_down", True)):
+            sup.run()
+
+        assert pm.comfyui_process is None
+        assert _published(pm) == [True]
+
+    def test_kick_wakes_sleep(self):
+        app, pm = _make()
+        sup = ProcessSupervisor(app, pm)
+        calls = []
+
+        def probe(*_a, **_k):
+            calls.append(time.monotonic())
+            if len(calls) >= 2:
                 app._shutting_down = True
-            return original_wait(*args, **kwargs)
-        
-        with patch.object(threading.Event, 'wait', side_effect=mock_wait):
-            monitor(app, process_manager)
-        
-        # Should have waited 2 seconds (the default wait time)
-        assert 2 in wait_calls
-    
-    def test_monitor_multiple_iterations_before_shutdown(self):
-        """monitor should run multiple iterations before shutting down."""
-        from core.runner import monitor
-        
+            return False
+
+        sup._interval = 60.0
+        with patch.object(SUP, "is_http_reachable", side_effect=probe):
+            t = threading.Thread(target=sup.run, daemon=True)
+            t.start()
+            for _ in range(100):
+                if calls:
+                    break
+                time.sleep(0.01)
+            sup.kick(force=True)
+            t.join(timeout=5)
+
+        assert not t.is_alive()
+        assert len(calls) == 2
+        # kick(force=True) 让同样的结果再发布一次
+        assert _published(pm) == [False, False]
+
+    def test_stop_ends_loop(self):
+        app, pm = _make()
+        sup = ProcessSupervisor(app, pm)
+        with patch.object(SUP, "is_http_reachable", return_value=False):
+            t = threading.Thread(target=sup.run, daemon=True)
+            t.start()
+            for _ in range(100):
+                if sup.probes:
+                    break
+                time.sleep(0.01)
+            sup.stop()
+            t.join(timeout=5)
+        assert not t.is_alive()
+        assert sup.active is False
+
+
+class TestProcessManagerRefresh:
+    @pytest.fixture
+    def pm(self):
+        from core.process_manager import ProcessManager
+
         app = MagicMock()
-        app._shutting_down = False
-        
-        process_manager = MagicMock()
-        process_manager.comfyui_process = MagicMock()
-        process_manager.comfyui_process.poll.return_value = None
-        
-        call_count = [0]
-        original_wait = threading.Event.wait
-        
-        def mock_wait(self, timeout=None):
-            call_count[0] += 1
-            if call_count[0] >= 3:
-                app._shutting_down = True
-            return original_wait(self, timeout=0)  # Use 0 to avoid actual wait
-        
-        with patch.object(threading.Event, 'wait', mock_wait):
-            monitor(app, process_manager)
-        
-        # Should have run 3 iterations
-        assert call_count[0] == 3
-        assert process_manager.refresh_running_status_async.call_count == 3
+        app._launching = False
+        return ProcessManager(app)
+
+    def test_refresh_kicks_active_supervisor(self, pm):
+        sup = pm.supervisor
+        sup.active = True
+        with patch.object(sup, "kick") as kick, patch("threading.Thread") as thread:
+            pm.refresh_running_status_async()
+        kick.assert_called_once_with(force=True)
+        thread.assert_not_called()
+
+    def test_apply_running_status_keeps_intermediate_state(self, pm):
+        pm._stopping = True
+        pm.apply_running_status(True)
+        pm.app.big_btn.set_state.assert_not_called()
+        pm._stopping = False
+        pm.apply_running_status(True)
+        pm.app.big_btn.set_state.assert_called_once_with("running")
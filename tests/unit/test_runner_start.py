@@ -2,10 +2,22 @@
 
 import os
 import subprocess
+import sys
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from core import runner_start as RS
+
+
+@pytest.fixture(autouse=True)
+def _short_ready_timeout(monkeypatch, tmp_path):
+    """Mocked processes never print the ready line; keep the wait short."""
+    monkeypatch.setattr(RS, "READY_TIMEOUT", 0.3)
+    monkeypatch.setattr(RS, "_check_system_stats", lambda *a, **k: False)
+    monkeypatch.setattr("core.output_capture.default_log_dir", lambda app=None: tmp_path)
+
 
 class TestStartFunction:
     """Tests for the start() function."""
@@ -81,11 +93,15 @@ class TestStartFunction:
         worker_func = mock_thread.call_args[1]["target"]
         worker_func()
 
-        mock_popen.assert_called_once_with(
-            ["python", "script.py"],
-            env={"KEY": "val"},
-            cwd="/workdir",
-        )
+        mock_popen.assert_called_once()
+        args, kwargs = mock_popen.call_args
+        assert args == (["python", "script.py"],)
+        assert kwargs["cwd"] == "/workdir"
+        assert kwargs["env"]["KEY"] == "val"
+        # 输出被启动器读取，用于检测就绪日志
+        assert kwargs["stdout"] is subprocess.PIPE
+        assert kwargs["stderr"] is subprocess.STDOUT
+        assert kwargs["env"]["PYTHONUNBUFFERED"] == "1"
 
     def test_popen_called_with_correct_args_windows(
         self, mock_app, mock_pm, mock_popen, mock_thread, monkeypatch
@@ -210,7 +226,8 @@ class TestStartFunction:
         worker_func()
 
         call_kwargs = mock_popen.call_args[1]
-        assert call_kwargs["env"] == test_env
+        for key, value in test_env.items():
+            assert call_kwargs["env"][key] == value
         assert call_kwargs["cwd"] == test_cwd
 
     def test_pm_comfyui_process_set(
@@ -268,3 +285,104 @@ class TestStartFunction:
         worker_func()
 
         assert mock_pm.comfyui_process is not None
+
+
+class TestReadinessDetection:
+    """The ready line in ComfyUI's output ends the wait; HTTP is only a backup."""
+
+    @pytest.fixture
+    def app(self):
+        app = MagicMock()
+        app._launching = False
+        app.ui_post.side_effect = lambda fn: fn()
+        return app
+
+    @pytest.fixture
+    def pm(self):
+        pm = MagicMock()
+        pm.comfyui_process = None
+        return pm
+
+    def _run_worker(self, app, pm, cmd, monkeypatch):
+        monkeypatch.setattr(os, "name", "posix")
+        monkeypatch.setattr(RS, "READY_TIMEOUT", 20.0)
+        workers = []
+        with patch("core.runner_start.threading.Thread") as thread:
+            RS.start(app, pm, cmd, dict(os.environ), os.getcwd())
+            workers.append(thread.call_args[1]["target"])
+        done = threading.Event()
+
+        def run():
+            try:
+                workers[0]()
+            finally:
+                done.set()
+
+        threading.Thread(target=run, daemon=True).start()
+        assert done.wait(15)
+
+    def test_ready_line_ends_wait(self, app, pm, monkeypatch):
+        probe = MagicMock(return_value=False)
+        monkeypatch.setattr(RS, "_check_system_stats", probe)
+        monkeypatch.setattr(RS, "_echo_to_stdout", lambda line: None)
+        script = (
+            "import time; print('Starting server'); "
+            "print('To see the GUI go to: http://127.0.0.1:8188'); time.sleep(5)"
+        )
+        try:
+            self._run_worker(app, pm, [sys.executable, "-c", script], monkeypatch)
+            pm.on_start_success.assert_called_once_with()
+            assert pm.last_launch["signal"] == "log"
+            assert pm.last_launch["ready_seconds"] < 5
+            assert RS.launch_history()[-1] is pm.last_launch
+        finally:
+            pm.comfyui_process.kill()
+            pm.comfyui_process.wait()
+
+    def test_output_goes_to_log_and_tail(self, app, pm, monkeypatch, tmp_path):
+        monkeypatch.setattr(RS, "_echo_to_stdout", lambda line: None)
+        script = (
+            "import time; print('hello'); "
+            "print('To see the GUI go to: http://127.0.0.1:8188'); time.sleep(0.5)"
+        )
+        self._run_worker(app, pm, [sys.executable, "-c", script], monkeypatch)
+        pm.on_start_success.assert_called_once_with()
+        pm.comfyui_process.wait()
+        capture = pm.output_capture
+        capture.join(5)
+        assert capture.tail()[0] == "hello\n"
+        log = (tmp_path / "comfyui_output.log").read_text(encoding="utf-8")
+        assert log.startswith("hello\n")
+
+    def test_http_backup_with_backoff(self, app, pm, monkeypatch):
+        calls = []
+
+        def probe(*_a, **_k):
+            calls.append(1)
+            return len(calls) >= 3
+
+        monkeypatch.setattr(RS, "_check_system_stats", probe)
+        monkeypatch.setattr(RS, "_echo_to_stdout", lambda line: None)
+        try:
+            self._run_worker(
+                app, pm, [sys.executable, "-c", "import time; time.sleep(5)"], monkeypatch
+            )
+            pm.on_start_success.assert_called_once_with()
+            assert pm.last_launch["signal"] == "http"
+            assert pm.last_launch["http_probes"] == 3
+            # 0.1 + 0.2 + 0.4 秒后第三次探测成功
+            assert pm.last_launch["ready_seconds"] < 3
+        finally:
+            pm.comfyui_process.kill()
+            pm.comfyui_process.wait()
+
+    def test_exit_is_recorded(self, app, pm, monkeypatch):
+        monkeypatch.setattr(RS, "_echo_to_stdout", lambda line: None)
+        self._run_worker(app, pm, [sys.executable, "-c", "print('boom')"], monkeypatch)
+        pm.on_start_failed.assert_called_once_with("进程意外退出")
+        assert pm.last_launch["signal"] == "exited"
+
+    def test_windows_console_is_not_captured(self, monkeypatch):
+        monkeypatch.setattr(os, "name", "nt")
+        assert RS._should_capture(True) is False
+        assert RS._should_capture(False) is True
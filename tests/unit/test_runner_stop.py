@@ -2,12 +2,16 @@
 Tests for core.runner_stop module - process termination functionality.
 """
 
+import http.server
+import json
 import subprocess
 import sys
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from core import runner_stop
 from core.runner_stop import stop
 
 
@@ -384,3 +388,94 @@ class TestStopFallbackMechanism:
             result = stop(app_context, mock_pm)
 
         assert result is False
+
+
+class _ReleaseHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests.append((self.path, json.loads(body or b"{}")))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def comfy_api():
+    server = http.server.HTTPServer(("127.0.0.1", 0), _ReleaseHandler)
+    server.requests = []
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestStopStrategy:
+    """API 释放 -> 整树终止 -> 只强制结束幸存者。"""
+
+    def test_api_release_before_termination(self, app_context, comfy_api):
+        app_context.custom_port.set(str(comfy_api.server_address[1]))
+        mock_pm = MagicMock()
+        mock_pm.comfyui_process = None
+
+        with patch("core.probe.find_pids_by_port_safe", return_value=[]):
+            stop(app_context, mock_pm)
+
+        assert comfy_api.requests == [
+            ("/interrupt", {}),
+            ("/free", {"unload_models": True, "free_memory": True}),
+        ]
+        assert mock_pm.last_stop["api"] == {"interrupt": True, "free": True}
+
+    def test_api_release_unreachable_is_fast(self):
+        result = runner_stop._request_release(1, timeout=0.5)
+        assert result == {"interrupt": False}
+
+    def test_api_release_can_be_disabled(self, app_context, comfy_api):
+        app_context.custom_port.set(str(comfy_api.server_address[1]))
+        app_context.config["launch_options"]["stop_api_release"] = False
+        mock_pm = MagicMock()
+        mock_pm.comfyui_process = None
+
+        with patch("core.probe.find_pids_by_port_safe", return_value=[]):
+            stop(app_context, mock_pm)
+
+        assert comfy_api.requests == []
+
+    def test_tree_stop_when_psutil_available(self, app_context, monkeypatch):
+        monkeypatch.setattr(runner_stop, "psutil", object())
+        app_context.config["launch_options"]["stop_api_release"] = False
+        mock_process = MagicMock(pid=4321, pids=None)
+        mock_process.poll.return_value = None
+        mock_pm = MagicMock()
+        mock_pm.comfyui_process = mock_process
+        tree = {
+            "pids": [4321, 4322], "terminated": 1, "killed": 1,
+            "survivors": [4323], "denied": [], "seconds": 0.1,
+        }
+
+        with (
+            patch("core.kill.stop_process_tree", return_value=tree) as mock_tree,
+            patch("core.port_owner.pids_for_port", return_value=[4400]),
+        ):
+            result = stop(app_context, mock_pm)
+
+        assert result is True
+        assert mock_tree.call_args[0][0] == [4321]
+        mock_process.terminate.assert_not_called()
+        mock_process.wait.assert_called_once_with(timeout=1)
+        report = mock_pm.last_stop
+        assert report["method"] == "tree"
+        assert report["terminated"] == 1 and report["killed"] == 1
+        # 幸存者 + 仍占用端口的进程
+        assert report["orphans"] == [4323, 4400]
+        assert report["seconds"] >= 0
+        assert runner_stop.stop_history()[-1] is report
+
+    def test_multi_instance_releases_each_instance_port(self):
+        group = MagicMock()
+        group.instances = [MagicMock(port=9001), MagicMock(port=9002)]
+        assert runner_stop._release_ports(MagicMock(), group) == [9001, 9002]
@@ -0,0 +1,150 @@
+"""Tests for core.status."""
+
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core import status as ST
+
+GB = 1024 * 1024 * 1024
+
+SYSTEM_STATS = {
+    "system": {
+        "comfyui_version": "0.3.40",
+        "python_version": "3.12.7",
+        "pytorch_version": "2.7.0+cu128",
+        "ram_total": 32 * GB,
+        "ram_free": 16 * GB,
+    },
+    "devices": [{
+        "name": "cuda:0 NVIDIA GeForce RTX 4090",
+        "type": "cuda",
+        "index": 0,
+        "vram_total": 24 * GB,
+        "vram_free": 20 * GB,
+        "torch_vram_total": 2 * GB,
+        "torch_vram_free": 1 * GB,
+    }],
+}
+QUEUE = {"queue_running": [[0, "a"]], "queue_pending": [[1, "b"], [2, "c"]]}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.ports.add(self.client_address[1])
+            self.server.paths.append(self.path)
+        data = {"/system_stats": SYSTEM_STATS, "/queue": QUEUE}.get(self.path)
+        body = json.dumps(data).encode()
+        self.send_response(200 if data else 404)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def comfy():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.lock = threading.Lock()
+    srv.ports = set()
+    srv.paths = []
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def reader(app_context, comfy, monkeypatch):
+    app_context.custom_port.set(str(comfy.server_address[1]))
+    monkeypatch.setattr(ST, "frontend_version", lambda app: "1.21.7")
+    monkeypatch.setattr("core.telemetry.port_pids", lambda port: [4242])
+    r = ST.StatusReader(app_context)
+    yield r
+    r.close()
+
+
+class TestStatusReader:
+    def test_record(self, reader, comfy):
+        rec = reader.read()
+        assert rec["running"] is True
+        assert rec["port"] == comfy.server_address[1]
+        assert rec["pid"] == 4242
+        assert rec["queue"] == {"running": 1, "pending": 2, "depth": 3}
+        assert rec["system"]["ram_total_mb"] == 32 * 1024
+        assert rec["system"]["comfyui_version"] == "0.3.40"
+        assert rec["devices"][0]["vram_free_mb"] == 20 * 1024
+        assert rec["devices"][0]["torch_vram_total_mb"] == 2 * 1024
+        assert rec["frontend_version"] == "1.21.7"
+        assert rec["latency_ms"] >= 0
+        json.dumps(rec)
+
+    def test_watch_reuses_one_connection(self, reader, comfy):
+        out = io.StringIO()
+        reader.watch(interval=0.01, count=3, out=out)
+        lines = out.getvalue().splitlines()
+        assert len(lines) == 3
+        assert all(json.loads(line)["running"] for line in lines)
+        assert comfy.paths == ["/system_stats", "/queue"] * 3
+        assert len(comfy.ports) == 1
+        assert reader.client.connects == 1
+
+    def test_not_running(self, app_context, monkeypatch):
+        with ThreadingHTTPServer(("127.0.0.1", 0), _Handler) as srv:
+            port = srv.server_address[1]
+        app_context.custom_port.set(str(port))
+        monkeypatch.setattr(ST, "frontend_version", lambda app: None)
+        r = ST.StatusReader(app_context)
+        rec = r.read()
+        assert rec["running"] is False
+        assert rec["pid"] is None and rec["queue"] is None and rec["devices"] == []
+
+    def test_daemon_process_info(self, reader, tmp_path, monkeypatch):
+        reader.cwd = tmp_path
+        monkeypatch.setattr(ST.DAEMON, "request", lambda cwd, cmd, timeout=None: {
+            "ok": True, "pid": 7, "daemon_pid": 6, "uptime": 12.5,
+            "ready_seconds": 8.2, "state": "running",
+        })
+        rec = reader.read()
+        assert (rec["pid"], rec["daemon_pid"], rec["uptime"], rec["ready_seconds"]) == (7, 6, 12.5, 8.2)
+
+
+class TestGitHead:
+    SHA = "0123456789abcdef0123456789abcdef01234567"
+
+    def test_branch_ref(self, tmp_path):
+        (tmp_path / ".git/refs/heads").mkdir(parents=True)
+        (tmp_path / ".git/HEAD").write_text("ref: refs/heads/master\n")
+        (tmp_path / ".git/refs/heads/master").write_text(self.SHA + "\n")
+        assert ST.git_head(tmp_path) == self.SHA
+
+    def test_packed_ref(self, tmp_path):
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git/HEAD").write_text("ref: refs/heads/master\n")
+        (tmp_path / ".git/packed-refs").write_text(
+            "# pack-refs with: peeled\n" + self.SHA + " refs/heads/master\n"
+        )
+        assert ST.git_head(tmp_path) == self.SHA
+
+    def test_detached_and_gitdir_file(self, tmp_path):
+        real = tmp_path / "real.git"
+        real.mkdir()
+        (real / "HEAD").write_text(self.SHA + "\n")
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        (repo / ".git").write_text("gitdir: ../real.git\n")
+        assert ST.git_head(repo) == self.SHA
+
+    def test_not_a_repo(self, tmp_path):
+        assert ST.git_head(tmp_path) is None
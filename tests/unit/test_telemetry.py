@@ -0,0 +1,210 @@
+"""Tests for core.telemetry."""
+
+import time
+import types
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core import telemetry as TEL
+
+
+class _Error(Exception):
+    pass
+
+
+class _FakeProc:
+    """psutil.Process 替身：cpu/rss/threads/io 可由测试修改。"""
+
+    def __init__(self, pid, children=(), cpu=10.0, rss_mb=100, threads=4, io=(0, 0)):
+        self.pid = pid
+        self._children = list(children)
+        self.cpu = cpu
+        self.rss = rss_mb * 1024 * 1024
+        self.threads = threads
+        self.io = io
+        self.dead = False
+
+    def children(self, recursive=False):
+        if self.dead:
+            raise _Error()
+        return list(self._children)
+
+    def oneshot(self):
+        return MagicMock(__enter__=lambda s: None, __exit__=lambda s, *a: False)
+
+    def cpu_percent(self, interval=None):
+        if self.dead:
+            raise _Error()
+        return self.cpu
+
+    def memory_info(self):
+        return types.SimpleNamespace(rss=self.rss)
+
+    def num_threads(self):
+        return self.threads
+
+    def io_counters(self):
+        return types.SimpleNamespace(read_bytes=self.io[0], write_bytes=self.io[1])
+
+
+@pytest.fixture
+def fake_psutil(monkeypatch):
+    table = {}
+
+    def process(pid):
+        if pid not in table:
+            raise _Error()
+        return table[pid]
+
+    mod = types.SimpleNamespace(Process=process, Error=_Error)
+    monkeypatch.setattr(TEL, "psutil", mod)
+    return table
+
+
+class TestTreeSampler:
+    def test_sums_whole_tree(self, fake_psutil):
+        child = _FakeProc(11, cpu=30.0, rss_mb=300, threads=6)
+        fake_psutil[10] = _FakeProc(10, children=[child])
+        s = TEL.TreeSampler().sample([10])
+        assert s["processes"] == 2
+        assert s["cpu_percent"] == 40.0
+        assert s["rss_mb"] == 400.0
+        assert s["threads"] == 10
+        # 第一次采样没有 I/O 速率基线
+        assert s["io_read_bps"] is None
+
+    def test_io_rate_between_samples(self, fake_psutil):
+        root = _FakeProc(10, io=(0, 0))
+        fake_psutil[10] = root
+        sampler = TEL.TreeSampler()
+        with patch.object(TEL.time, "monotonic", side_effect=[100.0, 102.0]):
+            sampler.sample([10])
+            root.io = (4 * 1024 * 1024, 2 * 1024 * 1024)
+            s = sampler.sample([10])
+        assert s["io_read_bps"] == 2 * 1024 * 1024
+        assert s["io_write_bps"] == 1024 * 1024
+
+    def test_reuses_process_objects(self, fake_psutil):
+        root = _FakeProc(10)
+        fake_psutil[10] = root
+        sampler = TEL.TreeSampler()
+        sampler.sample([10])
+        # 第二次采样沿用同一对象（cpu_percent 依赖上一次调用）
+        del fake_psutil[10]
+        assert sampler.sample([10])["processes"] == 1
+
+    def test_gone_process(self, fake_psutil):
+        assert TEL.TreeSampler().sample([99]) is None
+        assert TEL.TreeSampler().sample([]) is None
+
+    def test_without_psutil(self, monkeypatch):
+        monkeypatch.setattr(TEL, "psutil", None)
+        assert TEL.TreeSampler().sample([1]) is None
+
+
+class TestGpuSampler:
+    def test_nvidia_smi_parsing(self, monkeypatch):
+        monkeypatch.setattr(TEL, "pynvml", None)
+        monkeypatch.setattr(TEL.shutil, "which", lambda name: "/usr/bin/nvidia-smi")
+        out = "0, 87, 10240, 24576\n1, [N/A], 512, 8192\n"
+        run = MagicMock(return_value=types.SimpleNamespace(returncode=0, stdout=out))
+        monkeypatch.setattr(TEL, "run_hidden", run)
+        gpus = TEL.GpuSampler().sample()
+        assert gpus == [
+            {"index": 0, "util_percent": 87.0, "vram_used_mb": 10240.0, "vram_total_mb": 24576.0},
+            {"index": 1, "util_percent": None, "vram_used_mb": 512.0, "vram_total_mb": 8192.0},
+        ]
+
+    def test_no_backend(self, monkeypatch):
+        monkeypatch.setattr(TEL, "pynvml", None)
+        monkeypatch.setattr(TEL.shutil, "which", lambda name: None)
+        sampler = TEL.GpuSampler()
+        assert sampler.sample() == []
+        assert sampler.sample() == []
+
+
+def _app(**opts):
+    app = MagicMock()
+    app.config = {"launch_options": opts}
+    app._shutting_down = False
+    return app
+
+
+class TestTelemetrySampler:
+    def test_ring_buffer_and_series(self, fake_psutil):
+        fake_psutil[10] = _FakeProc(10)
+        pm = MagicMock()
+        pm.comfyui_process.poll.return_value = None
+        pm.comfyui_process.pid = 10
+        pm.comfyui_process.pids = None
+        sampler = TEL.TelemetrySampler(_app(telemetry_history=10), pm)
+        sampler._gpu = MagicMock()
+        sampler._gpu.sample.return_value = [{"index": 0, "vram_used_mb": 5.0}]
+        for i in range(15):
+            fake_psutil[10].rss = (100 + i) * 1024 * 1024
+            sampler.sample_once()
+        snap = sampler.snapshot()
+        assert len(snap) == 10
+        assert sampler.series("rss_mb") == [float(100 + i) for i in range(5, 15)]
+        assert sampler.series("vram_used_mb", gpu=0) == [5.0] * 10
+        assert sampler.series("vram_used_mb", gpu=1) == []
+        assert sampler.latest()["pids"] == [10]
+
+    def test_nothing_recorded_when_not_running(self, fake_psutil, monkeypatch):
+        pm = MagicMock()
+        pm.comfyui_process = None
+        app = _app()
+        app.custom_port.get.return_value = "8188"
+        monkeypatch.setattr(TEL.PROBECLIENT, "check", lambda port, **kw: False)
+        monkeypatch.setattr(TEL, "port_pids", lambda port: pytest.fail("port scanned"))
+        sampler = TEL.TelemetrySampler(app, pm)
+        assert sampler.sample_once() is None
+        assert sampler.snapshot() == []
+
+    def test_external_instance_found_by_port(self, fake_psutil, monkeypatch):
+        fake_psutil[42] = _FakeProc(42)
+        pm = MagicMock()
+        pm.comfyui_process = None
+        app = _app()
+        app.custom_port.get.return_value = "8190"
+        monkeypatch.setattr(TEL.PROBECLIENT, "check", lambda port, **kw: port == 8190)
+        monkeypatch.setattr(TEL, "port_pids", lambda port: [42] if port == "8190" else [])
+        sampler = TEL.TelemetrySampler(app, pm)
+        sampler._gpu = MagicMock(sample=MagicMock(return_value=[]))
+        assert sampler.sample_once()["pids"] == [42]
+
+    def test_group_pids(self):
+        group = MagicMock()
+        group.poll.return_value = None
+        group.pids = [1, 2]
+        assert TEL.process_pids(group) == [1, 2]
+        group.poll.return_value = 0
+        assert TEL.process_pids(group) == []
+
+    def test_settings_from_config(self):
+        assert TEL.settings_from_config({}) == (TEL.DEFAULT_INTERVAL, TEL.DEFAULT_HISTORY)
+        cfg = {"launch_options": {"telemetry_interval": "0.1", "telemetry_history": "x"}}
+        assert TEL.settings_from_config(cfg) == (0.5, TEL.DEFAULT_HISTORY)
+
+
+def test_collect_and_format(fake_psutil, monkeypatch):
+    fake_psutil[10] = _FakeProc(10, io=(0, 0))
+    monkeypatch.setattr(TEL.GpuSampler, "sample", lambda self: [
+        {"index": 0, "util_percent": 50.0, "vram_used_mb": 2048.0, "vram_total_mb": 8192.0}
+    ])
+    history = TEL.collect([10], duration=0.02, samples=3)
+    assert len(history) == 2
+    lines = TEL.format_sample(history[-1], history)
+    text = "\n".join(lines)
+    assert "CPU: 10.0%" in text
+    assert "RSS: 100.0 MB" in text
+    assert "GPU0: 50% util, VRAM 2048 / 8192 MB" in text
+    assert any(line.startswith("VRAM0 ") for line in lines)
+
+
+def test_sparkline():
+    assert TEL.sparkline([]) == ""
+    assert TEL.sparkline([1, 1, 1]) == "▁▁▁"
+    assert TEL.sparkline([0, 5, 10]) == "▁▅█"
+    assert len(TEL.sparkline(list(range(100)), width=20)) == 20
@@ -362,3 +362,199 @@ class TestSyncRequirementsFilesFrozenPropagation(unittest.TestCase):
                 "numpy",
             },
         )
+
+
+class TestSyncRequirementsFilesFingerprint(unittest.TestCase):
+    """A successful sync is fingerprinted; an identical re-run is skipped."""
+
+    def setUp(self):
+        from services.update_service import UpdateService
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.app = MagicMock()
+        self.app.logger = MagicMock()
+        self.app.config.get.return_value = {}
+        self.app.config_manager.config_file = self.root / "launcher" / "config.json"
+        self.app.pypi_proxy_mode.get.return_value = "none"
+        self.app.pypi_proxy_url.get.return_value = ""
+        self.app.auto_update_deps_var.get.return_value = True
+        self.svc = UpdateService(self.app)
+        self.req = self.root / "requirements.txt"
+        self.req.write_text("a==1\n", encoding="utf-8")
+        self.env = {"a": "1"}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _sync(self, res, **kw):
+        with patch.object(
+            self.svc, "_resolve_comfy_root", return_value=self.root
+        ), patch.object(
+            self.svc, "_collect_requirement_files", return_value=[self.req]
+        ), patch.object(
+            self.svc, "_resolve_python_exec", return_value="python"
+        ), patch(
+            "utils.req_fingerprint.PIPINDEX.installed_versions",
+            side_effect=lambda _py: dict(self.env),
+        ), patch(
+            "services.update_service.PIPUTILS.install_requirements_file",
+            return_value=res,
+        ) as mock_install:
+            result = self.svc.sync_requirements_files(**kw)
+        return result, mock_install
+
+    def test_second_identical_sync_is_skipped(self):
+        ok = {"success": True, "error": None, "installed": [], "satisfied": ["a-1"]}
+        first, m1 = self._sync(ok)
+        second, m2 = self._sync(ok)
+        self.assertEqual(m1.call_count, 1)
+        m2.assert_not_called()
+        self.assertEqual(first["unchanged"], [])
+        self.assertEqual(second["unchanged"], ["requirements.txt"])
+        self.assertIn("unchanged", second["summary"])
+        self.assertFalse(second["updated"])
+
+    def test_changed_environment_or_force_resyncs(self):
+        ok = {"success": True, "error": None, "installed": [], "satisfied": ["a-1"]}
+        self._sync(ok)
+        self.env = {"a": "2"}
+        _res, m = self._sync(ok)
+        self.assertEqual(m.call_count, 1)
+        _res, m = self._sync(ok, force=True)
+        self.assertEqual(m.call_count, 1)
+
+    def test_failed_sync_is_not_recorded(self):
+        bad = {
+            "success": False,
+            "error": "X",
+            "installed": [],
+            "satisfied": [],
+            "missing": ["a==1"],
+        }
+        self._sync(bad)
+        _res, m = self._sync(bad)
+        self.assertEqual(m.call_count, 1)
+
+
+class TestSyncCustomNodeRequirements(unittest.TestCase):
+    """Union sync: one combined install, conflicts reported per node."""
+
+    def setUp(self):
+        from services.update_service import UpdateService
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "requirements.txt").write_text("numpy>=1.25\n", encoding="utf-8")
+        for name, text in {
+            "node-a": "numpy<2\nfoo==1.0\n",
+            "node-b": "foo==2.0\n",
+        }.items():
+            d = self.root / "custom_nodes" / name
+            d.mkdir(parents=True)
+            (d / "requirements.txt").write_text(text, encoding="utf-8")
+        self.app = MagicMock()
+        self.app.config.get.return_value = {}
+        self.svc = UpdateService(self.app)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, **kw):
+        captured = {}
+
+        def fake_install(path, _py, **kwargs):
+            captured["text"] = Path(path).read_text(encoding="utf-8")
+            captured["kwargs"] = kwargs
+            return {"success": True, "error": None, "installed": ["numpy-1.26.4"]}
+
+        with patch.object(
+            self.svc, "_resolve_comfy_root", return_value=self.root
+        ), patch.object(
+            self.svc, "_resolve_python_exec", return_value="python"
+        ), patch.object(
+            self.svc, "_collect_requirement_files",
+            return_value=[self.root / "requirements.txt"],
+        ), patch(
+            "services.update_service.PIPUTILS.install_requirements_file",
+            side_effect=fake_install,
+        ) as mock_install:
+            result = self.svc.sync_custom_node_requirements(**kw)
+        return result, mock_install, captured
+
+    def test_installs_union_once_and_reports_conflicts(self):
+        result, mock_install, captured = self._run()
+        self.assertEqual(mock_install.call_count, 1)
+        self.assertEqual(captured["text"].split(), ["numpy>=1.25,<2"])
+        self.assertTrue(captured["kwargs"]["plan"])
+        self.assertEqual([c["name"] for c in result["conflicts"]], ["foo"])
+        self.assertEqual(result["conflicts"][0]["pairs"], [["node-a", "node-b"]])
+        self.assertEqual(result["installed"], ["numpy-1.26.4"])
+        self.assertTrue(result["updated"])
+
+    def test_check_only_does_not_install(self):
+        result, mock_install, _ = self._run(install=False)
+        mock_install.assert_not_called()
+        self.assertEqual(len(result["conflicts"]), 1)
+        self.assertIn("node-b", result["sources"])
+
+
+class TestEnvironmentLock(unittest.TestCase):
+    """Snapshot before updates; restore re-checks out git and reinstalls the delta."""
+
+    def setUp(self):
+        from services.update_service import UpdateService
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = MagicMock()
+        self.app.config_manager.config_file = Path(self.tmp.name) / "config.json"
+        self.svc = UpdateService(self.app)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _snapshot(self, commit="abc1234", dists=None):
+        with patch.object(
+            self.svc, "_safe_get_current_kernel_version",
+            return_value={"commit": commit, "tag": None},
+        ), patch.object(
+            self.svc, "_resolve_python_exec", return_value="python"
+        ), patch(
+            "utils.env_lock.PIPINDEX.installed_versions",
+            return_value=dists or {"foo": "1.0"},
+        ):
+            return self.svc.snapshot_environment(reason="test")
+
+    def test_snapshot_writes_lock_next_to_config(self):
+        path = self._snapshot()
+        self.assertIsNotNone(path)
+        self.assertEqual(path.parent, Path(self.tmp.name) / "env-locks")
+        self.assertEqual(self.svc.list_environment_locks(), [path])
+
+    def test_snapshot_disabled_without_config_path(self):
+        self.app.config_manager.config_file = MagicMock()
+        self.assertIsNone(self._snapshot())
+
+    def test_restore_checks_out_commit_and_restores_delta(self):
+        self._snapshot(commit="abc1234")
+        self.app.services.version.upgrade_to_commit.return_value = {"component": "core"}
+        with patch.object(
+            self.svc, "_safe_get_current_kernel_version",
+            return_value={"commit": "def5678"},
+        ), patch.object(
+            self.svc, "_resolve_python_exec", return_value="python"
+        ), patch(
+            "services.update_service.ENVLOCK.restore",
+            return_value={"success": True, "installed": ["foo==1.0"], "error": None},
+        ) as mock_restore:
+            res = self.svc.restore_environment()
+        self.app.services.version.upgrade_to_commit.assert_called_once_with(
+            "abc1234", stable_only=False
+        )
+        self.assertTrue(res["git_restored"])
+        self.assertTrue(res["success"])
+        self.assertEqual(mock_restore.call_args[0][0]["distributions"], {"foo": "1.0"})
+
+    def test_restore_without_lockfile(self):
+        res = self.svc.restore_environment()
+        self.assertEqual(res["error_code"], "NO_LOCKFILE")
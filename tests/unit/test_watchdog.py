@@ -0,0 +1,258 @@
+"""Tests for core.watchdog."""
+
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core import process_events as PE
+from core import watchdog as WD
+from core.supervisor import ProcessSupervisor
+
+
+class _Var:
+    def __init__(self, v):
+        self._v = v
+
+    def get(self):
+        return self._v
+
+
+class _Recorder:
+    def __init__(self):
+        self.events = []
+
+    def on_watchdog_restart(self, reason=None, attempt=None, delay=None, exit_code=None):
+        self.events.append(("restart", reason, attempt, delay, exit_code))
+
+    def on_hang_detected(self, latency=None, failures=None):
+        self.events.append(("hang", failures))
+
+    def on_resource_limit(self, resource=None, value_mb=None, limit_mb=None):
+        self.events.append(("limit", resource, value_mb, limit_mb))
+
+    def on_restart_budget_exhausted(self, reason=None, restarts=None, window=None):
+        self.events.append(("exhausted", reason, restarts))
+
+
+@pytest.fixture
+def recorder():
+    rec = _Recorder()
+    PE.register_callback(rec)
+    yield rec
+    PE.unregister_callback(rec)
+
+
+def _setup(**opts):
+    options = {"watchdog_enabled": True}
+    options.update(opts)
+    app = MagicMock()
+    app._launching = False
+    app._shutting_down = False
+    app.config = {"launch_options": options}
+    app.custom_port = _Var("8188")
+    pm = MagicMock()
+    pm._stopping = False
+    pm.comfyui_process = None
+    pm.last_launch = {}
+    wd = WD.Watchdog(app, pm)
+    wd._schedule = MagicMock()
+    return app, pm, wd
+
+
+class TestPolicy:
+    def test_defaults_disabled(self):
+        p = WD.WatchdogPolicy.from_config({})
+        assert p.enabled is False
+        assert p.max_restarts == 5
+        assert p.rss_limit_mb == 0 and p.vram_limit_mb == 0
+
+    def test_reads_and_sanitizes_options(self):
+        p = WD.WatchdogPolicy.from_config({"launch_options": {
+            "watchdog_enabled": True,
+            "watchdog_max_restarts": "2",
+            "watchdog_hang_checks": 0,
+            "watchdog_backoff_initial": "bad",
+            "watchdog_vram_limit_mb": 8000,
+        }})
+        assert p.enabled is True
+        assert p.max_restarts == 2
+        assert p.hang_checks == 1
+        assert p.backoff_initial == 2.0
+        assert p.vram_limit_mb == 8000.0
+
+
+class TestRestartOnExit:
+    def test_disabled_does_nothing(self, recorder):
+        _app, _pm, wd = _setup(watchdog_enabled=False)
+        assert wd.on_exit(MagicMock(), 1) is False
+        wd._schedule.assert_not_called()
+        assert recorder.events == []
+
+    def test_exponential_backoff(self, recorder):
+        _app, _pm, wd = _setup(watchdog_backoff_initial=1.0, watchdog_backoff_max=3.0)
+        for _ in range(4):
+            assert wd.on_exit(MagicMock(), 1) is True
+        delays = [c.args[0] for c in wd._schedule.call_args_list]
+        assert delays == [1.0, 2.0, 3.0, 3.0]
+        assert recorder.events[0] == ("restart", "crash", 1, 1.0, 1)
+        assert [e[2] for e in recorder.events] == [1, 2, 3, 4]
+
+    def test_backoff_resets_after_stable_run(self):
+        _app, pm, wd = _setup(watchdog_backoff_initial=1.0)
+        wd.on_exit(MagicMock(), 1)
+        wd.on_exit(MagicMock(), 1)
+        pm.last_launch = {"finished_at": WD.time.time() - WD.STABLE_UPTIME - 1}
+        wd.on_exit(MagicMock(), 1)
+        assert wd._schedule.call_args.args[0] == 1.0
+
+    def test_budget_exhausted(self, recorder):
+        _app, _pm, wd = _setup(watchdog_max_restarts=2)
+        assert wd.on_exit(MagicMock(), 1) is True
+        assert wd.on_exit(MagicMock(), 1) is True
+        assert wd.on_exit(MagicMock(), 1) is False
+        assert wd._schedule.call_count == 2
+        assert recorder.events[-1] == ("exhausted", "crash", 2)
+
+    def test_budget_window_slides(self):
+        _app, _pm, wd = _setup(watchdog_max_restarts=1, watchdog_restart_window=60)
+        with patch.object(WD.time, "monotonic", return_value=1000.0):
+            assert wd.on_exit(MagicMock(), 1) is True
+            assert wd.on_exit(MagicMock(), 1) is False
+        with patch.object(WD.time, "monotonic", return_value=1061.0):
+            assert wd.on_exit(MagicMock(), 1) is True
+
+
+class TestRestartAction:
+    def test_restart_posts_start(self):
+        _app, pm, wd = _setup()
+        with patch.object(WD.PROBECLIENT, "check", return_value=False):
+            wd._restart()
+        pm._post_to_ui.assert_called_once_with(pm.start_comfyui)
+
+    def test_skipped_when_already_running_or_busy(self):
+        app, pm, wd = _setup()
+        pm.comfyui_process = MagicMock()
+        pm.comfyui_process.poll.return_value = None
+        wd._restart()
+        pm.comfyui_process = None
+        app._launching = True
+        wd._restart()
+        app._launching = False
+        with patch.object(WD.PROBECLIENT, "check", return_value=True):
+            wd._restart()
+        pm._post_to_ui.assert_not_called()
+
+    def test_cancel_stops_pending_timer(self):
+        _app, pm, wd = _setup(watchdog_backoff_initial=30.0)
+        del wd._schedule
+        wd.on_exit(MagicMock(), 1)
+        assert wd.restart_pending
+        wd.cancel()
+        assert not wd.restart_pending
+        pm._post_to_ui.assert_not_called()
+
+
+class _Client:
+    def __init__(self, results, stats=None):
+        self.results = list(results)
+        self.last_latency = 10.0
+        self.stats = stats
+
+    def check(self, max_age=None, timeout=None):
+        return self.results.pop(0)
+
+    def last_json(self):
+        return self.stats
+
+
+def _alive_proc():
+    proc = MagicMock()
+    proc.poll.return_value = None
+    return proc
+
+
+class TestHealthCheck:
+    def test_hang_after_consecutive_failures(self, recorder):
+        _app, pm, wd = _setup(watchdog_hang_checks=2)
+        pm.comfyui_process = _alive_proc()
+        client = _Client([False, True, False, False])
+        with patch.object(WD.PROBECLIENT, "get_client", return_value=client), \
+                patch("core.runner_stop._stop_tracked_process") as stop:
+            assert wd.check() is None
+            assert wd.check() is None  # 成功一次后计数清零
+            assert wd.check() is None
+            assert wd.check() == "hang"
+        stop.assert_called_once()
+        assert ("hang", 2) in recorder.events
+        assert wd._pending_reason == "hang"
+
+        # 进程随后退出：按 hang 原因计划重启
+        assert wd.on_exit(pm.comfyui_process, -15) is True
+        assert recorder.events[-1][:2] == ("restart", "hang")
+
+    def test_vram_limit(self, recorder):
+        _app, pm, wd = _setup(watchdog_vram_limit_mb=1000)
+        pm.comfyui_process = _alive_proc()
+        stats = {"devices": [
+            {"type": "cuda", "torch_vram_total": 1500 * 1024 * 1024},
+            {"type": "cpu", "vram_total": 1, "vram_free": 0},
+        ]}
+        with patch.object(WD.PROBECLIENT, "get_client", return_value=_Client([True], stats)), \
+                patch("core.runner_stop._stop_tracked_process") as stop:
+            assert wd.check() == "vram"
+        stop.assert_called_once()
+        assert recorder.events == [("limit", "vram", 1500.0, 1000.0)]
+
+    def test_rss_limit_uses_process_tree(self):
+        if WD.psutil is None:
+            pytest.skip("psutil not installed")
+        _app, pm, wd = _setup(watchdog_rss_limit_mb=1)
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            pm.comfyui_process = child
+            assert WD.rss_mb(child) > 1
+            with patch.object(WD.PROBECLIENT, "get_client", return_value=_Client([True])), \
+                    patch("core.runner_stop._stop_tracked_process") as stop:
+                assert wd.check() == "rss"
+            stop.assert_called_once()
+        finally:
+            child.kill()
+            child.wait()
+
+    def test_idle_when_busy_or_no_child(self):
+        app, pm, wd = _setup()
+        with patch.object(WD.PROBECLIENT, "get_client") as get_client:
+            assert wd.check() is None
+            pm.comfyui_process = _alive_proc()
+            pm._stopping = True
+            assert wd.check() is None
+        get_client.assert_not_called()
+
+
+def test_vram_falls_back_to_device_usage():
+    stats = {"devices": [{"type": "cuda", "vram_total": 3 * 1024 * 1024, "vram_free": 1024 * 1024}]}
+    assert WD.vram_mb(stats) == 2.0
+    assert WD.vram_mb(None) is None
+
+
+class TestSupervisorHook:
+    def _run_exit(self, busy):
+        app = MagicMock()
+        app._launching = False
+        pm = MagicMock()
+        pm._stopping = busy
+        proc = MagicMock()
+        proc.wait.return_value = 3
+        pm.comfyui_process = proc
+        ProcessSupervisor(app, pm)._supervise_child(proc)
+        return pm, proc
+
+    def test_unexpected_exit_notifies_watchdog(self):
+        pm, proc = self._run_exit(busy=False)
+        pm.watchdog.on_exit.assert_called_once_with(proc, 3)
+
+    def test_stop_flow_exit_is_not_reported(self):
+        pm, _proc = self._run_exit(busy=True)
+        pm.watchdog.on_exit.assert_not_called()
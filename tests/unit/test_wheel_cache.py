@@ -0,0 +1,227 @@
+"""
+Tests for utils/wheel_cache.py (shared wheelhouse with LRU eviction).
+"""
+
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def cache(tmp_path):
+    from utils.wheel_cache import WheelCache
+
+    c = WheelCache(tmp_path / "cache", max_bytes=1000)
+    c.ensure_dirs()
+    return c
+
+
+@pytest.fixture(autouse=True)
+def _reset_global_cache():
+    from utils import wheel_cache
+
+    wheel_cache.configure(enabled=False)
+    yield
+    wheel_cache.configure(enabled=False)
+
+
+def _write(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    return path
+
+
+class TestWheelCache:
+    def test_pip_args_point_at_cache_dirs(self, cache):
+        args = cache.pip_args()
+        assert args == [
+            "--cache-dir",
+            str(cache.pip_cache_dir),
+            "--find-links",
+            str(cache.wheels_dir),
+        ]
+
+    def test_find_wheel_normalizes_name_and_version(self, cache):
+        _write(cache.wheels_dir / "Foo_Bar-1.2.0-py3-none-any.whl", 10)
+        assert cache.find_wheel("foo-bar", "1.2") is not None
+        assert cache.find_wheel("foo-bar", "1.3") is None
+        assert cache.covers(["foo-bar==1.2.0"]) is True
+        assert cache.covers(["foo-bar==1.2.0", "other==1.0"]) is False
+        assert cache.covers(["pkg @ https://x/pkg.whl"]) is False
+
+    def test_harvest_collects_locally_built_wheels(self, cache):
+        built = _write(
+            cache.pip_cache_dir / "wheels" / "ab" / "cd" / "legacy_pkg-0.3-py3-none-any.whl",
+            10,
+        )
+        added = cache.harvest_built_wheels()
+        assert added == [built.name]
+        assert (cache.wheels_dir / built.name).exists()
+        # second harvest is a no-op
+        assert cache.harvest_built_wheels() == []
+
+    def test_enforce_limit_evicts_least_recently_used(self, cache):
+        old = _write(cache.wheels_dir / "old-1.0-py3-none-any.whl", 600)
+        new = _write(cache.wheels_dir / "new-1.0-py3-none-any.whl", 600)
+        past = time.time() - 3600
+        os.utime(old, (past, past))
+        os.utime(new, (past, past))
+        cache.mark_used([new.name])
+
+        removed = cache.enforce_limit()
+
+        assert removed == 1
+        assert not old.exists()
+        assert new.exists()
+
+    def test_under_limit_keeps_everything(self, cache):
+        _write(cache.wheels_dir / "a-1.0-py3-none-any.whl", 100)
+        assert cache.enforce_limit() == 0
+
+    @pytest.mark.skipif(not hasattr(os, "link"), reason="需要硬链接")
+    def test_hardlinked_wheel_counted_once_and_fully_evicted(self, cache):
+        src = _write(cache.pip_cache_dir / "wheels" / "ab" / "old-1.0-py3-none-any.whl", 600)
+        link = cache.wheels_dir / src.name
+        os.link(src, link)
+        other = _write(cache.wheels_dir / "new-1.0-py3-none-any.whl", 300)
+        past = time.time() - 3600
+        for p in (src, other):
+            os.utime(p, (past, past))
+        cache.mark_used([other.name])
+
+        assert cache.total_size() == 900
+        cache.max_bytes = 500
+        assert cache.enforce_limit() == 2
+        assert not src.exists() and not link.exists()
+        assert other.exists()
+
+    def test_recently_used_files_are_not_evicted(self, cache):
+        whl = _write(cache.wheels_dir / "a-1.0-py3-none-any.whl", 2000)
+        assert cache.enforce_limit() == 0
+        assert whl.exists()
+
+    def test_maintain_skipped_while_another_process_holds_lock(self, cache):
+        from utils.common import SingletonLock
+
+        held = SingletonLock(".maintain.lock", lock_dir=str(cache.root))
+        assert held.acquire()
+        try:
+            with patch.object(cache, "enforce_limit") as enforce:
+                cache.maintain()
+            enforce.assert_not_called()
+        finally:
+            held.release()
+
+        with patch.object(cache, "enforce_limit") as enforce:
+            cache.maintain()
+        enforce.assert_called_once()
+
+    def test_note_pip_output_marks_wheelhouse_hits(self, cache):
+        whl = _write(cache.wheels_dir / "a-1.0-py3-none-any.whl", 10)
+        cache.note_pip_output(f"Processing {whl}\nInstalling collected packages: a")
+        assert whl.name in cache._load_usage()
+
+    def test_after_install_outside_batch_maintains_immediately(self, cache):
+        with patch.object(cache, "maintain") as maintain:
+            cache.after_install("")
+        maintain.assert_called_once()
+
+    def test_batch_maintains_once_at_the_end(self, cache):
+        with patch.object(cache, "maintain") as maintain:
+            with cache.batch():
+                cache.after_install("")
+                with cache.batch():
+                    cache.after_install("")
+                cache.after_install("")
+                maintain.assert_not_called()
+            maintain.assert_called_once()
+
+    def test_batch_without_installs_skips_maintenance(self, cache):
+        with patch.object(cache, "maintain") as maintain:
+            with cache.batch():
+                pass
+        maintain.assert_not_called()
+
+
+class TestConfigure:
+    def test_configure_from_config_uses_section(self, tmp_path):
+        from utils import wheel_cache
+
+        c = wheel_cache.configure_from_config(
+            {"pip_cache": {"enabled": True, "dir": str(tmp_path), "max_size_gb": 1}}
+        )
+        assert c.root == tmp_path
+        assert c.max_bytes == 1024 ** 3
+        assert wheel_cache.get_cache() is c
+
+    def test_disabled_in_config(self):
+        from utils import wheel_cache
+
+        assert wheel_cache.configure_from_config({"pip_cache": {"enabled": False}}) is None
+        assert wheel_cache.get_cache() is None
+
+    def test_non_dict_config_is_ignored(self):
+        from utils import wheel_cache
+
+        assert wheel_cache.configure_from_config(MagicMock()) is None
+
+
+class TestPipIntegration:
+    def test_install_passes_cache_args_and_maintains_cache(self, tmp_path):
+        from utils import wheel_cache
+        from utils.pip import install_or_update_package
+
+        c = wheel_cache.configure(enabled=True, root=tmp_path / "c", max_size_gb=1)
+        ok = MagicMock(returncode=0, stdout="Successfully installed x-1.0", stderr="")
+        with patch("utils.pip.run_hidden", return_value=ok) as run, patch(
+            "utils.pip.get_package_version", return_value="1.0"
+        ), patch.object(c, "after_install") as after:
+            install_or_update_package("x", "python")
+        cmd = run.call_args[0][0]
+        assert "--find-links" in cmd and str(c.wheels_dir) in cmd
+        assert "--cache-dir" in cmd
+        after.assert_called_once()
+
+    def test_requirements_sync_maintains_cache_once(self, tmp_path):
+        from utils import wheel_cache
+        from utils.pip import install_requirements_file
+
+        c = wheel_cache.configure(enabled=True, root=tmp_path / "c", max_size_gb=1)
+        req = tmp_path / "requirements.txt"
+        req.write_text("a\nb\nc\n", encoding="utf-8")
+        ok = MagicMock(returncode=0, stdout="Successfully installed a-1.0", stderr="")
+        with patch("utils.pip._run_pip_report", return_value=(ok, None)) as run, patch(
+            "utils.pip.get_package_version", return_value=None
+        ), patch.object(c, "maintain") as maintain:
+            install_requirements_file(req, "python")
+        assert run.call_count == 3
+        maintain.assert_called_once()
+
+    def test_planned_install_goes_offline_when_wheelhouse_covers_delta(self, tmp_path):
+        from utils import wheel_cache
+        from utils.pip import install_requirements_file
+
+        c = wheel_cache.configure(enabled=True, root=tmp_path / "c", max_size_gb=1)
+        c.ensure_dirs()
+        _write(c.wheels_dir / "requests-2.31.0-py3-none-any.whl", 10)
+        req = tmp_path / "requirements.txt"
+        req.write_text("requests==2.31.0\n", encoding="utf-8")
+        report = {"install": [{"metadata": {"name": "requests", "version": "2.31.0"}}]}
+        ok = MagicMock(returncode=0, stdout="", stderr="")
+
+        with patch("utils.pip._pip_command", return_value=["pip"]), patch(
+            "utils.pip._run_pip_report", return_value=(ok, report)
+        ), patch("utils.pip.run_hidden", return_value=ok) as run, patch(
+            "utils.pip.PIPINDEX.installed_versions", return_value={}
+        ):
+            result = install_requirements_file(
+                str(req), "python", index_url="https://mirror/simple", plan=True
+            )
+
+        assert run.call_count == 1
+        cmd = run.call_args[0][0]
+        assert "--no-index" in cmd
+        assert "https://mirror/simple" not in cmd
+        assert result["installed"] == ["requests-2.31.0"]
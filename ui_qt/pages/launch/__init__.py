@@ -3,5 +3,6 @@
 from ui_qt.pages.launch.launch_controls_section import LaunchControlsSection
 from ui_qt.pages.launch.environment_section import EnvironmentSection
 from ui_qt.pages.launch.version_section import VersionSection
+from ui_qt.pages.launch.telemetry_section import TelemetrySection
 
-__all__ = ['LaunchControlsSection', 'EnvironmentSection', 'VersionSection']
+__all__ = ['LaunchControlsSection', 'EnvironmentSection', 'VersionSection', 'TelemetrySection']
@@ -0,0 +1,151 @@
+"""
+资源占用区块
+显示 ComfyUI 进程树的 CPU、内存、I/O 与各显卡利用率、显存的实时曲线，
+数据来自 ProcessManager.telemetry 的环形缓冲区（core.telemetry）。
+"""
+
+import time
+
+from PyQt5 import QtWidgets, QtCore
+from ui_qt.widgets.custom import Sparkline
+from core.telemetry import series
+
+# 曲线显示的样本数（默认 2 秒一次，约 4 分钟）
+VISIBLE_SAMPLES = 120
+
+
+class TelemetrySection(QtWidgets.QWidget):
+    """
+    资源占用区块控件
+
+    ComfyUI 未运行（缓冲区中没有新样本）时整个区块隐藏
+    """
+
+    def __init__(self, app_context, theme_manager=None, parent=None):
+        super().__init__(parent)
+        self.app = app_context
+        self.theme_manager = theme_manager
+        self._gpu_lines = {}
+        self._setup_ui()
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start(self._interval_ms())
+
+        if self.theme_manager:
+            self.theme_manager.register_listener(self._on_theme_changed)
+
+    def _setup_ui(self):
+        """设置 UI"""
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.setContentsMargins(0, 0, 0, 0)
+        main_layout.setSpacing(0)
+
+        group = QtWidgets.QGroupBox("资源占用")
+        self._grid = QtWidgets.QGridLayout(group)
+        self._grid.setContentsMargins(10, 6, 10, 6)
+        self._grid.setHorizontalSpacing(16)
+        self._grid.setVerticalSpacing(6)
+        main_layout.addWidget(group)
+
+        self.cpu_line = self._make_line("CPU")
+        self.rss_line = self._make_line("内存")
+        self.io_line = self._make_line("磁盘 I/O")
+        for col, line in enumerate((self.cpu_line, self.rss_line, self.io_line)):
+            self._grid.addWidget(line, 0, col)
+        self.hide()
+
+    def _make_line(self, title):
+        return Sparkline(title, color=self._get_line_color(), text_color=self._get_label_color())
+
+    def _telemetry(self):
+        try:
+            return self.app.process_manager.telemetry
+        except Exception:
+            return None
+
+    def _interval_ms(self):
+        tel = self._telemetry()
+        try:
+            return int(tel.interval * 1000)
+        except Exception:
+            return 2000
+
+    def refresh(self):
+        """从缓冲区读取最近的样本并更新曲线"""
+        tel = self._telemetry()
+        if tel is None:
+            return
+        samples = tel.snapshot()[-VISIBLE_SAMPLES:]
+        last = samples[-1] if samples else None
+        # 超过两个采样周期没有新样本：进程已停止
+        if last is None or self._age(last) > tel.interval * 2.5:
+            self.hide()
+            return
+        self.show()
+
+        self.cpu_line.set_values(series(samples, "cpu_percent"), f"{last.get('cpu_percent') or 0:.0f}%")
+        self.rss_line.set_values(
+            series(samples, "rss_mb"),
+            f"{(last.get('rss_mb') or 0) / 1024:.2f} GB · {last.get('threads')} 线程",
+        )
+        io = [
+            (s.get("io_read_bps") or 0) + (s.get("io_write_bps") or 0)
+            for s in samples if s.get("io_read_bps") is not None
+        ]
+        self.io_line.set_values(io, f"{(io[-1] if io else 0) / 1024 / 1024:.1f} MB/s")
+
+        for g in last.get("gpus") or []:
+            idx = g.get("index")
+            lines = self._gpu_lines.get(idx)
+            if lines is None:
+                row = 1 + len(self._gpu_lines)
+                lines = (self._make_line(f"GPU{idx} 利用率"), self._make_line(f"GPU{idx} 显存"))
+                self._grid.addWidget(lines[0], row, 0)
+                self._grid.addWidget(lines[1], row, 1, 1, 2)
+                self._gpu_lines[idx] = lines
+            util = g.get("util_percent")
+            lines[0].set_values(
+                series(samples, "util_percent", gpu=idx),
+                "n/a" if util is None else f"{util:.0f}%",
+            )
+            lines[1].set_values(
+                series(samples, "vram_used_mb", gpu=idx),
+                f"{(g.get('vram_used_mb') or 0) / 1024:.1f} / {(g.get('vram_total_mb') or 0) / 1024:.1f} GB",
+            )
+
+    def _age(self, sample):
+        try:
+            return time.time() - float(sample.get("t"))
+        except Exception:
+            return 0.0
+
+    def _get_label_color(self):
+        """获取标签颜色"""
+        try:
+            if self.theme_manager and hasattr(self.theme_manager, 'colors'):
+                return self.theme_manager.colors.get('label_muted', '#9CA3AF')
+        except Exception:
+            pass
+        return '#9CA3AF'
+
+    def _get_line_color(self):
+        """获取曲线颜色"""
+        try:
+            if self.theme_manager and hasattr(self.theme_manager, 'colors'):
+                return self.theme_manager.colors.get('btn_primary_bg', '#7F56D9')
+        except Exception:
+            pass
+        return '#7F56D9'
+
+    def _on_theme_changed(self, theme_styles):
+        """主题变更回调"""
+        self.update_theme(theme_styles)
+
+    def update_theme(self, theme_styles=None):
+        """更新主题"""
+        lines = [self.cpu_line, self.rss_line, self.io_line]
+        for pair in self._gpu_lines.values():
+            lines.extend(pair)
+        for line in lines:
+            line.set_colors(self._get_line_color(), self._get_label_color())
@@ -8,7 +8,7 @@ from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtCore import Qt
 from .base_page import BasePage
 from ui_qt.theme_styles import ThemeStyles
-from ui_qt.pages.launch import LaunchControlsSection, EnvironmentSection, VersionSection
+from ui_qt.pages.launch import LaunchControlsSection, EnvironmentSection, VersionSection, TelemetrySection
 
 
 class LaunchPage(BasePage):
@@ -136,6 +136,13 @@ class LaunchPage(BasePage):
         except Exception:
             pass
 
+        # ============== 资源占用区块（ComfyUI 运行时显示） ==============
+        self.telemetry_section = TelemetrySection(
+            app_context=self.app,
+            theme_manager=self.theme_manager
+        )
+        layout.addWidget(self.telemetry_section)
+
         # ============== 环境配置区块 ==============
         self.environment_section = EnvironmentSection(
             app_context=self.app,
@@ -161,7 +168,9 @@ class LaunchPage(BasePage):
         layout.addStretch(1)
 
         # 存储需要主题更新的组件
-        self._styled_widgets = [self.launch_controls_section, self.environment_section, self.version_section]
+        self._styled_widgets = [
+            self.launch_controls_section, self.telemetry_section, self.environment_section, self.version_section
+        ]
         if hasattr(self.app, "_styled_widgets"):
             self.app._theme_widgets.extend(self._styled_widgets)
         try:
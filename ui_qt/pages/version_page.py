@@ -9,6 +9,7 @@ from ui_qt.widgets import InfoCard, StyledTableWidget
 from ui_qt.widgets.custom import NoWheelComboBox
 from ui_qt.theme_styles import ThemeStyles
 from utils import common as COMMON
+from utils import env_lock as ENVLOCK
 from utils.common import run_hidden
 from ui_qt.widgets.progress_dialog import ProgressDialog
 
@@ -123,6 +124,12 @@ class VersionPage(BasePage):
             cb_deps.setChecked(self.app.auto_update_deps_var.get())
             cb_deps.toggled.connect(lambda c: (self.app.auto_update_deps_var.set(c), self._save_config()))
 
+        cb_nodes = QtWidgets.QCheckBox("含节点依赖")
+        cb_nodes.setToolTip("同步依赖时把 custom_nodes 的 requirements 一并合并、检查冲突后一次安装")
+        if hasattr(self.app, 'sync_node_deps_var'):
+            cb_nodes.setChecked(self.app.sync_node_deps_var.get())
+            cb_nodes.toggled.connect(lambda c: (self.app.sync_node_deps_var.set(c), self._save_config()))
+
         # 超时选择器（放在同一行）
         lbl_timeout = QtWidgets.QLabel("超时:")
         lbl_timeout.setStyleSheet(lbl_style)
@@ -153,6 +160,8 @@ class VersionPage(BasePage):
         row_strat.addSpacing(15)
         row_strat.addWidget(cb_deps)
         row_strat.addSpacing(15)
+        row_strat.addWidget(cb_nodes)
+        row_strat.addSpacing(15)
         row_strat.addWidget(lbl_timeout)
         row_strat.addWidget(self.timeout_combo)
         row_strat.addStretch(1)
@@ -190,9 +199,16 @@ class VersionPage(BasePage):
         self.btn_refresh.setToolTip("从远程仓库拉取最新的提交历史")
         self.btn_refresh.clicked.connect(self._fetch_remote_and_refresh)
 
+        self.btn_rollback = QtWidgets.QPushButton("回滚到更新前")
+        self.btn_rollback.setCursor(QtCore.Qt.PointingHandCursor)
+        self.btn_rollback.setStyleSheet(self.theme_manager.styles.primary_button_style())
+        self.btn_rollback.setToolTip("按更新前自动保存的环境锁文件，恢复内核提交与 Python 依赖")
+        self.btn_rollback.clicked.connect(self._rollback_environment)
+
         btn_row.addWidget(self.btn_upd)
         btn_row.addWidget(self.btn_switch)
         btn_row.addWidget(self.btn_refresh)
+        btn_row.addWidget(self.btn_rollback)
         btn_row.addStretch(1)
 
         info_layout.addLayout(btn_row)
@@ -376,6 +392,80 @@ class VersionPage(BasePage):
             from ui_qt.widgets.dialog_helper import DialogHelper
             DialogHelper.show_warning(self, "切换失败", str(e))
 
+    def _rollback_environment(self):
+        """按最近一份环境锁文件回滚内核提交与依赖"""
+        from ui_qt.widgets.dialog_helper import DialogHelper
+
+        update_svc = getattr(getattr(self.app, "services", None), "update", None)
+        if update_svc is None or getattr(self.app, "_update_running", False):
+            return
+        if hasattr(self.app, '_is_comfyui_running') and self.app._is_comfyui_running():
+            DialogHelper.show_warning(
+                self, "无法回滚",
+                "ComfyUI 正在运行中，无法回滚。\n请先停止 ComfyUI 后再试。"
+            )
+            return
+        locks = update_svc.list_environment_locks()
+        lock = ENVLOCK.load(locks[0]) if locks else None
+        if lock is None:
+            DialogHelper.show_info(self, "无法回滚", "还没有可用的环境锁文件（每次更新前会自动保存一份）。")
+            return
+        commit = ((lock.get("git") or {}).get("commit") or "")[:8] or "-"
+        if not DialogHelper.show_confirmation(
+            self, "回滚到更新前",
+            f"将按 {lock.get('created_at') or locks[0].name} 保存的环境锁文件回滚：\n"
+            f"内核恢复到提交 {commit}，依赖只重装/卸载有差异的包。\n\n是否继续？",
+        ):
+            return
+
+        progress = ProgressDialog(parent=self, title="回滚中", theme_manager=self.theme_manager)
+        progress.set_status("正在按环境锁文件回滚...")
+        progress.set_progress(0, maximum=0)
+        progress.show()
+        if hasattr(self, "btn_rollback"):
+            self.btn_rollback.setEnabled(False)
+
+        def _on_progress(text, percent=None):
+            self.app.ui_post(lambda t=text: progress.set_status(t))
+
+        def _bg():
+            try:
+                res = update_svc.restore_environment(locks[0], on_progress=_on_progress)
+            except Exception as e:
+                res = {"error": str(e)}
+            self.app.ui_post(lambda r=res: self._on_rollback_done(progress, r))
+
+        import threading
+        threading.Thread(target=_bg, daemon=True).start()
+
+    def _on_rollback_done(self, progress, res):
+        from ui_qt.widgets.dialog_helper import DialogHelper
+
+        try:
+            progress.close()
+        except Exception:
+            pass
+        if hasattr(self, "btn_rollback"):
+            self.btn_rollback.setEnabled(True)
+        if hasattr(self.app, 'get_version_info'):
+            self.app.get_version_info("all")
+        self._refresh_kernel_section()
+        if not isinstance(res, dict) or res.get("error"):
+            error = res.get("error") if isinstance(res, dict) else None
+            DialogHelper.show_warning(self, "回滚失败", str(error or "未知错误"))
+            return
+        lines = []
+        if res.get("git_restored"):
+            lines.append("内核已恢复到更新前的提交。")
+        lines.append(
+            f"重装 {len(res.get('installed') or [])} 个包，卸载 {len(res.get('removed') or [])} 个包，"
+            f"{res.get('unchanged') or 0} 个未变。"
+        )
+        untouched = list(res.get("frozen") or []) + list(res.get("skipped") or [])
+        if untouched:
+            lines.append("未处理（黑名单 / 可编辑安装）：" + ", ".join(untouched))
+        DialogHelper.show_info(self, "回滚完成", "\n".join(lines))
+
     def _fetch_remote_and_refresh(self):
         """从远程刷新提交历史"""
         # 显示进度对话框
@@ -21,6 +21,7 @@ from core.version_workers import (
     GitStatusWorker,
     GpuCheckWorker,
     GpuEnumerateWorker,
+    EnvProbeWorker,
     BaseVersionWorker,
 )
 from core.app_state import AppState
@@ -28,6 +29,7 @@ from services.git_service import GitService
 from utils import common as COMMON
 from ui import assets_helper as ASSETS
 from utils import pip as PIPUTILS
+from utils import env_agent as ENVAGENT
 from utils.common import run_hidden
 from ui_qt.theme_manager import ThemeManager
 from ui_qt.widgets.dialog_helper import DialogHelper
@@ -221,17 +223,23 @@ class VersionWorker(QtCore.QThread):
         try:
             if self.scope in ("all", "python_related"):
                 try:
-                    r = run_hidden(
-                        [self.app.python_exec, "--version"],
-                        capture_output=True,
-                        text=True,
-                        timeout=10,
-                    )
-                    val = (
-                        r.stdout.strip().replace("Python ", "")
-                        if r.returncode == 0
-                        else "获取失败"
+                    info = ENVAGENT.query(
+                        self.app.python_exec, "python", timeout=10, log=self.app.logger
                     )
+                    if isinstance(info, dict) and info.get("version"):
+                        val = info["version"]
+                    else:
+                        r = run_hidden(
+                            [self.app.python_exec, "--version"],
+                            capture_output=True,
+                            text=True,
+                            timeout=10,
+                        )
+                        val = (
+                            r.stdout.strip().replace("Python ", "")
+                            if r.returncode == 0
+                            else "获取失败"
+                        )
                     self.pythonVersion.emit(val)
                     self.app.logger.info("UI: Python 版本=%s", val)
                 except Exception:
@@ -666,6 +674,9 @@ def _format_update_summary(core_res, req_res):
                 f"跳过 {len(frozen)} 项"
             )
             lines.append(counts)
+            unchanged = req_res.get("unchanged") or []
+            if unchanged:
+                lines.append(f"  未变化已跳过：{', '.join(unchanged)}")
             # 黑名单明细：单行紧凑呈现。每条一行 "- name (已跳过)" 占太多竖向空间，
             # 改为 "自动跳过（无需操作）：name1, name2, ..."。超过 6 个则折叠为“等 N 项”。
             if frozen:
@@ -713,8 +724,19 @@ def _format_update_summary(core_res, req_res):
                 f"依赖：已满足 0 项，已更新 0 项，失败 1 项，跳过 0 项"
             )
             lines.append(f"  - <全部>（{generic_err}）")
+        elif req_res.get("unchanged"):
+            lines.append("依赖：未变化（requirements 与环境均与上次同步一致），已跳过同步")
         elif req_res.get("summary"):
             lines.append("依赖：已是最新")
+        conflicts = req_res.get("conflicts") or []
+        if conflicts:
+            from utils.req_union import format_conflict
+
+            lines.append(f"节点依赖冲突 {len(conflicts)} 处（详见日志）：")
+            for c in conflicts[:3]:
+                lines.append(f"  - {format_conflict(c)}")
+            if len(conflicts) > 3:
+                lines.append(f"  - ... 等 {len(conflicts) - 3} 处")
     return "\n".join(lines).strip() or "更新流程完成"
 
 def _confirm_deps_or_warn(parent, auto_update_deps_var) -> bool:
@@ -1031,6 +1053,10 @@ class PyQtLauncher(QtWidgets.QMainWindow, process_events.ProcessCallback):
             self.auto_update_deps_var = BoolVar(bool(vp.get("auto_update_deps", True)))
         except Exception:
             self.auto_update_deps_var = BoolVar(True)
+        try:
+            self.sync_node_deps_var = BoolVar(bool(vp.get("sync_node_requirements", False)))
+        except Exception:
+            self.sync_node_deps_var = BoolVar(False)
         try:
             self.update_timeout_var = Var(int(vp.get("update_timeout", 120)))
         except Exception:
@@ -1108,6 +1134,12 @@ class PyQtLauncher(QtWidgets.QMainWindow, process_events.ProcessCallback):
         self.big_btn = BigBtnProxy()
         self.process_manager = ProcessManager(self)
         process_events.register_callback(self)
+        # 可选：事件由独立的分发线程投递，监管/看门狗线程不被回调阻塞
+        try:
+            if (self.config.get("launch_options") or {}).get("event_queue_enabled"):
+                process_events.start_dispatcher()
+        except Exception:
+            pass
         self.services = ServiceContainer.from_app(self)
         self._setup_ui()
 
@@ -2286,18 +2318,9 @@ class PyQtLauncher(QtWidgets.QMainWindow, process_events.ProcessCallback):
         except Exception:
             pass
 
-        # 定时检测 ComfyUI 运行状态并同步按钮（每 5 秒）
+        # 运行状态由进程监管线程推送（core.supervisor），不再定时轮询
         try:
-            self._status_timer = QtCore.QTimer(self)
-            self._status_timer.timeout.connect(
-                lambda: (
-                    self.services.process.refresh_status()
-                    if hasattr(self, "services") and hasattr(self.services, "process")
-                    else None
-                )
-            )
-            self._status_timer.start(5000)
-            # 首次立即检测一次
+            # 按钮挂上后立即检测一次
             QtCore.QTimer.singleShot(500, lambda: (
                 self.services.process.refresh_status()
                 if hasattr(self, "services") and hasattr(self.services, "process")
@@ -2781,6 +2804,67 @@ class PyQtLauncher(QtWidgets.QMainWindow, process_events.ProcessCallback):
         except Exception:
             pass
 
+    def _start_python_related_workers(self):
+        """逐项检测（环境探测失败时的退路）：每项各起一个 worker。"""
+        # Python 版本
+        self._start_version_worker(
+            PythonVersionWorker, "python", self._on_python_version
+        )
+        # Torch 版本
+        self._start_version_worker(
+            TorchVersionWorker, "torch", self._on_torch_version
+        )
+        # 前端包版本
+        self._start_version_worker(
+            FrontendVersionWorker, "frontend", self._on_frontend_version
+        )
+        # 模板库版本
+        self._start_version_worker(
+            TemplateVersionWorker, "template", self._on_template_version
+        )
+        # GPU 检测
+        self._start_gpu_check()
+        # GPU 枚举（供启动控制区显卡下拉）
+        try:
+            self._start_gpu_enumerate()
+        except Exception:
+            pass
+
+    def _start_env_probe(self, attempt=1):
+        """启动环境探测 worker，结果分发到各版本 / GPU 回调。"""
+        try:
+            if not hasattr(self, "_version_workers"):
+                self._version_workers = {}
+
+            worker = EnvProbeWorker(self, attempt)
+            worker.pythonVersionReady.connect(self._on_python_version)
+            worker.torchVersionReady.connect(self._on_torch_version)
+            worker.frontendVersionReady.connect(self._on_frontend_version)
+            worker.templateVersionReady.connect(self._on_template_version)
+            worker.gpuStatusReady.connect(self._on_gpu_driver_status)
+            worker.inventoryReady.connect(self._on_gpu_inventory_ready)
+            worker.probeFailed.connect(self._start_python_related_workers)
+
+            def on_retry(attempt_num):
+                QtCore.QTimer.singleShot(
+                    BaseVersionWorker.RETRY_DELAY_MS,
+                    lambda: self._start_env_probe(attempt_num + 1),
+                )
+
+            worker.retryNeeded.connect(on_retry)
+            worker.finished.connect(lambda: self._cleanup_worker("probe", attempt))
+            worker.finished.connect(worker.deleteLater)
+
+            self._version_workers[f"probe_{attempt}"] = worker
+            worker.start()
+        except Exception as e:
+            try:
+                if hasattr(self, "logger"):
+                    self.logger.warning("启动环境探测 worker 失败: %s", e)
+            except Exception:
+                pass
+            self._start_python_related_workers()
+
     def _start_gpu_check(self, attempt=1):
         """启动 GPU 检测 worker"""
         try:
@@ -2920,29 +3004,8 @@ class PyQtLauncher(QtWidgets.QMainWindow, process_events.ProcessCallback):
         # 并行启动所有检测
         try:
             if scope in ("all", "python_related"):
-                # Python 版本
-                self._start_version_worker(
-                    PythonVersionWorker, "python", self._on_python_version
-                )
-                # Torch 版本
-                self._start_version_worker(
-                    TorchVersionWorker, "torch", self._on_torch_version
-                )
-                # 前端包版本
-                self._start_version_worker(
-                    FrontendVersionWorker, "frontend", self._on_frontend_version
-                )
-                # 模板库版本
-                self._start_version_worker(
-                    TemplateVersionWorker, "template", self._on_template_version
-                )
-                # GPU 检测
-                self._start_gpu_check()
-                # GPU 枚举（供启动控制区显卡下拉）
-                try:
-                    self._start_gpu_enumerate()
-                except Exception:
-                    pass
+                # 一次探测拿全 Python/torch/前端/模板/GPU；失败时退回逐项 worker
+                self._start_env_probe()
 
             if scope in ("all", "core_only", "selected"):
                 # 内核版本
@@ -2997,6 +3060,10 @@ class PyQtLauncher(QtWidgets.QMainWindow, process_events.ProcessCallback):
                 "version_preferences.auto_update_deps",
                 bool(self.auto_update_deps_var.get()),
             )
+            self.services.config.set(
+                "version_preferences.sync_node_requirements",
+                bool(self.sync_node_deps_var.get()),
+            )
             self.services.config.set(
                 "version_preferences.update_timeout", int(self.update_timeout_var.get())
             )
@@ -3154,6 +3221,12 @@ class PyQtLauncher(QtWidgets.QMainWindow, process_events.ProcessCallback):
                     core_res = {"component": "core", "error": "用户取消"}
                     return
 
+                # 更新前保存环境锁文件，出问题时可按锁文件回滚
+                try:
+                    self.services.update.snapshot_environment(reason="upgrade_latest")
+                except Exception:
+                    pass
+
                 # 1. 更新内核（带超时）
                 on_progress("正在更新 ComfyUI 内核...")
 
@@ -3215,7 +3288,14 @@ class PyQtLauncher(QtWidgets.QMainWindow, process_events.ProcessCallback):
                         if hasattr(self, "auto_update_deps_var") and bool(
                             self.auto_update_deps_var.get()
                         ):
-                            req_res = self.services.update.sync_requirements_files(on_progress=on_progress)
+                            if bool(getattr(self, "sync_node_deps_var", None) and self.sync_node_deps_var.get()):
+                                # ComfyUI 与全部节点的 requirements 合并，一次解析安装
+                                on_progress("正在合并同步 ComfyUI 与节点依赖...")
+                                req_res = self.services.update.sync_custom_node_requirements(
+                                    on_progress=on_progress
+                                )
+                            else:
+                                req_res = self.services.update.sync_requirements_files(on_progress=on_progress)
                     except Exception as e:
                         req_res = {"component": "requirements", "error": str(e)}
 
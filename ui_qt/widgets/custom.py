@@ -1,4 +1,4 @@
-from PyQt5 import QtWidgets, QtGui
+from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtCore import Qt
 
 
@@ -47,3 +47,70 @@ class NoWheelComboBox(QtWidgets.QComboBox):
     """
     def wheelEvent(self, event):
         event.ignore()
+
+
+class Sparkline(QtWidgets.QWidget):
+    """
+    迷你折线图：标题与当前值在上，最近一段数值的折线在下
+    """
+    def __init__(self, title="", color="#7F56D9", text_color="#9CA3AF", parent=None):
+        super().__init__(parent)
+        self._title = title
+        self._values = []
+        self._text = ""
+        self._color = QtGui.QColor(color)
+        self._text_color = QtGui.QColor(text_color)
+        self.setMinimumSize(120, 48)
+        self.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+
+    def set_values(self, values, text=""):
+        self._values = [float(v) for v in values if v is not None]
+        self._text = text
+        self.update()
+
+    def set_colors(self, color=None, text_color=None):
+        if color:
+            self._color = QtGui.QColor(color)
+        if text_color:
+            self._text_color = QtGui.QColor(text_color)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        font = painter.font()
+        font.setPointSizeF(8.5)
+        painter.setFont(font)
+        fm = painter.fontMetrics()
+        header = fm.height()
+        painter.setPen(self._text_color)
+        header_rect = QtCore.QRectF(0, 0, self.width(), header)
+        painter.drawText(header_rect, Qt.AlignLeft | Qt.AlignVCenter, self._title)
+        painter.drawText(header_rect, Qt.AlignRight | Qt.AlignVCenter, self._text)
+
+        values = self._values
+        if len(values) < 2:
+            return
+        top = header + 4
+        h = max(1, self.height() - top - 2)
+        w = max(1, self.width() - 2)
+        lo, hi = min(values), max(values)
+        span = (hi - lo) or 1.0
+        step = w / (len(values) - 1)
+        points = [
+            QtCore.QPointF(1 + i * step, top + h - (v - lo) / span * h)
+            for i, v in enumerate(values)
+        ]
+        # 折线下方半透明填充
+        area = QtGui.QPolygonF([QtCore.QPointF(points[0].x(), top + h)] + points
+                               + [QtCore.QPointF(points[-1].x(), top + h)])
+        fill = QtGui.QColor(self._color)
+        fill.setAlpha(50)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(fill)
+        painter.drawPolygon(area)
+        pen = QtGui.QPen(self._color)
+        pen.setWidthF(1.5)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawPolyline(QtGui.QPolygonF(points))
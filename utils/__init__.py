@@ -6,6 +6,16 @@
 __all__ = [
     "paths",
     "pip",
+    "pip_index",
+    "pep440",
+    "wheel_cache",
+    "pip_prefetch",
+    "pip_progress",
+    "req_fingerprint",
+    "req_union",
+    "env_agent",
+    "env_lock",
+    "installer_backend",
     "net",
     "common",
     "logging",
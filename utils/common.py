@@ -165,8 +165,8 @@ def is_git_repo(path: str | Path) -> bool:
 
 
 class SingletonLock:
-    def __init__(self, lock_file_name):
-        self.lock_file_path = os.path.join(tempfile.gettempdir(), lock_file_name)
+    def __init__(self, lock_file_name, lock_dir=None):
+        self.lock_file_path = os.path.join(lock_dir or tempfile.gettempdir(), lock_file_name)
         self.lock_file = None
 
     def acquire(self):
@@ -0,0 +1,413 @@
+"""
+目标解释器常驻助手
+版本 / GPU 等查询原来每次都起一个新解释器（``python --version``、内联
+pynvml 脚本），嵌入式 Python 冷启动加 import 常常要 1~3 秒。这里用
+``app.python_exec`` 起一个常驻子进程，按 JSON 行协议应答：
+
+    请求  {"id": 1, "op": "python", "args": {}}
+    应答  {"id": 1, "ok": true, "result": {...}}  /  {"id": 1, "ok": false, "error": "..."}
+
+支持的 op：``ping``、``python``、``package_version``、``distributions``、
+``torch``（只读 ``torch/version.py``，不 import torch，常驻进程不占显存）、
+``gpus``（pynvml，每次查询后 nvmlShutdown），以及把以上合成一份 JSON 的
+``probe``。同一脚本带 ``--once <op> [参数JSON]`` 时只答一次就退出，供助手
+起不来时一次性运行。
+
+pip 改动环境后 ``pip_index.invalidate`` 会通知这里停掉对应助手，下一次
+查询自动重启，拿到的始终是新环境。助手挂掉或超时同样停掉，下次重启；
+调用方用 ``query`` 拿不到结果时退回原来的一次性子进程。助手只加载标准库
+与纯 Python 的 pynvml，不占用 site-packages 里的二进制文件，不妨碍 pip 覆盖安装。
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from utils import pip_index as PIPINDEX
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30.0
+
+_AGENT_SOURCE = r'''
+import json, os, platform, sys, warnings
+warnings.filterwarnings("ignore")
+
+
+def _md():
+    import importlib.metadata as md
+    return md
+
+
+def op_ping(args):
+    return {"pid": os.getpid()}
+
+
+def op_python(args):
+    return {
+        "version": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "executable": sys.executable,
+    }
+
+
+def op_package_version(args):
+    md = _md()
+    out = {}
+    for name in args.get("names") or []:
+        try:
+            out[name] = md.version(name)
+        except md.PackageNotFoundError:
+            out[name] = None
+    return out
+
+
+def op_distributions(args):
+    out = {}
+    for dist in _md().distributions():
+        try:
+            name = dist.metadata["Name"]
+            if name:
+                out[name] = dist.version
+        except Exception:
+            pass
+    return out
+
+
+def op_torch(args):
+    import importlib.util
+    spec = importlib.util.find_spec("torch")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    ns = {}
+    path = os.path.join(list(spec.submodule_search_locations)[0], "version.py")
+    with open(path, "r", encoding="utf-8") as f:
+        exec(compile(f.read(), path, "exec"), ns)
+    return {
+        "version": ns.get("__version__"),
+        "cuda": ns.get("cuda"),
+        "hip": ns.get("hip"),
+    }
+
+
+def op_gpus(args):
+    import pynvml
+    pynvml.nvmlInit()
+    try:
+        driver = pynvml.nvmlSystemGetDriverVersion()
+        if isinstance(driver, bytes):
+            driver = driver.decode("utf-8")
+        gpus = []
+        for i in range(pynvml.nvmlDeviceGetCount()):
+            h = pynvml.nvmlDeviceGetHandleByIndex(i)
+            name = pynvml.nvmlDeviceGetName(h)
+            if isinstance(name, bytes):
+                name = name.decode("utf-8")
+            mem = pynvml.nvmlDeviceGetMemoryInfo(h).total // (1024 * 1024)
+            gpus.append({"index": i, "name": name, "memory_mb": int(mem)})
+        return {"driver": driver, "gpus": gpus}
+    finally:
+        pynvml.nvmlShutdown()
+
+
+def op_probe(args):
+    out = {
+        "python": op_python(args),
+        "packages": op_package_version({"names": args.get("packages") or []}),
+        "torch": None,
+        "gpu": None,
+    }
+    try:
+        out["torch"] = op_torch(args)
+    except Exception as e:
+        out["torch_error"] = "%s: %s" % (type(e).__name__, e)
+    try:
+        out["gpu"] = op_gpus(args)
+    except BaseException as e:
+        out["gpu_error"] = "%s: %s" % (type(e).__name__, e)
+    torch = out["torch"] or {}
+    gpus = (out["gpu"] or {}).get("gpus") or []
+    out["cuda_available"] = bool(torch.get("cuda") and gpus)
+    return out
+
+
+OPS = {
+    "ping": op_ping,
+    "python": op_python,
+    "package_version": op_package_version,
+    "distributions": op_distributions,
+    "torch": op_torch,
+    "gpus": op_gpus,
+    "probe": op_probe,
+}
+
+if len(sys.argv) >= 3 and sys.argv[1] == "--once":
+    result = OPS[sys.argv[2]](json.loads(sys.argv[3]) if len(sys.argv) > 3 else {})
+    sys.stdout.write(json.dumps(result) + "\n")
+    sys.exit(0)
+
+for line in sys.stdin:
+    line = line.strip()
+    if not line:
+        continue
+    try:
+        req = json.loads(line)
+    except Exception:
+        continue
+    rid = req.get("id")
+    fn = OPS.get(req.get("op"))
+    if fn is None:
+        resp = {"id": rid, "ok": False, "error": "unknown op: %s" % req.get("op")}
+    else:
+        try:
+            resp = {"id": rid, "ok": True, "result": fn(req.get("args") or {})}
+        except BaseException as e:
+            resp = {"id": rid, "ok": False, "error": "%s: %s" % (type(e).__name__, e)}
+    sys.stdout.write(json.dumps(resp) + "\n")
+    sys.stdout.flush()
+'''
+
+
+class AgentError(RuntimeError):
+    """助手不可用、超时或查询本身出错。"""
+
+
+class EnvAgent:
+    """一个目标解释器里的常驻助手进程；请求串行，线程安全。"""
+
+    def __init__(self, python_exec: Union[str, Path], log: Optional[logging.Logger] = None):
+        self.python_exec = str(python_exec)
+        self.log = log or logger
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._seq = 0
+        self.starts = 0
+        self.requests = 0
+
+    def alive(self) -> bool:
+        proc = self._proc
+        return proc is not None and proc.poll() is None
+
+    def _start_locked(self) -> None:
+        si = None
+        cf = 0
+        if os.name == "nt":
+            si = subprocess.STARTUPINFO()
+            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            cf = subprocess.CREATE_NO_WINDOW
+        env = dict(os.environ)
+        env["PYTHONIOENCODING"] = "utf-8"
+        env.pop("PYTHONPATH", None)
+        proc = subprocess.Popen(
+            [self.python_exec, "-u", "-c", _AGENT_SOURCE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            startupinfo=si,
+            creationflags=cf,
+            env=env,
+        )
+        lines: "queue.Queue[Optional[bytes]]" = queue.Queue()
+
+        def _reader():
+            try:
+                for raw in proc.stdout:
+                    lines.put(raw)
+            except Exception:
+                pass
+            finally:
+                lines.put(None)
+
+        threading.Thread(target=_reader, name="env-agent-reader", daemon=True).start()
+        self._proc = proc
+        self._lines = lines
+        self.starts += 1
+        self.log.info("环境助手已启动: pid=%s python=%s", proc.pid, self.python_exec)
+
+    def _stop_locked(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+        except Exception:
+            pass
+        try:
+            proc.wait(timeout=1.0)
+        except Exception:
+            try:
+                proc.kill()
+                proc.wait(timeout=1.0)
+            except Exception:
+                pass
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stop_locked()
+
+    def request(self, op: str, timeout: float = DEFAULT_TIMEOUT, **args) -> Any:
+        """发一条请求并等应答；助手未启动时先启动。失败抛 ``AgentError``。"""
+        with self._lock:
+            if not self.alive():
+                self._stop_locked()
+                try:
+                    self._start_locked()
+                except Exception as e:
+                    raise AgentError(f"无法启动环境助手: {e}") from e
+            self._seq += 1
+            rid = self._seq
+            line = json.dumps({"id": rid, "op": op, "args": args}) + "\n"
+            try:
+                self._proc.stdin.write(line.encode("utf-8"))
+                self._proc.stdin.flush()
+            except Exception as e:
+                self._stop_locked()
+                raise AgentError(f"环境助手已退出: {e}") from e
+            self.requests += 1
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    raw = self._lines.get(timeout=max(0.0, remaining))
+                except queue.Empty:
+                    # 卡住的助手直接停掉，下次请求重启
+                    self._stop_locked()
+                    raise AgentError(f"环境助手 {op} 超时（{timeout:.0f}s）")
+                if raw is None:
+                    self._stop_locked()
+                    raise AgentError("环境助手意外退出")
+                try:
+                    resp = json.loads(raw.decode("utf-8", "replace"))
+                except Exception:
+                    continue
+                if resp.get("id") != rid:
+                    # 上一次超时请求的迟到应答
+                    continue
+                if resp.get("ok"):
+                    return resp.get("result")
+                raise AgentError(str(resp.get("error") or "unknown error"))
+
+
+_AGENTS: Dict[str, EnvAgent] = {}
+_AGENTS_LOCK = threading.Lock()
+
+
+def _agent_key(python_exec: Union[str, Path]) -> str:
+    try:
+        return os.path.normcase(os.path.abspath(str(python_exec)))
+    except Exception:
+        return str(python_exec)
+
+
+def get_agent(python_exec: Union[str, Path], log: Optional[logging.Logger] = None) -> EnvAgent:
+    key = _agent_key(python_exec)
+    with _AGENTS_LOCK:
+        agent = _AGENTS.get(key)
+        if agent is None:
+            agent = _AGENTS[key] = EnvAgent(python_exec, log)
+        return agent
+
+
+def query(
+    python_exec: Union[str, Path],
+    op: str,
+    timeout: float = DEFAULT_TIMEOUT,
+    log: Optional[logging.Logger] = None,
+    **args,
+) -> Optional[Any]:
+    """查询助手；任何失败都返回 None（调用方走原来的一次性子进程）。"""
+    if not python_exec:
+        return None
+    try:
+        return get_agent(python_exec, log).request(op, timeout=timeout, **args)
+    except Exception as e:
+        try:
+            (log or logger).info("环境助手查询 %s 失败: %s", op, e)
+        except Exception:
+            pass
+        return None
+
+
+# 启动器关心的包：版本页显示的 torch / 前端包 / 模板库
+PROBE_PACKAGES = ("torch", "comfyui-frontend-package", "comfyui-workflow-templates")
+
+
+def probe(
+    python_exec: Union[str, Path],
+    packages=PROBE_PACKAGES,
+    timeout: float = DEFAULT_TIMEOUT,
+    log: Optional[logging.Logger] = None,
+) -> Optional[Dict[str, Any]]:
+    """一次拿全环境信息：Python、包版本、torch 构建信息、CUDA 可用性、GPU 清单。
+
+    先问常驻助手；助手不可用时用同一脚本 ``--once probe`` 起一次解释器。
+    ``cuda_available`` 是“torch 为 CUDA 构建且 NVML 看得到显卡”，不 import torch。
+    两种方式都失败时返回 None。
+    """
+    if not python_exec:
+        return None
+    args = {"packages": list(packages)}
+    result = query(python_exec, "probe", timeout=timeout, log=log, **args)
+    if isinstance(result, dict):
+        return result
+    try:
+        from utils.common import run_hidden
+
+        r = run_hidden(
+            [str(python_exec), "-c", _AGENT_SOURCE, "--once", "probe", json.dumps(args)],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except Exception as e:
+        (log or logger).warning("环境探测失败: %s", e)
+        return None
+    for line in reversed((r.stdout or "").splitlines()):
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                data = json.loads(line)
+            except Exception:
+                break
+            return data if isinstance(data, dict) else None
+    (log or logger).warning("环境探测无输出: rc=%s", getattr(r, "returncode", None))
+    return None
+
+
+def invalidate(python_exec: Union[str, Path, None] = None) -> None:
+    """环境变了：停掉对应助手（None 时全部），下次查询自动重启。"""
+    with _AGENTS_LOCK:
+        if python_exec is None:
+            targets = list(_AGENTS.values())
+        else:
+            agent = _AGENTS.get(_agent_key(python_exec))
+            targets = [agent] if agent is not None else []
+    for agent in targets:
+        try:
+            agent.stop()
+        except Exception:
+            pass
+
+
+def shutdown_all() -> None:
+    with _AGENTS_LOCK:
+        agents = list(_AGENTS.values())
+        _AGENTS.clear()
+    for agent in agents:
+        try:
+            agent.stop()
+        except Exception:
+            pass
+
+
+PIPINDEX.add_invalidate_listener(invalidate)
+atexit.register(shutdown_all)
@@ -0,0 +1,255 @@
+"""
+环境锁文件
+更新前把目标解释器的已安装分发包全集与 ComfyUI 的 git HEAD 记到一个
+JSON 锁文件里；依赖升级把节点弄坏时，按锁文件只重装有差异的分发包
+（优先共享 wheel 缓存离线安装），几秒内回到更新前的状态，而不必重装
+整个嵌入式 Python。
+
+锁文件记录 ``{规范化名: 版本}``，直接读 site-packages 得到，不启动 pip；
+VCS、本地路径等直接 URL 安装的包另记其来源（``direct_url.json``），回滚时按
+来源重装，可编辑安装不参与回滚。
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from utils import pip_index as PIPINDEX
+
+logger = logging.getLogger(__name__)
+
+LOCK_VERSION = 1
+DEFAULT_KEEP = 5
+_LOCK_PREFIX = "env-lock-"
+# 打包工具本身不参与回滚：卸掉它们会让 pip 无法继续工作
+_TOOLING = frozenset({"pip", "setuptools", "wheel"})
+
+
+def snapshot(
+    python_exec: Union[str, Path],
+    git: Optional[Dict[str, Any]] = None,
+    reason: str = "",
+) -> Optional[Dict[str, Any]]:
+    """当前环境的锁数据；定位不到 site-packages 时返回 None。"""
+    versions = PIPINDEX.installed_versions(python_exec)
+    if versions is None:
+        return None
+    return {
+        "version": LOCK_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "reason": reason,
+        "python_exec": str(python_exec),
+        "python_version": PIPINDEX.guess_python_version(python_exec),
+        "git": dict(git or {}),
+        "distributions": dict(sorted(versions.items())),
+        "sources": dict(sorted(PIPINDEX.direct_urls(python_exec).items())),
+    }
+
+
+def source_requirement(name: str, info: Dict[str, Any]) -> Optional[str]:
+    """``direct_url.json`` 对应的 pip 安装要求；可编辑安装返回 None。"""
+    url = (info or {}).get("url")
+    if not url or (info.get("dir_info") or {}).get("editable"):
+        return None
+    vcs = info.get("vcs_info") or {}
+    if vcs.get("vcs"):
+        url = f"{vcs['vcs']}+{url}"
+        ref = vcs.get("commit_id") or vcs.get("requested_revision")
+        if ref:
+            url = f"{url}@{ref}"
+    if info.get("subdirectory"):
+        url = f"{url}#subdirectory={info['subdirectory']}"
+    return f"{name} @ {url}"
+
+
+def save(lock: Dict[str, Any], locks_dir: Union[str, Path], keep: int = DEFAULT_KEEP) -> Path:
+    """写入 ``env-lock-<时间>.json`` 并只保留最近 ``keep`` 份。"""
+    from config.manager import atomic_write_json
+
+    d = Path(locks_dir)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = d / f"{_LOCK_PREFIX}{stamp}.json"
+    n = 1
+    while path.exists():
+        path = d / f"{_LOCK_PREFIX}{stamp}-{n}.json"
+        n += 1
+    atomic_write_json(path, lock)
+    for old in list_locks(d)[keep:]:
+        try:
+            old.unlink()
+        except Exception:
+            pass
+    return path
+
+
+def list_locks(locks_dir: Union[str, Path]) -> List[Path]:
+    """按时间从新到旧排列的锁文件。"""
+    try:
+        files = [
+            p for p in Path(locks_dir).glob(f"{_LOCK_PREFIX}*.json") if p.is_file()
+        ]
+    except Exception:
+        return []
+    return sorted(files, key=_order_key, reverse=True)
+
+
+def _order_key(path: Path):
+    # 同一秒内保存的锁文件带 -1/-2 后缀，按修改时间相同时再按序号排
+    stem = path.stem[len(_LOCK_PREFIX):]
+    stamp, _sep, seq = stem.partition("-")
+    head, _sep2, tail = seq.partition("-")
+    try:
+        n = int(tail) if tail else 0
+    except ValueError:
+        n = 0
+    try:
+        mtime = path.stat().st_mtime
+    except Exception:
+        mtime = 0.0
+    return (mtime, stamp, head, n)
+
+
+def load(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("distributions"), dict):
+        return None
+    return data
+
+
+def diff(
+    locked: Dict[str, str],
+    current: Dict[str, str],
+    frozen: Iterable[str] = (),
+    sources: Optional[Dict[str, Any]] = None,
+    current_sources: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """锁文件与当前环境的差异。
+
+    返回 ``{"install": [spec...], "remove": [name...], "frozen": [name...],
+    "skipped": [name...], "unchanged": int}``；黑名单包（torch 等）不参与回滚，
+    只列出来。``sources`` 是锁文件记录的直接 URL 来源：这些包按来源重装
+    （``name @ url``），其余按 ``name==ver``；可编辑安装（锁文件里的，或
+    ``current_sources`` 里当前环境的）不重装也不卸载，列在 ``skipped``。
+    """
+    frozen_keys = {PIPINDEX.canonicalize_name(n) for n in frozen}
+    sources = sources or {}
+    current_sources = current_sources or {}
+    out: Dict[str, Any] = {
+        "install": [], "remove": [], "frozen": [], "skipped": [], "unchanged": 0,
+    }
+    for name, ver in sorted(locked.items()):
+        if current.get(name) == ver:
+            out["unchanged"] += 1
+            continue
+        if name in frozen_keys or name in _TOOLING:
+            out["frozen"].append(name)
+            continue
+        if name in sources:
+            spec = source_requirement(name, sources[name])
+            if spec is None:
+                out["skipped"].append(name)
+                continue
+            out["install"].append(spec)
+            continue
+        out["install"].append(f"{name}=={ver}")
+    for name in sorted(current):
+        if name in locked or name in _TOOLING:
+            continue
+        if name in frozen_keys:
+            out["frozen"].append(name)
+            continue
+        if name in current_sources and source_requirement(name, current_sources[name]) is None:
+            out["skipped"].append(name)
+            continue
+        out["remove"].append(name)
+    return out
+
+
+def restore(
+    lock: Dict[str, Any],
+    python_exec: Union[str, Path],
+    index_url: Optional[str] = None,
+    log: Optional[logging.Logger] = None,
+    on_progress=None,
+    frozen: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """把环境恢复到锁文件记录的分发包集合：先按锁文件补装差异，成功后再卸载多出来的。
+
+    补装失败时不卸载任何包，环境保持回滚前的样子。
+    """
+    from utils import pip as PIPUTILS
+
+    log = log or logger
+    result: Dict[str, Any] = {
+        "success": False,
+        "installed": [],
+        "removed": [],
+        "frozen": [],
+        "skipped": [],
+        "unchanged": 0,
+        "offline": False,
+        "error": None,
+        "error_code": None,
+    }
+    current = PIPINDEX.installed_versions(python_exec)
+    if current is None:
+        result["error"] = "无法定位目标环境的 site-packages"
+        result["error_code"] = "SITE_PACKAGES_NOT_FOUND"
+        return result
+    delta = diff(
+        lock.get("distributions") or {},
+        current,
+        frozen,
+        sources=lock.get("sources") or {},
+        current_sources=PIPINDEX.direct_urls(python_exec),
+    )
+    result["frozen"] = delta["frozen"]
+    result["skipped"] = delta["skipped"]
+    result["unchanged"] = delta["unchanged"]
+    log.info(
+        "环境回滚：重装 %d 个，卸载 %d 个，未变 %d 个，跳过可编辑安装 %d 个",
+        len(delta["install"]),
+        len(delta["remove"]),
+        delta["unchanged"],
+        len(delta["skipped"]),
+    )
+    if delta["install"]:
+        if on_progress is not None:
+            try:
+                on_progress(f"正在恢复 {len(delta['install'])} 个包的版本…", None)
+            except Exception:
+                pass
+        res = PIPUTILS.install_pins(
+            delta["install"], python_exec, index_url=index_url, logger=log
+        )
+        result["offline"] = bool(res.get("offline"))
+        if not res.get("success"):
+            result["error"] = res.get("error")
+            result["error_code"] = res.get("error_code")
+            return result
+        result["installed"] = list(delta["install"])
+    if delta["remove"]:
+        if on_progress is not None:
+            try:
+                on_progress(f"正在卸载更新新增的 {len(delta['remove'])} 个包…", None)
+            except Exception:
+                pass
+        res = PIPUTILS.uninstall_packages(delta["remove"], python_exec, log)
+        if not res.get("success"):
+            result["error"] = res.get("error")
+            result["error_code"] = "PIP_UNINSTALL_FAILED"
+            return result
+        result["removed"] = list(delta["remove"])
+    result["success"] = True
+    return result
+
+
+def locks_dir_for(config_file: Union[str, Path]) -> Path:
+    return Path(os.path.abspath(str(config_file))).parent / "env-locks"
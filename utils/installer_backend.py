@@ -0,0 +1,155 @@
+"""
+安装器后端
+``utils.pip`` 的安装操作从这里取命令前缀与缓存参数：
+
+- ``pip``（默认）：``Scripts/pip.exe``（``bin/pip``）或 ``python -m pip``；
+- ``uv``：本机已有的 ``uv`` 可执行文件，以 ``uv pip install --python <解释器>``
+  装进同一个解释器，依赖解析与下载快一个数量级。``uv pip`` 不支持
+  ``--report``，结果由调用方从输出里解析（`` + name==ver`` 行）。
+
+配置 ``version_preferences.installer_backend`` 取 ``pip`` / ``uv`` / ``auto``：
+``auto`` 找得到 uv 就用 uv；``uv`` 找不到可执行文件时同样退回 pip，不会
+因为缺 uv 让依赖同步失败。启动器不负责下载 uv。
+"""
+
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+BACKEND_PIP = "pip"
+BACKEND_UV = "uv"
+BACKEND_AUTO = "auto"
+BACKENDS = (BACKEND_PIP, BACKEND_UV, BACKEND_AUTO)
+
+
+class PipBackend:
+    """pip 本身：支持 ``--report``，``pip download`` 可用于预取。"""
+
+    name = BACKEND_PIP
+    supports_report = True
+    prefer = BACKEND_PIP
+
+    def available(self, python_exec: Union[str, Path, None] = None) -> bool:
+        return True
+
+    def install_command(self, python_exec: Union[str, Path]) -> List[str]:
+        from utils import pip as PIPUTILS
+
+        return PIPUTILS._pip_command(python_exec) + ["install"]
+
+    def cache_args(self, cache) -> List[str]:
+        return cache.pip_args()
+
+
+class UvBackend(PipBackend):
+    """``uv pip``：指定 ``--python`` 装进目标解释器（嵌入式 Python 也可以）。
+
+    uv 的缓存格式与 pip 不同，放在共享缓存目录的 ``uv`` 子目录；
+    wheelhouse 仍通过 ``--find-links`` 共用。
+    """
+
+    name = BACKEND_UV
+    supports_report = False
+
+    def __init__(self, uv_path: Union[str, Path, None] = None, prefer: str = BACKEND_UV):
+        self.uv_path = str(uv_path) if uv_path else None
+        # auto：没有 uv 时静默用 pip；uv：明确要求过，找不到时警告一次
+        self.prefer = prefer
+
+    def executable(self, python_exec: Union[str, Path, None] = None) -> Optional[str]:
+        return find_uv(python_exec, self.uv_path)
+
+    def available(self, python_exec: Union[str, Path, None] = None) -> bool:
+        return self.executable(python_exec) is not None
+
+    def install_command(self, python_exec: Union[str, Path]) -> List[str]:
+        uv = self.executable(python_exec)
+        if uv is None:
+            raise FileNotFoundError("uv executable not found")
+        return [uv, "pip", "install", "--python", str(Path(python_exec).resolve())]
+
+    def cache_args(self, cache) -> List[str]:
+        if not cache.ensure_dirs():
+            return []
+        return [
+            "--cache-dir",
+            str(Path(cache.root) / "uv"),
+            "--find-links",
+            str(cache.wheels_dir),
+        ]
+
+
+def find_uv(
+    python_exec: Union[str, Path, None] = None,
+    configured: Union[str, Path, None] = None,
+) -> Optional[str]:
+    """按 配置路径 -> 解释器旁（Scripts/、bin/）-> PATH 的顺序找 uv。"""
+    candidates: List[Path] = []
+    if configured:
+        candidates.append(Path(configured))
+    if python_exec:
+        try:
+            py_dir = Path(python_exec).resolve().parent
+            exe = "uv.exe" if os.name == "nt" else "uv"
+            candidates.extend([py_dir / "Scripts" / exe, py_dir / exe, py_dir / "bin" / exe])
+        except Exception:
+            pass
+    for c in candidates:
+        try:
+            if c.is_file():
+                return str(c)
+        except Exception:
+            continue
+    try:
+        return shutil.which("uv")
+    except Exception:
+        return None
+
+
+_PIP = PipBackend()
+_BACKEND: PipBackend = _PIP
+_BACKEND_LOCK = threading.Lock()
+_warned_missing = False
+
+
+def configure(name: str = BACKEND_PIP, uv_path: Union[str, Path, None] = None) -> PipBackend:
+    """设置进程内的安装器后端；未知名称按 pip 处理。"""
+    global _BACKEND, _warned_missing
+    key = (name or BACKEND_PIP).strip().lower()
+    with _BACKEND_LOCK:
+        if key in (BACKEND_UV, BACKEND_AUTO):
+            _BACKEND = UvBackend(uv_path, prefer=key)
+        else:
+            _BACKEND = _PIP
+        _warned_missing = False
+        return _BACKEND
+
+
+def configure_from_config(config) -> PipBackend:
+    """按 ``version_preferences.installer_backend`` / ``uv_path`` 设置后端。"""
+    if not isinstance(config, dict):
+        return _BACKEND
+    prefs = config.get("version_preferences") or {}
+    if not isinstance(prefs, dict):
+        prefs = {}
+    return configure(
+        str(prefs.get("installer_backend") or BACKEND_PIP),
+        (str(prefs.get("uv_path") or "").strip() or None),
+    )
+
+
+def get_backend(python_exec: Union[str, Path, None] = None) -> PipBackend:
+    """当前生效的后端：选了 uv 但本机没有 uv 时返回 pip。"""
+    global _warned_missing
+    backend = _BACKEND
+    if backend is _PIP or backend.available(python_exec):
+        return backend
+    if not _warned_missing and backend.prefer == BACKEND_UV:
+        _warned_missing = True
+        logger.warning("未找到 uv 可执行文件，依赖安装改用 pip")
+    return _PIP
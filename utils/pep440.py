@@ -0,0 +1,534 @@
+"""
+PEP 440 版本 / 版本约束与 PEP 508 环境标记求值
+在启动器进程内判断“本地已安装版本是否已满足 requirements 中的约束”，
+从而让已满足的 pinned / ranged spec 完全不必启动 pip。
+
+启动器以 PyInstaller 单文件发布，不捆绑 ``packaging``，因此这里实现一个
+够用的精简版：版本比较规则与 ``packaging.version`` 一致；约束支持
+``== != <= >= < > ~= ===`` 与 ``==X.*`` 通配；标记支持 and / or / 括号、
+版本比较与 in / not in。无法判定的情况一律返回“不确定”，交给 pip 处理。
+"""
+
+import os
+import platform
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+
+class InvalidVersion(ValueError):
+    pass
+
+
+class InvalidSpecifier(ValueError):
+    pass
+
+
+class InvalidMarker(ValueError):
+    pass
+
+
+class UndefinedEnvironmentName(ValueError):
+    pass
+
+
+_VERSION_RE = re.compile(
+    r"""
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?P<pre>[-_.]?(?P<pre_l>alpha|beta|preview|pre|rc|a|b|c)[-_.]?(?P<pre_n>[0-9]+)?)?
+    (?P<post>(?:-(?P<post_n1>[0-9]+))|(?:[-_.]?(?P<post_l>post|rev|r)[-_.]?(?P<post_n2>[0-9]+)?))?
+    (?P<dev>[-_.]?(?P<dev_l>dev)[-_.]?(?P<dev_n>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+_PRE_NORMALIZE = {
+    "alpha": "a",
+    "a": "a",
+    "beta": "b",
+    "b": "b",
+    "c": "rc",
+    "pre": "rc",
+    "preview": "rc",
+    "rc": "rc",
+}
+_PRE_RANK = {"a": 0, "b": 1, "rc": 2}
+
+
+class Version:
+    """PEP 440 版本，比较语义与 ``packaging.version.Version`` 相同。"""
+
+    __slots__ = ("epoch", "release", "pre", "post", "dev", "local", "_key")
+
+    def __init__(self, text: str):
+        m = _VERSION_RE.match(text or "")
+        if not m:
+            raise InvalidVersion(f"无效的版本号: {text!r}")
+        self.epoch = int(m.group("epoch") or 0)
+        self.release = tuple(int(p) for p in m.group("release").split("."))
+        self.pre = None
+        if m.group("pre_l"):
+            self.pre = (
+                _PRE_NORMALIZE[m.group("pre_l").lower()],
+                int(m.group("pre_n") or 0),
+            )
+        self.post = None
+        if m.group("post"):
+            self.post = int(m.group("post_n1") or m.group("post_n2") or 0)
+        self.dev = int(m.group("dev_n") or 0) if m.group("dev_l") else None
+        self.local = None
+        if m.group("local"):
+            self.local = tuple(
+                int(p) if p.isdigit() else p.lower()
+                for p in re.split(r"[-_.]", m.group("local"))
+            )
+        self._key = self._compute_key()
+
+    def _compute_key(self):
+        release = list(self.release)
+        while len(release) > 1 and release[-1] == 0:
+            release.pop()
+        if self.pre is None and self.post is None and self.dev is not None:
+            pre = (-1,)
+        elif self.pre is None:
+            pre = (2,)
+        else:
+            pre = (1, _PRE_RANK[self.pre[0]], self.pre[1])
+        post = (-1,) if self.post is None else (0, self.post)
+        dev = (1,) if self.dev is None else (0, self.dev)
+        if self.local is None:
+            local: Tuple = ()
+        else:
+            # 字母段排在数字段之前
+            local = tuple(
+                (1, p, "") if isinstance(p, int) else (0, 0, p) for p in self.local
+            )
+        return (self.epoch, tuple(release), pre, post, dev, local)
+
+    @property
+    def is_prerelease(self) -> bool:
+        return self.pre is not None or self.dev is not None
+
+    @property
+    def is_postrelease(self) -> bool:
+        return self.post is not None
+
+    @property
+    def base_version(self) -> str:
+        prefix = f"{self.epoch}!" if self.epoch else ""
+        return prefix + ".".join(str(p) for p in self.release)
+
+    @property
+    def public(self) -> str:
+        s = self.base_version
+        if self.pre is not None:
+            s += f"{self.pre[0]}{self.pre[1]}"
+        if self.post is not None:
+            s += f".post{self.post}"
+        if self.dev is not None:
+            s += f".dev{self.dev}"
+        return s
+
+    def __str__(self) -> str:
+        if self.local is None:
+            return self.public
+        return self.public + "+" + ".".join(str(p) for p in self.local)
+
+    def __repr__(self) -> str:
+        return f"<Version({str(self)!r})>"
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __eq__(self, other):
+        return isinstance(other, Version) and self._key == other._key
+
+    def __lt__(self, other):
+        return self._key < other._key
+
+    def __le__(self, other):
+        return self._key <= other._key
+
+    def __gt__(self, other):
+        return self._key > other._key
+
+    def __ge__(self, other):
+        return self._key >= other._key
+
+
+def parse_version(text: str) -> Optional[Version]:
+    try:
+        return Version(text)
+    except InvalidVersion:
+        return None
+
+
+_CLAUSE_RE = re.compile(r"^\s*(===|~=|==|!=|<=|>=|<|>)\s*(\S+?)\s*$")
+
+
+def _pad(release: Tuple[int, ...], n: int) -> Tuple[int, ...]:
+    return tuple(release) + (0,) * max(0, n - len(release))
+
+
+class Specifier:
+    """单个约束子句，如 ``>=4.50.3``、``==1.2.*``。"""
+
+    def __init__(self, text: str):
+        m = _CLAUSE_RE.match(text or "")
+        if not m:
+            raise InvalidSpecifier(f"无效的版本约束: {text!r}")
+        self.operator = m.group(1)
+        self.version = m.group(2)
+        self._wildcard = False
+        self._spec_version: Optional[Version] = None
+        if self.operator == "===":
+            return
+        v = self.version
+        if v.endswith(".*"):
+            if self.operator not in ("==", "!="):
+                raise InvalidSpecifier(f"只有 == / != 支持通配: {text!r}")
+            self._wildcard = True
+            v = v[:-2]
+        try:
+            self._spec_version = Version(v)
+        except InvalidVersion:
+            raise InvalidSpecifier(f"无效的版本约束: {text!r}")
+        if self.operator == "~=" and len(self._spec_version.release) < 2:
+            raise InvalidSpecifier(f"~= 至少需要两段版本号: {text!r}")
+
+    def __str__(self) -> str:
+        return f"{self.operator}{self.version}"
+
+    @property
+    def is_prerelease(self) -> bool:
+        return bool(self._spec_version and self._spec_version.is_prerelease)
+
+    def _prefix_match(self, candidate: Version) -> bool:
+        spec = self._spec_version
+        if candidate.epoch != spec.epoch:
+            return False
+        if spec.pre is None and spec.post is None and spec.dev is None:
+            n = len(spec.release)
+            return _pad(candidate.release, n)[:n] == spec.release
+        # 带 pre/post/dev 的前缀（罕见）：按规范化字符串前缀比较
+        return Version(candidate.public).public.startswith(spec.public)
+
+    def _equal(self, candidate: Version) -> bool:
+        if self._wildcard:
+            return self._prefix_match(candidate)
+        spec = self._spec_version
+        if spec.local is None:
+            # 约束不带 local 段时忽略候选版本的 local（2.5.1+cu124 == 2.5.1）
+            return Version(candidate.public) == spec
+        return candidate == spec
+
+    def contains(self, candidate: Version) -> bool:
+        op = self.operator
+        if op == "===":
+            return str(candidate).lower() == self.version.lower()
+        spec = self._spec_version
+        public = Version(candidate.public)
+        if op == "==":
+            return self._equal(candidate)
+        if op == "!=":
+            return not self._equal(candidate)
+        if op == "<=":
+            return public <= spec
+        if op == ">=":
+            return public >= spec
+        if op == "<":
+            if not public < spec:
+                return False
+            if (
+                not spec.is_prerelease
+                and candidate.is_prerelease
+                and Version(candidate.base_version) == Version(spec.base_version)
+            ):
+                return False
+            return True
+        if op == ">":
+            if not public > spec:
+                return False
+            same_base = Version(candidate.base_version) == Version(spec.base_version)
+            if not spec.is_postrelease and candidate.is_postrelease and same_base:
+                return False
+            if candidate.local is not None and same_base:
+                return False
+            return True
+        if op == "~=":
+            prefix = Version(
+                (f"{spec.epoch}!" if spec.epoch else "")
+                + ".".join(str(p) for p in spec.release[:-1])
+            )
+            n = len(prefix.release)
+            return (
+                public >= spec
+                and candidate.epoch == spec.epoch
+                and _pad(candidate.release, n)[:n] == prefix.release
+            )
+        return False
+
+
+class SpecifierSet:
+    """逗号分隔的约束集合，如 ``>=2.0,<3``；空集合匹配任意版本。"""
+
+    def __init__(self, text: str = ""):
+        self._specs: List[Specifier] = [
+            Specifier(part) for part in (text or "").split(",") if part.strip()
+        ]
+
+    def __str__(self) -> str:
+        return ",".join(str(s) for s in self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def __iter__(self):
+        return iter(self._specs)
+
+    def contains(self, version, prereleases: Optional[bool] = None) -> bool:
+        """``prereleases=None`` 时只有约束本身提到预发布版才接受预发布版。
+
+        判断“已安装版本是否满足”时应传 ``prereleases=True``，与 pip 对
+        已安装分发包的处理一致。
+        """
+        if not isinstance(version, Version):
+            version = Version(str(version))
+        if prereleases is None:
+            prereleases = any(s.is_prerelease for s in self._specs)
+        if version.is_prerelease and not prereleases:
+            return False
+        return all(s.contains(version) for s in self._specs)
+
+
+# ---------------------------------------------------------------------------
+# PEP 508 环境标记
+# ---------------------------------------------------------------------------
+
+_MARKER_VARIABLES = frozenset(
+    {
+        "os_name",
+        "sys_platform",
+        "platform_machine",
+        "platform_python_implementation",
+        "platform_release",
+        "platform_system",
+        "platform_version",
+        "python_version",
+        "python_full_version",
+        "implementation_name",
+        "implementation_version",
+        "extra",
+    }
+)
+# 旧写法别名（setuptools 时代）
+_MARKER_ALIASES = {
+    "os.name": "os_name",
+    "sys.platform": "sys_platform",
+    "platform.version": "platform_version",
+    "platform.machine": "platform_machine",
+    "platform.python_implementation": "platform_python_implementation",
+    "python_implementation": "platform_python_implementation",
+}
+
+_MARKER_TOKEN_RE = re.compile(
+    r"""
+    \s*(?:
+        (?P<lparen>\()
+      | (?P<rparen>\))
+      | (?P<string>'[^']*'|"[^"]*")
+      | (?P<op>===|==|!=|<=|>=|~=|<|>)
+      | (?P<word>[A-Za-z_][A-Za-z0-9_.]*)
+    )
+    """,
+    re.VERBOSE,
+)
+
+
+def _tokenize_marker(text: str) -> List[Tuple[str, str]]:
+    tokens: List[Tuple[str, str]] = []
+    pos = 0
+    text = text or ""
+    while pos < len(text):
+        if text[pos:].strip() == "":
+            break
+        m = _MARKER_TOKEN_RE.match(text, pos)
+        if not m:
+            raise InvalidMarker(f"无法解析的环境标记: {text!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == "string":
+            tokens.append(("string", value[1:-1]))
+        elif kind == "word":
+            if value in ("and", "or", "in", "not"):
+                tokens.append((value, value))
+            else:
+                tokens.append(("var", _MARKER_ALIASES.get(value, value)))
+        else:
+            tokens.append((kind, value))
+    return tokens
+
+
+class _MarkerParser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _take(self, kind=None):
+        tok = self._peek()
+        if tok[0] is None or (kind and tok[0] != kind):
+            raise InvalidMarker(f"环境标记语法错误，期望 {kind}，得到 {tok[1]!r}")
+        self.pos += 1
+        return tok
+
+    def parse(self):
+        node = self._or()
+        if self._peek()[0] is not None:
+            raise InvalidMarker(f"环境标记多余的内容: {self._peek()[1]!r}")
+        return node
+
+    def _or(self):
+        node = self._and()
+        while self._peek()[0] == "or":
+            self._take("or")
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self):
+        node = self._atom()
+        while self._peek()[0] == "and":
+            self._take("and")
+            node = ("and", node, self._atom())
+        return node
+
+    def _atom(self):
+        if self._peek()[0] == "lparen":
+            self._take("lparen")
+            node = self._or()
+            self._take("rparen")
+            return node
+        lhs = self._value()
+        kind, value = self._peek()
+        if kind == "op":
+            self._take()
+            op = value
+        elif kind == "in":
+            self._take()
+            op = "in"
+        elif kind == "not":
+            self._take()
+            self._take("in")
+            op = "not in"
+        else:
+            raise InvalidMarker(f"环境标记缺少比较运算符: {value!r}")
+        return ("cmp", lhs, op, self._value())
+
+    def _value(self):
+        kind, value = self._peek()
+        if kind == "string":
+            self._take()
+            return ("string", value)
+        if kind == "var":
+            self._take()
+            if value not in _MARKER_VARIABLES:
+                raise InvalidMarker(f"未知的环境标记变量: {value!r}")
+            return ("var", value)
+        raise InvalidMarker(f"环境标记期望变量或字符串，得到 {value!r}")
+
+
+def _marker_value(node, env: Dict[str, str]) -> str:
+    kind, value = node
+    if kind == "string":
+        return value
+    if value not in env:
+        raise UndefinedEnvironmentName(value)
+    return env[value]
+
+
+def _compare(lhs: str, op: str, rhs: str) -> bool:
+    if op == "in":
+        return lhs in rhs
+    if op == "not in":
+        return lhs not in rhs
+    lv = parse_version(lhs)
+    if lv is not None:
+        try:
+            return SpecifierSet(f"{op}{rhs}").contains(lv, prereleases=True)
+        except InvalidSpecifier:
+            pass
+    if op == "==":
+        return lhs == rhs
+    if op == "!=":
+        return lhs != rhs
+    if op == "===":
+        return lhs == rhs
+    raise InvalidMarker(f"无法对非版本值使用 {op}: {lhs!r} {op} {rhs!r}")
+
+
+def _eval_node(node, env: Dict[str, str]) -> bool:
+    kind = node[0]
+    if kind == "or":
+        return _eval_node(node[1], env) or _eval_node(node[2], env)
+    if kind == "and":
+        return _eval_node(node[1], env) and _eval_node(node[2], env)
+    _cmp, lhs, op, rhs = node
+    return _compare(_marker_value(lhs, env), op, _marker_value(rhs, env))
+
+
+def evaluate_marker(marker: str, env: Dict[str, str]) -> Optional[bool]:
+    """对 ``marker`` 求值；语法错误或用到 ``env`` 中缺失的变量时返回 None。"""
+    try:
+        tree = _MarkerParser(_tokenize_marker(marker)).parse()
+        return bool(_eval_node(tree, env))
+    except (InvalidMarker, UndefinedEnvironmentName):
+        return None
+
+
+def default_environment() -> Dict[str, str]:
+    """当前（启动器）进程的标记环境。"""
+    impl = sys.implementation
+    iv = impl.version
+    impl_version = f"{iv.major}.{iv.minor}.{iv.micro}"
+    if iv.releaselevel != "final":
+        impl_version += iv.releaselevel[0] + str(iv.serial)
+    return {
+        "implementation_name": impl.name,
+        "implementation_version": impl_version,
+        "os_name": os.name,
+        "platform_machine": platform.machine(),
+        "platform_release": platform.release(),
+        "platform_system": platform.system(),
+        "platform_version": platform.version(),
+        "python_full_version": platform.python_version(),
+        "platform_python_implementation": platform.python_implementation(),
+        "python_version": ".".join(platform.python_version_tuple()[:2]),
+        "sys_platform": sys.platform,
+        "extra": "",
+    }
+
+
+def target_environment(
+    python_version: Optional[str] = None, same_interpreter: bool = False
+) -> Dict[str, str]:
+    """目标解释器的标记环境。
+
+    目标解释器与启动器在同一台机器上，平台类变量直接取启动器进程的值；
+    Python 版本则用 ``python_version``（``X.Y``）替换。未知时移除版本相关
+    变量，使依赖它们的标记求值为“不确定”，而不是误用启动器自身的版本。
+    """
+    env = default_environment()
+    if same_interpreter:
+        return env
+    for k in ("python_version", "python_full_version", "implementation_version"):
+        env.pop(k, None)
+    if python_version:
+        env["python_version"] = python_version
+    return env
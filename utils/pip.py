@@ -7,8 +7,17 @@ import logging
 from pathlib import Path, PurePosixPath
 from typing import Optional, Union, Dict, Any, Iterable, List
 from utils.common import run_hidden
+from utils import pep440 as PEP440
+from utils import pip_index as PIPINDEX
+from utils import wheel_cache as WHEELCACHE
+from utils import pip_prefetch as PIPPREFETCH
+from utils import pip_progress as PIPPROGRESS
+from utils import installer_backend as INSTALLER
 import os
+import re
+import shutil
 import sys
+import tempfile
 
 
 def compute_pip_executable(python_exec: Union[str, Path]) -> Path:
@@ -24,6 +33,40 @@ def compute_pip_executable(python_exec: Union[str, Path]) -> Path:
     return python_path.parent.parent / "bin" / "pip"
 
 
+def _pip_command(python_exec: Union[str, Path]) -> List[str]:
+    """pip 调用前缀：优先 Scripts/pip.exe（bin/pip），否则 ``python -m pip``。"""
+    python_path = Path(python_exec).resolve()
+    pip_exe = compute_pip_executable(python_path)
+    if pip_exe.exists():
+        return [str(pip_exe)]
+    return [str(python_path), "-m", "pip"]
+
+
+def _install_command(python_exec: Union[str, Path]) -> List[str]:
+    """当前安装器后端的 ``install`` 命令前缀（pip 或 ``uv pip install --python``）。"""
+    return INSTALLER.get_backend(python_exec).install_command(python_exec)
+
+
+def _cache_args(python_exec: Union[str, Path, None] = None) -> List[str]:
+    """共享 wheel 缓存的安装参数（``--cache-dir`` / ``--find-links``）；未启用时为空。"""
+    cache = WHEELCACHE.get_cache()
+    if cache is None:
+        return []
+    try:
+        return INSTALLER.get_backend(python_exec).cache_args(cache)
+    except Exception:
+        return []
+
+
+def _after_pip_install(proc) -> None:
+    """pip 安装结束后维护共享缓存：记录命中、收集本地编译的 wheel、LRU 淘汰。"""
+    cache = WHEELCACHE.get_cache()
+    if cache is None:
+        return
+    out = (getattr(proc, "stdout", "") or "") + "\n" + (getattr(proc, "stderr", "") or "")
+    cache.after_install(out)
+
+
 def get_package_version(
     package_name: str,
     python_exec: Union[str, Path],
@@ -36,6 +79,15 @@ def get_package_version(
     # 调用方传入的可能是从 requirements.txt 读出的 spec，
     # 这里先裁到包名再走 pip show，避免被当作包名查。
     pkg_name, _ver = _split_name_version(package_name or "")
+    # 优先查进程内的已安装包索引（直接读 site-packages 的 dist-info），
+    # 命中时是一次字典查找；定位不到 site-packages 才退回 pip show 子进程。
+    known, indexed_ver = PIPINDEX.lookup_version(pkg_name, python_exec)
+    if known:
+        try:
+            logger.debug("已安装包索引: %s -> %s", pkg_name, indexed_ver)
+        except Exception:
+            pass
+        return indexed_ver
     try:
         python_path = Path(python_exec).resolve()
         if not python_path.exists():
@@ -114,41 +166,69 @@ def install_or_update_package(
         "updated": False,
         "up_to_date": False,
         "version": None,
+        "installed": [],
         "error": None,
         "error_code": None,
     }
     try:
-        python_path = Path(python_exec).resolve()
-        pip_exe = compute_pip_executable(python_path)
-        if pip_exe.exists():
-            cmd = [str(pip_exe), "install"]
-        else:
-            cmd = [str(python_path), "-m", "pip", "install"]
+        backend = INSTALLER.get_backend(python_exec)
+        cmd = backend.install_command(python_exec)
         if upgrade:
             cmd.append("-U")
         cmd.append(package_name)
         if index_url:
             cmd.extend(["-i", index_url])
+        cmd.extend(_cache_args(python_exec))
         logger.info(f"执行 pip 操作: {' '.join(cmd)}")
-        if on_progress is not None:
-            pip_result = _run_pip_streaming(cmd, logger, on_progress)
-        else:
-            pip_result = run_hidden(cmd, capture_output=True, text=True)
+        # --report 一次拿到实际安装的名称与版本；旧版 pip / uv / 报告缺失时退回解析输出
+        pip_result, report = _run_pip_report(
+            cmd,
+            logger,
+            on_progress,
+            fallback_without_report=True,
+            report=backend.supports_report,
+        )
+        # 不管成功与否，pip 都可能已改动 site-packages
+        PIPINDEX.invalidate(python_exec)
+        _after_pip_install(pip_result)
         if pip_result.returncode == 0:
             result["success"] = True
             stdout = getattr(pip_result, "stdout", "") or ""
-            result["updated"] = any(
-                keyword in stdout
-                for keyword in [
-                    "Successfully installed",
-                    "Installing collected packages",
-                    "Successfully upgraded",
-                ]
-            )
-            result["up_to_date"] = (
-                "Requirement already satisfied" in stdout
-            ) and not result["updated"]
-            result["version"] = get_package_version(package_name, python_exec, logger)
+            if isinstance(report, dict):
+                result["installed"] = _installed_from_report(report)
+                result["updated"] = bool(result["installed"])
+                result["up_to_date"] = not result["updated"]
+                key = _requirement_key(package_name)
+                for item in report.get("install") or []:
+                    meta = item.get("metadata") or {}
+                    if PIPINDEX.canonicalize_name(meta.get("name") or "") == key:
+                        result["version"] = meta.get("version")
+                        break
+            else:
+                # uv 的结果行（`` + name==ver``）写在 stderr
+                stderr = getattr(pip_result, "stderr", "") or ""
+                result["installed"] = _installed_from_stdout(stdout + "\n" + stderr)
+                result["updated"] = bool(result["installed"]) or any(
+                    keyword in stdout
+                    for keyword in [
+                        "Successfully installed",
+                        "Installing collected packages",
+                        "Successfully upgraded",
+                    ]
+                )
+                result["up_to_date"] = (
+                    "Requirement already satisfied" in stdout
+                    or (backend.name == INSTALLER.BACKEND_UV and not result["installed"])
+                ) and not result["updated"]
+                key = _requirement_key(package_name)
+                for token in result["installed"]:
+                    m = _INSTALLED_TOKEN_RE.match(token)
+                    if m and PIPINDEX.canonicalize_name(m.group(1)) == key:
+                        result["version"] = m.group(2)
+                        break
+            if result["version"] is None:
+                # 未出现在报告里（已满足）：已安装包索引命中时只是一次字典查找
+                result["version"] = get_package_version(package_name, python_exec, logger)
             logger.info(
                 f"pip 操作完成: {package_name}, 更新={result['updated']}, 已满足={result['up_to_date']}"
             )
@@ -156,7 +236,7 @@ def install_or_update_package(
             stderr = getattr(pip_result, "stderr", "") or ""
             result["error"] = f"pip 命令执行失败: {stderr}"
             # 规范化错误码：命令返回非零但未抛异常
-            if "Could not find a version" in stderr:
+            if "Could not find a version" in stderr or _parse_missing_packages(stderr):
                 result["error_code"] = "VERSION_NOT_FOUND"
             else:
                 result["error_code"] = "PIP_COMMAND_FAILED"
@@ -169,6 +249,101 @@ def install_or_update_package(
     return result
 
 
+def install_pins(
+    pins: List[str],
+    python_exec: Union[str, Path],
+    index_url: Optional[str] = None,
+    logger: Optional[logging.Logger] = None,
+    on_progress=None,
+) -> Dict[str, Any]:
+    """按精确版本（``name==ver``）一次性安装，不解析依赖（``--no-deps``）。
+
+    共享 wheel 缓存里能找到全部 wheel 时先 ``--no-index`` 离线装，失败或
+    缓存不全时再联网（仍带缓存参数，命中 pip 的下载缓存）。返回
+    ``{"success", "offline", "error", "error_code"}``。
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    result: Dict[str, Any] = {
+        "success": False,
+        "offline": False,
+        "error": None,
+        "error_code": None,
+    }
+    pins = [p for p in pins if p]
+    if not pins:
+        result["success"] = True
+        return result
+
+    def _run(cmd):
+        logger.info("执行 pip 精确安装: %s", " ".join(cmd))
+        if on_progress is not None:
+            proc = _run_pip_streaming(cmd, logger, on_progress)
+        else:
+            proc = run_hidden(cmd, capture_output=True, text=True)
+        PIPINDEX.invalidate(python_exec)
+        _after_pip_install(proc)
+        return proc
+
+    try:
+        base_cmd = _install_command(python_exec) + ["--no-deps"] + list(pins)
+        cache = WHEELCACHE.get_cache()
+        if cache is not None and cache.covers(pins):
+            proc = _run(base_cmd + ["--no-index"] + _cache_args(python_exec))
+            if proc.returncode == 0:
+                result["success"] = True
+                result["offline"] = True
+                return result
+            logger.info("离线安装失败，改为联网安装")
+        cmd = list(base_cmd)
+        if index_url:
+            cmd.extend(["-i", index_url])
+        cmd.extend(_cache_args(python_exec))
+        proc = _run(cmd)
+        if proc.returncode == 0:
+            result["success"] = True
+        else:
+            stderr = getattr(proc, "stderr", "") or ""
+            result["error"] = f"pip 命令执行失败: {stderr.strip()[:500]}"
+            result["error_code"] = (
+                "VERSION_NOT_FOUND"
+                if "Could not find a version" in stderr
+                else "PIP_COMMAND_FAILED"
+            )
+            logger.error(result["error"])
+    except Exception as e:
+        result["error"] = f"pip 操作异常: {str(e)}"
+        result["error_code"] = "PIP_OPERATION_EXCEPTION"
+        logger.error(result["error"])
+    return result
+
+
+def uninstall_packages(
+    names: List[str],
+    python_exec: Union[str, Path],
+    logger: Optional[logging.Logger] = None,
+) -> Dict[str, Any]:
+    """``pip uninstall -y`` 一次卸载多个包，返回 ``{"success", "error"}``。"""
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    names = [n for n in names if n]
+    if not names:
+        return {"success": True, "error": None}
+    try:
+        cmd = _pip_command(python_exec) + ["uninstall", "-y"] + list(names)
+        logger.info("执行 pip 卸载: %s", " ".join(cmd))
+        proc = run_hidden(cmd, capture_output=True, text=True)
+        PIPINDEX.invalidate(python_exec)
+        if proc.returncode == 0:
+            return {"success": True, "error": None}
+        stderr = getattr(proc, "stderr", "") or ""
+        logger.error("pip 卸载失败: %s", stderr.strip()[:500])
+        return {"success": False, "error": stderr.strip()[:500] or "pip uninstall 失败"}
+    except Exception as e:
+        logger.error("pip 卸载异常: %s", e)
+        return {"success": False, "error": str(e)}
+
+
 def batch_install_packages(
     packages: List[str],
     python_exec: Union[str, Path],
@@ -187,7 +362,7 @@ def batch_install_packages(
     return results
 
 
-def _run_pip_streaming(cmd, logger, on_progress):
+def _run_pip_streaming(cmd, logger, on_progress=None, on_event=None, max_rate_hz=None):
     """Run pip with streaming stdout/stderr, reporting progress via on_progress.
 
     pip 的进度和阶段信息会同时写到 stdout 和 stderr：下载阶段基本
@@ -197,11 +372,14 @@ def _run_pip_streaming(cmd, logger, on_progress):
     stdout 会导致进入安装阶段后 UI 卡在最后一条 Downloading 消息，
     看起来像死锁。
 
-    现在把两个流共用一个行解析器；它们会并发地写"当前包"到同一个
-    pkg_state，用轻量锁保护；on_progress 自身经 ui_post 投递到 UI
-    线程，可以从任意线程调用。
+    两个流共用一个 ``PipLineParser``，每行翻译成结构化的
+    ``PipProgressEvent``（阶段 / 包名 / 已下载与总字节），再经
+    ``ProgressCoalescer`` 限速投递：阶段事件直接送达，字节进度与心跳
+    最多 ``max_rate_hz``（默认 20 Hz）次/秒、保留最新一条。大批量安装时
+    进度条行成千上万，逐行 ui_post 会把 Qt 事件循环淹没。
+
+    ``on_event`` 收结构化事件；``on_progress`` 仍按旧约定只收文本。
     """
-    import re as _re
     import subprocess
     import threading
     import time
@@ -224,132 +402,41 @@ def _run_pip_streaming(cmd, logger, on_progress):
         creationflags=cf,
     )
 
-    # 两个线程（主线程读 stdout，后台线程读 stderr）会同时改"当前包"，
-    # 用锁保护。on_progress 的最终接收者是 UI 线程，不需要再保护。
-    pkg_lock = threading.Lock()
-    pkg_state = {"pkg": None}
-    # 最近一次解析出真实行的时间。心跳线程据此判断要不要覆盖 UI。
+    def _dispatch(event):
+        if on_event is not None:
+            try:
+                on_event(event)
+            except Exception:
+                pass
+        if on_progress is not None:
+            try:
+                on_progress(event.text)
+            except Exception:
+                pass
+
+    parser = PIPPROGRESS.PipLineParser()
+    coalescer = PIPPROGRESS.ProgressCoalescer(
+        _dispatch,
+        max_rate_hz=PIPPROGRESS.DEFAULT_MAX_RATE_HZ if max_rate_hz is None else max_rate_hz,
+    )
+    # 最近一次读到 pip 输出的时间。心跳线程据此判断要不要覆盖 UI。
     last_event_lock = threading.Lock()
     last_event_at = {"t": time.monotonic()}
 
-    def _set_pkg(name):
-        with pkg_lock:
-            pkg_state["pkg"] = name
-
-    def _get_pkg():
-        with pkg_lock:
-            return pkg_state["pkg"]
-
-    def _mark_event():
+    def _handle_line(raw):
+        """把一行 pip 输出翻译成进度事件。stdout 和 stderr 共用。"""
         with last_event_lock:
             last_event_at["t"] = time.monotonic()
-
-    def _handle_line(raw):
-        """把一行 pip 输出翻译成 UI 进度消息。stdout 和 stderr 共用。"""
         try:
-            if raw.startswith("Collecting "):
-                token = raw[len("Collecting "):].split()[0]
-                name = _re.split(r"[><=!]", token)[0].split("[")[0]
-                _set_pkg(name)
-                on_progress(f"正在收集依赖: {name}")
-                return
-
-            if raw.startswith("Downloading "):
-                sm = _re.search(r"\(([^)]+)\)", raw)
-                size = sm.group(1).strip() if sm else ""
-                if not _get_pkg():
-                    url = raw.split("Downloading ", 1)[1].split("(")[0].strip()
-                    _set_pkg(url.split("/")[-1].split("-")[0])
-                p = _get_pkg()
-                on_progress(f"正在下载 {p} ({size})" if size else f"正在下载 {p}")
-                return
-
-            if raw.startswith("Installing collected packages"):
-                tail = raw.split(":", 1)[-1].strip() if ":" in raw else ""
-                on_progress(
-                    "正在安装依赖包" + (f": {tail}" if tail else "")
-                )
-                return
-
-            if raw.startswith("Attempting uninstall:"):
-                m = _re.search(r"Attempting uninstall:\s*(\S+)", raw)
-                if m:
-                    _set_pkg(m.group(1))
-                    on_progress(f"正在清理旧版: {m.group(1)}")
-                return
-
-            if raw.startswith("Uninstalling "):
-                # "Uninstalling comfyui-foo-1.2.3:" — pkg 是 "-<数字>" 之前的部分
-                m = _re.search(r"Uninstalling\s+([A-Za-z0-9_.\-]+)-\d", raw)
-                if m:
-                    _set_pkg(m.group(1))
-                    on_progress(f"正在卸载: {m.group(1)}")
-                return
-
-            if raw.startswith("Installing ") and not raw.startswith(
-                "Installing collected"
-            ):
-                # "Installing comfyui-foo-1.2.3" — pkg 名是 "-<数字>" 之前的部分
-                m = _re.search(
-                    r"Installing\s+([A-Za-z0-9_.\-]+)-\d", raw
-                )
-                if m:
-                    _set_pkg(m.group(1))
-                    on_progress(f"正在安装: {m.group(1)}")
-                return
-
-            if raw.startswith("Successfully installed "):
-                tail = raw[len("Successfully installed "):].strip()
-                on_progress(f"已安装: {tail}")
-                return
-
-            if raw.startswith("Successfully uninstalled "):
-                tail = raw[len("Successfully uninstalled "):].strip()
-                on_progress(f"已卸载: {tail}")
-                return
-
-            if raw.startswith("Running setup.py install for "):
-                # "Running setup.py install for legacy-pkg: started"
-                m = _re.search(
-                    r"Running setup\.py install for\s+(\S+)", raw
-                )
-                if m:
-                    name = m.group(1).rstrip(":")
-                    on_progress(
-                        f"正在编译: {name}（首次安装需要编译，请稍候）"
-                    )
-                return
-
-            if raw.startswith("Found existing installation:"):
-                # "Found existing installation: bar 1.0" 或 "bar-1.0"
-                m = _re.search(
-                    r"Found existing installation:\s+([A-Za-z0-9_.\-]+?)(?:[\s-]\d|$)",
-                    raw,
-                )
-                if m:
-                    _set_pkg(m.group(1))
-                return
-
-            # pip progress bar: "11.1/22.2 MB" or "2.2M/22.2M"
-            pm = _re.search(
-                r"([\d.]+)\s*/\s*([\d.]+)\s*([kKmMgG][bB]?)\b", raw
-            )
-            if pm and _get_pkg():
-                cur, tot, unit = pm.group(1), pm.group(2), pm.group(3)
-                on_progress(
-                    f"正在下载 {_get_pkg()}  {cur} {unit} / {tot} {unit}"
-                )
+            coalescer.push(parser.feed(raw))
         except Exception:
             # 解析异常不能拖垮后台线程
             pass
-        else:
-            # 没抛异常就算一次"真实事件"，告诉心跳线程：刚有活干。
-            _mark_event()
 
     def _drain(stream, line_sink, byte_sink):
         """按行把 stream 抽干：line_sink 收解码后的行（stdout 用），
         byte_sink 收原始字节（stderr 用，保持 CompletedProcess.stderr
-        原始内容）；每解析出一行就调一次 _handle_line 推 UI。"""
+        原始内容）；每解析出一行就调一次 _handle_line。"""
         buf = b""
         try:
             while True:
@@ -387,31 +474,28 @@ def _run_pip_streaming(cmd, logger, on_progress):
     stderr_thread.start()
 
     # 心跳线程：pip 在解析依赖/排队下载阶段可能 5~30s 都不打任何 stdout/stderr，
-    # 不打任何东西 UI 就一直卡在"开始安装…"。每 5s 看一下距上次"真实行"
+    # 不打任何东西 UI 就一直卡在"开始安装…"。每 5s 看一下距上次输出
     # 多久了，超过 5s 就推一条"正在解析/下载中…（已等待 Ns）"覆盖 UI，
-    # 让用户知道 pip 还在跑。pip 一打新行就由 on_progress 立刻覆盖。
+    # 让用户知道 pip 还在跑。pip 一打新行就会被新事件覆盖。
     heartbeat_start = time.monotonic()
     heartbeat_stop = threading.Event()
 
     def _heartbeat():
+        wait_for = 5.0
         while not heartbeat_stop.is_set():
-            # 5s 检查一次；用 Event.wait 让 stop 立刻响应
-            if heartbeat_stop.wait(5.0):
+            # 用 Event.wait 让 stop 立刻响应
+            if heartbeat_stop.wait(wait_for):
                 break
             with last_event_lock:
                 since_last = time.monotonic() - last_event_at["t"]
-            # 5s 内有真实行 → 不打扰 pip 的进度显示
+            # 5s 内有真实行 → 不打扰 pip 的进度显示；下一次正好在
+            # “最后一行之后 5s”检查，而不是固定 5s 网格（否则可能晚到 10s）
             if since_last < 5.0:
+                wait_for = max(0.05, 5.0 - since_last)
                 continue
+            wait_for = 5.0
             elapsed = int(time.monotonic() - heartbeat_start)
-            try:
-                on_progress(
-                    f"正在解析依赖/下载中…（已等待 {elapsed}s，"
-                    f"如长时间停留请检查网络）"
-                )
-            except Exception:
-                # on_progress 自身出问题不能拖垮后台线程
-                pass
+            coalescer.push(PIPPROGRESS.heartbeat_event(elapsed))
 
     heartbeat_thread = threading.Thread(target=_heartbeat, daemon=True)
     heartbeat_thread.start()
@@ -420,16 +504,23 @@ def _run_pip_streaming(cmd, logger, on_progress):
     try:
         _drain(proc.stdout, stdout_lines, None)
     finally:
-        # 退出前一定要停心跳，否则它会一直打 on_progress
+        # 退出前一定要停心跳，否则它会一直推事件
         heartbeat_stop.set()
         heartbeat_thread.join(timeout=2)
 
     proc.wait()
     stderr_thread.join(timeout=5)
+    # 补发合并器里最后一条进度，保证 UI 停在最新状态
+    coalescer.close()
     stderr_out = b"".join(stderr_parts).decode("utf-8", errors="ignore")
 
     if logger:
-        logger.info("pip 流式安装完成: rc=%d", proc.returncode)
+        logger.info(
+            "pip 流式安装完成: rc=%d（进度事件 投递 %d / 合并 %d）",
+            proc.returncode,
+            coalescer.delivered,
+            coalescer.dropped,
+        )
 
     return subprocess.CompletedProcess(
         args=cmd,
@@ -445,16 +536,21 @@ _MISSING_PKG_RE = _re_missing.compile(
     r"Could not find a version that satisfies the requirement\s+"
     r"([A-Za-z0-9_.\-]+\s*[><=!~]+\s*[A-Za-z0-9_.+\-]+)"
 )
+# uv: "Because there is no version of foo==9.9 and you require foo==9.9, ..."
+_UV_MISSING_PKG_RE = _re_missing.compile(
+    r"there is no version of\s+"
+    r"([A-Za-z0-9_.\-]+\s*[><=!~]+\s*[A-Za-z0-9_.+\-]*[A-Za-z0-9+])"
+)
 
 
 def _parse_missing_packages(stderr):
-    """Extract package specs that pip could not find a version for."""
+    """Extract package specs that pip (or uv) could not find a version for."""
     if not stderr:
         return []
     seen = set()
     out = []
     for line in stderr.splitlines():
-        m = _MISSING_PKG_RE.search(line)
+        m = _MISSING_PKG_RE.search(line) or _UV_MISSING_PKG_RE.search(line)
         if not m:
             continue
         spec = m.group(1).strip()
@@ -496,20 +592,17 @@ def _filter_requirements(req_path, missing):
         return req_path
     return filtered
 
-def _parse_requirements_file(req_path) -> List[str]:
-    """Extract package specs from a pip requirements file.
+def _parse_requirements_entries(req_path) -> List[tuple]:
+    """Like ``_parse_requirements_file`` but keeps the environment marker.
 
-    Skips empty lines, comments (lines starting with ``#`` and inline ``#``),
-    command-line options (``-r``, ``-e``, ``--index-url`` and friends), and
-    strips environment markers (``pkg ; python_version < "3.10"``). The
-    remaining non-empty lines are returned as package specs that can be fed
-    directly to ``pip install <spec>``.
+    Returns ``(spec, marker)`` tuples; ``marker`` is ``None`` when the line
+    has none (``pkg ; python_version < "3.10"`` -> ``("pkg", 'python_version < "3.10"')``).
     """
     try:
         text = Path(req_path).read_text(encoding="utf-8")
     except Exception:
         return []
-    specs: List[str] = []
+    entries: List[tuple] = []
     for raw in text.splitlines():
         # strip inline comments
         line = raw.split("#", 1)[0].strip() if "#" in raw else raw.strip()
@@ -518,12 +611,53 @@ def _parse_requirements_file(req_path) -> List[str]:
         # skip pip options and -r / -e includes
         if line.startswith("-"):
             continue
-        # strip environment markers
+        marker = None
         if ";" in line:
-            line = line.split(";", 1)[0].strip()
+            line, marker = (part.strip() for part in line.split(";", 1))
+            marker = marker or None
         if line:
-            specs.append(line)
-    return specs
+            entries.append((line, marker))
+    return entries
+
+
+def _parse_requirements_file(req_path) -> List[str]:
+    """Extract package specs from a pip requirements file.
+
+    Skips empty lines, comments (lines starting with ``#`` and inline ``#``),
+    command-line options (``-r``, ``-e``, ``--index-url`` and friends), and
+    strips environment markers (``pkg ; python_version < "3.10"``). The
+    remaining non-empty lines are returned as package specs that can be fed
+    directly to ``pip install <spec>``.
+    """
+    return [spec for spec, _marker in _parse_requirements_entries(req_path)]
+
+
+_REQ_SPECIFIER_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9_.\-]*)\s*(\(?[<>=!~].*?\)?)?\s*$")
+
+
+def _locally_satisfied_version(spec: str, python_exec: Union[str, Path]) -> Optional[str]:
+    """Return the installed version when it already satisfies ``spec``.
+
+    Uses only the in-process installed-distribution index and the PEP 440
+    evaluator, so it never spawns a process. Anything it cannot decide
+    (unknown interpreter layout, extras, URL specs, unparsable versions)
+    returns ``None`` and is left to pip.
+    """
+    m = _REQ_SPECIFIER_RE.match((spec or "").split(";", 1)[0])
+    if not m:
+        return None
+    name = m.group(1)
+    spec_text = (m.group(2) or "").strip().strip("()")
+    known, installed = PIPINDEX.lookup_version(name, python_exec)
+    if not known or not installed:
+        return None
+    try:
+        version = PEP440.Version(installed)
+        if PEP440.SpecifierSet(spec_text).contains(version, prereleases=True):
+            return installed
+    except ValueError:
+        return None
+    return None
 
 
 def _split_name_version(spec: str):
@@ -532,12 +666,13 @@ def _split_name_version(spec: str):
     For ``comfyui-frontend-package==1.45.15`` returns
     ``("comfyui-frontend-package", "1.45.15")``; for ``torch>=2.0`` returns
     ``("torch", ">=2.0")``; for ``requests`` returns ``("requests", "")``.
+    An environment marker (``pkg ; extra == "x"``) is ignored.
     """
     import re as _re_split
 
     m = _re_split.match(
         r"^\s*([A-Za-z0-9_.\-]+)\s*([><=!~].*)?\s*$",
-        spec,
+        spec.split(";", 1)[0],
     )
     if not m:
         return spec, ""
@@ -596,43 +731,29 @@ def _retry_install_remaining(
         "\u8df3\u8fc7\u955c\u50cf\u5c1a\u672a\u540c\u6b65\u7684\u5305\uff0c\u5b89\u88c5\u5176\u4f59\u4f9d\u8d56: %s",
         ", ".join(missing),
     )
-    if on_progress:
-        retry_result = _run_pip_streaming(retry_cmd, logger, on_progress)
-    else:
-        retry_result = run_hidden(retry_cmd, capture_output=True, text=True)
+    retry_result, report = _run_pip_report(
+        retry_cmd,
+        logger,
+        on_progress,
+        fallback_without_report=True,
+        report=INSTALLER.get_backend().supports_report,
+    )
+    # 这里拿不到 python_exec，清空全部索引
+    PIPINDEX.invalidate()
     if retry_result.returncode == 0:
         out["success"] = True
         out["partial"] = True
         out["updated"] = True
         out["up_to_date"] = False
         retry_stdout = getattr(retry_result, "stdout", "") or ""
-        try:
-            import re as _re_retry
-            for line in retry_stdout.splitlines():
-                if "Successfully installed" in line:
-                    tail = line.split("Successfully installed", 1)[1].strip()
-                    for t in tail.split():
-                        m = _re_retry.match(
-                            r"^([A-Za-z0-9_.\-]+)-([0-9][A-Za-z0-9_.+\-]*)$",
-                            t,
-                        )
-                        if m:
-                            out["installed"].append(f"{m.group(1)}-{m.group(2)}")
-                        else:
-                            out["installed"].append(t)
-                elif "Requirement already satisfied" in line:
-                    m = _re_retry.search(
-                        r"Requirement already satisfied:\s*"
-                        r"([A-Za-z0-9_.\-]+).*?"
-                        r"\(.*?version\s+([A-Za-z0-9_.+\-]+)",
-                        line,
-                    )
-                    if m:
-                        out["satisfied"].append(
-                            f"{m.group(1)}-{m.group(2)}"
-                        )
-        except Exception:
-            pass
+        if isinstance(report, dict):
+            out["installed"] = _installed_from_report(report)
+        else:
+            out["installed"] = _installed_from_stdout(
+                retry_stdout + "\n" + (getattr(retry_result, "stderr", "") or "")
+            )
+        # 报告只列出要安装的项，已满足的仍从 stdout 里取
+        out["satisfied"] = _satisfied_from_stdout(retry_stdout)
         logger.info(
             "\u90e8\u5206\u4f9d\u8d56\u5b8c\u6210\u5b89\u88c5\uff08\u8df3\u8fc7\u7684\u5305: %s\uff09",
             ", ".join(missing),
@@ -648,6 +769,564 @@ def _retry_install_remaining(
 
 
 
+def _run_pip_report(
+    cmd, logger, on_progress=None, fallback_without_report=False, report=True
+):
+    """运行带 ``--report <tmp>`` 的 pip 命令，返回 ``(CompletedProcess, report_dict|None)``。
+
+    报告写到临时文件而不是 stdout，避免和 pip 的普通输出/进度条混在一起。
+    ``fallback_without_report=True`` 时，旧版 pip（< 22.2）不认 ``--report``
+    会去掉该参数重跑一次，报告为 None，由调用方退回解析 stdout。
+    ``report=False``（后端不支持 ``--report``，如 uv）时直接运行，报告为 None。
+    """
+    import json
+    import tempfile
+
+    if not report:
+        if on_progress is not None:
+            return _run_pip_streaming(list(cmd), logger, on_progress), None
+        return run_hidden(list(cmd), capture_output=True, text=True), None
+
+    fd, report_path = tempfile.mkstemp(prefix="pip-report-", suffix=".json")
+    os.close(fd)
+    try:
+        full_cmd = list(cmd) + ["--report", report_path]
+        if on_progress is not None:
+            proc = _run_pip_streaming(full_cmd, logger, on_progress)
+        else:
+            proc = run_hidden(full_cmd, capture_output=True, text=True)
+        data = None
+        if proc.returncode == 0:
+            try:
+                if os.path.getsize(report_path) > 0:
+                    with open(report_path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+            except Exception as e:
+                if logger:
+                    logger.warning("读取 pip report 失败: %s", e)
+        elif fallback_without_report and "--report" in (
+            getattr(proc, "stderr", "") or ""
+        ) and "no such option" in (getattr(proc, "stderr", "") or ""):
+            if logger:
+                logger.info("当前 pip 不支持 --report，改为解析输出")
+            if on_progress is not None:
+                proc = _run_pip_streaming(list(cmd), logger, on_progress)
+            else:
+                proc = run_hidden(list(cmd), capture_output=True, text=True)
+        return proc, data
+    finally:
+        try:
+            os.unlink(report_path)
+        except Exception:
+            pass
+
+
+def _installed_from_report(report) -> List[str]:
+    """pip report 里实际安装的分发包，``["name-version", ...]``。"""
+    out: List[str] = []
+    for item in (report or {}).get("install") or []:
+        meta = item.get("metadata") or {}
+        name, version = meta.get("name"), meta.get("version")
+        if name and version:
+            out.append(f"{name}-{version}")
+        elif name:
+            out.append(name)
+    return out
+
+
+_INSTALLED_TOKEN_RE = re.compile(r"^([A-Za-z0-9_.\-]+)-([0-9][A-Za-z0-9_.+\-]*)$")
+# uv pip install 的变更行：`` + name==1.0``（`` - `` 是被替换掉的旧版本）
+_UV_INSTALLED_RE = re.compile(r"^\s*\+\s*([A-Za-z0-9_.\-]+)==(\S+)")
+_SATISFIED_RE = re.compile(
+    r"Requirement already satisfied:\s*"
+    r"([A-Za-z0-9_.\-]+).*?"
+    r"\(.*?version\s+([A-Za-z0-9_.+\-]+)"
+)
+
+
+def _installed_from_stdout(stdout: str) -> List[str]:
+    """退路：从 ``Successfully installed a-1.0 b-2.0``（uv 为 `` + a==1.0``）行里取已安装项。"""
+    out: List[str] = []
+    try:
+        for line in (stdout or "").splitlines():
+            um = _UV_INSTALLED_RE.match(line)
+            if um:
+                token = f"{um.group(1)}-{um.group(2)}"
+                if token not in out:
+                    out.append(token)
+                continue
+            if "Successfully installed" not in line:
+                continue
+            tail = line.split("Successfully installed", 1)[1].strip()
+            for t in tail.split():
+                m = _INSTALLED_TOKEN_RE.match(t)
+                out.append(f"{m.group(1)}-{m.group(2)}" if m else t)
+    except Exception:
+        pass
+    return out
+
+
+def _satisfied_from_stdout(stdout: str) -> List[str]:
+    out: List[str] = []
+    try:
+        for line in (stdout or "").splitlines():
+            if "Requirement already satisfied" not in line:
+                continue
+            m = _SATISFIED_RE.search(line)
+            if m:
+                out.append(f"{m.group(1)}-{m.group(2)}")
+    except Exception:
+        pass
+    return out
+
+
+def _requirement_name(spec: str) -> str:
+    """spec 里的包名（去掉 extras / 版本 / ``@ url``）。"""
+    name = _split_name_version(spec or "")[0]
+    return re.split(r"[\s\[@;><=!~]", name.strip(), 1)[0]
+
+
+def _requirement_key(spec: str) -> str:
+    """spec 的规范化包名，用于和 pip 报告 / 已安装索引对齐。"""
+    return PIPINDEX.canonicalize_name(_requirement_name(spec))
+
+
+def _spec_for_report_item(item, specs_by_name) -> Optional[str]:
+    """把 pip report 里的一条 install 项转成可直接安装的精确 spec。"""
+    meta = item.get("metadata") or {}
+    name = meta.get("name")
+    version = meta.get("version")
+    if not name:
+        return None
+    if item.get("is_direct"):
+        # 直接 URL / VCS 依赖：不能按 name==version 去索引里找，沿用原 spec
+        orig = specs_by_name.get(PIPINDEX.canonicalize_name(name))
+        if orig:
+            return orig
+        url = (item.get("download_info") or {}).get("url")
+        return f"{name} @ {url}" if url else None
+    if not version:
+        return None
+    return f"{name}=={version}"
+
+
+def _frozen_constraints_file(frozen_names, python_exec: Union[str, Path]) -> Optional[str]:
+    """把已安装的黑名单包钉在当前版本的 pip 约束文件（``-c``）；没有可钉的包时为 None。
+
+    调用方用完后负责删除。
+    """
+    pins = []
+    for name in sorted(frozen_names):
+        known, ver = PIPINDEX.lookup_version(name, python_exec)
+        if known and ver:
+            pins.append(f"{name}=={ver}")
+    if not pins:
+        return None
+    fd, path = tempfile.mkstemp(prefix="frozen-", suffix=".txt")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write("\n".join(pins) + "\n")
+    return path
+
+
+def _plan_requirements(
+    specs: List[str],
+    python_exec: Union[str, Path],
+    index_url: Optional[str],
+    upgrade: bool,
+    logger: logging.Logger,
+    constraints: Optional[str] = None,
+) -> Dict[str, Any]:
+    """对全部 spec 做一次 ``pip install --dry-run --report`` 解析。
+
+    返回 ``{"ok", "install", "missing", "stderr"}``：``install`` 是 pip 报告里
+    需要安装/变更的条目（已满足的不会出现），``missing`` 是镜像找不到版本
+    而被剔除的原始 spec。镜像缺包时剔除后再解析一次；仍失败则 ``ok=False``，
+    由调用方退回逐个安装。``constraints`` 是传给 pip ``-c`` 的约束文件。
+    """
+    out: Dict[str, Any] = {"ok": False, "install": [], "missing": [], "stderr": ""}
+    remaining = list(specs)
+    for _attempt in range(2):
+        if not remaining:
+            out["ok"] = True
+            return out
+        cmd = _install_command(python_exec) + ["--dry-run", "--quiet"]
+        if upgrade:
+            cmd.append("-U")
+        cmd.extend(remaining)
+        if constraints:
+            cmd.extend(["-c", constraints])
+        if index_url:
+            cmd.extend(["-i", index_url])
+        cmd.extend(_cache_args(python_exec))
+        logger.info("依赖解析（一次性，共 %d 项）: %s", len(remaining), " ".join(cmd))
+        proc, report = _run_pip_report(cmd, logger)
+        if proc.returncode == 0 and isinstance(report, dict):
+            out["ok"] = True
+            out["install"] = list(report.get("install") or [])
+            return out
+        stderr = getattr(proc, "stderr", "") or ""
+        out["stderr"] = stderr
+        missing_names = {
+            _requirement_key(m)
+            for m in _parse_missing_packages(stderr)
+        }
+        if not missing_names:
+            break
+        still = []
+        for spec in remaining:
+            if _requirement_key(spec) in missing_names:
+                out["missing"].append(spec)
+            else:
+                still.append(spec)
+        if len(still) == len(remaining):
+            break
+        remaining = still
+    return out
+
+
+def _prefetch_delta(items, python_exec, index_url, cache, workers, logger, progress):
+    """并发预取差量分发包，返回 ``(暂存目录|None, 是否可离线安装)``。
+
+    共享 wheelhouse 里已有的 wheel 不再下载；直接 URL / VCS 依赖、sdist
+    或任一下载失败时都不能离线安装（sdist 构建还要从索引取构建依赖）。
+    """
+    import tempfile
+
+    todo = []
+    for item in items:
+        meta = item.get("metadata") or {}
+        if cache is not None and cache.find_wheel(
+            meta.get("name") or "", meta.get("version") or ""
+        ):
+            continue
+        todo.append(item)
+    if not todo:
+        return None, True
+    staging_parent = None
+    if cache is not None and cache.ensure_dirs():
+        # 与 wheelhouse 同盘，收进缓存时可以硬链接
+        staging_parent = cache.root / "staging"
+        try:
+            staging_parent.mkdir(parents=True, exist_ok=True)
+        except Exception:
+            staging_parent = None
+    try:
+        staging = Path(
+            tempfile.mkdtemp(
+                prefix="prefetch-", dir=str(staging_parent) if staging_parent else None
+            )
+        )
+    except Exception as e:
+        logger.warning("创建预取暂存目录失败，跳过预取: %s", e)
+        return None, False
+    progress(f"并发预取 {len(todo)} 个分发包…", 0)
+    try:
+        fetched = PIPPREFETCH.prefetch(
+            todo,
+            staging,
+            _pip_command(python_exec),
+            index_url=index_url,
+            max_workers=workers,
+            on_progress=progress,
+        )
+    except Exception as e:
+        logger.warning("预取失败，改为联网安装: %s", e)
+        return staging, False
+    complete = not fetched["failed"] and not fetched["skipped"]
+    if complete:
+        complete = all(
+            str(p).lower().endswith(".whl") for p in fetched["files"].values()
+        )
+    logger.info(
+        "预取完成：%d 个成功，%d 个失败，%d 个交给 pip 处理",
+        len(fetched["files"]),
+        len(fetched["failed"]),
+        len(fetched["skipped"]),
+    )
+    return staging, complete
+
+
+def _install_requirements_planned(
+    specs: List[str],
+    python_exec: Union[str, Path],
+    index_url: Optional[str],
+    upgrade: bool,
+    logger: logging.Logger,
+    on_progress,
+    frozen_names: set,
+    prefetch: bool = False,
+    prefetch_workers: int = PIPPREFETCH.DEFAULT_WORKERS,
+) -> Optional[Dict[str, Any]]:
+    """规划模式：一次解析 + 只装差量 + 一次 pip 安装。
+
+    ``prefetch=True`` 时，差量里共享缓存没有的分发包先并发下载到暂存目录，
+    安装阶段再带 ``--no-index --find-links <暂存目录>`` 离线完成。
+
+    返回 ``{"installed", "satisfied", "missing", "frozen", "fallback"}``，
+    ``fallback`` 是批量失败、需要退回逐个安装的 spec；解析本身不可用
+    （旧版 pip 不支持 ``--dry-run``/``--report`` 等）时返回 None。
+    """
+    def _progress(text, percent=None):
+        if on_progress is None:
+            return
+        try:
+            on_progress(text, percent)
+        except Exception:
+            pass
+
+    _progress(f"正在解析依赖（共 {len(specs)} 项，一次性解析）…", None)
+    # 黑名单包（torch 等）钉在已安装版本上解析：差量用 --no-deps 安装，
+    # 不能让依赖它们的包装上、它们自己却被跳过
+    constraints = _frozen_constraints_file(frozen_names, python_exec)
+    try:
+        plan = _plan_requirements(
+            specs, python_exec, index_url, upgrade, logger, constraints=constraints
+        )
+    finally:
+        if constraints:
+            try:
+                os.unlink(constraints)
+            except Exception:
+                pass
+    if not plan["ok"]:
+        logger.warning(
+            "一次性依赖解析失败，退回逐个安装: %s",
+            (plan.get("stderr") or "").strip()[:200],
+        )
+        return None
+    touched = [
+        (item.get("metadata") or {})
+        for item in plan["install"]
+        if PIPINDEX.canonicalize_name((item.get("metadata") or {}).get("name") or "") in frozen_names
+    ]
+    if touched:
+        # 只可能是未安装、无法钉版本的黑名单包：跳过它而用 --no-deps 装其余的
+        # 会留下依赖缺失的环境，交给逐个安装
+        logger.warning(
+            "依赖解析要求变更黑名单包 %s，退回逐个安装",
+            ", ".join(f"{m.get('name')}=={m.get('version')}" for m in touched),
+        )
+        return None
+
+    out: Dict[str, Any] = {
+        "installed": [],
+        "satisfied": [],
+        "missing": list(plan["missing"]),
+        "frozen": [],
+        "fallback": [],
+    }
+    missing_set = set(out["missing"])
+    specs_by_name: Dict[str, str] = {}
+    for spec in specs:
+        if spec in missing_set:
+            continue
+        specs_by_name.setdefault(_requirement_key(spec), spec)
+
+    delta: Dict[str, str] = {}
+    delta_items: List[Dict[str, Any]] = []
+    for item in plan["install"]:
+        meta = item.get("metadata") or {}
+        cname = PIPINDEX.canonicalize_name(meta.get("name") or "")
+        if not cname:
+            continue
+        pin = _spec_for_report_item(item, specs_by_name)
+        if pin:
+            delta[cname] = pin
+            delta_items.append(item)
+
+    installed_versions = PIPINDEX.installed_versions(python_exec) or {}
+    for cname, spec in specs_by_name.items():
+        if cname in delta:
+            continue
+        ver = installed_versions.get(cname) or ""
+        name = _requirement_name(spec)
+        out["satisfied"].append(f"{name}-{ver}" if ver else name)
+
+    if not delta:
+        logger.info("依赖解析完成：全部 %d 项已满足，无需安装", len(specs_by_name))
+        return out
+
+    logger.info(
+        "依赖解析完成：需安装 %d 个分发包（%s）",
+        len(delta),
+        ", ".join(delta.values()),
+    )
+    def _run_install(cmd):
+        logger.info("执行 pip 批量安装: %s", " ".join(cmd))
+        if on_progress is not None:
+            proc = _run_pip_streaming(
+                cmd, logger, lambda text, percent=None: _progress(text, percent)
+            )
+        else:
+            proc = run_hidden(cmd, capture_output=True, text=True)
+        PIPINDEX.invalidate(python_exec)
+        _after_pip_install(proc)
+        return proc
+
+    base_cmd = _install_command(python_exec) + ["--no-deps"]
+    base_cmd.extend(delta.values())
+    proc = None
+    staging: Optional[Path] = None
+    staged_links: List[str] = []
+    cache = WHEELCACHE.get_cache()
+    try:
+        if cache is not None and cache.covers(delta.values()):
+            # 全部 pin 都能在共享 wheelhouse 里找到：先离线装，不碰索引
+            _progress("共享缓存已有全部 wheel，离线安装…", None)
+            proc = _run_install(base_cmd + ["--no-index"] + _cache_args(python_exec))
+            if proc.returncode != 0:
+                logger.info("离线安装失败（可能是平台标签不匹配），改为联网安装")
+                proc = None
+        elif prefetch:
+            staging, complete = _prefetch_delta(
+                delta_items, python_exec, index_url, cache, prefetch_workers, logger, _progress
+            )
+            if staging is not None:
+                staged_links = ["--find-links", str(staging)]
+            if complete:
+                _progress("预取完成，离线安装…", None)
+                proc = _run_install(
+                    base_cmd + ["--no-index"] + staged_links + _cache_args(python_exec)
+                )
+                if proc.returncode != 0:
+                    logger.info("离线安装失败，改为联网安装")
+                    proc = None
+        if proc is None:
+            cmd = list(base_cmd)
+            if index_url:
+                cmd.extend(["-i", index_url])
+            # 预取不完整时，已下载的部分仍通过 --find-links 提供给 pip
+            cmd.extend(staged_links)
+            cmd.extend(_cache_args(python_exec))
+            proc = _run_install(cmd)
+        if proc.returncode == 0 and staging is not None and cache is not None:
+            # 预取到的 wheel 收进共享 wheelhouse，下次同版本直接离线装
+            try:
+                if cache.add_wheels(p for p in staging.iterdir() if p.suffix == ".whl"):
+                    # 按上限淘汰；在依赖同步的 batch() 内会推迟到同步结束
+                    cache.after_install()
+            except Exception:
+                pass
+    finally:
+        if staging is not None:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    if proc.returncode != 0:
+        # 批量装失败：只把计划内需要变更的请求项交给逐个安装去隔离问题
+        stderr = getattr(proc, "stderr", "") or ""
+        logger.warning("批量安装失败，退回逐个安装: %s", stderr.strip()[:200])
+        out["fallback"] = [s for n, s in specs_by_name.items() if n in delta]
+        return out
+
+    for cname, spec in specs_by_name.items():
+        if cname not in delta:
+            continue
+        name = _requirement_name(spec)
+        ver = None
+        for item in plan["install"]:
+            meta = item.get("metadata") or {}
+            if PIPINDEX.canonicalize_name(meta.get("name") or "") == cname:
+                ver = meta.get("version")
+                break
+        out["installed"].append(f"{name}-{ver}" if ver else name)
+    return out
+
+
+def _install_requirements_oneshot(
+    specs: List[str],
+    python_exec: Union[str, Path],
+    index_url: Optional[str],
+    upgrade: bool,
+    logger: logging.Logger,
+    on_progress,
+    frozen_names: set,
+) -> Dict[str, Any]:
+    """不支持 ``--report`` 的后端（uv）：解析与安装在一次调用里完成。
+
+    黑名单包以当前已安装版本写成约束文件（``-c``），解析不会顺带升级
+    torch 等；镜像缺包时剔除后重试一次。返回值与规划模式相同，批量失败的
+    spec 放进 ``fallback`` 交给逐个安装。
+    """
+    import tempfile
+
+    out: Dict[str, Any] = {
+        "installed": [],
+        "satisfied": [],
+        "missing": [],
+        "frozen": [],
+        "fallback": [],
+    }
+    constraints = _frozen_constraints_file(frozen_names, python_exec)
+
+    remaining = list(specs)
+    proc = None
+    try:
+        for _attempt in range(2):
+            cmd = _install_command(python_exec)
+            if upgrade:
+                cmd.append("-U")
+            cmd.extend(remaining)
+            if constraints:
+                cmd.extend(["-c", constraints])
+            if index_url:
+                cmd.extend(["-i", index_url])
+            cmd.extend(_cache_args(python_exec))
+            if on_progress is not None:
+                try:
+                    on_progress(f"正在解析并安装依赖（共 {len(remaining)} 项）…", None)
+                except Exception:
+                    pass
+            logger.info("依赖一次性安装（%d 项）: %s", len(remaining), " ".join(cmd))
+            if on_progress is not None:
+                proc = _run_pip_streaming(cmd, logger, on_progress)
+            else:
+                proc = run_hidden(cmd, capture_output=True, text=True)
+            PIPINDEX.invalidate(python_exec)
+            _after_pip_install(proc)
+            if proc.returncode == 0:
+                break
+            missing_keys = {
+                _requirement_key(m)
+                for m in _parse_missing_packages(getattr(proc, "stderr", "") or "")
+            }
+            still = [sp for sp in remaining if _requirement_key(sp) not in missing_keys]
+            if not missing_keys or len(still) == len(remaining):
+                break
+            out["missing"].extend(sp for sp in remaining if _requirement_key(sp) in missing_keys)
+            remaining = still
+            if not remaining:
+                return out
+    finally:
+        if constraints:
+            try:
+                os.unlink(constraints)
+            except Exception:
+                pass
+
+    if proc is None or proc.returncode != 0:
+        stderr = getattr(proc, "stderr", "") or ""
+        logger.warning("一次性安装失败，退回逐个安装: %s", stderr.strip()[:200])
+        out["fallback"] = remaining
+        return out
+
+    text = (getattr(proc, "stdout", "") or "") + "\n" + (getattr(proc, "stderr", "") or "")
+    changed: Dict[str, str] = {}
+    for token in _installed_from_stdout(text):
+        m = _INSTALLED_TOKEN_RE.match(token)
+        if m:
+            changed[PIPINDEX.canonicalize_name(m.group(1))] = m.group(2)
+    for spec in remaining:
+        key = _requirement_key(spec)
+        name = _requirement_name(spec)
+        if key in changed:
+            out["installed"].append(f"{name}-{changed[key]}")
+            continue
+        _known, ver = PIPINDEX.lookup_version(name, python_exec)
+        out["satisfied"].append(f"{name}-{ver}" if ver else name)
+    return out
+
+
+
 def install_requirements_file(
     requirements_file: Union[str, Path],
     python_exec: Union[str, Path],
@@ -656,6 +1335,9 @@ def install_requirements_file(
     logger: Optional[logging.Logger] = None,
     on_progress=None,
     ignore_pkgs: Optional[Iterable[str]] = None,
+    plan: bool = False,
+    prefetch: bool = False,
+    prefetch_workers: int = PIPPREFETCH.DEFAULT_WORKERS,
 ) -> Dict[str, Any]:
     """Install each package in the requirements file individually.
 
@@ -665,6 +1347,22 @@ def install_requirements_file(
     package, then aggregate the per-package results. One failure does not
     block the others.
 
+    With ``plan=True`` all active specs first go through a single
+    ``pip install --dry-run --report`` resolver pass; only the resulting
+    delta is installed, in one ``pip install --no-deps`` run. Specs that
+    fail the batch (and everything, when the resolver itself is not
+    usable) fall back to the per-package path above.
+
+    ``prefetch=True`` implies the planned path and additionally downloads
+    the delta concurrently (at most ``prefetch_workers`` at a time) into a
+    staging directory before installing; when every distribution was
+    fetched as a wheel the install itself runs with ``--no-index``.
+
+    With the ``uv`` installer backend (``utils.installer_backend``) there is
+    no ``--report``; the planned path becomes a single ``uv pip install`` of
+    all active specs, with frozen packages pinned through a constraints
+    file. The result dict has the same shape either way.
+
     ``ignore_pkgs`` is an optional iterable of package names (case-insensitive)
     that should be left untouched — e.g. ``{"torch", "numpy"}``.  Frozen
     specs are not pip-installed and do not appear in installed/satisfied/
@@ -688,6 +1386,36 @@ def install_requirements_file(
             "frozen": [{"name": ..., "spec": ...}, ...],  # 黑名单跳过
         }
     """
+    # 逐个安装时每次 pip 调用都会触发缓存维护（遍历整个缓存目录）：
+    # 合并到同步结束时做一次
+    with WHEELCACHE.batch():
+        return _install_requirements_file(
+            requirements_file,
+            python_exec,
+            index_url=index_url,
+            upgrade=upgrade,
+            logger=logger,
+            on_progress=on_progress,
+            ignore_pkgs=ignore_pkgs,
+            plan=plan,
+            prefetch=prefetch,
+            prefetch_workers=prefetch_workers,
+        )
+
+
+def _install_requirements_file(
+    requirements_file: Union[str, Path],
+    python_exec: Union[str, Path],
+    index_url: Optional[str] = None,
+    upgrade: bool = False,
+    logger: Optional[logging.Logger] = None,
+    on_progress=None,
+    ignore_pkgs: Optional[Iterable[str]] = None,
+    plan: bool = False,
+    prefetch: bool = False,
+    prefetch_workers: int = PIPPREFETCH.DEFAULT_WORKERS,
+) -> Dict[str, Any]:
+    """``install_requirements_file`` 的实现（在共享缓存的 ``batch()`` 内运行）。"""
     if logger is None:
         logger = logging.getLogger(__name__)
     result: Dict[str, Any] = {
@@ -718,7 +1446,33 @@ def install_requirements_file(
             logger.error(result["error"])
             return result
 
-        specs = _parse_requirements_file(req_path)
+        entries = _parse_requirements_entries(req_path)
+        if not entries:
+            result["up_to_date"] = True
+            result["success"] = True
+            return result
+
+        # 环境标记：在启动器进程内按目标解释器求值。明确不适用（False）的
+        # 行 pip 也不会装，直接丢掉；适用（True）的去掉标记；求不出来（None）
+        # 的把标记原样带在 spec 上，交给 pip 判断。
+        specs: List[str] = []
+        marker_env = None
+        for spec, marker in entries:
+            if marker:
+                if marker_env is None:
+                    marker_env = PEP440.target_environment(
+                        PIPINDEX.guess_python_version(python_exec)
+                    )
+                verdict = PEP440.evaluate_marker(marker, marker_env)
+                if verdict is False:
+                    try:
+                        logger.info("环境标记不适用，跳过: %s ; %s", spec, marker)
+                    except Exception:
+                        pass
+                    continue
+                if verdict is None:
+                    spec = f"{spec} ; {marker}"
+            specs.append(spec)
         if not specs:
             result["up_to_date"] = True
             result["success"] = True
@@ -749,14 +1503,74 @@ def install_requirements_file(
             result["success"] = True
             return result
 
-        logger.info(
-            "开始逐个安装 requirements: %s（共 %d 项，跳过 %d 项）",
-            req_path.name,
-            len(active_specs),
-            skipped,
-        )
+        # 本地满足检查：带版本约束的 spec（==、>=、~= 等）若已安装版本满足，
+        # 直接记为 satisfied，不启动 pip。upgrade=True 时要追新，不能跳过。
+        if not upgrade:
+            still_active: List[str] = []
+            for spec in active_specs:
+                name, _ver = _split_name_version(spec)
+                local_ver = _locally_satisfied_version(spec, python_exec) if _ver else None
+                if local_ver:
+                    result["satisfied"].append(f"{name}-{local_ver}")
+                else:
+                    still_active.append(spec)
+            locally_satisfied = len(active_specs) - len(still_active)
+            if locally_satisfied:
+                try:
+                    logger.info(
+                        "本地已满足版本约束，跳过 pip：%d 项", locally_satisfied
+                    )
+                except Exception:
+                    pass
+                if on_progress is not None:
+                    try:
+                        on_progress(f"本地检查：{locally_satisfied} 项依赖已满足", None)
+                    except Exception:
+                        pass
+            active_specs = still_active
 
         any_new_install = False
+        if (plan or prefetch) and active_specs:
+            if INSTALLER.get_backend(python_exec).supports_report:
+                planned = _install_requirements_planned(
+                    active_specs,
+                    python_exec,
+                    index_url,
+                    upgrade,
+                    logger,
+                    on_progress,
+                    frozen_names,
+                    prefetch=prefetch,
+                    prefetch_workers=prefetch_workers,
+                )
+            else:
+                # uv 自己并发下载、解析足够快，不需要 dry-run 规划与预取
+                planned = _install_requirements_oneshot(
+                    active_specs,
+                    python_exec,
+                    index_url,
+                    upgrade,
+                    logger,
+                    on_progress,
+                    frozen_names,
+                )
+            if planned is not None:
+                result["installed"].extend(planned["installed"])
+                result["satisfied"].extend(planned["satisfied"])
+                result["missing"].extend(planned["missing"])
+                result["frozen"].extend(planned["frozen"])
+                if planned["installed"]:
+                    any_new_install = True
+                active_specs = planned["fallback"]
+
+        if active_specs:
+            logger.info(
+                "开始逐个安装 requirements: %s（共 %d 项，跳过 %d 项）",
+                req_path.name,
+                len(active_specs),
+                skipped,
+            )
+
         total = len(active_specs)
         for idx, spec in enumerate(active_specs, start=1):
             name, _ver = _split_name_version(spec)
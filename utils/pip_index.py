@@ -0,0 +1,373 @@
+"""
+已安装分发包索引
+直接读取目标解释器 site-packages 下的 ``*.dist-info/METADATA``（以及旧式
+``*.egg-info``），在启动器进程内得到 ``{规范化包名: 版本}``，代替每次查询都
+起一个 ``python -m pip show`` 子进程。
+
+索引按 site-packages 目录的 mtime 做键：pip 安装/卸载会增删 dist-info 目录，
+目录 mtime 随之变化，下一次查询就会自动重建；pip 操作结束后调用方也会显式
+``invalidate``，以防文件系统 mtime 精度太粗（FAT 等）漏掉变化。
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_NAME_NORMALIZE_RE = re.compile(r"[-_.]+")
+
+# ``foo_bar-1.2.3.dist-info`` / ``foo_bar-1.2.3-py3.11.egg-info``
+_DIST_DIR_RE = re.compile(
+    r"^(?P<name>[A-Za-z0-9_.]+?)-(?P<version>[0-9][A-Za-z0-9_.!+]*?)"
+    r"(?:-py\d[\d.]*)?\.(?:dist-info|egg-info)$"
+)
+
+
+def canonicalize_name(name: str) -> str:
+    """PEP 503 规范化：大小写、``-``/``_``/``.`` 均视为等价。"""
+    return _NAME_NORMALIZE_RE.sub("-", (name or "").strip()).lower()
+
+
+def _read_metadata_headers(path: Path) -> Tuple[Optional[str], Optional[str]]:
+    """只读 METADATA/PKG-INFO 的头部（空行之前），取 Name 与 Version。"""
+    name = None
+    version = None
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                if not line.strip():
+                    break
+                if name is None and line.startswith("Name:"):
+                    name = line.split(":", 1)[1].strip()
+                elif version is None and line.startswith("Version:"):
+                    version = line.split(":", 1)[1].strip()
+                if name and version:
+                    break
+    except Exception:
+        pass
+    return name, version
+
+
+def _read_distribution(entry: Path) -> Tuple[Optional[str], Optional[str]]:
+    """解析一个 dist-info / egg-info 条目；元数据不可读时退回目录名。"""
+    if entry.is_dir():
+        meta = entry / ("METADATA" if entry.suffix == ".dist-info" else "PKG-INFO")
+    else:
+        # 旧式 egg-info 也可能是单个文件（内容即 PKG-INFO）
+        meta = entry
+    name, version = _read_metadata_headers(meta)
+    if name and version:
+        return name, version
+    m = _DIST_DIR_RE.match(entry.name)
+    if m:
+        return name or m.group("name"), version or m.group("version")
+    return name, version
+
+
+def _pth_dirs(exe_dir: Path) -> List[Path]:
+    """嵌入式 Python 用 ``python3xx._pth`` 声明 sys.path，逐行取出相对目录。"""
+    out: List[Path] = []
+    try:
+        pth_files = list(exe_dir.glob("*._pth"))
+    except Exception:
+        return out
+    for pth in pth_files:
+        try:
+            lines = pth.read_text(encoding="utf-8", errors="ignore").splitlines()
+        except Exception:
+            continue
+        for raw in lines:
+            line = raw.strip()
+            if not line or line.startswith("#") or line.startswith("import "):
+                continue
+            # zip 形式的标准库不会装第三方包
+            if line.lower().endswith(".zip"):
+                continue
+            out.append(exe_dir / line)
+    return out
+
+
+def _prefix_site_dirs(prefix: Path) -> List[Path]:
+    out: List[Path] = [prefix / "Lib" / "site-packages"]
+    for lib in ("lib", "lib64"):
+        try:
+            out.extend(sorted((prefix / lib).glob("python3*/site-packages")))
+            out.extend(sorted((prefix / lib).glob("python3*/dist-packages")))
+        except Exception:
+            pass
+    out.append(prefix / "lib" / "python3" / "dist-packages")
+    return out
+
+
+def find_site_packages(python_exec: Union[str, Path]) -> List[Path]:
+    """推断目标解释器的 site-packages 目录（不启动解释器）。
+
+    - 嵌入式 Python：``python_embeded/python.exe`` 旁的 ``._pth`` 与
+      ``Lib/site-packages``；
+    - venv / 常规安装：``<prefix>/Lib/site-packages`` 或
+      ``<prefix>/lib/python3.X/site-packages``。
+
+    venv 的 python 往往是指向系统解释器的符号链接，因此先按未解析的路径
+    找；只有找不到时才看符号链接目标，避免把系统 site-packages 当成 venv 的。
+    """
+    try:
+        exe = Path(os.path.abspath(str(python_exec)))
+    except Exception:
+        return []
+    if not exe.exists():
+        return []
+
+    def _collect(exe_path: Path) -> List[Path]:
+        exe_dir = exe_path.parent
+        candidates = _pth_dirs(exe_dir)
+        candidates.extend(_prefix_site_dirs(exe_dir))
+        candidates.extend(_prefix_site_dirs(exe_dir.parent))
+        found: List[Path] = []
+        seen = set()
+        for c in candidates:
+            try:
+                key = os.path.normcase(os.path.abspath(str(c)))
+                if key in seen or not c.is_dir():
+                    continue
+                seen.add(key)
+                found.append(c)
+            except Exception:
+                continue
+        return found
+
+    dirs = _collect(exe)
+    if not dirs:
+        try:
+            real = exe.resolve()
+            if real != exe:
+                dirs = _collect(real)
+        except Exception:
+            pass
+    return dirs
+
+
+_PY_TAG_RE = re.compile(r"^python(\d)(\d+)(?:\.dll|\._pth|\.zip)$", re.IGNORECASE)
+_LIB_PY_RE = re.compile(r"python(\d+)\.(\d+)", re.IGNORECASE)
+
+
+def guess_python_version(python_exec: Union[str, Path]) -> Optional[str]:
+    """不启动解释器，推断目标 Python 的 ``X.Y`` 版本。
+
+    依据（按优先级）：venv 的 ``pyvenv.cfg``、嵌入式发行版旁的
+    ``python3XX.dll`` / ``python3XX._pth`` / ``python3XX.zip``、以及
+    ``lib/python3.X/site-packages`` 目录名。推断不出时返回 None。
+    """
+    try:
+        exe = Path(os.path.abspath(str(python_exec)))
+        if not exe.exists():
+            return None
+        try:
+            if os.path.samefile(str(exe), sys.executable):
+                return "%d.%d" % sys.version_info[:2]
+        except Exception:
+            pass
+        for cfg in (exe.parent / "pyvenv.cfg", exe.parent.parent / "pyvenv.cfg"):
+            try:
+                if cfg.is_file():
+                    for line in cfg.read_text(encoding="utf-8", errors="ignore").splitlines():
+                        key, _, value = line.partition("=")
+                        if key.strip().lower() in ("version", "version_info"):
+                            m = re.match(r"\s*(\d+)\.(\d+)", value)
+                            if m:
+                                return f"{m.group(1)}.{m.group(2)}"
+            except Exception:
+                pass
+        try:
+            for entry in os.scandir(exe.parent):
+                m = _PY_TAG_RE.match(entry.name)
+                if m:
+                    return f"{m.group(1)}.{m.group(2)}"
+        except Exception:
+            pass
+        for d in find_site_packages(exe):
+            m = _LIB_PY_RE.search(str(d))
+            if m:
+                return f"{m.group(1)}.{m.group(2)}"
+    except Exception:
+        pass
+    return None
+
+
+def _scan_site_dir(site_dir: Path, out: Dict[str, str]) -> None:
+    try:
+        entries = list(os.scandir(site_dir))
+    except Exception:
+        return
+    for e in entries:
+        n = e.name
+        if not (n.endswith(".dist-info") or n.endswith(".egg-info")):
+            continue
+        name, version = _read_distribution(Path(e.path))
+        if not name or not version:
+            continue
+        # 与 Python 的 sys.path 顺序一致：先找到的优先
+        out.setdefault(canonicalize_name(name), version)
+
+
+class InstalledDistributionIndex:
+    """单个解释器的已安装包索引。
+
+    ``versions()`` 在 site-packages 目录 mtime 未变化时直接返回缓存的字典；
+    返回 ``None`` 表示无法定位 site-packages（调用方应退回 pip show）。
+    """
+
+    def __init__(self, python_exec: Union[str, Path]):
+        self.python_exec = str(python_exec)
+        self._lock = threading.Lock()
+        self._site_dirs: Optional[List[Path]] = None
+        self._signature: Optional[Tuple] = None
+        self._versions: Dict[str, str] = {}
+
+    def _compute_signature(self, dirs: List[Path]) -> Tuple:
+        sig = []
+        for d in dirs:
+            try:
+                sig.append((str(d), os.stat(d).st_mtime_ns))
+            except Exception:
+                sig.append((str(d), None))
+        return tuple(sig)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._site_dirs = None
+            self._signature = None
+            self._versions = {}
+
+    def versions(self) -> Optional[Dict[str, str]]:
+        with self._lock:
+            if self._site_dirs is None:
+                self._site_dirs = find_site_packages(self.python_exec)
+            if not self._site_dirs:
+                # 下次再试：解释器可能稍后才解压/安装好
+                self._site_dirs = None
+                return None
+            sig = self._compute_signature(self._site_dirs)
+            if sig != self._signature:
+                versions: Dict[str, str] = {}
+                for d in self._site_dirs:
+                    _scan_site_dir(d, versions)
+                self._versions = versions
+                self._signature = sig
+                try:
+                    logger.info(
+                        "已安装包索引重建: %s（%d 个分发包）",
+                        self.python_exec,
+                        len(versions),
+                    )
+                except Exception:
+                    pass
+            return self._versions
+
+    def lookup(self, package_name: str) -> Tuple[bool, Optional[str]]:
+        """返回 ``(known, version)``：``known`` 为 False 表示索引不可用。"""
+        versions = self.versions()
+        if versions is None:
+            return False, None
+        return True, versions.get(canonicalize_name(package_name))
+
+
+def direct_urls(python_exec: Union[str, Path]) -> Dict[str, dict]:
+    """直接 URL 安装的分发包：``{规范化名: direct_url.json 内容}``（PEP 610）。
+
+    VCS、本地路径、压缩包链接与可编辑安装都会在 dist-info 里留下
+    ``direct_url.json``；这些包在索引上找不到 ``name==version``。
+    """
+    out: Dict[str, dict] = {}
+    for site_dir in find_site_packages(python_exec):
+        try:
+            entries = list(os.scandir(site_dir))
+        except Exception:
+            continue
+        for e in entries:
+            if not e.name.endswith(".dist-info"):
+                continue
+            try:
+                with open(os.path.join(e.path, "direct_url.json"), "r", encoding="utf-8") as f:
+                    info = json.load(f)
+            except Exception:
+                continue
+            if not isinstance(info, dict) or not info.get("url"):
+                continue
+            name, _version = _read_distribution(Path(e.path))
+            if name:
+                out.setdefault(canonicalize_name(name), info)
+    return out
+
+
+_INDEXES: Dict[str, InstalledDistributionIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def _index_key(python_exec: Union[str, Path]) -> str:
+    try:
+        return os.path.normcase(os.path.abspath(str(python_exec)))
+    except Exception:
+        return str(python_exec)
+
+
+def get_index(python_exec: Union[str, Path]) -> InstalledDistributionIndex:
+    key = _index_key(python_exec)
+    with _INDEXES_LOCK:
+        idx = _INDEXES.get(key)
+        if idx is None:
+            idx = InstalledDistributionIndex(python_exec)
+            _INDEXES[key] = idx
+        return idx
+
+
+def installed_versions(python_exec: Union[str, Path]) -> Optional[Dict[str, str]]:
+    """目标解释器全部已安装包 ``{规范化名: 版本}``；定位不到 site-packages 时为 None。"""
+    try:
+        versions = get_index(python_exec).versions()
+    except Exception:
+        return None
+    return dict(versions) if versions is not None else None
+
+
+def lookup_version(
+    package_name: str, python_exec: Union[str, Path]
+) -> Tuple[bool, Optional[str]]:
+    try:
+        return get_index(python_exec).lookup(package_name)
+    except Exception:
+        return False, None
+
+
+_INVALIDATE_LISTENERS: List[Callable[[Union[str, Path, None]], None]] = []
+
+
+def add_invalidate_listener(fn: Callable[[Union[str, Path, None]], None]) -> None:
+    """注册环境变更回调（如常驻助手重启），``invalidate`` 时以同样参数调用。"""
+    if fn not in _INVALIDATE_LISTENERS:
+        _INVALIDATE_LISTENERS.append(fn)
+
+
+def invalidate(python_exec: Union[str, Path, None] = None) -> None:
+    """pip 操作后调用。``python_exec`` 为 None 时清空所有解释器的索引。"""
+    for fn in list(_INVALIDATE_LISTENERS):
+        try:
+            fn(python_exec)
+        except Exception:
+            pass
+    with _INDEXES_LOCK:
+        if python_exec is None:
+            targets = list(_INDEXES.values())
+        else:
+            idx = _INDEXES.get(_index_key(python_exec))
+            targets = [idx] if idx is not None else []
+    for idx in targets:
+        try:
+            idx.invalidate()
+        except Exception:
+            pass
@@ -0,0 +1,192 @@
+"""
+依赖预取
+安装必须串行（只有一个目标环境），下载却不必。依赖解析（``pip install
+--dry-run --report``）给出了每个待装分发包的确切下载链接和哈希，这里用
+有上限的线程池并发把它们下载到暂存目录，随后的安装阶段从暂存目录离线完成。
+
+镜像链路上慢的是每个包的往返延迟而不是带宽，并发下载能把 N 次往返叠在一起。
+进程内下载失败（例如代理只写在 pip.ini 里）的条目退回 ``pip download``，
+同样在线程池里并发执行。
+"""
+
+import concurrent.futures
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from utils.common import run_hidden
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 6
+_CHUNK = 1024 * 256
+
+
+def _item_url(item: Dict[str, Any]) -> Optional[str]:
+    info = item.get("download_info") or {}
+    url = info.get("url")
+    if not url or item.get("is_direct"):
+        # 直接 URL / VCS 依赖由 pip 自己处理
+        return None
+    if "vcs_info" in info or "dir_info" in info:
+        return None
+    return url
+
+
+def _item_sha256(item: Dict[str, Any]) -> Optional[str]:
+    archive = (item.get("download_info") or {}).get("archive_info") or {}
+    hashes = archive.get("hashes") or {}
+    if hashes.get("sha256"):
+        return hashes["sha256"].lower()
+    h = archive.get("hash") or ""
+    if h.startswith("sha256="):
+        return h.split("=", 1)[1].lower()
+    return None
+
+
+def _filename_from_url(url: str) -> str:
+    path = urllib.parse.urlparse(url).path
+    return urllib.parse.unquote(path.rsplit("/", 1)[-1])
+
+
+def _download_url(url: str, dest: Path, sha256: Optional[str], timeout: float) -> Path:
+    if dest.exists() and sha256:
+        try:
+            with open(dest, "rb") as f:
+                if hashlib.sha256(f.read()).hexdigest() == sha256:
+                    return dest
+        except Exception:
+            pass
+    tmp = dest.with_name(dest.name + f".{threading.get_ident()}.part")
+    digest = hashlib.sha256()
+    req = urllib.request.Request(url, headers={"User-Agent": "ComfyUI-Mie-Launcher"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp, open(tmp, "wb") as f:
+            while True:
+                chunk = resp.read(_CHUNK)
+                if not chunk:
+                    break
+                f.write(chunk)
+                digest.update(chunk)
+        if sha256 and digest.hexdigest() != sha256:
+            raise ValueError(f"sha256 不匹配: {dest.name}")
+        os.replace(tmp, dest)
+        return dest
+    finally:
+        try:
+            if tmp.exists():
+                tmp.unlink()
+        except Exception:
+            pass
+
+
+def _pip_download(
+    pip_cmd: List[str],
+    pin: str,
+    staging: Path,
+    index_url: Optional[str],
+    extra_args: List[str],
+) -> List[Path]:
+    # 多个线程会同时回退到 pip download：每次下载到独立的临时子目录，
+    # 再移入暂存目录，避免按目录差异把别的包的文件认成自己的
+    staging.mkdir(parents=True, exist_ok=True)
+    work = Path(tempfile.mkdtemp(prefix=".pip-download-", dir=str(staging)))
+    try:
+        cmd = list(pip_cmd) + ["download", "--no-deps", "-d", str(work), pin]
+        if index_url:
+            cmd.extend(["-i", index_url])
+        cmd.extend(extra_args)
+        r = run_hidden(cmd, capture_output=True, text=True)
+        if r.returncode != 0:
+            raise RuntimeError((getattr(r, "stderr", "") or "").strip()[:200] or "pip download 失败")
+        files = []
+        for p in sorted(work.iterdir()):
+            if p.is_file():
+                dest = staging / p.name
+                os.replace(p, dest)
+                files.append(dest)
+        return files
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def prefetch(
+    items: List[Dict[str, Any]],
+    staging_dir: Union[str, Path],
+    pip_cmd: List[str],
+    index_url: Optional[str] = None,
+    extra_pip_args: Optional[List[str]] = None,
+    max_workers: int = DEFAULT_WORKERS,
+    timeout: float = 120.0,
+    on_progress: Optional[Callable[[str, Optional[int]], None]] = None,
+) -> Dict[str, Any]:
+    """并发下载 pip 报告中的 install 条目到 ``staging_dir``。
+
+    返回 ``{"files": {规范化名: Path}, "failed": [名称...], "skipped": [名称...]}``；
+    ``skipped`` 为直接 URL / VCS 等不适合预取、交给 pip 处理的条目。
+    """
+    from utils.pip_index import canonicalize_name
+
+    staging = Path(staging_dir)
+    staging.mkdir(parents=True, exist_ok=True)
+    out: Dict[str, Any] = {"files": {}, "failed": [], "skipped": []}
+    jobs = []
+    for item in items:
+        meta = item.get("metadata") or {}
+        name = meta.get("name") or ""
+        version = meta.get("version") or ""
+        if not name:
+            continue
+        url = _item_url(item)
+        if url is None:
+            out["skipped"].append(name)
+            continue
+        jobs.append((name, version, url, _item_sha256(item)))
+    if not jobs:
+        return out
+
+    total = len(jobs)
+    done = [0]
+    lock = threading.Lock()
+    workers = max(1, min(int(max_workers or 1), total))
+    logger.info("并发预取 %d 个分发包（%d 路）到 %s", total, workers, staging)
+
+    def _one(job):
+        name, version, url, sha256 = job
+        try:
+            path = _download_url(url, staging / _filename_from_url(url), sha256, timeout)
+        except Exception as e:
+            logger.info("直接下载 %s 失败，改用 pip download: %s", name, e)
+            files = _pip_download(
+                pip_cmd, f"{name}=={version}", staging, index_url, extra_pip_args or []
+            )
+            if not files:
+                raise RuntimeError("pip download 未产生文件")
+            path = files[0]
+        with lock:
+            done[0] += 1
+            n = done[0]
+        if on_progress is not None:
+            try:
+                on_progress(f"预取 {n}/{total}：{name} {version}", int(n / total * 100))
+            except Exception:
+                pass
+        return path
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_one, job): job for job in jobs}
+        for fut in concurrent.futures.as_completed(futures):
+            name = futures[fut][0]
+            try:
+                out["files"][canonicalize_name(name)] = fut.result()
+            except Exception as e:
+                logger.warning("预取 %s 失败: %s", name, e)
+                out["failed"].append(name)
+    return out
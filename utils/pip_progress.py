@@ -0,0 +1,331 @@
+"""
+pip 流式输出的进度事件
+把 pip 的 stdout/stderr 行翻译成结构化事件（阶段、包名、已下载/总字节），
+再经过限速合并器投递给 UI：
+
+- ``PipProgressEvent``：一条进度事件，``text`` / ``percent`` 给只认字符串
+  回调的旧调用方用；
+- ``PipLineParser``：前缀分发表 + 预编译正则，两个读线程共用，包名状态加锁；
+- ``ProgressCoalescer``：阶段类事件（收集、安装、卸载……每个包只有几条）
+  直接投递；字节进度与心跳这类高频事件按最高频率（默认 20 Hz）合并，
+  永远保留最新一条，结束时补发，UI 不会停在过期的状态上。
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+PHASE_COLLECT = "collect"
+PHASE_DOWNLOAD = "download"
+PHASE_INSTALL = "install"
+PHASE_UNINSTALL_PREPARE = "uninstall_prepare"
+PHASE_UNINSTALL = "uninstall"
+PHASE_INSTALLING = "installing"
+PHASE_INSTALLED = "installed"
+PHASE_UNINSTALLED = "uninstalled"
+PHASE_BUILD = "build"
+PHASE_WAIT = "wait"
+
+DEFAULT_MAX_RATE_HZ = 20.0
+
+_UNIT_FACTORS = {"k": 1000, "m": 1000 ** 2, "g": 1000 ** 3}
+
+
+def _to_bytes(value: str, unit: str) -> Optional[int]:
+    try:
+        factor = _UNIT_FACTORS.get((unit or "")[:1].lower(), 1)
+        return int(float(value) * factor)
+    except Exception:
+        return None
+
+
+@dataclass(frozen=True)
+class PipProgressEvent:
+    phase: str
+    package: Optional[str] = None
+    bytes_done: Optional[int] = None
+    bytes_total: Optional[int] = None
+    detail: str = ""
+
+    @property
+    def transient(self) -> bool:
+        """高频、可被后一条覆盖的事件（字节进度 / 心跳）。"""
+        return self.phase == PHASE_WAIT or self.bytes_done is not None
+
+    @property
+    def percent(self) -> Optional[int]:
+        if self.bytes_done is None or not self.bytes_total:
+            return None
+        return max(0, min(100, int(self.bytes_done * 100 / self.bytes_total)))
+
+    @property
+    def text(self) -> str:
+        """与原先字符串回调一致的中文状态文本。"""
+        p = self.package or ""
+        d = self.detail
+        if self.phase == PHASE_COLLECT:
+            return f"正在收集依赖: {p}"
+        if self.phase == PHASE_DOWNLOAD:
+            if self.bytes_done is not None:
+                return f"正在下载 {p}  {d}"
+            return f"正在下载 {p} ({d})" if d else f"正在下载 {p}"
+        if self.phase == PHASE_INSTALL:
+            return "正在安装依赖包" + (f": {d}" if d else "")
+        if self.phase == PHASE_UNINSTALL_PREPARE:
+            return f"正在清理旧版: {p}"
+        if self.phase == PHASE_UNINSTALL:
+            return f"正在卸载: {p}"
+        if self.phase == PHASE_INSTALLING:
+            return f"正在安装: {p}"
+        if self.phase == PHASE_INSTALLED:
+            return f"已安装: {d}"
+        if self.phase == PHASE_UNINSTALLED:
+            return f"已卸载: {d}"
+        if self.phase == PHASE_BUILD:
+            return f"正在编译: {p}（首次安装需要编译，请稍候）"
+        if self.phase == PHASE_WAIT:
+            return d
+        return d or p
+
+
+def heartbeat_event(elapsed_seconds: int) -> PipProgressEvent:
+    return PipProgressEvent(
+        PHASE_WAIT,
+        detail=f"正在解析依赖/下载中…（已等待 {elapsed_seconds}s，如长时间停留请检查网络）",
+    )
+
+
+_SPEC_SPLIT_RE = re.compile(r"[><=!]")
+_PAREN_RE = re.compile(r"\(([^)]+)\)")
+_SIZE_RE = re.compile(r"([\d.]+)\s*([kKmMgG]?[bB])")
+_ATTEMPT_UNINSTALL_RE = re.compile(r"Attempting uninstall:\s*(\S+)")
+_UNINSTALLING_RE = re.compile(r"Uninstalling\s+([A-Za-z0-9_.\-]+)-\d")
+_INSTALLING_RE = re.compile(r"Installing\s+([A-Za-z0-9_.\-]+)-\d")
+_SETUP_PY_RE = re.compile(r"Running setup\.py install for\s+(\S+)")
+_FOUND_EXISTING_RE = re.compile(
+    r"Found existing installation:\s+([A-Za-z0-9_.\-]+?)(?:[\s-]\d|$)"
+)
+# pip 进度条："11.1/22.2 MB" 或 "2.2M/22.2M"
+_BAR_RE = re.compile(r"([\d.]+)\s*/\s*([\d.]+)\s*([kKmMgG][bB]?)\b")
+
+
+class PipLineParser:
+    """pip 输出行 -> ``PipProgressEvent``。stdout/stderr 两个线程共用一个实例。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pkg: Optional[str] = None
+        # 前缀分发表：按顺序匹配，"Installing collected" 必须排在 "Installing " 前面
+        self._dispatch: List[Tuple[str, Callable[[str], Optional[PipProgressEvent]]]] = [
+            ("Collecting ", self._on_collecting),
+            ("Downloading ", self._on_downloading),
+            ("Installing collected packages", self._on_install_batch),
+            ("Attempting uninstall:", self._on_attempt_uninstall),
+            ("Uninstalling ", self._on_uninstalling),
+            ("Installing ", self._on_installing),
+            ("Successfully installed ", self._on_installed),
+            ("Successfully uninstalled ", self._on_uninstalled),
+            ("Running setup.py install for ", self._on_setup_py),
+            ("Found existing installation:", self._on_found_existing),
+        ]
+
+    @property
+    def package(self) -> Optional[str]:
+        with self._lock:
+            return self._pkg
+
+    def _set_pkg(self, name: Optional[str]) -> None:
+        with self._lock:
+            self._pkg = name
+
+    def feed(self, raw: str) -> Optional[PipProgressEvent]:
+        """解析一行（已去掉首尾空白）；不是进度相关的行返回 None。"""
+        for prefix, handler in self._dispatch:
+            if raw.startswith(prefix):
+                return handler(raw)
+        return self._on_bar(raw)
+
+    def _on_collecting(self, raw: str) -> Optional[PipProgressEvent]:
+        token = raw[len("Collecting "):].split()[0]
+        name = _SPEC_SPLIT_RE.split(token)[0].split("[")[0]
+        self._set_pkg(name)
+        return PipProgressEvent(PHASE_COLLECT, name)
+
+    def _on_downloading(self, raw: str) -> Optional[PipProgressEvent]:
+        sm = _PAREN_RE.search(raw)
+        size = sm.group(1).strip() if sm else ""
+        pkg = self.package
+        if not pkg:
+            url = raw.split("Downloading ", 1)[1].split("(")[0].strip()
+            pkg = url.split("/")[-1].split("-")[0]
+            self._set_pkg(pkg)
+        total = None
+        if size:
+            m = _SIZE_RE.match(size)
+            if m:
+                total = _to_bytes(m.group(1), m.group(2))
+        return PipProgressEvent(PHASE_DOWNLOAD, pkg, bytes_total=total, detail=size)
+
+    def _on_install_batch(self, raw: str) -> Optional[PipProgressEvent]:
+        tail = raw.split(":", 1)[-1].strip() if ":" in raw else ""
+        return PipProgressEvent(PHASE_INSTALL, detail=tail)
+
+    def _on_attempt_uninstall(self, raw: str) -> Optional[PipProgressEvent]:
+        m = _ATTEMPT_UNINSTALL_RE.search(raw)
+        if not m:
+            return None
+        self._set_pkg(m.group(1))
+        return PipProgressEvent(PHASE_UNINSTALL_PREPARE, m.group(1))
+
+    def _on_uninstalling(self, raw: str) -> Optional[PipProgressEvent]:
+        # "Uninstalling comfyui-foo-1.2.3:" — pkg 是 "-<数字>" 之前的部分
+        m = _UNINSTALLING_RE.search(raw)
+        if not m:
+            return None
+        self._set_pkg(m.group(1))
+        return PipProgressEvent(PHASE_UNINSTALL, m.group(1))
+
+    def _on_installing(self, raw: str) -> Optional[PipProgressEvent]:
+        m = _INSTALLING_RE.search(raw)
+        if not m:
+            return None
+        self._set_pkg(m.group(1))
+        return PipProgressEvent(PHASE_INSTALLING, m.group(1))
+
+    def _on_installed(self, raw: str) -> Optional[PipProgressEvent]:
+        return PipProgressEvent(
+            PHASE_INSTALLED, detail=raw[len("Successfully installed "):].strip()
+        )
+
+    def _on_uninstalled(self, raw: str) -> Optional[PipProgressEvent]:
+        return PipProgressEvent(
+            PHASE_UNINSTALLED, detail=raw[len("Successfully uninstalled "):].strip()
+        )
+
+    def _on_setup_py(self, raw: str) -> Optional[PipProgressEvent]:
+        m = _SETUP_PY_RE.search(raw)
+        if not m:
+            return None
+        return PipProgressEvent(PHASE_BUILD, m.group(1).rstrip(":"))
+
+    def _on_found_existing(self, raw: str) -> Optional[PipProgressEvent]:
+        # "Found existing installation: bar 1.0" 或 "bar-1.0"：只更新当前包
+        m = _FOUND_EXISTING_RE.search(raw)
+        if m:
+            self._set_pkg(m.group(1))
+        return None
+
+    def _on_bar(self, raw: str) -> Optional[PipProgressEvent]:
+        pm = _BAR_RE.search(raw)
+        if not pm:
+            return None
+        pkg = self.package
+        if not pkg:
+            return None
+        cur, tot, unit = pm.group(1), pm.group(2), pm.group(3)
+        return PipProgressEvent(
+            PHASE_DOWNLOAD,
+            pkg,
+            bytes_done=_to_bytes(cur, unit),
+            bytes_total=_to_bytes(tot, unit),
+            detail=f"{cur} {unit} / {tot} {unit}",
+        )
+
+
+class ProgressCoalescer:
+    """按最高频率投递进度事件，始终保留最新一条。
+
+    非 transient 事件立即投递，并丢弃尚未投递的旧进度；transient 事件
+    距上次投递不足 ``1/max_rate_hz`` 秒时暂存，由后台线程在间隔到期后
+    补发最新的一条。``close()`` 停止后台线程并补发剩余事件。
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[PipProgressEvent], None],
+        max_rate_hz: float = DEFAULT_MAX_RATE_HZ,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._sink = sink
+        self._interval = 1.0 / max_rate_hz if max_rate_hz and max_rate_hz > 0 else 0.0
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._pending: Optional[PipProgressEvent] = None
+        self._last_emit = float("-inf")
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.delivered = 0
+        self.dropped = 0
+
+    def _deliver(self, event: PipProgressEvent) -> None:
+        try:
+            self._sink(event)
+        except Exception:
+            # 回调出错不能拖垮读线程
+            pass
+
+    def push(self, event: Optional[PipProgressEvent]) -> None:
+        if event is None:
+            return
+        with self._cond:
+            if self._closed:
+                return
+            now = self._clock()
+            if not event.transient:
+                if self._pending is not None:
+                    self._pending = None
+                    self.dropped += 1
+                self._last_emit = now
+                self.delivered += 1
+                deliver_now = True
+            elif self._pending is None and now - self._last_emit >= self._interval:
+                self._last_emit = now
+                self.delivered += 1
+                deliver_now = True
+            else:
+                if self._pending is not None:
+                    self.dropped += 1
+                self._pending = event
+                deliver_now = False
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+                self._cond.notify()
+        if deliver_now:
+            self._deliver(event)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    if self._pending is None:
+                        self._cond.wait()
+                        continue
+                    delay = self._last_emit + self._interval - self._clock()
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+                    event, self._pending = self._pending, None
+                    self._last_emit = self._clock()
+                    self.delivered += 1
+                    break
+            self._deliver(event)
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            event, self._pending = self._pending, None
+            if event is not None:
+                self.delivered += 1
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=2)
+        if event is not None:
+            self._deliver(event)
@@ -0,0 +1,113 @@
+"""
+依赖同步指纹
+记录每个 requirements 文件上一次“完全成功”同步时的指纹：
+
+- 文件内容的 sha256；
+- 目标解释器路径；
+- site-packages 状态（已安装分发包 ``{名称: 版本}`` 全集的哈希）；
+- 调用方附加的影响结果的参数（如黑名单）。
+
+指纹一致说明文件和环境都没有变化，上一次同步的结论仍然成立，整个同步
+可以跳过。任一部分无法计算时返回 None，调用方照常同步，不做记录。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from utils import pip_index as PIPINDEX
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE_NAME = "requirements_sync.json"
+_LOCK = threading.Lock()
+
+
+def environment_state(python_exec: Union[str, Path]) -> Optional[str]:
+    """目标环境已安装分发包集合的哈希；定位不到 site-packages 时为 None。"""
+    versions = PIPINDEX.installed_versions(python_exec)
+    if not versions:
+        return None
+    h = hashlib.sha256()
+    for name in sorted(versions):
+        h.update(f"{name}=={versions[name]}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _file_key(req_file: Union[str, Path]) -> str:
+    try:
+        return os.path.normcase(os.path.abspath(str(req_file)))
+    except Exception:
+        return str(req_file)
+
+
+def compute(
+    req_file: Union[str, Path],
+    python_exec: Union[str, Path],
+    env_state: Optional[str] = None,
+    extra: Iterable[str] = (),
+) -> Optional[str]:
+    """单个 requirements 文件在当前环境下的同步指纹。
+
+    ``env_state`` 可由调用方预先算好，多个文件共用，避免重复扫描。
+    """
+    if env_state is None:
+        env_state = environment_state(python_exec)
+    if env_state is None:
+        return None
+    try:
+        content = Path(req_file).read_bytes()
+    except Exception:
+        return None
+    h = hashlib.sha256()
+    h.update(hashlib.sha256(content).hexdigest().encode("ascii"))
+    h.update(b"\0")
+    h.update(_file_key(python_exec).encode("utf-8", "surrogatepass"))
+    h.update(b"\0")
+    h.update(env_state.encode("ascii"))
+    for item in sorted(str(x) for x in extra):
+        h.update(b"\0")
+        h.update(item.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+class FingerprintStore:
+    """指纹持久化：``{requirements 文件绝对路径: 指纹}``，写入时原子替换。"""
+
+    def __init__(self, state_file: Union[str, Path]):
+        self.state_file = Path(state_file)
+
+    def _load(self) -> Dict[str, str]:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entries = data.get("files") if isinstance(data, dict) else None
+            return dict(entries) if isinstance(entries, dict) else {}
+        except Exception:
+            return {}
+
+    def get(self, req_file: Union[str, Path]) -> Optional[str]:
+        with _LOCK:
+            return self._load().get(_file_key(req_file))
+
+    def put(self, req_file: Union[str, Path], fingerprint: Optional[str]) -> None:
+        """记录指纹；``fingerprint`` 为 None 时删除旧记录（下次必定同步）。"""
+        with _LOCK:
+            entries = self._load()
+            key = _file_key(req_file)
+            if fingerprint:
+                entries[key] = fingerprint
+            elif key in entries:
+                entries.pop(key, None)
+            else:
+                return
+            try:
+                from config.manager import atomic_write_json
+
+                atomic_write_json(self.state_file, {"files": entries})
+            except Exception as e:
+                logger.debug("写入依赖同步指纹失败 %s: %s", self.state_file, e)
@@ -0,0 +1,284 @@
+"""
+custom_nodes 依赖并集
+把 ComfyUI 自身的 requirements*.txt 与 ``custom_nodes/*/requirements.txt``
+合并成一份约束集合，供一次依赖解析安装：
+
+- 同名包的版本约束按节点合并（``numpy>=1.25`` + ``numpy<2`` -> ``numpy>=1.25,<2``），
+  extras 取并集；
+- 合并前检查约束是否还有交集：没有交集的包按节点两两列出冲突来源，
+  不进入安装；若 ComfyUI 自身也约束了该包，则以 ComfyUI 的约束为准继续安装；
+- 黑名单包（torch 等）不安装，但若节点要求与已安装版本不符也列为冲突，
+  方便用户知道是哪个节点在要求换 torch。
+
+约束交集判断不访问索引：用各约束里出现的版本号（及其紧邻的更大版本）
+与已安装版本作为候选，只要有一个候选满足全部约束即视为相容。
+"""
+
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from utils import pep440 as PEP440
+from utils import pip_index as PIPINDEX
+
+logger = logging.getLogger(__name__)
+
+CORE_LABEL_PREFIX = "ComfyUI/"
+
+_REQ_RE = re.compile(
+    r"^\s*(?P<name>[A-Za-z0-9][A-Za-z0-9_.\-]*)\s*"
+    r"(?:\[(?P<extras>[^\]]*)\])?\s*"
+    r"(?:@\s*(?P<url>\S+)|(?P<spec>\(?[<>=!~][^;]*?\)?))?\s*$"
+)
+
+
+def collect_sources(
+    core_files: Iterable[Union[str, Path]],
+    custom_nodes_dir: Union[str, Path, None],
+) -> List[Tuple[str, Path]]:
+    """``[(来源标签, requirements 路径)]``：先 ComfyUI 自身，再按目录名排序的各节点。
+
+    跳过 ``.disabled`` 结尾（ComfyUI-Manager 禁用的节点）、隐藏目录与 ``__pycache__``。
+    """
+    sources: List[Tuple[str, Path]] = []
+    for f in core_files:
+        p = Path(f)
+        sources.append((CORE_LABEL_PREFIX + p.name, p))
+    if not custom_nodes_dir:
+        return sources
+    try:
+        nodes = sorted(Path(custom_nodes_dir).iterdir(), key=lambda p: p.name.lower())
+    except Exception:
+        return sources
+    for node in nodes:
+        name = node.name
+        if name.startswith((".", "__")) or name.endswith(".disabled"):
+            continue
+        req = node / "requirements.txt"
+        try:
+            if node.is_dir() and req.is_file():
+                sources.append((name, req))
+        except Exception:
+            continue
+    return sources
+
+
+def parse_requirement(spec: str) -> Optional[Dict[str, Any]]:
+    """``name[extras] <specifier>`` / ``name @ url`` -> 字典；其他写法（裸 URL 等）返回 None。"""
+    m = _REQ_RE.match(spec or "")
+    if not m:
+        return None
+    spec_text = (m.group("spec") or "").strip().strip("()").replace(" ", "")
+    try:
+        PEP440.SpecifierSet(spec_text)
+    except ValueError:
+        return None
+    extras = [e.strip() for e in (m.group("extras") or "").split(",") if e.strip()]
+    return {
+        "name": m.group("name"),
+        "key": PIPINDEX.canonicalize_name(m.group("name")),
+        "extras": extras,
+        "specifier": spec_text,
+        "url": m.group("url"),
+    }
+
+
+def _bumped(version: PEP440.Version) -> Optional[PEP440.Version]:
+    """紧邻 ``version`` 之上的一个发布版（1.0 -> 1.0.0.0.1），用于开区间边界。"""
+    try:
+        return PEP440.Version(".".join(str(p) for p in version.release) + ".0.0.0.1")
+    except Exception:
+        return None
+
+
+def _candidates(specifiers: Iterable[str], hint_versions: Iterable[str] = ()) -> List[PEP440.Version]:
+    out: List[PEP440.Version] = [PEP440.Version("0")]
+    for text in specifiers:
+        for clause in PEP440.SpecifierSet(text):
+            raw = clause.version[:-2] if clause.version.endswith(".*") else clause.version
+            v = PEP440.parse_version(raw)
+            if v is None:
+                continue
+            out.append(v)
+            b = _bumped(v)
+            if b is not None:
+                out.append(b)
+    for text in hint_versions:
+        v = PEP440.parse_version(text)
+        if v is not None:
+            out.append(v)
+    return out
+
+
+def satisfiable(specifiers: Iterable[str], hint_versions: Iterable[str] = ()) -> bool:
+    """这些约束是否存在共同满足的版本（启发式，不访问索引）。"""
+    specifiers = [s for s in specifiers if s]
+    if not specifiers:
+        return True
+    sets = [PEP440.SpecifierSet(s) for s in specifiers]
+    for candidate in _candidates(specifiers, hint_versions):
+        if all(s.contains(candidate, prereleases=True) for s in sets):
+            return True
+    return False
+
+
+def _clashing_pairs(entries: List[Dict[str, Any]], hints: List[str]) -> List[List[str]]:
+    pairs: List[List[str]] = []
+    for i in range(len(entries)):
+        for j in range(i + 1, len(entries)):
+            a, b = entries[i], entries[j]
+            if a["source"] == b["source"]:
+                continue
+            if not satisfiable([a["specifier"], b["specifier"]], hints):
+                pair = [a["source"], b["source"]]
+                if pair not in pairs:
+                    pairs.append(pair)
+    return pairs
+
+
+def _merged_spec(name: str, entries: List[Dict[str, Any]]) -> str:
+    extras: List[str] = []
+    clauses: List[str] = []
+    for e in entries:
+        for x in e["extras"]:
+            if x not in extras:
+                extras.append(x)
+        for clause in PEP440.SpecifierSet(e["specifier"]):
+            c = str(clause)
+            if c not in clauses:
+                clauses.append(c)
+    head = name + (f"[{','.join(extras)}]" if extras else "")
+    return head + ",".join(clauses)
+
+
+def build_union(
+    sources: List[Tuple[str, Path]],
+    read_entries,
+    marker_env: Optional[Dict[str, str]] = None,
+    installed: Optional[Dict[str, str]] = None,
+    frozen: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """合并各来源的 requirements。
+
+    ``read_entries(path)`` 返回 ``[(spec, marker)]``（即 ``utils.pip`` 的解析器）。
+    返回::
+
+        {
+            "specs": [...],          # 合并后的安装行（环境标记无法判断的原样保留）
+            "conflicts": [{"name", "reason", "specs": [{"source", "spec"}], "pairs"}],
+            "unparsed": [{"source", "spec"}],   # 裸 URL / VCS 等，原样交给 pip
+            "sources": [来源标签...],
+        }
+    """
+    installed = installed or {}
+    frozen_keys = {PIPINDEX.canonicalize_name(n) for n in frozen}
+    by_key: Dict[str, List[Dict[str, Any]]] = {}
+    order: List[str] = []
+    passthrough: List[str] = []
+    unparsed: List[Dict[str, str]] = []
+    for label, path in sources:
+        for spec, marker in read_entries(path) or []:
+            if marker:
+                verdict = PEP440.evaluate_marker(marker, marker_env or {})
+                if verdict is False:
+                    continue
+                if verdict is None:
+                    line = f"{spec} ; {marker}"
+                    if line not in passthrough:
+                        passthrough.append(line)
+                    continue
+            req = parse_requirement(spec)
+            if req is None:
+                unparsed.append({"source": label, "spec": spec})
+                if spec not in passthrough:
+                    passthrough.append(spec)
+                continue
+            req["source"] = label
+            req["spec"] = spec
+            if req["key"] not in by_key:
+                by_key[req["key"]] = []
+                order.append(req["key"])
+            by_key[req["key"]].append(req)
+
+    specs: List[str] = []
+    conflicts: List[Dict[str, Any]] = []
+    for key in order:
+        entries = by_key[key]
+        name = entries[0]["name"]
+        have = installed.get(key)
+        hints = [have] if have else []
+        listed = [{"source": e["source"], "spec": e["spec"]} for e in entries]
+
+        if key in frozen_keys:
+            # 黑名单包不装；已安装版本不满足某节点时提示来源
+            have_v = PEP440.parse_version(have) if have else None
+            if have_v is not None:
+                bad = [
+                    e for e in entries
+                    if e["specifier"] and not PEP440.SpecifierSet(e["specifier"]).contains(
+                        have_v, prereleases=True
+                    )
+                ]
+                if bad:
+                    conflicts.append({
+                        "name": name,
+                        "reason": "frozen",
+                        "installed": have,
+                        "specs": [{"source": e["source"], "spec": e["spec"]} for e in bad],
+                        "pairs": [],
+                    })
+            # 仍写进安装行：install_requirements_file 会把它归入 frozen 并跳过
+            specs.append(_merged_spec(name, entries))
+            continue
+
+        urls = {e["url"] for e in entries if e["url"]}
+        if len(urls) > 1:
+            conflicts.append({
+                "name": name, "reason": "url", "specs": listed, "pairs": [],
+            })
+            continue
+        if urls:
+            specs.append(f"{name} @ {urls.pop()}")
+            continue
+
+        if satisfiable([e["specifier"] for e in entries], hints):
+            specs.append(_merged_spec(name, entries))
+            continue
+
+        conflicts.append({
+            "name": name,
+            "reason": "specifier",
+            "specs": listed,
+            "pairs": _clashing_pairs(entries, hints),
+        })
+        core = [e for e in entries if e["source"].startswith(CORE_LABEL_PREFIX)]
+        if core and satisfiable([e["specifier"] for e in core], hints):
+            # ComfyUI 自身的约束优先，与之相容的节点约束一并保留
+            keep = list(core)
+            for e in entries:
+                if e in core:
+                    continue
+                if satisfiable([x["specifier"] for x in keep] + [e["specifier"]], hints):
+                    keep.append(e)
+            specs.append(_merged_spec(name, keep))
+
+    for line in passthrough:
+        if line not in specs:
+            specs.append(line)
+    return {
+        "specs": specs,
+        "conflicts": conflicts,
+        "unparsed": unparsed,
+        "sources": [label for label, _p in sources],
+    }
+
+
+def format_conflict(conflict: Dict[str, Any]) -> str:
+    """一条冲突的单行描述，用于日志与摘要。"""
+    parts = ", ".join(f"{s['source']}: {s['spec']}" for s in conflict.get("specs") or [])
+    if conflict.get("reason") == "frozen":
+        return f"{conflict['name']}（已锁定 {conflict.get('installed')}）与 {parts} 不符"
+    if conflict.get("reason") == "url":
+        return f"{conflict['name']} 被指定了不同的安装地址：{parts}"
+    return f"{conflict['name']} 版本约束无交集：{parts}"
@@ -0,0 +1,397 @@
+"""
+启动器共享 wheel 缓存
+同一台机器上由启动器管理的所有 ComfyUI 便携包共用一个缓存目录：
+
+- ``wheels/``：wheelhouse，pip 通过 ``--find-links`` 使用；从源码包本地编译
+  出的 wheel 会被收集到这里，重复安装无需再次编译，也可以离线安装；
+- ``pip-cache/``：作为 pip 的 ``--cache-dir``，HTTP 下载缓存与 pip 自己的
+  已编译 wheel 缓存都在这里，跨安装复用；
+- ``usage.json``：wheelhouse 中每个文件的最近使用时间，用于 LRU 淘汰。
+
+缓存总大小超过上限时，按最近使用时间从旧到新删除，直到回到上限以内。
+收集与淘汰都要遍历整个缓存目录，一次依赖同步（``batch()``）内只在结束时做一次。
+缓存目录由同一用户的所有启动器共用：维护时持有 ``root`` 下的文件锁，拿不到锁
+（别的启动器正在维护）就跳过；最近刚用过的文件不淘汰，避免删掉另一个 pip
+进程正通过 ``--find-links`` 使用的 wheel。收集进 wheelhouse 的 wheel 是
+``pip-cache`` 里同一文件的硬链接，统计大小与淘汰都按 inode 合并。
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from utils import pep440 as PEP440
+from utils import pip_index as PIPINDEX
+from utils.common import SingletonLock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE_GB = 20
+# 最近这么多秒内用过（或刚加入）的文件不淘汰
+EVICT_GRACE_SECONDS = 600
+_MAINTAIN_LOCK_NAME = ".maintain.lock"
+_APP_DIR_NAME = "ComfyUI-Mie-Launcher"
+
+# pip 输出里引用本地 wheel 的行：
+#   "Processing c:\...\wheels\foo-1.0-py3-none-any.whl"
+#   "Looking in links: ..." 不算使用
+_PROCESSING_RE = re.compile(r"Processing\s+(\S+\.whl)\b", re.IGNORECASE)
+
+
+def default_cache_root() -> Path:
+    """每用户的共享缓存根目录（不随某个 ComfyUI 安装移动）。"""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+        return Path(base) / _APP_DIR_NAME / "wheel-cache"
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(base) / _APP_DIR_NAME.lower() / "wheel-cache"
+
+
+def parse_wheel_filename(filename: str) -> Optional[Tuple[str, str]]:
+    """``foo_bar-1.2.3-py3-none-any.whl`` -> ``("foo-bar", "1.2.3")``（名称已规范化）。"""
+    if not filename.lower().endswith(".whl"):
+        return None
+    parts = filename[:-4].split("-")
+    if len(parts) < 5:
+        return None
+    return PIPINDEX.canonicalize_name(parts[0]), parts[1]
+
+
+class WheelCache:
+    def __init__(self, root: Union[str, Path], max_bytes: int):
+        self.root = Path(root)
+        self.wheels_dir = self.root / "wheels"
+        self.pip_cache_dir = self.root / "pip-cache"
+        self.usage_file = self.root / "usage.json"
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._batch_lock = threading.Lock()
+        self._batch_depth = 0
+        self._batch_dirty = False
+
+    # ------------------------------------------------------------------
+    # pip 集成
+    # ------------------------------------------------------------------
+    def ensure_dirs(self) -> bool:
+        try:
+            self.wheels_dir.mkdir(parents=True, exist_ok=True)
+            self.pip_cache_dir.mkdir(parents=True, exist_ok=True)
+            return True
+        except Exception as e:
+            logger.warning("创建 wheel 缓存目录失败 %s: %s", self.root, e)
+            return False
+
+    def pip_args(self) -> List[str]:
+        if not self.ensure_dirs():
+            return []
+        return [
+            "--cache-dir",
+            str(self.pip_cache_dir),
+            "--find-links",
+            str(self.wheels_dir),
+        ]
+
+    def find_wheel(self, name: str, version: str) -> Optional[Path]:
+        """wheelhouse 里 ``name==version`` 的 wheel（不检查平台标签）。"""
+        cname = PIPINDEX.canonicalize_name(name)
+        want = PEP440.parse_version(version)
+        try:
+            entries = list(os.scandir(self.wheels_dir))
+        except Exception:
+            return None
+        for e in entries:
+            parsed = parse_wheel_filename(e.name)
+            if not parsed or parsed[0] != cname:
+                continue
+            have = PEP440.parse_version(parsed[1])
+            if (want is not None and have == want) or parsed[1] == version:
+                return Path(e.path)
+        return None
+
+    def covers(self, pins: Iterable[str]) -> bool:
+        """``name==version`` 形式的 pin 是否全部能在 wheelhouse 中找到。"""
+        pins = list(pins)
+        if not pins:
+            return False
+        for pin in pins:
+            if "==" not in pin or "@" in pin:
+                return False
+            name, version = pin.split("==", 1)
+            if not self.find_wheel(name.strip(), version.strip()):
+                return False
+        return True
+
+    # ------------------------------------------------------------------
+    # 收集 / 使用记录
+    # ------------------------------------------------------------------
+    def _load_usage(self) -> Dict[str, float]:
+        try:
+            with open(self.usage_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            wheels = data.get("wheels") if isinstance(data, dict) else None
+            return dict(wheels) if isinstance(wheels, dict) else {}
+        except Exception:
+            return {}
+
+    def _save_usage(self, usage: Dict[str, float]) -> None:
+        try:
+            from config.manager import atomic_write_json
+
+            atomic_write_json(self.usage_file, {"wheels": usage})
+        except Exception as e:
+            logger.debug("写入 wheel 缓存使用记录失败: %s", e)
+
+    def mark_used(self, filenames: Iterable[str]) -> None:
+        names = [os.path.basename(str(n)) for n in filenames if n]
+        if not names:
+            return
+        with self._lock:
+            usage = self._load_usage()
+            now = time.time()
+            for n in names:
+                usage[n] = now
+            self._save_usage(usage)
+
+    def add_wheels(self, paths: Iterable[Union[str, Path]]) -> List[str]:
+        """把 wheel 放进 wheelhouse（能硬链接就硬链接），返回新加入的文件名。"""
+        added: List[str] = []
+        if not self.ensure_dirs():
+            return added
+        for p in paths:
+            src = Path(p)
+            dst = self.wheels_dir / src.name
+            try:
+                if dst.exists() or not src.is_file():
+                    continue
+                tmp = dst.with_name(dst.name + ".part")
+                try:
+                    os.link(src, tmp)
+                except Exception:
+                    shutil.copy2(src, tmp)
+                os.replace(tmp, dst)
+                added.append(src.name)
+            except Exception as e:
+                logger.debug("加入 wheel 缓存失败 %s: %s", src, e)
+        if added:
+            self.mark_used(added)
+        return added
+
+    def harvest_built_wheels(self) -> List[str]:
+        """把 pip 在 ``pip-cache/wheels`` 里编译好的 wheel 收进 wheelhouse。
+
+        pip 自己的编译缓存按下载链接做键，换一个镜像就命中不了；放进
+        wheelhouse 后，只要包名与版本一致，任何安装都能通过 ``--find-links``
+        直接复用。
+        """
+        built = self.pip_cache_dir / "wheels"
+        found: List[Path] = []
+        try:
+            for dirpath, _dirnames, filenames in os.walk(built):
+                for fn in filenames:
+                    if fn.lower().endswith(".whl"):
+                        found.append(Path(dirpath) / fn)
+        except Exception:
+            return []
+        added = self.add_wheels(found)
+        if added:
+            logger.info("已收集本地编译的 wheel 到共享缓存: %s", ", ".join(added))
+        return added
+
+    def note_pip_output(self, text: str) -> None:
+        """从 pip 输出中找出用到的 wheelhouse 文件，刷新其最近使用时间。"""
+        if not text:
+            return
+        used = []
+        wheels_dir = os.path.normcase(str(self.wheels_dir))
+        for m in _PROCESSING_RE.finditer(text):
+            path = m.group(1)
+            if os.path.normcase(path).startswith(wheels_dir):
+                used.append(path)
+        if used:
+            self.mark_used(used)
+
+    # ------------------------------------------------------------------
+    # LRU 淘汰
+    # ------------------------------------------------------------------
+    def _entries(self) -> List[Tuple[float, int, List[Path]]]:
+        """缓存中的文件，硬链接到同一 inode 的多个路径合并为一项 ``(最近使用, 大小, 路径们)``。"""
+        usage = self._load_usage()
+        groups: Dict[Tuple[int, int], List] = {}
+        out: List[List] = []
+        for top in (self.wheels_dir, self.pip_cache_dir):
+            try:
+                walker = os.walk(top)
+            except Exception:
+                continue
+            for dirpath, _dirnames, filenames in walker:
+                for fn in filenames:
+                    if fn == _MAINTAIN_LOCK_NAME:
+                        continue
+                    p = Path(dirpath) / fn
+                    try:
+                        st = p.stat()
+                    except Exception:
+                        continue
+                    last = st.st_mtime
+                    if top == self.wheels_dir:
+                        last = max(last, float(usage.get(fn) or 0))
+                    key = (st.st_dev, st.st_ino)
+                    entry = groups.get(key) if st.st_ino else None
+                    if entry is not None:
+                        entry[0] = max(entry[0], last)
+                        entry[2].append(p)
+                        continue
+                    entry = [last, st.st_size, [p]]
+                    if st.st_ino:
+                        groups[key] = entry
+                    out.append(entry)
+        return [(e[0], e[1], e[2]) for e in out]
+
+    def total_size(self) -> int:
+        return sum(size for _t, size, _p in self._entries())
+
+    def enforce_limit(self) -> int:
+        """超过上限时按最近使用时间淘汰，返回删除的文件数。"""
+        if self.max_bytes <= 0:
+            return 0
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _t, size, _p in entries)
+            if total <= self.max_bytes:
+                return 0
+            entries.sort(key=lambda e: e[0])
+            cutoff = time.time() - EVICT_GRACE_SECONDS
+            removed = 0
+            removed_names = []
+            for last, size, paths in entries:
+                if total <= self.max_bytes or last >= cutoff:
+                    break
+                gone = 0
+                for path in paths:
+                    try:
+                        path.unlink()
+                        gone += 1
+                        removed_names.append(path.name)
+                    except Exception:
+                        continue
+                removed += gone
+                if gone == len(paths):
+                    # 所有硬链接都删掉才真正释放空间
+                    total -= size
+            if removed_names:
+                usage = self._load_usage()
+                for n in removed_names:
+                    usage.pop(n, None)
+                self._save_usage(usage)
+            logger.info(
+                "wheel 缓存超过上限，已淘汰 %d 个文件（当前 %.1f MB / 上限 %.1f MB）",
+                removed,
+                total / 1024 / 1024,
+                self.max_bytes / 1024 / 1024,
+            )
+            return removed
+
+    def maintain(self) -> None:
+        """收集编译产物并按上限淘汰（会遍历 wheelhouse 与 pip 缓存）。
+
+        持有 ``root`` 下的跨进程文件锁；别的启动器正在维护时直接跳过。
+        """
+        if not self.ensure_dirs():
+            return
+        lock = SingletonLock(_MAINTAIN_LOCK_NAME, lock_dir=str(self.root))
+        if not lock.acquire():
+            logger.debug("wheel 缓存正由其他进程维护，跳过")
+            return
+        try:
+            self.harvest_built_wheels()
+            self.enforce_limit()
+        except Exception as e:
+            logger.debug("wheel 缓存维护失败: %s", e)
+        finally:
+            lock.release()
+
+    def after_install(self, pip_output: str = "") -> None:
+        """一次 pip 安装结束后的维护：记录使用；不在 ``batch()`` 内时再收集、淘汰。"""
+        try:
+            self.note_pip_output(pip_output)
+        except Exception as e:
+            logger.debug("记录 wheel 缓存使用失败: %s", e)
+        with self._batch_lock:
+            if self._batch_depth > 0:
+                self._batch_dirty = True
+                return
+        self.maintain()
+
+    @contextmanager
+    def batch(self):
+        """一次依赖同步内的多次 pip 调用合并维护：结束时（有安装过才）收集、淘汰一次。"""
+        with self._batch_lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._batch_lock:
+                self._batch_depth -= 1
+                run = self._batch_depth == 0 and self._batch_dirty
+                if run:
+                    self._batch_dirty = False
+            if run:
+                self.maintain()
+
+
+_CACHE: Optional[WheelCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def configure(
+    enabled: bool = True,
+    root: Union[str, Path, None] = None,
+    max_size_gb: Optional[float] = None,
+) -> Optional[WheelCache]:
+    """设置进程内的共享缓存；``enabled=False`` 时关闭（pip 不带缓存参数）。"""
+    global _CACHE
+    with _CACHE_LOCK:
+        if not enabled:
+            _CACHE = None
+            return None
+        try:
+            gb = float(max_size_gb if max_size_gb is not None else DEFAULT_MAX_SIZE_GB)
+        except Exception:
+            gb = float(DEFAULT_MAX_SIZE_GB)
+        path = Path(root) if root else default_cache_root()
+        if _CACHE is None or _CACHE.root != path:
+            _CACHE = WheelCache(path, int(gb * 1024 ** 3))
+        else:
+            _CACHE.max_bytes = int(gb * 1024 ** 3)
+        return _CACHE
+
+
+def configure_from_config(config) -> Optional[WheelCache]:
+    """按应用配置 ``pip_cache`` 段设置共享缓存；配置不是 dict 时不做任何事。"""
+    if not isinstance(config, dict):
+        return get_cache()
+    section = config.get("pip_cache") or {}
+    if not isinstance(section, dict):
+        section = {}
+    return configure(
+        enabled=bool(section.get("enabled", False)),
+        root=(section.get("dir") or "").strip() or None,
+        max_size_gb=section.get("max_size_gb"),
+    )
+
+
+def get_cache() -> Optional[WheelCache]:
+    return _CACHE
+
+
+def batch():
+    """当前共享缓存的 ``WheelCache.batch()``；未启用缓存时什么也不做。"""
+    cache = get_cache()
+    return cache.batch() if cache is not None else nullcontext()